@@ -14,6 +14,8 @@ from supabase import create_client
 import logging
 import re
 
+from etl.catalog_snapshot import has_snapshot, load_snapshot, read_manifest
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -64,6 +66,17 @@ class LupitoCatalogAnalyzer:
             except Exception as e:
                 logger.error(f"  ✗ {table}: {str(e)}")
         
+        # Published catalog from the local snapshot (typed, with token lists) when there is one
+        if has_snapshot('foods_published_prod'):
+            df = load_snapshot('foods_published_prod')
+            self.tables_data['foods_published'] = {
+                'df': df,
+                'total_count': len(df),
+                'last_updated': read_manifest()['created_at'][:10]
+            }
+            logger.info(f"  ✓ foods_published: {len(df)} rows (snapshot)")
+            return
+        
         # Check for views
         try:
             views = ['foods_published']
@@ -11,6 +11,9 @@ from datetime import datetime
 import re
 import hashlib
 
+from etl.brand_normalization import duplicate_keys, normalize_frame, rebuild_product_keys
+from etl.brand_resolver import get_brand_resolver
+
 class BrandNormalizer:
     def __init__(self, dry_run=True):
         self.dry_run = dry_run
@@ -19,20 +22,13 @@ class BrandNormalizer:
         self.output_dir = Path("reports/MANUF/NORMALIZED") if not dry_run else Path("reports/MANUF/DRY_RUN")
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Load brand phrase map
-        self.brand_map = self.load_brand_map()
+        # Brand phrase rules (data/brand_phrase_map.csv) from the shared brand resolver
+        self.rule_index = get_brand_resolver().phrase_rules
         
         # Track changes
         self.changes = []
         self.merges = []
         
-    def load_brand_map(self):
-        """Load brand phrase map"""
-        map_file = self.data_dir / "brand_phrase_map.csv"
-        if map_file.exists():
-            return pd.read_csv(map_file)
-        return pd.DataFrame()
-    
     def load_all_data(self):
         """Load all harvest data"""
         all_data = []
@@ -92,107 +88,17 @@ class BrandNormalizer:
     
     def normalize_brand(self, row):
         """Normalize a single brand/product_name pair"""
-        brand = str(row.get('brand', '')).strip()
-        product_name = str(row.get('product_name', '')).strip()
-        
-        if not brand or not product_name:
-            return row
-        
-        # Check brand map for matches
-        for _, mapping in self.brand_map.iterrows():
-            source_brand = mapping['source_brand']
-            prefix = mapping['prefix_from_name']
-            
-            # Check if this mapping applies
-            applies = False
-            
-            if source_brand == '*':
-                # Orphan fragment - check if product_name starts with prefix
-                if product_name.startswith(prefix + ' '):
-                    applies = True
-            elif brand.lower() == source_brand.lower():
-                # Check if product_name starts with expected prefix
-                if product_name.lower().startswith(prefix.lower()):
-                    applies = True
-            
-            if applies:
-                # Apply normalization
-                change = {
-                    'product_id': row.get('product_id'),
-                    'old_brand': brand,
-                    'old_product_name': product_name,
-                    'new_brand': mapping['canonical_brand'],
-                    'new_brand_slug': mapping['brand_slug'],
-                    'brand_line': mapping['brand_line'],
-                    'confidence': mapping['confidence']
-                }
-                
-                # Clean product_name
-                strip_regex = mapping['strip_prefix_regex']
-                new_product_name = re.sub(strip_regex, '', product_name, flags=re.IGNORECASE).strip()
-                
-                # Guard against over-stripping
-                if new_product_name and len(new_product_name) > 5:
-                    change['new_product_name'] = new_product_name
-                else:
-                    # Don't strip if it would leave too little
-                    change['new_product_name'] = product_name
-                
-                # Update row
-                row = row.copy()
-                row['brand'] = change['new_brand']
-                row['brand_slug'] = change['new_brand_slug']
-                row['product_name'] = change['new_product_name']
-                
-                if change['brand_line']:
-                    row['brand_line'] = change['brand_line']
-                
-                # Track change
-                self.changes.append(change)
-                
-                # Only apply first matching rule
-                break
-        
-        return row
+        normalized, changes = normalize_frame(pd.DataFrame([row]), self.rule_index)
+        self.changes.extend(changes)
+        return normalized.iloc[0]
     
     def rebuild_product_key(self, row):
         """Rebuild product_key with canonical brand_slug"""
-        brand_slug = str(row.get('brand_slug', 'unknown')).lower().replace(' ', '_')
-        
-        # Create name_slug from product_name
-        product_name = str(row.get('product_name', ''))
-        name_slug = re.sub(r'[^a-z0-9]+', '_', product_name.lower()).strip('_')
-        
-        # Get form or default
-        form = str(row.get('form', 'unknown')).lower()
-        
-        # Build key
-        product_key = f"{brand_slug}|{name_slug}|{form}"
-        
-        row['product_key'] = product_key
-        row['name_slug'] = name_slug
-        
-        return row
+        return rebuild_product_keys(pd.DataFrame([row])).iloc[0]
     
     def detect_duplicates(self, df):
         """Detect duplicates after key rebuild"""
-        key_counts = df['product_key'].value_counts()
-        duplicates = key_counts[key_counts > 1]
-        
-        merge_candidates = []
-        
-        for key, count in duplicates.items():
-            dupes = df[df['product_key'] == key]
-            
-            merge_candidates.append({
-                'product_key': key,
-                'count': count,
-                'product_ids': list(dupes['product_id']),
-                'brands': list(dupes['brand'].unique()),
-                'names': list(dupes['product_name'].unique())[:2]  # Sample
-            })
-        
-        return merge_candidates
+        return duplicate_keys(df).to_dict('records')
     
     def apply_normalization(self, df):
         """Apply normalization to entire dataframe"""
@@ -203,14 +109,10 @@ class BrandNormalizer:
         df['original_brand'] = df['brand']
         df['original_product_name'] = df['product_name']
         
-        # Apply normalization to each row
-        normalized_rows = []
-        for idx, row in df.iterrows():
-            normalized = self.normalize_brand(row)
-            normalized = self.rebuild_product_key(normalized)
-            normalized_rows.append(normalized)
-        
-        df_normalized = pd.DataFrame(normalized_rows)
+        # Apply rules once per distinct brand/product_name, then rebuild keys
+        df_normalized, changes = normalize_frame(df, self.rule_index)
+        self.changes.extend(changes)
+        df_normalized = rebuild_product_keys(df_normalized)
         
         # Detect duplicates
         self.merges = self.detect_duplicates(df_normalized)
@@ -5,113 +5,27 @@ Implements brand-family + series normalization across the catalog
 """
 
 import pandas as pd
-import yaml
-import re
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 
+from etl.brand_resolver import get_brand_resolver
+
 class BrandFamilyResolver:
     def __init__(self):
         self.base_dir = Path('/Users/sergiubiris/Desktop/lupito-content')
-        self.yaml_path = self.base_dir / 'data' / 'brand_family_map.yaml'
         self.reports_dir = self.base_dir / 'reports'
         
-        # Load brand family mappings
-        with open(self.yaml_path, 'r') as f:
-            self.config = yaml.safe_load(f)
-        
-        # Build lookup tables
-        self._build_lookups()
-        
-    def _build_lookups(self):
-        """Build efficient lookup tables from YAML config"""
-        self.brand_to_family = {}
-        self.family_configs = {}
-        
-        for family in self.config['families']:
-            family_slug = family['family_slug']
-            self.family_configs[family_slug] = family
-            
-            # Map aliases to family
-            for alias in family.get('aliases', []):
-                normalized = self._normalize_brand(alias)
-                self.brand_to_family[normalized] = family_slug
-            
-            # Also check detect patterns
-            for pattern in family.get('detect_patterns', []):
-                # Store patterns for fuzzy matching
-                pass  # Will use in resolve_brand
-    
-    def _normalize_brand(self, brand):
-        """Normalize brand name for lookup"""
-        if pd.isna(brand):
-            return 'unknown'
-        
-        # Convert to lowercase and replace common separators
-        normalized = str(brand).lower()
-        normalized = normalized.replace('|', '_')
-        normalized = normalized.replace("'", '')
-        normalized = normalized.replace(' ', '_')
-        normalized = re.sub(r'[^a-z0-9_]', '', normalized)
+        # Families, aliases and series rules from the shared brand resolver
+        self.resolver = get_brand_resolver()
+        self.family_configs = self.resolver.families
         
-        return normalized
-    
     def resolve_brand(self, brand_slug, product_name=None):
         """
         Resolve a brand to its family and detect series
         Returns: (brand_family, series)
         """
-        # Normalize brand
-        normalized = self._normalize_brand(brand_slug)
-        
-        # Direct lookup
-        if normalized in self.brand_to_family:
-            family_slug = self.brand_to_family[normalized]
-        else:
-            # Try pattern matching
-            family_slug = self._detect_family_by_pattern(brand_slug, product_name)
-        
-        if not family_slug:
-            family_slug = 'other'
-        
-        # Detect series
-        series = None
-        if family_slug in self.family_configs and product_name:
-            series = self._detect_series(family_slug, product_name)
-        
-        return family_slug, series
-    
-    def _detect_family_by_pattern(self, brand, product_name):
-        """Detect family using patterns"""
-        search_text = f"{brand} {product_name or ''}".lower()
-        
-        for family in self.config['families']:
-            for pattern in family.get('detect_patterns', []):
-                if re.search(pattern, search_text):
-                    return family['family_slug']
-        
-        return None
-    
-    def _detect_series(self, family_slug, product_name):
-        """Detect series based on product name"""
-        if not product_name:
-            return None
-        
-        product_lower = product_name.lower()
-        family_config = self.family_configs.get(family_slug)
-        
-        if not family_config:
-            return None
-        
-        # Check family-specific series rules
-        for rule in family_config.get('series_rules', []):
-            series_slug = rule['series_slug']
-            for pattern in rule['patterns']:
-                if re.search(pattern, product_lower):
-                    return series_slug
-        
-        return None
+        return self.resolver.resolve_family(brand_slug, product_name)
     
     def process_catalog(self, df):
         """
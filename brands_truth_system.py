@@ -12,7 +12,6 @@ import os
 import pandas as pd
 import numpy as np
 import json
-import yaml
 from supabase import create_client, Client
 from datetime import datetime
 from pathlib import Path
@@ -21,6 +20,8 @@ from collections import defaultdict
 from typing import Dict, List, Tuple, Optional
 from dotenv import load_dotenv
 
+from etl.brand_resolver import get_brand_resolver
+
 # Load environment variables
 load_dotenv()
 
@@ -61,94 +62,11 @@ class BrandsTruthSystem:
     
     def _load_canonical_brand_map(self) -> Dict[str, str]:
         """
-        Load the canonical brand mapping
-        This is the SINGLE SOURCE OF TRUTH for brand normalization
+        Load the canonical brand mapping (brand_slug -> canonical brand_slug)
+        This is the SINGLE SOURCE OF TRUTH for brand normalization:
+        data/canonical_brand_map.yaml, compiled by etl/brand_resolver.py
         """
-        canonical_map = {
-            # Royal Canin consolidation
-            'royal': 'royal_canin',
-            'royal_canin': 'royal_canin',
-            'royalcanin': 'royal_canin',
-            'rc': 'royal_canin',
-            
-            # Hill's consolidation
-            'hills': 'hills',
-            'hill_s': 'hills',
-            'hills_science_plan': 'hills',
-            'hills_prescription_diet': 'hills',
-            'science_diet': 'hills',
-            'prescription_diet': 'hills',
-            
-            # Purina consolidation
-            'purina': 'purina',
-            'purina_pro_plan': 'purina',
-            'purina_one': 'purina',
-            'purina_dog_chow': 'purina',
-            'purina_veterinary': 'purina',
-            'pro_plan': 'purina',
-            'proplan': 'purina',
-            
-            # Split brand fixes
-            'arden': 'arden_grange',
-            'arden_grange': 'arden_grange',
-            'barking': 'barking_heads',
-            'barking_heads': 'barking_heads',
-            'meowing': 'meowing_heads',
-            'meowing_heads': 'meowing_heads',
-            'lily_s': 'lilys_kitchen',
-            'lilys': 'lilys_kitchen',
-            'lilys_kitchen': 'lilys_kitchen',
-            'james': 'james_wellbeloved',
-            'wellbeloved': 'james_wellbeloved',
-            'james_wellbeloved': 'james_wellbeloved',
-            
-            # Other major brands
-            'acana': 'acana',
-            'orijen': 'orijen',
-            'brit': 'brit',
-            'brit_care': 'brit',
-            'brit_premium': 'brit',
-            'bosch': 'bosch',
-            'belcando': 'belcando',
-            'bozita': 'bozita',
-            'alpha': 'alpha',
-            'alpha_spirit': 'alpha',
-            'advance': 'advance',
-            'advance_veterinary_diets': 'advance',
-            'farmina': 'farmina',
-            'burns': 'burns',
-            'wellness': 'wellness',
-            'wellness_core': 'wellness',
-            'blue_buffalo': 'blue_buffalo',
-            'applaws': 'applaws',
-            'briantos': 'briantos',
-            
-            # Store brands
-            'harringtons': 'harringtons',
-            'wainwrights': 'wainwrights',
-            
-            # Budget brands
-            'bakers': 'bakers',
-            'chappie': 'chappie',
-            'wagg': 'wagg',
-            'pedigree': 'pedigree',
-            'cesar': 'cesar',
-            'whiskas': 'whiskas',
-            'sheba': 'sheba'
-        }
-        
-        # Save canonical map as YAML for reference
-        yaml_path = self.base_dir / 'data' / 'canonical_brand_map.yaml'
-        yaml_path.parent.mkdir(exist_ok=True)
-        
-        with open(yaml_path, 'w') as f:
-            yaml.dump({
-                'canonical_brand_mappings': canonical_map,
-                'generated': datetime.now().isoformat(),
-                'total_mappings': len(canonical_map)
-            }, f)
-        
-        return canonical_map
+        return dict(get_brand_resolver().canonical_slugs)
     
     def phase_1_grounding_check(self) -> Tuple[List[str], Dict]:
         """
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Batch generation of derived breed content
+
+Single pass over the breed table for everything that is computed from data
+we already hold (no scraping):
+- general_care (rules from generate_care_content.py)
+- shedding / color_varieties / breed_standard (rules from zero_fields_generator.py)
+
+Breed rows are loaded once, derived fields are computed in a process pool,
+the results are diffed against the current values and only rows that
+actually change are written, as bulk upserts. The same pass produces the
+dry-run diff report.
+
+Usage:
+    python3 breed_content_batch.py --dry-run
+    python3 breed_content_batch.py
+"""
+
+import os
+import json
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CONTENT_TABLE = 'breeds_comprehensive_content'
+BASIC_TABLE = 'breeds_published'
+BASIC_COLUMNS = 'breed_slug, display_name, size_category, energy, coat_length, shedding, trainability, adult_weight_avg_kg'
+PAGE_SIZE = 1000
+UPSERT_BATCH = 500
+CHUNK_SIZE = 50
+
+# Same thresholds as generate_care_content.update_breed_care_content
+CARE_EXISTING_MIN_CHARS = 200
+CARE_GENERATED_MIN_CHARS = 100
+
+_zero_fields = None
+
+
+def _zero_fields_rules():
+    """Per-process ZeroFieldsGenerator used only for its rules"""
+    global _zero_fields
+    if _zero_fields is None:
+        from zero_fields_generator import ZeroFieldsGenerator
+        _zero_fields = ZeroFieldsGenerator(connect=False)
+    return _zero_fields
+
+
+def derive_care(breed: Dict[str, Any], basic_data: Dict[str, Dict]) -> Dict[str, Any]:
+    """general_care for breeds without substantial care content"""
+    from generate_care_content import generate_care_content_from_data
+
+    existing_care = breed.get('general_care') or ''
+    if len(existing_care.strip()) >= CARE_EXISTING_MIN_CHARS:
+        return {}
+    generated = generate_care_content_from_data(breed, basic_data)
+    if len(generated.strip()) < CARE_GENERATED_MIN_CHARS:
+        return {}
+    return {'general_care': generated}
+
+
+def derive_zero_fields(breed: Dict[str, Any], basic_data: Dict[str, Dict]) -> Dict[str, Any]:
+    """shedding / color_varieties / breed_standard for breeds missing them"""
+    rules = _zero_fields_rules()
+    derived = {}
+    if not breed.get('shedding'):
+        shedding = rules.generate_shedding_data(breed)
+        if shedding:
+            derived['shedding'] = shedding
+    if not breed.get('color_varieties') and breed.get('colors'):
+        color_varieties = rules.generate_color_varieties(breed)
+        if color_varieties and color_varieties != breed.get('colors'):
+            derived['color_varieties'] = color_varieties
+    if not breed.get('breed_standard'):
+        breed_standard = rules.generate_breed_standard_url(breed)
+        if breed_standard:
+            derived['breed_standard'] = breed_standard
+    return derived
+
+
+DERIVERS = {
+    'care': derive_care,
+    'zero_fields': derive_zero_fields,
+}
+
+
+def _derive_chunk(args: Tuple[List[Dict], Dict[str, Dict], List[str]]) -> List[Dict[str, Any]]:
+    """Worker: compute derived fields for a chunk and diff them against the row"""
+    breeds, basic_data, deriver_names = args
+    changes = []
+    for breed in breeds:
+        derived = {}
+        errors = []
+        for name in deriver_names:
+            try:
+                derived.update(DERIVERS[name](breed, basic_data))
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+
+        changed = {field: value for field, value in derived.items() if breed.get(field) != value}
+        if changed or errors:
+            changes.append({
+                'breed_slug': breed['breed_slug'],
+                'changes': changed,
+                'before': {field: breed.get(field) for field in changed},
+                'errors': errors,
+            })
+    return changes
+
+
+class BreedContentBatch:
+    """Load once, derive in parallel, write only the diff"""
+
+    def __init__(self, supabase, derivers: List[str] = None, workers: int = None, chunk_size: int = CHUNK_SIZE):
+        self.supabase = supabase
+        self.derivers = derivers or list(DERIVERS)
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+
+    def _fetch_all(self, table: str, columns: str = '*') -> List[Dict[str, Any]]:
+        rows, page = [], 0
+        while True:
+            response = self.supabase.table(table).select(columns).range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE - 1).execute()
+            if not response.data:
+                break
+            rows.extend(response.data)
+            if len(response.data) < PAGE_SIZE:
+                break
+            page += 1
+        return rows
+
+    def load(self) -> Tuple[List[Dict], Dict[str, Dict]]:
+        breeds = self._fetch_all(CONTENT_TABLE)
+        basic_data = {row['breed_slug']: row for row in self._fetch_all(BASIC_TABLE, BASIC_COLUMNS)}
+        return breeds, basic_data
+
+    def compute(self, breeds: List[Dict], basic_data: Dict[str, Dict]) -> List[Dict[str, Any]]:
+        """Derived-field diff for every breed, computed in a process pool"""
+        tasks = []
+        for start in range(0, len(breeds), self.chunk_size):
+            chunk = breeds[start:start + self.chunk_size]
+            # Ship each worker only the basic rows its chunk needs
+            chunk_basic = {b['breed_slug']: basic_data[b['breed_slug']] for b in chunk if b['breed_slug'] in basic_data}
+            tasks.append((chunk, chunk_basic, self.derivers))
+
+        if self.workers <= 1 or len(tasks) <= 1:
+            results = map(_derive_chunk, tasks)
+            return [change for chunk in results for change in chunk]
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return [change for chunk in pool.map(_derive_chunk, tasks) for change in chunk]
+
+    def apply(self, changes: List[Dict[str, Any]]) -> int:
+        """Bulk upsert changed rows, grouped by the set of columns they touch"""
+        now = datetime.now().isoformat()
+        groups = defaultdict(list)
+        for change in changes:
+            if change['changes']:
+                row = {'breed_slug': change['breed_slug'], **change['changes'], 'updated_at': now}
+                groups[tuple(sorted(row))].append(row)
+
+        written = 0
+        for rows in groups.values():
+            for start in range(0, len(rows), UPSERT_BATCH):
+                batch = rows[start:start + UPSERT_BATCH]
+                self.supabase.table(CONTENT_TABLE).upsert(batch, on_conflict='breed_slug').execute()
+                written += len(batch)
+        return written
+
+    @staticmethod
+    def report(changes: List[Dict[str, Any]], total_breeds: int, dry_run: bool) -> Dict[str, Any]:
+        fields_changed = defaultdict(int)
+        for change in changes:
+            for field in change['changes']:
+                fields_changed[field] += 1
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'operation': 'Breed derived content batch',
+            'dry_run': dry_run,
+            'total_breeds': total_breeds,
+            'breeds_changed': sum(1 for c in changes if c['changes']),
+            'breeds_with_errors': sum(1 for c in changes if c['errors']),
+            'fields_changed': dict(fields_changed),
+            'diff': changes,
+        }
+
+    def run(self, dry_run: bool = False, report_file: str = None) -> Dict[str, Any]:
+        breeds, basic_data = self.load()
+        changes = self.compute(breeds, basic_data)
+        report = self.report(changes, len(breeds), dry_run)
+        if not dry_run:
+            report['rows_written'] = self.apply(changes)
+
+        report_file = report_file or f'breed_content_batch_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        report['report_file'] = report_file
+        return report
+
+
+def main():
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description='Generate derived breed content in one batch pass')
+    parser.add_argument('--dry-run', action='store_true', help='Only write the diff report')
+    parser.add_argument('--only', nargs='+', choices=list(DERIVERS), help='Derivers to run (default: all)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--report', help='Report file path')
+    args = parser.parse_args()
+
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    batch = BreedContentBatch(supabase, derivers=args.only, workers=args.workers)
+    report = batch.run(dry_run=args.dry_run, report_file=args.report)
+
+    print(f"Breeds processed: {report['total_breeds']}")
+    print(f"Breeds changed:   {report['breeds_changed']}")
+    for field, count in report['fields_changed'].items():
+        print(f"  {field}: {count}")
+    if report['breeds_with_errors']:
+        print(f"Breeds with errors: {report['breeds_with_errors']}")
+    if not args.dry_run:
+        print(f"Rows written: {report['rows_written']}")
+    print(f"Report: {report['report_file']}")
+
+
+if __name__ == "__main__":
+    main()
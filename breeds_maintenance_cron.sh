@@ -9,7 +9,7 @@ cd /Users/sergiubiris/Desktop/lupito-content
 source venv/bin/activate
 
 # Run maintenance job
-python3 breeds_weekly_maintenance.py >> logs/breeds_maintenance.log 2>&1
+python3 breeds_weekly_maintenance.py --budget ${BREEDS_REFRESH_BUDGET:-100} >> logs/breeds_maintenance.log 2>&1
 
 # Check if successful
 if [ $? -eq 0 ]; then
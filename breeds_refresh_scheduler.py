@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Breed refresh scheduler
+Plans breed re-scrapes from change signals instead of random spot checks.
+
+Keeps per-breed/per-source state in breeds_refresh_state (see
+sql/breeds_refresh_state.sql): when each source was last checked, how often
+it actually changed, and the validators needed for cheap "has it changed"
+probes (Wikipedia revision ids, HTTP ETag/Last-Modified).
+
+A plan is built in two stages under a request budget:
+1. Every breed/source is ranked by expected value of a refresh: probability
+   the source changed since the last check (from its observed change rate)
+   weighted by how incomplete our data is, plus conflict flags.
+2. Candidates are probed in rank order (Wikipedia: 50 titles per API call,
+   other sources: one conditional HEAD each) and only those whose source
+   changed since the data was scraped are scheduled for a full re-scrape.
+"""
+
+import os
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Any
+from urllib.parse import unquote, urlparse
+
+import requests
+
+WIKIPEDIA_API = 'https://en.wikipedia.org/w/api.php'
+WIKIPEDIA_TITLES_PER_PROBE = 50
+PAGE_SIZE = 1000
+
+# Weight of each breeds_details field in the completeness score (sums to 1.0)
+COMPLETENESS_WEIGHTS = {
+    'adult_weight_avg_kg': 0.25,
+    'size_category': 0.20,
+    'height_cm_max': 0.10,
+    'lifespan_years_max': 0.10,
+    'energy': 0.05,
+    'shedding': 0.05,
+    'trainability': 0.05,
+    'bark_level': 0.05,
+    'coat_length': 0.05,
+    'origin': 0.05,
+}
+DEFAULT_WEIGHT_PENALTY = 0.05  # weight_from == 'default'
+
+# Change-rate prior: roughly one change every 60 days until observed otherwise
+PRIOR_CHANGES = 0.5
+PRIOR_DAYS = 30.0
+CONFLICT_BONUS = 0.25
+
+
+@dataclass
+class RefreshTask:
+    """One breed/source pair in a refresh plan"""
+    breed_slug: str
+    display_name: str
+    source: str
+    url: str
+    priority: float
+    completeness: float
+    change_probability: float
+    reasons: List[str] = field(default_factory=list)
+    action: str = 'pending'           # 'scrape', 'skip_unchanged', 'over_budget'
+    current_version: Optional[str] = None
+    validators: Dict[str, Any] = field(default_factory=dict)
+
+
+def parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    ts = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def completeness_score(breed: Dict[str, Any]) -> float:
+    """Fraction (0-1) of critical breed fields that are populated"""
+    score = sum(weight for column, weight in COMPLETENESS_WEIGHTS.items() if breed.get(column))
+    if breed.get('weight_from') == 'default':
+        score -= DEFAULT_WEIGHT_PENALTY
+    return round(max(0.0, min(1.0, score)), 3)
+
+
+def change_rate(state: Optional[Dict[str, Any]], now: datetime) -> float:
+    """Observed changes per day for a breed/source, smoothed by the prior"""
+    if not state:
+        return PRIOR_CHANGES / PRIOR_DAYS
+    first_checked = parse_ts(state.get('first_checked_at'))
+    observed_days = (now - first_checked).total_seconds() / 86400 if first_checked else 0.0
+    return (state.get('changes', 0) + PRIOR_CHANGES) / (observed_days + PRIOR_DAYS)
+
+
+def wikipedia_title(url: str) -> str:
+    return unquote(urlparse(url).path.rsplit('/', 1)[-1]).replace('_', ' ')
+
+
+class BreedRefreshScheduler:
+    """Build and record prioritized breed refresh plans"""
+
+    def __init__(self, supabase, session: requests.Session = None, sources: List[str] = None):
+        self.supabase = supabase
+        self.session = session or requests.Session()
+        self.session.headers.setdefault('User-Agent', 'Mozilla/5.0 (Educational Breed Data Scraper) Contact: research@example.com')
+        self.sources = sources or ['wikipedia']
+        self.now = datetime.now(timezone.utc)
+        self.state: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.requests_used = 0
+
+    # ------------------------------------------------------------------ loading
+
+    def _fetch_all(self, table: str, columns: str = '*') -> List[Dict[str, Any]]:
+        rows, page = [], 0
+        while True:
+            response = self.supabase.table(table).select(columns).range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE - 1).execute()
+            if not response.data:
+                break
+            rows.extend(response.data)
+            if len(response.data) < PAGE_SIZE:
+                break
+            page += 1
+        return rows
+
+    def load_breeds(self) -> List[Dict[str, Any]]:
+        """breeds_details rows with their known Wikipedia URL attached"""
+        breeds = self._fetch_all('breeds_details')
+        try:
+            urls = {
+                row['breed_slug']: row['wikipedia_url']
+                for row in self._fetch_all('breeds_comprehensive_content', 'breed_slug,wikipedia_url')
+                if row.get('wikipedia_url')
+            }
+        except Exception:
+            urls = {}
+        for breed in breeds:
+            breed['wikipedia_url'] = urls.get(breed['breed_slug'])
+        return breeds
+
+    def load_state(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        try:
+            rows = self._fetch_all('breeds_refresh_state')
+        except Exception:
+            rows = []
+        self.state = {(row['breed_slug'], row['source']): row for row in rows}
+        return self.state
+
+    def source_url(self, breed: Dict[str, Any], source: str) -> str:
+        state = self.state.get((breed['breed_slug'], source)) or {}
+        if state.get('url'):
+            return state['url']
+        if source == 'wikipedia':
+            return breed.get('wikipedia_url') or \
+                f"https://en.wikipedia.org/wiki/{breed['display_name'].replace(' ', '_')}"
+        if source == 'akc':
+            return f"https://www.akc.org/dog-breeds/{breed['breed_slug']}/"
+        raise ValueError(f"Unknown source: {source}")
+
+    # ------------------------------------------------------------------ scoring
+
+    def score(self, breed: Dict[str, Any], source: str) -> RefreshTask:
+        state = self.state.get((breed['breed_slug'], source))
+        completeness = completeness_score(breed)
+        reasons = []
+
+        last_checked = parse_ts((state or {}).get('last_checked_at')) or parse_ts(breed.get('updated_at'))
+        age_days = (self.now - last_checked).total_seconds() / 86400 if last_checked else 365.0
+        p_changed = 1 - math.exp(-change_rate(state, self.now) * age_days)
+
+        incompleteness = 1 - completeness
+        priority = p_changed * (0.5 + incompleteness) + 0.5 * incompleteness
+
+        if state is None:
+            reasons.append('Never checked')
+        if age_days > 180:
+            reasons.append(f"Stale data ({int(age_days)} days old)")
+        if incompleteness > 0:
+            reasons.append(f"Completeness {completeness:.0%}")
+        if breed.get('conflict_flags'):
+            priority += CONFLICT_BONUS
+            reasons.append(f"Has conflicts: {breed['conflict_flags']}")
+
+        return RefreshTask(
+            breed_slug=breed['breed_slug'],
+            display_name=breed.get('display_name') or breed['breed_slug'],
+            source=source,
+            url=self.source_url(breed, source),
+            priority=round(priority, 4),
+            completeness=completeness,
+            change_probability=round(p_changed, 4),
+            reasons=reasons,
+        )
+
+    # ------------------------------------------------------------------ probing
+
+    def probe_wikipedia(self, tasks: List[RefreshTask]):
+        """Fetch current revision ids for up to 50 pages in one API call"""
+        # Several breeds can point at the same page (variants, shared articles)
+        titles: Dict[str, List[RefreshTask]] = {}
+        for task in tasks:
+            titles.setdefault(wikipedia_title(task.url), []).append(task)
+        params = {
+            'action': 'query', 'prop': 'revisions', 'rvprop': 'ids|timestamp',
+            'titles': '|'.join(titles), 'redirects': 1, 'format': 'json', 'formatversion': 2,
+        }
+        self.requests_used += 1
+        response = self.session.get(WIKIPEDIA_API, params=params, timeout=30)
+        response.raise_for_status()
+        query = response.json().get('query', {})
+
+        # Follow normalization/redirect chains back to the requested titles
+        aliases = {}
+        for mapping in query.get('normalized', []) + query.get('redirects', []):
+            aliases[mapping['to']] = aliases.get(mapping['from'], mapping['from'])
+
+        for page in query.get('pages', []):
+            if not page.get('revisions'):
+                continue
+            revision_id = page['revisions'][0]['revid']
+            for task in titles.get(aliases.get(page['title'], page['title']), []):
+                task.current_version = str(revision_id)
+                task.validators = {'revision_id': revision_id}
+
+    def probe_http(self, task: RefreshTask):
+        """Conditional HEAD against the stored ETag/Last-Modified"""
+        state = self.state.get((task.breed_slug, task.source)) or {}
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+        self.requests_used += 1
+        response = self.session.head(task.url, headers=headers, timeout=30, allow_redirects=True)
+        if response.status_code == 304:
+            task.current_version = state.get('scraped_version')
+            task.validators = {'etag': state.get('etag'), 'last_modified': state.get('last_modified')}
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        task.current_version = etag or last_modified
+        task.validators = {'etag': etag, 'last_modified': last_modified}
+
+    def _needs_scrape(self, task: RefreshTask) -> bool:
+        state = self.state.get((task.breed_slug, task.source))
+        if not state or not state.get('scraped_version'):
+            return True
+        if task.current_version is None:  # Source gave no validator; fall back to priority
+            return True
+        return task.current_version != state.get('scraped_version')
+
+    # ------------------------------------------------------------------ planning
+
+    def plan(self, budget: int, breeds: List[Dict[str, Any]] = None) -> List[RefreshTask]:
+        """Rank every breed/source, probe in rank order and schedule re-scrapes
+
+        `budget` counts HTTP requests: probes and scrapes alike (one request
+        per scrape: the task URL is the only page fetched).
+        """
+        if breeds is None:
+            breeds = self.load_breeds()
+        if not self.state:
+            self.load_state()
+
+        ranked = sorted(
+            (self.score(breed, source) for breed in breeds for source in self.sources),
+            key=lambda task: task.priority,
+            reverse=True,
+        )
+
+        self.requests_used = 0
+        for start in range(0, len(ranked), WIKIPEDIA_TITLES_PER_PROBE):
+            chunk = ranked[start:start + WIKIPEDIA_TITLES_PER_PROBE]
+            wiki = [task for task in chunk if task.source == 'wikipedia']
+            other = [task for task in chunk if task.source != 'wikipedia']
+
+            if self.requests_used >= budget:
+                break
+            if wiki:
+                try:
+                    self.probe_wikipedia(wiki)
+                except Exception as e:
+                    for task in wiki:
+                        task.reasons.append(f"Probe failed: {e}")
+
+            for task in chunk:
+                if task.source != 'wikipedia':
+                    if self.requests_used >= budget:
+                        break
+                    try:
+                        self.probe_http(task)
+                    except Exception as e:
+                        task.reasons.append(f"Probe failed: {e}")
+
+                if not self._needs_scrape(task):
+                    task.action = 'skip_unchanged'
+                elif self.requests_used < budget:
+                    task.action = 'scrape'
+                    self.requests_used += 1
+                else:
+                    task.action = 'over_budget'
+
+        for task in ranked:
+            if task.action == 'pending':
+                task.action = 'over_budget'
+        return ranked
+
+    # ------------------------------------------------------------------ recording
+
+    def record_probes(self, plan: List[RefreshTask]) -> int:
+        """Record every probed task that is not being scraped now
+
+        Unchanged breeds count as checks for the change-rate estimate, and
+        over-budget breeds keep the revision/validators their probe saw.
+        """
+        recorded = 0
+        for task in plan:
+            if task.action == 'skip_unchanged' or (task.action == 'over_budget' and task.current_version is not None):
+                self.record(task)
+                recorded += 1
+        return recorded
+
+    def record(self, task: RefreshTask, scraped: bool = False, failed: bool = False):
+        """Persist the outcome of a probe (and optional scrape) for a task
+
+        A failed scrape (network error, server error) leaves scraped_version
+        alone so the task is planned again; failures counts them in a row.
+        """
+        key = (task.breed_slug, task.source)
+        state = dict(self.state.get(key) or {})
+        now = self.now.isoformat()
+        previous = state.get('revision_id') if task.source == 'wikipedia' else state.get('etag') or state.get('last_modified')
+        changed = task.current_version is not None and previous is not None and str(previous) != task.current_version
+
+        state.update({
+            'breed_slug': task.breed_slug,
+            'source': task.source,
+            'url': task.url,
+            'checks': state.get('checks', 0) + 1,
+            'changes': state.get('changes', 0) + (1 if changed else 0),
+            'completeness': task.completeness,
+            'first_checked_at': state.get('first_checked_at') or now,
+            'last_checked_at': now,
+        })
+        state.update({k: v for k, v in task.validators.items() if v is not None})
+        if changed:
+            state['last_changed_at'] = now
+        if scraped:
+            state['last_scraped_at'] = now
+            state['scraped_version'] = task.current_version
+            state['failures'] = 0
+        elif failed:
+            state['failures'] = state.get('failures', 0) + 1
+            state['last_failed_at'] = now
+
+        self.supabase.table('breeds_refresh_state').upsert(state, on_conflict='breed_slug,source').execute()
+        self.state[key] = state
+        return state
+
+
+def main():
+    """Print a refresh plan without scraping"""
+    import argparse
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description='Plan breed re-scrapes from change signals')
+    parser.add_argument('--budget', type=int, default=100, help='Max HTTP requests (probes + scrapes)')
+    parser.add_argument('--sources', nargs='+', default=['wikipedia'], help='Sources to plan for')
+    args = parser.parse_args()
+
+    load_dotenv()
+    supabase = create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_SERVICE_KEY"))
+    scheduler = BreedRefreshScheduler(supabase, sources=args.sources)
+    plan = scheduler.plan(args.budget)
+
+    to_scrape = [task for task in plan if task.action == 'scrape']
+    print(f"Planned {len(to_scrape)} re-scrapes using {scheduler.requests_used}/{args.budget} requests")
+    print(f"Unchanged since last scrape: {sum(1 for t in plan if t.action == 'skip_unchanged')}")
+    for task in to_scrape:
+        print(f"  {task.priority:.3f}  {task.breed_slug:<35} {task.source:<10} {', '.join(task.reasons)}")
+
+
+if __name__ == "__main__":
+    main()
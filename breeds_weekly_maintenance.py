@@ -1,18 +1,21 @@
 #!/usr/bin/env python3
 """
 Weekly maintenance job for breeds database.
-Spot-checks 5 random breeds and re-scrapes if needed.
+Re-scrapes the breeds whose sources actually changed, prioritized by
+breeds_refresh_scheduler within a request budget.
 """
 
 import os
 import sys
-import random
+import argparse
 from pathlib import Path
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from supabase import create_client
 import pandas as pd
 
+from breeds_refresh_scheduler import BreedRefreshScheduler
+
 # Add jobs directory for scraper access
 sys.path.insert(0, str(Path(__file__).parent / 'jobs'))
 
@@ -21,12 +24,6 @@ url = os.environ.get("SUPABASE_URL")
 key = os.environ.get("SUPABASE_SERVICE_KEY")
 supabase = create_client(url, key)
 
-def get_random_breeds(count=5):
-    """Get random breeds for spot-checking"""
-    response = supabase.table('breeds_details').select('*').execute()
-    all_breeds = response.data
-    return random.sample(all_breeds, min(count, len(all_breeds)))
-
 def needs_rescrape(breed):
     """Check if breed needs re-scraping"""
     reasons = []
@@ -55,55 +52,79 @@ def needs_rescrape(breed):
     
     return reasons
 
-def rescrape_breed(breed_slug, breed_name):
-    """Attempt to re-scrape breed from Wikipedia"""
+# rescrape_breed outcomes
+RESCRAPE_UPDATED = 'updated'    # page parsed and breeds_details updated
+RESCRAPE_NO_DATA = 'no_data'    # no such page, or it lacks weight data
+RESCRAPE_ERROR = 'error'        # network/server error: retried next run
+
+
+def fetch_wikipedia_page(session, url):
+    """Fetched page, or None when Wikipedia has no such article (other errors raise)"""
+    response = session.get(url, timeout=10)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    if 'Special:Search' in response.url or 'Wikipedia does not have an article' in response.text:
+        return None
+    return response
+
+
+def rescrape_breed(breed_slug, breed_name, url=None):
+    """Attempt to re-scrape breed from Wikipedia
+
+    With a known (probed) URL only that page is fetched, so a scrape costs
+    the one request the scheduler budgeted; otherwise the usual title
+    patterns are tried. Returns (status, message).
+    """
     try:
         from wikipedia_breed_scraper_fixed import WikipediaBreedScraper
         
         scraper = WikipediaBreedScraper()
         
-        # Try different URL patterns
-        urls = [
+        urls = [url] if url else [
             f"https://en.wikipedia.org/wiki/{breed_name.replace(' ', '_')}",
             f"https://en.wikipedia.org/wiki/{breed_name.replace(' ', '_')}_(dog)",
             f"https://en.wikipedia.org/wiki/{breed_slug.replace('-', '_').title()}"
         ]
         
         for url in urls:
-            try:
-                data = scraper.scrape_breed(breed_name, url)
-                if data and data.get('weight_kg_max'):
-                    # Update breed with new data
-                    updates = {
-                        'weight_kg_min': data.get('weight_kg_min'),
-                        'weight_kg_max': data.get('weight_kg_max'),
-                        'adult_weight_avg_kg': round((data.get('weight_kg_min', 0) + data.get('weight_kg_max', 0)) / 2, 1),
-                        'weight_from': 'enrichment',
-                        'updated_at': datetime.now().isoformat()
-                    }
-                    
-                    if data.get('height_cm_max'):
-                        updates['height_cm_min'] = data.get('height_cm_min')
-                        updates['height_cm_max'] = data.get('height_cm_max')
-                        updates['height_from'] = 'enrichment'
-                    
-                    supabase.table('breeds_details').update(updates).eq('breed_slug', breed_slug).execute()
-                    return True, "Successfully re-scraped from Wikipedia"
-            except:
+            response = fetch_wikipedia_page(scraper.session, url)
+            if response is None:
                 continue
+            data = scraper.parse_breed_page(breed_name, response.text)
+            if data and data.get('weight_kg_max'):
+                # Update breed with new data
+                updates = {
+                    'weight_kg_min': data.get('weight_kg_min'),
+                    'weight_kg_max': data.get('weight_kg_max'),
+                    'adult_weight_avg_kg': round((data.get('weight_kg_min', 0) + data.get('weight_kg_max', 0)) / 2, 1),
+                    'weight_from': 'enrichment',
+                    'updated_at': datetime.now().isoformat()
+                }
+                
+                if data.get('height_cm_max'):
+                    updates['height_cm_min'] = data.get('height_cm_min')
+                    updates['height_cm_max'] = data.get('height_cm_max')
+                    updates['height_from'] = 'enrichment'
+                
+                supabase.table('breeds_details').update(updates).eq('breed_slug', breed_slug).execute()
+                return RESCRAPE_UPDATED, "Successfully re-scraped from Wikipedia"
         
-        return False, "Could not scrape from Wikipedia"
+        return RESCRAPE_NO_DATA, "Could not scrape from Wikipedia"
     except Exception as e:
-        return False, f"Scraping error: {str(e)}"
+        return RESCRAPE_ERROR, f"Scraping error: {str(e)}"
 
-def generate_spotcheck_report(results):
+def generate_spotcheck_report(results, plan_summary=None):
     """Generate spot-check report"""
+    plan_summary = plan_summary or {}
     report = f"""
 ## Weekly Spot-Check Report
 **Date:** {datetime.now().strftime('%Y-%m-%d %H:%M')}
 **Breeds Checked:** {len(results)}
 
 ### Summary
+- Requests used: {plan_summary.get('requests_used', 'n/a')} / {plan_summary.get('budget', 'n/a')}
+- Probed unchanged (skipped): {plan_summary.get('skipped_unchanged', 0)}
 - Needed rescraping: {sum(1 for r in results if r['needed_rescrape'])}
 - Successfully updated: {sum(1 for r in results if r.get('rescrape_success'))}
 - Failed updates: {sum(1 for r in results if r.get('rescrape_attempted') and not r.get('rescrape_success'))}
@@ -117,6 +138,8 @@ def generate_spotcheck_report(results):
         report += f"- Current quality: {result.get('data_quality', 'Unknown')}\n"
         report += f"- Weight coverage: {result.get('has_weight', False)}\n"
         report += f"- Last updated: {result.get('age_days', 'Unknown')} days ago\n"
+        if result.get('priority') is not None:
+            report += f"- Priority: {result['priority']:.3f} (change probability {result['change_probability']:.0%})\n"
         
         if result['needed_rescrape']:
             report += f"- **Needs rescrape:** {', '.join(result['reasons'])}\n"
@@ -136,18 +159,31 @@ def generate_spotcheck_report(results):
 
 def main():
     """Run weekly maintenance"""
+    parser = argparse.ArgumentParser(description='Weekly breeds maintenance')
+    parser.add_argument('--budget', type=int, default=100, help='Max HTTP requests (probes + scrapes)')
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("BREEDS WEEKLY MAINTENANCE")
     print("=" * 80)
     print(f"Run time: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     
-    # Get random breeds
-    breeds = get_random_breeds(5)
-    print(f"\nSelected {len(breeds)} breeds for spot-checking")
+    # Plan re-scrapes from change signals
+    scheduler = BreedRefreshScheduler(supabase)
+    breeds = {breed['breed_slug']: breed for breed in scheduler.load_breeds()}
+    plan = scheduler.plan(args.budget, list(breeds.values()))
+    tasks = [task for task in plan if task.action == 'scrape']
+    skipped = [task for task in plan if task.action == 'skip_unchanged']
+    print(f"\nPlanned {len(tasks)} re-scrapes using {scheduler.requests_used}/{args.budget} requests "
+          f"({len(skipped)} probed breeds unchanged)")
+    
+    # Unchanged and over-budget probes still count as checks for the change-rate estimate
+    scheduler.record_probes(plan)
     
     results = []
     
-    for breed in breeds:
+    for task in tasks:
+        breed = breeds[task.breed_slug]
         print(f"\nChecking: {breed['display_name']} ({breed['breed_slug']})")
         
         result = {
@@ -155,8 +191,11 @@ def main():
             'display_name': breed['display_name'],
             'has_weight': bool(breed.get('adult_weight_avg_kg')),
             'data_quality': 'A+' if breed.get('size_category') and breed.get('adult_weight_avg_kg') else 'B',
-            'needed_rescrape': False,
-            'rescrape_attempted': False,
+            'priority': task.priority,
+            'change_probability': task.change_probability,
+            'needed_rescrape': True,
+            'reasons': task.reasons + needs_rescrape(breed),
+            'rescrape_attempted': True,
             'rescrape_success': False
         }
         
@@ -165,32 +204,28 @@ def main():
             updated = datetime.fromisoformat(breed['updated_at'].replace('Z', '+00:00'))
             result['age_days'] = (datetime.now(updated.tzinfo) - updated).days
         
-        # Check if needs rescraping
-        reasons = needs_rescrape(breed)
-        if reasons:
-            result['needed_rescrape'] = True
-            result['reasons'] = reasons
-            print(f"  ⚠️ Needs rescraping: {', '.join(reasons)}")
-            
-            # Attempt rescrape
-            if breed.get('weight_from') == 'default' or not breed.get('adult_weight_avg_kg'):
-                print(f"  🔄 Attempting to rescrape...")
-                result['rescrape_attempted'] = True
-                success, message = rescrape_breed(breed['breed_slug'], breed['display_name'])
-                result['rescrape_success'] = success
-                result['rescrape_message'] = message
-                
-                if success:
-                    print(f"  ✅ {message}")
-                else:
-                    print(f"  ❌ {message}")
+        print(f"  🔄 Rescraping: {', '.join(result['reasons'])}")
+        status, message = rescrape_breed(breed['breed_slug'], breed['display_name'], task.url)
+        success = status == RESCRAPE_UPDATED
+        result['rescrape_success'] = success
+        result['rescrape_message'] = message
+        # A missing page or one that lacked the fields still consumes this
+        # revision (retried once the source changes again); errors are retried
+        scheduler.record(task, scraped=status != RESCRAPE_ERROR, failed=status == RESCRAPE_ERROR)
+        
+        if success:
+            print(f"  ✅ {message}")
         else:
-            print(f"  ✅ Data is current")
+            print(f"  ❌ {message}")
         
         results.append(result)
     
     # Generate report
-    report = generate_spotcheck_report(results)
+    report = generate_spotcheck_report(results, {
+        'requests_used': scheduler.requests_used,
+        'budget': args.budget,
+        'skipped_unchanged': len(skipped)
+    })
     
     # Append to spotcheck file
     spotcheck_file = Path('reports/BREEDS_SPOTCHECK.md')
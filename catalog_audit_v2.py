@@ -14,6 +14,11 @@ import shutil
 from collections import defaultdict, Counter
 import warnings
 import glob
+
+from etl.catalog_audit import (CoverageRule, DuplicateKeyRule, InvalidSlugRule, StringifiedArrayRule,
+                               ValueCountsRule, audit_source, count_rows)
+from etl.dedup import deduplicate_frame
+
 warnings.filterwarnings('ignore')
 
 class CatalogFixPackV2:
@@ -27,7 +32,19 @@ class CatalogFixPackV2:
         self.food_tables = []
         self.table_metadata = {}
         self.fix_stats = defaultdict(lambda: defaultdict(int))
-        
+        self.post_fix_reports = {}
+        
+    def post_fix_audit(self, file_path):
+        """One chunked pass over a fixed table, shared by phases 4-6"""
+        key = str(file_path)
+        if key not in self.post_fix_reports:
+            self.post_fix_reports[key] = audit_source(file_path, [
+                StringifiedArrayRule(),
+                InvalidSlugRule(),
+                ValueCountsRule('brand'),
+            ])
+        return self.post_fix_reports[key]
+    
     def phase1_inventory_lineage(self):
         """Phase 1: Create inventory and lineage of all food tables"""
         print("="*60)
@@ -54,7 +71,7 @@ class CatalogFixPackV2:
             if path.exists() and path.suffix == '.csv':
                 try:
                     df = pd.read_csv(path, nrows=5)  # Quick read for metadata
-                    full_df = pd.read_csv(path)
+                    rows = count_rows(path)  # Single-column chunked count
                     
                     # Classify table type
                     table_type = self.classify_table(path.name)
@@ -62,7 +79,7 @@ class CatalogFixPackV2:
                     self.table_metadata[path.name] = {
                         'path': str(path),
                         'type': table_type,
-                        'rows': len(full_df),
+                        'rows': rows,
                         'columns': list(df.columns),
                         'has_brand': 'brand' in df.columns,
                         'has_product_key': 'product_key' in df.columns,
@@ -70,7 +87,7 @@ class CatalogFixPackV2:
                     }
                     
                     self.food_tables.append(str(path))
-                    print(f"  Found: {path.name} ({table_type}, {len(full_df):,} rows)")
+                    print(f"  Found: {path.name} ({table_type}, {rows:,} rows)")
                     
                 except Exception as e:
                     print(f"  Error reading {path}: {e}")
@@ -115,33 +132,32 @@ class CatalogFixPackV2:
             print(f"  Analyzing: {path.name}")
             
             try:
-                df = pd.read_csv(path)
+                # All checks in one chunked pass (etl/catalog_audit.py)
+                report = audit_source(path, [
+                    StringifiedArrayRule(),
+                    InvalidSlugRule(),
+                    DuplicateKeyRule(),
+                    CoverageRule(),
+                ])
                 
-                # Check for stringified arrays
+                # Stringified arrays
                 stringified_cols = []
-                for col in df.columns:
-                    if self.is_stringified_array_column(df[col]):
-                        stringified_cols.append(col)
-                        health_stats[path.name]['stringified_arrays'] += len(df[df[col].notna()])
+                for issue in report['stringified_arrays']:
+                    stringified_cols.append(issue['column'])
+                    health_stats[path.name]['stringified_arrays'] += issue['affected_rows']
                 
-                # Check for invalid slugs
-                for slug_col in ['brand_slug', 'name_slug']:
-                    if slug_col in df.columns:
-                        invalid = df[df[slug_col].str.contains(r'[^a-z0-9_-]', na=False, regex=True)]
-                        if len(invalid) > 0:
-                            health_stats[path.name][f'invalid_{slug_col}'] = len(invalid)
+                # Invalid slugs
+                for issue in report['invalid_slugs']:
+                    health_stats[path.name][f"invalid_{issue['column']}"] = issue['count']
                 
-                # Check for duplicate keys
-                if 'product_key' in df.columns:
-                    duplicates = df[df.duplicated('product_key', keep=False)]
-                    if len(duplicates) > 0:
-                        health_stats[path.name]['duplicate_keys'] = len(duplicates)
+                # Duplicate keys
+                duplicates = report['duplicate_keys']
+                if duplicates and duplicates['total_duplicates'] > 0:
+                    health_stats[path.name]['duplicate_keys'] = duplicates['total_duplicates']
                 
                 # Field coverage
-                for field in ['form', 'life_stage', 'kcal_per_100g', 'ingredients_tokens', 'price_per_kg_eur']:
-                    if field in df.columns:
-                        coverage = df[field].notna().sum() / len(df) * 100
-                        health_stats[path.name][f'{field}_coverage'] = round(coverage, 1)
+                for field, coverage in report['coverage'].items():
+                    health_stats[path.name][f'{field}_coverage'] = coverage
                 
                 # Store for fixes
                 self.table_metadata[path.name]['stringified_cols'] = stringified_cols
@@ -155,18 +171,9 @@ class CatalogFixPackV2:
     
     def is_stringified_array_column(self, series):
         """Check if column contains stringified arrays/JSON"""
-        sample = series.dropna().head(100)
-        if len(sample) == 0:
-            return False
-        
-        stringified_count = 0
-        for val in sample:
-            if isinstance(val, str):
-                if (val.startswith('[') and val.endswith(']')) or \
-                   (val.startswith('{') and val.endswith('}')):
-                    stringified_count += 1
-        
-        return stringified_count > len(sample) * 0.5
+        rule = StringifiedArrayRule([series.name])
+        rule.observe(series.to_frame())
+        return bool(rule.result())
     
     def phase3_apply_fixes(self):
         """Phase 3: Apply normalization and fixes"""
@@ -217,7 +224,7 @@ class CatalogFixPackV2:
         self.generate_fix_reports()
     
     def fix_stringified_arrays(self, df, table_name):
-        """Convert stringified arrays to proper arrays"""
+        """Convert stringified arrays to proper arrays (each distinct value parsed once)"""
         fixed_count = 0
         
         stringified_cols = self.table_metadata.get(table_name, {}).get('stringified_cols', [])
@@ -225,18 +232,27 @@ class CatalogFixPackV2:
         for col in stringified_cols:
             if col not in df.columns:
                 continue
-                
-            for idx, val in df[col].items():
-                if pd.notna(val) and isinstance(val, str):
-                    if val.startswith('[') and val.endswith(']'):
-                        try:
-                            # Try to parse as JSON
-                            parsed = json.loads(val)
-                            # Keep as string representation of list for CSV
-                            df.at[idx, col] = str(parsed)
-                            fixed_count += 1
-                        except:
-                            pass
+            
+            values = df[col].astype(object)
+            is_array = values.map(lambda v: isinstance(v, str) and v.startswith('[') and v.endswith(']')).to_numpy()
+            if not is_array.any():
+                continue
+            
+            codes, uniques = pd.factorize(values[is_array])
+            parsed = []
+            for val in uniques:
+                try:
+                    # Keep as string representation of list for CSV
+                    parsed.append(str(json.loads(val)))
+                except ValueError:
+                    parsed.append(None)
+            parsed = np.array(parsed + [None], dtype=object)[codes]
+            ok = np.array([p is not None for p in parsed], dtype=bool)
+            
+            rows = np.flatnonzero(is_array)[ok]
+            values.iloc[rows] = parsed[ok]
+            df[col] = values
+            fixed_count += int(ok.sum())
         
         self.fix_stats[table_name]['arrays_fixed'] = fixed_count
         return fixed_count
@@ -249,59 +265,32 @@ class CatalogFixPackV2:
             if slug_col not in df.columns:
                 continue
             
-            for idx, val in df[slug_col].items():
-                if pd.notna(val) and isinstance(val, str):
-                    # Replace invalid characters
-                    clean_val = re.sub(r'[^a-z0-9_-]+', '_', val.lower())
-                    clean_val = re.sub(r'_+', '_', clean_val).strip('_')
-                    
-                    if clean_val != val:
-                        df.at[idx, slug_col] = clean_val
-                        fixed_count += 1
+            values = df[slug_col].astype(object)
+            is_str = values.map(lambda v: isinstance(v, str)).to_numpy()
+            text = values[is_str].astype(str)
+            
+            # Replace invalid characters
+            clean = (text.str.lower()
+                     .str.replace(r'[^a-z0-9_-]+', '_', regex=True)
+                     .str.replace(r'_+', '_', regex=True)
+                     .str.strip('_'))
+            changed = (clean != text).to_numpy()
+            
+            if changed.any():
+                values.loc[text.index[changed]] = clean[changed]
+                df[slug_col] = values
+                fixed_count += int(changed.sum())
         
         self.fix_stats[table_name]['slugs_fixed'] = fixed_count
         return fixed_count
     
     def deduplicate_products(self, df, table_name):
-        """Deduplicate based on product_key"""
+        """Deduplicate with the blocking + union-find engine (etl/dedup.py)"""
         if 'product_key' not in df.columns:
             return df, 0
         
-        # Find duplicates
-        duplicates = df[df.duplicated('product_key', keep=False)]
-        if len(duplicates) == 0:
-            return df, 0
-        
-        # Keep best version of each duplicate (prefer more complete data)
-        def score_row(row):
-            score = 0
-            # Prefer rows with more data
-            if pd.notna(row.get('kcal_per_100g')):
-                score += 10
-            if pd.notna(row.get('ingredients_tokens')):
-                score += 5
-            if pd.notna(row.get('life_stage')):
-                score += 3
-            if pd.notna(row.get('form')):
-                score += 3
-            if pd.notna(row.get('price_per_kg_eur')):
-                score += 2
-            return score
-        
-        # Process each duplicate group
-        kept_indices = []
-        for key, group in duplicates.groupby('product_key'):
-            # Score each row
-            scores = group.apply(score_row, axis=1)
-            # Keep the best scoring row
-            best_idx = scores.idxmax()
-            kept_indices.append(best_idx)
-        
-        # Get non-duplicate rows
-        non_duplicates = df[~df.duplicated('product_key', keep=False)]
-        
-        # Combine kept duplicates with non-duplicates
-        df_deduped = pd.concat([non_duplicates, df.loc[kept_indices]])
+        # Cluster exact-key and near duplicates; keep each cluster's most complete row
+        df_deduped = deduplicate_frame(df)
         
         removed = len(df) - len(df_deduped)
         self.fix_stats[table_name]['duplicates_removed'] = removed
@@ -326,25 +315,27 @@ class CatalogFixPackV2:
             'Nature\'s': "Nature's Variety"
         }
         
-        for idx, brand in df['brand'].items():
-            if pd.notna(brand) and brand in brand_map:
-                df.at[idx, 'brand'] = brand_map[brand]
-                
-                # Update brand_slug if present
-                if 'brand_slug' in df.columns:
-                    slug_map = {
-                        'Royal Canin': 'royal_canin',
-                        "Hill's": 'hills',
-                        'Arden Grange': 'arden_grange',
-                        'Barking Heads': 'barking_heads',
-                        "Lily's Kitchen": 'lilys_kitchen',
-                        "Nature's Variety": 'natures_variety'
-                    }
-                    new_brand = brand_map[brand]
-                    if new_brand in slug_map:
-                        df.at[idx, 'brand_slug'] = slug_map[new_brand]
-                
-                fixed_count += 1
+        slug_map = {
+            'Royal Canin': 'royal_canin',
+            "Hill's": 'hills',
+            'Arden Grange': 'arden_grange',
+            'Barking Heads': 'barking_heads',
+            "Lily's Kitchen": 'lilys_kitchen',
+            "Nature's Variety": 'natures_variety'
+        }
+        
+        new_brands = df['brand'].map(brand_map)
+        mapped = new_brands.notna().to_numpy()
+        if mapped.any():
+            df.loc[mapped, 'brand'] = new_brands[mapped]
+            
+            # Update brand_slug if present
+            if 'brand_slug' in df.columns:
+                new_slugs = new_brands.map(slug_map)
+                with_slug = new_slugs.notna().to_numpy()
+                df.loc[with_slug, 'brand_slug'] = new_slugs[with_slug]
+            
+            fixed_count = int(mapped.sum())
         
         self.fix_stats[table_name]['brands_normalized'] = fixed_count
         return fixed_count
@@ -363,16 +354,19 @@ class CatalogFixPackV2:
             'senior': ['senior', 'ageing', 'mature', '7+', '8+', '10+', '12+']
         }
         
-        missing_life_stage = df[df['life_stage'].isna()]
+        # First matching stage wins, as in the keyword order above
+        names = df['product_name'].astype(str).str.lower()
+        pending = df['life_stage'].isna().to_numpy().copy()
+        life_stage = df['life_stage'].astype(object)
         
-        for idx, row in missing_life_stage.iterrows():
-            product_name = str(row.get('product_name', '')).lower()
-            
-            for stage, keywords in patterns.items():
-                if any(keyword in product_name for keyword in keywords):
-                    df.at[idx, 'life_stage'] = stage
-                    inferred_count += 1
-                    break
+        for stage, keywords in patterns.items():
+            matches = pending & names.str.contains('|'.join(map(re.escape, keywords)), regex=True).to_numpy()
+            life_stage[matches] = stage
+            inferred_count += int(matches.sum())
+            pending &= ~matches
+        
+        if inferred_count:
+            df['life_stage'] = life_stage
         
         self.fix_stats[table_name]['life_stage_inferred'] = inferred_count
         return inferred_count
@@ -408,22 +402,19 @@ class CatalogFixPackV2:
         # Count rows in each layer
         for path in union_tables:
             try:
-                df = pd.read_csv(path)
-                pipeline_stats['total_rows_union'] += len(df)
+                pipeline_stats['total_rows_union'] += self.post_fix_audit(path)['rows']
             except:
                 pass
         
         for path in canonical_tables:
             try:
-                df = pd.read_csv(path)
-                pipeline_stats['total_rows_canonical'] += len(df)
+                pipeline_stats['total_rows_canonical'] += self.post_fix_audit(path)['rows']
             except:
                 pass
         
         for path in published_tables:
             try:
-                df = pd.read_csv(path)
-                pipeline_stats['total_rows_published'] += len(df)
+                pipeline_stats['total_rows_published'] += self.post_fix_audit(path)['rows']
             except:
                 pass
         
@@ -449,20 +440,18 @@ class CatalogFixPackV2:
             path = Path(file_path)
             
             try:
-                df = pd.read_csv(path)
+                brand_counts = self.post_fix_audit(path)['brand_counts']
+                for brand, count in brand_counts.items():
+                    all_brands[brand] += count
                 
-                if 'brand' in df.columns:
-                    brand_counts = df['brand'].value_counts()
-                    for brand, count in brand_counts.items():
-                        all_brands[brand] += count
-                    
-                    # Check for Royal Canin
-                    rc_rows = df[df['brand'].str.contains('Royal|Canin', case=False, na=False)]
-                    if len(rc_rows) > 0:
-                        rc_findings[path.name].append({
-                            'count': len(rc_rows),
-                            'variants': rc_rows['brand'].unique().tolist() if 'brand' in rc_rows.columns else []
-                        })
+                # Check for Royal Canin
+                rc_variants = [brand for brand in brand_counts
+                               if re.search('Royal|Canin', str(brand), re.IGNORECASE)]
+                if rc_variants:
+                    rc_findings[path.name].append({
+                        'count': sum(brand_counts[brand] for brand in rc_variants),
+                        'variants': rc_variants
+                    })
                 
             except Exception as e:
                 print(f"  Error scanning {path.name}: {e}")
@@ -490,21 +479,17 @@ class CatalogFixPackV2:
             path = Path(file_path)
             
             try:
-                df = pd.read_csv(path)
+                report = self.post_fix_audit(path)
                 
                 # Check for remaining stringified arrays
-                for col in df.columns:
-                    if self.is_stringified_array_column(df[col]):
-                        health_stats_after[path.name]['stringified_arrays'] += 1
-                        issues_remaining += 1
+                for issue in report['stringified_arrays']:
+                    health_stats_after[path.name]['stringified_arrays'] += 1
+                    issues_remaining += 1
                 
                 # Check for remaining invalid slugs
-                for slug_col in ['brand_slug', 'name_slug']:
-                    if slug_col in df.columns:
-                        invalid = df[df[slug_col].str.contains(r'[^a-z0-9_-]', na=False, regex=True)]
-                        if len(invalid) > 0:
-                            health_stats_after[path.name][f'invalid_{slug_col}'] = len(invalid)
-                            issues_remaining += 1
+                for issue in report['invalid_slugs']:
+                    health_stats_after[path.name][f"invalid_{issue['column']}"] = issue['count']
+                    issues_remaining += 1
                 
             except:
                 pass
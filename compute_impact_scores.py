@@ -10,6 +10,8 @@ from pathlib import Path
 from datetime import datetime
 import json
 
+from etl.catalog_snapshot import has_snapshot, load_snapshot
+
 class ImpactAnalyzer:
     def __init__(self):
         self.harvest_dir = Path("reports/MANUF/PILOT/harvests")
@@ -44,6 +46,13 @@ class ImpactAnalyzer:
         brand_files = list(self.harvest_dir.glob(f"{brand_slug}_pilot_*.csv"))
         if brand_files:
             return pd.read_csv(brand_files[0])
+        # Otherwise the brand's rows from the local catalog snapshot, in harvest column names
+        if has_snapshot():
+            df = load_snapshot(filters={'brand_slug': brand_slug})
+            if not df.empty:
+                ingredients = 'ingredients_raw' if 'ingredients_raw' in df else 'ingredients_tokens'
+                price = 'price_per_kg_eur' if 'price_per_kg_eur' in df else 'price_per_kg'
+                return df.rename(columns={'product_key': 'product_id', ingredients: 'ingredients', price: 'price'})
         return None
     
     def calculate_coverage(self, df):
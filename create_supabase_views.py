@@ -349,9 +349,17 @@ SELECT
 FROM foods_published_preview
 GROUP BY brand_slug, allowlist_status;
 
--- Refresh materialized views
-REFRESH MATERIALIZED VIEW foods_brand_quality_prod_mv;
-REFRESH MATERIALIZED VIEW foods_brand_quality_preview_mv;
+-- Unique indexes (required for REFRESH ... CONCURRENTLY)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_foods_brand_quality_prod_mv
+    ON foods_brand_quality_prod_mv (brand_slug, allowlist_status);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_foods_brand_quality_preview_mv
+    ON foods_brand_quality_preview_mv (brand_slug, allowlist_status);
+
+-- Refresh materialized views without blocking readers
+REFRESH MATERIALIZED VIEW CONCURRENTLY foods_brand_quality_prod_mv;
+REFRESH MATERIALIZED VIEW CONCURRENTLY foods_brand_quality_preview_mv;
+
+-- Later refreshes: sql/mv_refresh.sql + etl/mv_refresh.refresh_all()
         """)
         
         return True
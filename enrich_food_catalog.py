@@ -98,16 +98,20 @@ class FoodCatalogEnricher:
         
         return allergen_map
     
-    def enrich_allergen_groups(self):
-        """Enrich products with allergen group detection."""
+    def enrich_allergen_groups(self, products_df: Optional[pd.DataFrame] = None):
+        """Enrich products with allergen group detection.
+        
+        products_df lets callers that already loaded foods_published reuse it.
+        """
         logger.info("Starting allergen groups enrichment...")
         
         # Create allergen mapping
         allergen_map = self.create_allergen_mapping()
         
         # Fetch products with ingredients
-        products = self.supabase.table('foods_published').select('*').execute()
-        products_df = pd.DataFrame(products.data)
+        if products_df is None:
+            products = self.supabase.table('foods_published').select('*').execute()
+            products_df = pd.DataFrame(products.data)
         
         if products_df.empty:
             logger.warning("No products found")
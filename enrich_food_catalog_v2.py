@@ -7,6 +7,7 @@ Targets 95% form/life_stage coverage, 70% price buckets, and zero kcal outliers.
 import os
 import re
 import json
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -16,10 +17,72 @@ from dotenv import load_dotenv
 from supabase import create_client
 import logging
 
+from etl.classify_foods import get_food_classifier
+from etl.nutrition_engine import KCAL_ESTIMATED, evaluate_nutrition
+from etl.pack_size import parse_pack_sizes, price_per_kg as calculate_price_per_kg
+from etl.supabase_loader import fetch_frame
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+FOODS_TABLE = 'foods_published'
+
+# Brand-specific line mappings
+BRAND_LINES = {
+    'royal canin': {
+        'mini': {'form': 'dry', 'life_stage': None},
+        'maxi': {'form': 'dry', 'life_stage': None},
+        'giant': {'form': 'dry', 'life_stage': None},
+        'puppy': {'form': None, 'life_stage': 'puppy'},
+        'adult': {'form': None, 'life_stage': 'adult'},
+        'mature': {'form': None, 'life_stage': 'senior'},
+        'wet': {'form': 'wet', 'life_stage': None}
+    },
+    'hills': {
+        'science plan': {'form': 'dry', 'life_stage': None},
+        'prescription diet': {'form': None, 'life_stage': 'adult'},
+        'puppy': {'form': None, 'life_stage': 'puppy'},
+        'mature': {'form': None, 'life_stage': 'senior'}
+    },
+    'purina': {
+        'pro plan': {'form': 'dry', 'life_stage': None},
+        'one': {'form': 'dry', 'life_stage': None},
+        'puppy': {'form': None, 'life_stage': 'puppy'},
+        'senior': {'form': None, 'life_stage': 'senior'}
+    }
+}
+
+# Columns compared for the enrichment diff
+DIFF_COLUMNS = ['form', 'life_stage', 'price_per_kg_eur', 'price_bucket', 'kcal_per_100g']
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Column as a Series, all-missing if the table doesn't have it"""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def _text(df: pd.DataFrame, name: str) -> pd.Series:
+    """Lower-cased text column with missing values as ''"""
+    return _column(df, name).fillna('').astype(str).str.lower()
+
+
+def _numeric(df: pd.DataFrame, name: str) -> pd.Series:
+    return pd.to_numeric(_column(df, name), errors='coerce')
+
+
+def _present(values: pd.Series) -> pd.Series:
+    """Truthiness of a column: not missing, not empty, not zero"""
+    return values.notna() & (values != '') & (values != 0)
+
+
+def _changed(new: pd.Series, old: pd.Series) -> pd.Series:
+    """new != old, treating two missing values as equal"""
+    return (new != old) & ~(new.isna() & old.isna())
+
+
 class FoodCatalogEnricherV2:
     def __init__(self):
         load_dotenv()
@@ -31,6 +94,7 @@ class FoodCatalogEnricherV2:
         
         self.timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.enrichment_stats = {}
+        self.products_df = None
         
     def _connect_supabase(self):
         """Connect to Supabase"""
@@ -50,201 +114,123 @@ class FoodCatalogEnricherV2:
             f.write(f"-- Purpose: {name.replace('_', ' ').title()}\n\n")
             f.write(query)
     
+    # ========== DATA LOADING ==========
+    def load_products(self, refresh: bool = False) -> pd.DataFrame:
+        """Load foods_published once (paged, so no row cap) and share it across stages."""
+        if self.products_df is None or refresh:
+            started = time.monotonic()
+            self.products_df = fetch_frame(self.supabase, FOODS_TABLE, key='product_key')
+            logger.info(f"Loaded {len(self.products_df):,} products in {time.monotonic() - started:.1f}s")
+        return self.products_df
+    
     # ========== 1. ENHANCED FORM & LIFE STAGE CLASSIFIER V2 ==========
-    def classify_form_life_stage_v2(self):
+    def classify_form_life_stage_v2(self, products_df: Optional[pd.DataFrame] = None):
         """Enhanced classification with expanded dictionaries and heuristics."""
         logger.info("Starting enhanced form and life stage classification v2...")
         
-        # Fetch products
-        products = self.supabase.table('foods_published').select('*').execute()
-        products_df = pd.DataFrame(products.data)
+        if products_df is None:
+            products_df = self.load_products()
         
         if products_df.empty:
             return pd.DataFrame()
         
-        # Expanded classification rules (multi-lingual support)
-        form_rules = {
-            'dry': [
-                'kibble', 'pellet', 'biscuit', 'crunchy', 'dry food', 'dry dog', 'dry cat',
-                'cold pressed', 'extruded', 'dehydrated', 'crispy', 'nuggets', 'chunks dry',
-                'trockenfutter', 'croquettes', 'pienso seco', 'mangime secco', 'droogvoer',
-                'complete dry', 'dry complete', 'dry adult', 'dry puppy', 'dry senior'
-            ],
-            'wet': [
-                'pouch', 'can', 'tin', 'gravy', 'jelly', 'chunks', 'pate', 'terrine',
-                'wet food', 'canned', 'tray', 'bowl', 'stew', 'casserole', 'loaf',
-                'nassfutter', 'mousse', 'sauce', 'broth', 'soup', 'flakes in', 'chunks in',
-                'fillets', 'shreds', 'cuts in gravy', 'morsels', 'minced', 'fresh pack',
-                'alimento húmedo', 'umido', 'natvoer', 'wet complete', 'multipack'
-            ],
-            'freeze_dried': [
-                'freeze dried', 'freeze-dried', 'air dried', 'air-dried', 'lyophilized',
-                'sublimated', 'vacuum dried', 'gently dried', 'natural dried'
-            ],
-            'raw': [
-                'raw', 'barf', 'frozen', 'fresh frozen', 'raw frozen', 'minced raw',
-                'raw food', 'raw diet', 'biologically appropriate', 'prey model',
-                'raw complete', 'raw mince', 'raw chunks', 'raw meaty'
-            ]
-        }
-        
-        life_stage_rules = {
-            'puppy': [
-                'puppy', 'junior', 'growth', 'weaning', 'starter', 'puppies',
-                'cachorro', 'chiot', 'welpe', 'cucciolo', 'puppy formula',
-                'large breed puppy', 'small breed puppy', 'medium puppy'
-            ],
-            'adult': [
-                'adult', 'maintenance', 'mature adult', '1-7', '1-6 years',
-                'adulto', 'adulte', 'erwachsen', 'adults', 'adult dog',
-                'adult formula', 'adult maintenance', 'prime years'
-            ],
-            'senior': [
-                'senior', 'mature', '7+', '8+', '10+', '11+', 'aging', 'golden years',
-                'older', 'aged', 'geriatric', 'veteran', 'mature senior', 'senior dog',
-                'senior formula', 'senior years', 'twilight', 'elderly'
-            ],
-            'all': [
-                'all life stages', 'all ages', 'complete', 'family', 'universal',
-                'every life stage', 'any age', 'lifelong', 'all breeds all ages',
-                'complete food', 'whole life'
-            ]
-        }
-        
-        # Brand-specific line mappings
-        brand_lines = {
-            'royal canin': {
-                'mini': {'form': 'dry', 'life_stage': None},
-                'maxi': {'form': 'dry', 'life_stage': None},
-                'giant': {'form': 'dry', 'life_stage': None},
-                'puppy': {'form': None, 'life_stage': 'puppy'},
-                'adult': {'form': None, 'life_stage': 'adult'},
-                'mature': {'form': None, 'life_stage': 'senior'},
-                'wet': {'form': 'wet', 'life_stage': None}
-            },
-            'hills': {
-                'science plan': {'form': 'dry', 'life_stage': None},
-                'prescription diet': {'form': None, 'life_stage': 'adult'},
-                'puppy': {'form': None, 'life_stage': 'puppy'},
-                'mature': {'form': None, 'life_stage': 'senior'}
-            },
-            'purina': {
-                'pro plan': {'form': 'dry', 'life_stage': None},
-                'one': {'form': 'dry', 'life_stage': None},
-                'puppy': {'form': None, 'life_stage': 'puppy'},
-                'senior': {'form': None, 'life_stage': 'senior'}
-            }
-        }
-        
-        # Classify each product
-        classifications = []
-        
-        for _, product in products_df.iterrows():
-            product_key = product.get('product_key')
-            product_name = str(product.get('product_name', '')).lower()
-            brand = str(product.get('brand', '')).lower()
-            current_form = product.get('form')
-            current_life_stage = product.get('life_stage')
-            kcal = product.get('kcal_per_100g')
-            moisture = product.get('moisture_percent')
-            pack_size = str(product.get('pack_size', '')).lower()
-            
-            # Combined text for analysis
-            text = f"{product_name} {brand} {pack_size}"
-            
-            # Initialize with current values
-            detected_form = current_form
-            form_confidence = 0.3 if current_form else 0.0
-            detected_life_stage = current_life_stage
-            life_stage_confidence = 0.3 if current_life_stage else 0.0
-            
-            # Step 1: Apply brand-specific line rules
-            brand_lower = brand.lower()
-            for brand_key, lines in brand_lines.items():
-                if brand_key in brand_lower:
-                    for line_name, mapping in lines.items():
-                        if line_name in text:
-                            if mapping['form'] and not detected_form:
-                                detected_form = mapping['form']
-                                form_confidence = 0.85
-                            if mapping['life_stage'] and not detected_life_stage:
-                                detected_life_stage = mapping['life_stage']
-                                life_stage_confidence = 0.85
-            
-            # Step 2: Dictionary-based classification
-            for form, keywords in form_rules.items():
-                for keyword in keywords:
-                    if keyword in text:
-                        if form_confidence < 0.9:  # Don't override high-confidence matches
-                            detected_form = form
-                            form_confidence = 0.9
-                        break
-            
-            for stage, keywords in life_stage_rules.items():
-                for keyword in keywords:
-                    if keyword in text:
-                        if life_stage_confidence < 0.9:
-                            detected_life_stage = stage
-                            life_stage_confidence = 0.9
-                        break
-            
-            # Step 3: Heuristic backstops using kcal and moisture
-            if not detected_form or form_confidence < 0.7:
-                if kcal and moisture:
-                    if kcal >= 320 and kcal <= 450 and moisture <= 12:
-                        detected_form = 'dry'
-                        form_confidence = max(form_confidence, 0.75)
-                    elif kcal >= 60 and kcal <= 120 and moisture >= 70:
-                        detected_form = 'wet'
-                        form_confidence = max(form_confidence, 0.75)
-                    elif kcal >= 300 and kcal <= 600:
-                        detected_form = 'freeze_dried'
-                        form_confidence = max(form_confidence, 0.65)
-                    elif kcal >= 120 and kcal <= 300:
-                        detected_form = 'raw'
-                        form_confidence = max(form_confidence, 0.65)
-            
-            # Step 4: Packaging hints
-            if not detected_form or form_confidence < 0.7:
-                # Multi-pack patterns suggest wet food
-                if re.search(r'\d+\s*[x×]\s*\d+\s*(g|ml|oz)', pack_size):
-                    detected_form = 'wet'
-                    form_confidence = max(form_confidence, 0.7)
-                # Large single bags suggest dry food
-                elif re.search(r'\d+\s*(kg|lb)\s*(bag|sack)?', pack_size):
-                    if any(size in pack_size for size in ['10kg', '12kg', '15kg', '20kg']):
-                        detected_form = 'dry'
-                        form_confidence = max(form_confidence, 0.7)
-            
-            # Step 5: Apply confidence threshold
-            if form_confidence < 0.6:
-                detected_form = None  # Don't inject noise
-            if life_stage_confidence < 0.6:
-                detected_life_stage = None
-            
-            # Check for mismatches
-            mismatch = False
-            if 'puppy' in product_name and detected_life_stage != 'puppy':
-                mismatch = True
-            elif 'senior' in product_name and detected_life_stage != 'senior':
-                mismatch = True
-            elif 'kitten' in product_name and detected_life_stage != 'puppy':  # Kitten maps to puppy for dogs
-                mismatch = True
-            
-            classifications.append({
-                'product_key': product_key,
-                'form': detected_form,
-                'form_confidence': round(form_confidence, 2),
-                'form_from': 'enrichment' if detected_form != current_form else 'source',
-                'life_stage': detected_life_stage,
-                'life_stage_confidence': round(life_stage_confidence, 2),
-                'life_stage_from': 'enrichment' if detected_life_stage != current_life_stage else 'source',
-                'classification_mismatch': mismatch,
-                'source': 'nlp_rules_v2',
-                'fetched_at': self.timestamp
-            })
-        
-        classify_df = pd.DataFrame(classifications)
+        product_name = _text(products_df, 'product_name')
+        brand = _text(products_df, 'brand')
+        pack_size = _text(products_df, 'pack_size')
+        kcal = _numeric(products_df, 'kcal_per_100g')
+        moisture = _numeric(products_df, 'moisture_percent')
+        
+        # Combined text for analysis
+        text = product_name + ' ' + brand + ' ' + pack_size
+        
+        # Initialize with current values
+        current_form = _column(products_df, 'form').where(_present(_column(products_df, 'form')))
+        current_life_stage = _column(products_df, 'life_stage').where(_present(_column(products_df, 'life_stage')))
+        detected_form = current_form.copy()
+        form_confidence = pd.Series(np.where(current_form.notna(), 0.3, 0.0), index=products_df.index)
+        detected_life_stage = current_life_stage.copy()
+        life_stage_confidence = pd.Series(np.where(current_life_stage.notna(), 0.3, 0.0), index=products_df.index)
+        
+        # Step 1: Apply brand-specific line rules (only fills empty values)
+        for brand_key, lines in BRAND_LINES.items():
+            brand_mask = brand.str.contains(brand_key, regex=False)
+            if not brand_mask.any():
+                continue
+            for line_name, mapping in lines.items():
+                hit = brand_mask & text.str.contains(line_name, regex=False)
+                if mapping['form']:
+                    fill = hit & detected_form.isna()
+                    detected_form = detected_form.mask(fill, mapping['form'])
+                    form_confidence = form_confidence.mask(fill, 0.85)
+                if mapping['life_stage']:
+                    fill = hit & detected_life_stage.isna()
+                    detected_life_stage = detected_life_stage.mask(fill, mapping['life_stage'])
+                    life_stage_confidence = life_stage_confidence.mask(fill, 0.85)
+        
+        # Step 2: Dictionary-based classification (shared multi-lingual rule set)
+        classifier = get_food_classifier()
+        form_hit = classifier.form.classify_many(text)
+        take = form_hit['label'].notna() & (form_hit['confidence'] >= form_confidence)
+        detected_form = detected_form.mask(take, form_hit['label'])
+        form_confidence = form_confidence.mask(take, form_hit['confidence'])
+        
+        stage_hit = classifier.life_stage.classify_many(text)
+        take = stage_hit['label'].notna() & (stage_hit['confidence'] >= life_stage_confidence)
+        detected_life_stage = detected_life_stage.mask(take, stage_hit['label'])
+        life_stage_confidence = life_stage_confidence.mask(take, stage_hit['confidence'])
+        
+        # Step 3: Heuristic backstops using kcal and moisture
+        needs_form = detected_form.isna() | (form_confidence < 0.7)
+        has_energy = _present(kcal) & _present(moisture)
+        heuristics = [
+            ((kcal >= 320) & (kcal <= 450) & (moisture <= 12), 'dry', 0.75),
+            ((kcal >= 60) & (kcal <= 120) & (moisture >= 70), 'wet', 0.75),
+            ((kcal >= 300) & (kcal <= 600), 'freeze_dried', 0.65),
+            ((kcal >= 120) & (kcal <= 300), 'raw', 0.65),
+        ]
+        unmatched = needs_form & has_energy
+        for condition, form, confidence in heuristics:
+            hit = unmatched & condition
+            detected_form = detected_form.mask(hit, form)
+            form_confidence = form_confidence.mask(hit, np.maximum(form_confidence, confidence))
+            unmatched &= ~hit
+        
+        # Step 4: Packaging hints
+        needs_form = detected_form.isna() | (form_confidence < 0.7)
+        # Multi-pack patterns suggest wet food
+        multipack = pack_size.str.contains(r'\d+\s*[x×]\s*\d+\s*(?:g|ml|oz)')
+        # Large single bags suggest dry food
+        large_bag = (~multipack
+                     & pack_size.str.contains(r'\d+\s*(?:kg|lb)')
+                     & pack_size.str.contains(r'10kg|12kg|15kg|20kg'))
+        for hit, form in ((needs_form & multipack, 'wet'), (needs_form & large_bag, 'dry')):
+            detected_form = detected_form.mask(hit, form)
+            form_confidence = form_confidence.mask(hit, np.maximum(form_confidence, 0.7))
+        
+        # Step 5: Apply confidence threshold (don't inject noise)
+        detected_form = detected_form.where(form_confidence >= 0.6)
+        detected_life_stage = detected_life_stage.where(life_stage_confidence >= 0.6)
+        
+        # Check for mismatches (kitten maps to puppy for dogs)
+        puppy = product_name.str.contains('puppy', regex=False)
+        senior = ~puppy & product_name.str.contains('senior', regex=False)
+        kitten = ~puppy & ~senior & product_name.str.contains('kitten', regex=False)
+        mismatch = ((puppy & (detected_life_stage != 'puppy'))
+                    | (senior & (detected_life_stage != 'senior'))
+                    | (kitten & (detected_life_stage != 'puppy')))
+        
+        classify_df = pd.DataFrame({
+            'product_key': _column(products_df, 'product_key'),
+            'form': detected_form,
+            'form_confidence': form_confidence.round(2),
+            'form_from': np.where(_changed(detected_form, current_form), 'enrichment', 'source'),
+            'life_stage': detected_life_stage,
+            'life_stage_confidence': life_stage_confidence.round(2),
+            'life_stage_from': np.where(_changed(detected_life_stage, current_life_stage), 'enrichment', 'source'),
+            'classification_mismatch': mismatch,
+            'source': 'nlp_rules_v2',
+            'fetched_at': self.timestamp
+        })
         
         # Calculate coverage
         total = len(classify_df)
@@ -295,7 +281,7 @@ Generated: {self.timestamp}
 
 -- Classification Approach:
 -- 1. Brand-specific line mappings (confidence: 0.85)
--- 2. Expanded dictionary matching (confidence: 0.9)
+-- 2. Shared keyword rules, data/food_classification_rules.yaml (confidence: 0.9)
 -- 3. Kcal/moisture heuristics (confidence: 0.75)
 -- 4. Package size patterns (confidence: 0.7)
 -- 5. Confidence threshold: 0.6 minimum
@@ -331,123 +317,69 @@ Generated: {self.timestamp}
         return classify_df
     
     # ========== 2. ENHANCED PRICING WITH PACK SIZE PARSER ==========
-    def enrich_pricing_v2(self):
+    def enrich_pricing_v2(self, products_df: Optional[pd.DataFrame] = None):
         """Enhanced pricing with pack size parser and RRP fallback."""
         logger.info("Starting enhanced pricing enrichment v2...")
         
-        # Fetch products
-        products = self.supabase.table('foods_published').select('*').execute()
-        products_df = pd.DataFrame(products.data)
+        if products_df is None:
+            products_df = self.load_products()
         
         if products_df.empty:
             return pd.DataFrame()
         
-        def parse_pack_size(text):
-            """Extract weight in kg from pack size text."""
-            if not text:
-                return None
-            
-            text = str(text).lower()
-            
-            # Pattern 1: Multipack (e.g., "24x400g", "12 x 85g")
-            multipack = re.search(r'(\d+)\s*[x×]\s*(\d+(?:\.\d+)?)\s*(kg|g|ml|l)', text)
-            if multipack:
-                count = float(multipack.group(1))
-                size = float(multipack.group(2))
-                unit = multipack.group(3)
-                
-                if unit == 'g' or unit == 'ml':
-                    total_kg = (count * size) / 1000
-                elif unit == 'kg' or unit == 'l':
-                    total_kg = count * size
-                else:
-                    total_kg = None
-                    
-                return total_kg
-            
-            # Pattern 2: Single pack (e.g., "12kg", "400g", "1.5kg")
-            single = re.search(r'(\d+(?:\.\d+)?)\s*(kg|g|ml|l)', text)
-            if single:
-                size = float(single.group(1))
-                unit = single.group(2)
-                
-                if unit == 'g' or unit == 'ml':
-                    return size / 1000
-                elif unit == 'kg' or unit == 'l':
-                    return size
-            
-            return None
+        current_price = _numeric(products_df, 'price_eur')
+        current_price_per_kg = _numeric(products_df, 'price_per_kg_eur')
+        current_bucket = _column(products_df, 'price_bucket')
+        
+        # Try to extract weight from pack_size or product_name (one pass per distinct text)
+        packs = parse_pack_sizes(_column(products_df, 'pack_size'))
+        from_name = parse_pack_sizes(_column(products_df, 'product_name'))
+        packs = packs.where(packs['pack_grams'].notna(), from_name, axis=0)
+        weight_kg = packs['pack_grams'] / 1000
         
         # Calculate brand RRP medians by form
-        brand_rrp = {}
-        for brand in products_df['brand'].unique():
-            if pd.notna(brand):
-                brand_data = products_df[products_df['brand'] == brand]
-                for form in ['dry', 'wet', 'freeze_dried', 'raw']:
-                    form_data = brand_data[brand_data['form'] == form]
-                    if len(form_data) > 0 and 'price_per_kg_eur' in form_data.columns:
-                        prices = form_data['price_per_kg_eur'].dropna()
-                        if len(prices) > 0:
-                            if brand not in brand_rrp:
-                                brand_rrp[brand] = {}
-                            brand_rrp[brand][form] = prices.median()
-        
-        # Process pricing
-        pricing_enriched = []
-        
-        for _, product in products_df.iterrows():
-            product_key = product.get('product_key')
-            current_price = product.get('price_eur')
-            current_price_per_kg = product.get('price_per_kg_eur')
-            current_bucket = product.get('price_bucket')
-            pack_size = product.get('pack_size')
-            product_name = product.get('product_name', '')
-            brand = product.get('brand')
-            form = product.get('form')
-            
-            # Try to extract weight from pack_size or product_name
-            weight_kg = parse_pack_size(pack_size)
-            if not weight_kg:
-                weight_kg = parse_pack_size(product_name)
-            
-            # Calculate price per kg
-            price_per_kg = current_price_per_kg
-            price_source = 'source'
-            
-            if not price_per_kg:
-                if current_price and weight_kg and weight_kg > 0:
-                    price_per_kg = current_price / weight_kg
-                    price_source = 'calculated'
-                elif brand in brand_rrp and form in brand_rrp[brand]:
-                    # Use brand RRP fallback
-                    price_per_kg = brand_rrp[brand][form]
-                    price_source = 'rrp_estimate'
-            
-            # Determine price bucket with refined thresholds
-            if price_per_kg:
-                if price_per_kg < 15:
-                    bucket = 'low'
-                elif price_per_kg < 30:
-                    bucket = 'mid'
-                else:
-                    bucket = 'high'
-                bucket_from = price_source
-            else:
-                bucket = current_bucket
-                bucket_from = 'source' if current_bucket else 'default'
-            
-            pricing_enriched.append({
-                'product_key': product_key,
-                'price_eur': current_price,
-                'price_per_kg_eur': round(price_per_kg, 2) if price_per_kg else None,
-                'weight_kg': round(weight_kg, 3) if weight_kg else None,
-                'price_bucket': bucket,
-                'price_source': price_source,
-                'price_bucket_from': bucket_from,
-                'fetched_at': self.timestamp
-            })
-        
-        pricing_df = pd.DataFrame(pricing_enriched)
+        rrp = (products_df.assign(price_per_kg_eur=current_price_per_kg)
+               .loc[_column(products_df, 'form').isin(['dry', 'wet', 'freeze_dried', 'raw'])]
+               .groupby(['brand', 'form'])['price_per_kg_eur'].median()
+               .rename('rrp'))
+        if rrp.empty:
+            brand_rrp = pd.Series(np.nan, index=products_df.index)
+        else:
+            brand_rrp = (products_df[['brand', 'form']]
+                         .merge(rrp, left_on=['brand', 'form'], right_index=True, how='left')['rrp']
+                         .set_axis(products_df.index))
+        
+        # Price per kg: source value, then price / weight, then brand RRP fallback
+        has_source = _present(current_price_per_kg)
+        can_calculate = ~has_source & _present(current_price) & (weight_kg > 0)
+        use_rrp = ~has_source & ~can_calculate & brand_rrp.notna()
+        price_per_kg = (current_price_per_kg.where(has_source)
+                        .mask(can_calculate, pd.Series(calculate_price_per_kg(current_price, packs['pack_grams']),
+                                                       index=products_df.index))
+                        .mask(use_rrp, brand_rrp))
+        price_source = pd.Series(np.select([can_calculate, use_rrp], ['calculated', 'rrp_estimate'], 'source'),
+                                 index=products_df.index)
+        
+        # Determine price bucket with refined thresholds
+        has_price_per_kg = _present(price_per_kg)
+        bucket = pd.Series(np.select([price_per_kg < 15, price_per_kg < 30], ['low', 'mid'], 'high'),
+                           index=products_df.index)
+        price_bucket = bucket.where(has_price_per_kg, current_bucket)
+        bucket_from = price_source.where(has_price_per_kg,
+                                         np.where(_present(current_bucket), 'source', 'default'))
+        
+        pricing_df = pd.DataFrame({
+            'product_key': _column(products_df, 'product_key'),
+            'price_eur': current_price,
+            'price_per_kg_eur': price_per_kg.round(2).where(has_price_per_kg),
+            'weight_kg': weight_kg.round(3).where(_present(weight_kg)),
+            'pack_count': packs['pack_count'],
+            'pack_label': packs['pack_label'],
+            'price_bucket': price_bucket,
+            'price_source': price_source,
+            'price_bucket_from': bucket_from,
+            'fetched_at': self.timestamp
+        })
         
         # Calculate coverage
         total = len(pricing_df)
@@ -505,9 +437,9 @@ Generated: {self.timestamp}
         sql = f"""-- Pricing Enrichment V2 with Pack Size Parser
 -- Generated: {self.timestamp}
 
--- Pack Size Patterns:
--- Multipack: (\\d+)\\s*[x×]\\s*(\\d+(?:\\.\\d+)?)\\s*(kg|g|ml|l)
--- Single: (\\d+(?:\\.\\d+)?)\\s*(kg|g|ml|l)
+-- Pack Size Parser (etl/pack_size.py):
+-- Multipacks either way round (12 x 400g, 400g x 12), single amounts,
+-- units g/kg/ml/cl/l/oz/lb, decimal commas; weight ranges (2-10kg) skipped
 
 -- Price Bucket Thresholds:
 -- Low: < €15/kg
@@ -533,76 +465,37 @@ Generated: {self.timestamp}
         return pricing_df
     
     # ========== 3. KCAL OUTLIER DETECTION AND REPAIR ==========
-    def fix_kcal_outliers(self):
+    def fix_kcal_outliers(self, products_df: Optional[pd.DataFrame] = None):
         """Detect and repair kcal outliers."""
         logger.info("Starting kcal outlier detection and repair...")
         
-        # Fetch products
-        products = self.supabase.table('foods_published').select('*').execute()
-        products_df = pd.DataFrame(products.data)
+        if products_df is None:
+            products_df = self.load_products()
         
         if products_df.empty:
             return pd.DataFrame()
         
-        # Define form-specific sane ranges
-        kcal_ranges = {
-            'dry': (250, 500),
-            'wet': (40, 150),
-            'freeze_dried': (300, 600),
-            'raw': (120, 300)
-        }
-        
-        # Default range for unknown forms
-        default_range = (40, 600)
-        
-        kcal_fixes = []
-        
-        for _, product in products_df.iterrows():
-            product_key = product.get('product_key')
-            kcal = product.get('kcal_per_100g')
-            form = product.get('form')
-            protein = product.get('protein_percent')
-            fat = product.get('fat_percent')
-            fiber = product.get('fiber_percent', 0)
-            ash = product.get('ash_percent', 0)
-            moisture = product.get('moisture_percent', 0)
-            
-            if pd.notna(kcal) and kcal > 0:
-                # Get appropriate range
-                min_kcal, max_kcal = kcal_ranges.get(form, default_range)
-                
-                # Check if outlier
-                if kcal < min_kcal or kcal > max_kcal:
-                    old_kcal = kcal
-                    new_kcal = None
-                    method = 'cleared'
-                    
-                    # Try to re-estimate using Atwater factors if macros available
-                    if all(pd.notna(x) for x in [protein, fat]) and protein > 0 and fat > 0:
-                        # Calculate carbohydrates by difference
-                        carbs = 100 - protein - fat - (fiber or 0) - (ash or 0) - (moisture or 0)
-                        if carbs < 0:
-                            carbs = 0
-                        
-                        # Atwater factors: protein 4, fat 9, carbs 4 kcal/g
-                        estimated_kcal = (protein * 4) + (fat * 9) + (carbs * 4)
-                        
-                        # Check if estimate is within range
-                        if min_kcal <= estimated_kcal <= max_kcal:
-                            new_kcal = round(estimated_kcal, 1)
-                            method = 'estimated'
-                    
-                    kcal_fixes.append({
-                        'product_key': product_key,
-                        'form': form,
-                        'old_kcal': old_kcal,
-                        'new_kcal': new_kcal,
-                        'method': method,
-                        'kcal_flag': 'outlier_fixed' if new_kcal else 'invalid_cleared',
-                        'kcal_from': 'estimate' if new_kcal else 'cleared'
-                    })
-        
-        kcal_fixes_df = pd.DataFrame(kcal_fixes)
+        kcal = _numeric(products_df, 'kcal_per_100g')
+        form = _column(products_df, 'form')
+        
+        # Form-specific sanity bands and modified Atwater re-estimates
+        nutrition = evaluate_nutrition(
+            _numeric(products_df, 'protein_percent'), _numeric(products_df, 'fat_percent'),
+            _numeric(products_df, 'fiber_percent'), _numeric(products_df, 'ash_percent'),
+            _numeric(products_df, 'moisture_percent'), form.to_numpy(dtype=object), kcal
+        )
+        outlier = nutrition['kcal_outlier']
+        estimable = nutrition['kcal_method'] == KCAL_ESTIMATED
+        
+        kcal_fixes_df = pd.DataFrame({
+            'product_key': _column(products_df, 'product_key'),
+            'form': form,
+            'old_kcal': kcal,
+            'new_kcal': nutrition['kcal_final'],
+            'method': nutrition['kcal_method'],
+            'kcal_flag': np.where(estimable, 'outlier_fixed', 'invalid_cleared'),
+            'kcal_from': np.where(estimable, 'estimate', 'cleared')
+        })[outlier].reset_index(drop=True)
         
         # Calculate statistics
         total_outliers = len(kcal_fixes_df)
@@ -658,13 +551,13 @@ Generated: {self.timestamp}
         return kcal_fixes_df
     
     # ========== 4. BUILD RECONCILED VIEW V2 ==========
-    def build_foods_published_v2(self, classify_df, pricing_df, kcal_fixes_df):
+    def build_foods_published_v2(self, classify_df, pricing_df, kcal_fixes_df,
+                                 products_df: Optional[pd.DataFrame] = None):
         """Build reconciled foods_published_v2 view with all enrichments."""
         logger.info("Building foods_published_v2 reconciled view...")
         
-        # Fetch original data
-        products = self.supabase.table('foods_published').select('*').execute()
-        products_df = pd.DataFrame(products.data)
+        if products_df is None:
+            products_df = self.load_products()
         
         if products_df.empty:
             return pd.DataFrame()
@@ -672,7 +565,7 @@ Generated: {self.timestamp}
         # Keep existing allergen enrichment
         from enrich_food_catalog import FoodCatalogEnricher
         base_enricher = FoodCatalogEnricher()
-        allergens_df = base_enricher.enrich_allergen_groups()
+        allergens_df = base_enricher.enrich_allergen_groups(products_df)
         
         # Start with original data
         v2_df = products_df.copy()
@@ -889,8 +782,7 @@ CREATE INDEX IF NOT EXISTS idx_v2_price_bucket ON foods_published_v2(price_bucke
         logger.info("Generating final quality report v2...")
         
         # Calculate before/after metrics
-        products = self.supabase.table('foods_published').select('*').execute()
-        original_df = pd.DataFrame(products.data)
+        original_df = self.load_products()
         
         total = len(v2_df)
         
@@ -1035,6 +927,31 @@ Actions required before swap:
         
         return report
     
+    # ========== 7. ENRICHMENT DIFF ==========
+    def write_enrichment_diff(self, v2_df):
+        """Write one row per changed (product, field) between foods_published and v2."""
+        original_df = self.load_products()
+        
+        diffs = []
+        if not v2_df.empty:
+            for column in DIFF_COLUMNS:
+                old = _column(original_df, column)
+                new = _column(v2_df, column)
+                changed = _changed(new, old)
+                diffs.append(pd.DataFrame({
+                    'product_key': _column(v2_df, 'product_key')[changed],
+                    'field': column,
+                    'old_value': old[changed],
+                    'new_value': new[changed],
+                }))
+        diff_df = pd.concat(diffs, ignore_index=True) if diffs else pd.DataFrame(
+            columns=['product_key', 'field', 'old_value', 'new_value'])
+        
+        diff_df.to_csv(self.reports_dir / "FOODS_ENRICHMENT_V2_DIFF.csv", index=False)
+        logger.info(f"✓ Enrichment diff: {len(diff_df):,} changed fields")
+        
+        return diff_df
+    
     # ========== MAIN PIPELINE V2 ==========
     def run_enrichment_pipeline_v2(self):
         """Execute the enhanced enrichment pipeline v2."""
@@ -1042,18 +959,23 @@ Actions required before swap:
         logger.info("STARTING FOOD CATALOG ENRICHMENT PIPELINE V2")
         logger.info("=" * 60)
         
+        started = time.monotonic()
+        
         try:
+            # Single paged load shared by every stage
+            products_df = self.load_products(refresh=True)
+            
             # Step 1: Enhanced form and life stage classification
-            classify_df = self.classify_form_life_stage_v2()
+            classify_df = self.classify_form_life_stage_v2(products_df)
             
             # Step 2: Enhanced pricing with pack size parsing
-            pricing_df = self.enrich_pricing_v2()
+            pricing_df = self.enrich_pricing_v2(products_df)
             
             # Step 3: Fix kcal outliers
-            kcal_fixes_df = self.fix_kcal_outliers()
+            kcal_fixes_df = self.fix_kcal_outliers(products_df)
             
             # Step 4: Build reconciled view
-            v2_df = self.build_foods_published_v2(classify_df, pricing_df, kcal_fixes_df)
+            v2_df = self.build_foods_published_v2(classify_df, pricing_df, kcal_fixes_df, products_df)
             
             # Step 5: Run quality gates
             gates_passed, gate_results = self.run_quality_gates_v2(v2_df)
@@ -1061,9 +983,12 @@ Actions required before swap:
             # Step 6: Generate final report
             final_report = self.generate_final_report_v2(v2_df, gates_passed, gate_results)
             
+            # Step 7: Diff against the source table
+            diff_df = self.write_enrichment_diff(v2_df)
+            
             # Print summary
             logger.info("=" * 60)
-            logger.info("ENRICHMENT PIPELINE V2 COMPLETE")
+            logger.info(f"ENRICHMENT PIPELINE V2 COMPLETE ({time.monotonic() - started:.1f}s)")
             logger.info("=" * 60)
             
             print("\n📊 ENRICHMENT V2 SUMMARY")
@@ -1078,6 +1003,7 @@ Actions required before swap:
                 print(f"Weight Extraction: {self.enrichment_stats['pricing']['weight_extracted']:.1f}%")
             if 'kcal_fixes' in self.enrichment_stats:
                 print(f"Kcal Outliers Fixed: {self.enrichment_stats['kcal_fixes']['total_outliers']}")
+            print(f"Changed Fields: {len(diff_df):,}")
             
             print(f"\nQuality Gates: {'✅ PASSED' if gates_passed else '❌ FAILED'}")
             
@@ -1094,6 +1020,7 @@ Actions required before swap:
             print("- /reports/FOODS_KCAL_OUTLIERS_FIXES.md")
             print("- /reports/FOODS_QUALITY_AFTER_V2.md")
             print("- /reports/FOODS_SAMPLE_50.csv")
+            print("- /reports/FOODS_ENRICHMENT_V2_DIFF.csv")
             
             return gates_passed
             
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Per-brand acceptance gate metrics
+
+Gate thresholds live in data/acceptance_gates.yaml. brand_metrics()
+computes every brand's coverage metrics in one groupby over a projected
+catalog frame (load_gate_frame pages only the columns the gates need),
+and apply_gates() evaluates all gates as column comparisons.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import yaml
+
+GATES_FILE = Path(__file__).parent.parent / 'data' / 'acceptance_gates.yaml'
+GATE_COLUMNS = ('product_key', 'brand_slug', 'brand', 'form', 'life_stage', 'ingredients_tokens', 'kcal_per_100g')
+METRIC_COLUMNS = ['brand_slug', 'brand_name', 'sku_count', 'form_pct', 'life_stage_pct', 'ingredients_pct',
+                  'kcal_valid_pct', 'kcal_outliers']
+DEFAULT_KCAL_RANGE = (200, 600)
+# Metrics measured against kcal_range; their labels name the range in use
+KCAL_RANGE_METRICS = ('kcal_valid_pct', 'kcal_outliers')
+
+
+def load_gates(gates_file: Path = GATES_FILE) -> Dict:
+    """Load gate config from YAML"""
+    with open(gates_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def gate_thresholds(config: Dict) -> Dict[str, float]:
+    """Gate name -> threshold (min or max)"""
+    return {name: gate.get('min', gate.get('max')) for name, gate in config.get('gates', {}).items()}
+
+
+def gate_label(gate: Dict, config: Dict) -> str:
+    """Display label of a gate, e.g. 'Kcal Valid (200-600)'"""
+    label = gate.get('label', gate['metric'])
+    if gate['metric'] in KCAL_RANGE_METRICS:
+        low, high = config.get('kcal_range', DEFAULT_KCAL_RANGE)
+        label = f"{label} ({low:g}-{high:g})"
+    return label
+
+
+def load_gate_frame(supabase, table: str = 'foods_published_preview'):
+    """The gate columns of a table, paged by product_key"""
+    from etl.supabase_loader import fetch_frame
+
+    return fetch_frame(supabase, table, ','.join(GATE_COLUMNS), key='product_key')
+
+
+@lru_cache(maxsize=65536)
+def _token_string_count(text: str) -> int:
+    try:
+        tokens = json.loads(text)
+    except (ValueError, TypeError):
+        return 0
+    return len(tokens) if isinstance(tokens, (list, str)) else 0
+
+
+def has_tokens(values: pd.Series) -> np.ndarray:
+    """Non-empty token list (list or JSON-encoded list) per row; each distinct string is parsed once"""
+    result = np.zeros(len(values), dtype=bool)
+    is_list = values.map(lambda v: isinstance(v, list)).to_numpy()
+    if is_list.any():
+        result[is_list] = values[is_list].map(len).to_numpy() > 0
+    is_str = values.map(lambda v: isinstance(v, str)).to_numpy()
+    if is_str.any():
+        codes, uniques = pd.factorize(values[is_str])
+        counts = np.array([_token_string_count(text) for text in uniques], dtype=int)
+        result[is_str] = counts[codes] > 0
+    return result
+
+
+def brand_metrics(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
+    """Coverage metrics per brand_slug (rows without brand_slug are skipped)"""
+    config = config or load_gates()
+    low, high = config.get('kcal_range', DEFAULT_KCAL_RANGE)
+    df = df[df['brand_slug'].notna()] if 'brand_slug' in df.columns else df.iloc[0:0]
+    if df.empty:
+        return pd.DataFrame(columns=METRIC_COLUMNS)
+
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+    kcal = pd.to_numeric(column('kcal_per_100g'), errors='coerce')
+    flags = pd.DataFrame({
+        'brand_slug': df['brand_slug'],
+        'form': column('form').notna(),
+        'life_stage': column('life_stage').notna(),
+        'ingredients': has_tokens(column('ingredients_tokens')),
+        'kcal_valid': kcal.between(low, high),
+        'kcal_outlier': kcal.notna() & ~kcal.between(low, high),
+    })
+    grouped = flags.groupby('brand_slug', sort=False)
+    metrics = pd.DataFrame({
+        'brand_name': column('brand').groupby(df['brand_slug'], sort=False).first(),
+        'sku_count': grouped.size(),
+        'form_pct': grouped['form'].mean() * 100,
+        'life_stage_pct': grouped['life_stage'].mean() * 100,
+        'ingredients_pct': grouped['ingredients'].mean() * 100,
+        'kcal_valid_pct': grouped['kcal_valid'].mean() * 100,
+        'kcal_outliers': grouped['kcal_outlier'].sum().astype(int),
+    })
+    metrics['brand_name'] = metrics['brand_name'].fillna(pd.Series(metrics.index, index=metrics.index))
+    return metrics.rename_axis('brand_slug').reset_index()[METRIC_COLUMNS]
+
+
+def apply_gates(metrics: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
+    """
+    Adds meets_all_gates and failing_gates (names of failed gates) to the
+    metrics, sorted passing brands first then by SKU count
+    """
+    config = config or load_gates()
+    metrics = metrics.copy()
+    passed = {}
+    for name, gate in config.get('gates', {}).items():
+        values = metrics[gate['metric']]
+        ok = pd.Series(True, index=metrics.index)
+        if 'min' in gate:
+            ok &= values >= gate['min']
+        if 'max' in gate:
+            ok &= values <= gate['max']
+        passed[name] = ok
+
+    passed = pd.DataFrame(passed, index=metrics.index)
+    metrics['meets_all_gates'] = passed.all(axis=1)
+    metrics['failing_gates'] = [[name for name, ok in row.items() if not ok]
+                                for row in passed.to_dict('records')]
+    return metrics.sort_values(['meets_all_gates', 'sku_count'], ascending=[False, False])
+
+
+def gate_report(df: pd.DataFrame, config: Optional[Dict] = None) -> pd.DataFrame:
+    """brand_metrics + apply_gates in one call"""
+    config = config or load_gates()
+    return apply_gates(brand_metrics(df, config), config)
+
+
+def failing_reasons(row, config: Optional[Dict] = None) -> List[str]:
+    """'<metric> <value>' for each failed gate of a gate_report row"""
+    config = config or load_gates()
+    reasons = []
+    for name in row['failing_gates']:
+        metric = config['gates'][name]['metric']
+        value = row[metric]
+        reasons.append(f"{name} {value:.1f}%" if metric.endswith('_pct') else f"{name} {value}")
+    return reasons
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Brand phrase normalization (split brands such as "Royal" + "Canin Mini Adult")
+
+Rules come from data/brand_phrase_map.csv. They are indexed once:
+
+- by lowercased source_brand, for rules that need the row's brand to match
+- in a character trie of prefixes, for '*' orphan-fragment rules that match
+  on the product name alone
+
+and the strip_prefix_regex of every rule is compiled once. As before, the
+first rule in file order that applies wins, and stripping is skipped when
+it would leave 5 characters or fewer of the name.
+
+normalize_frame() applies the rules to a DataFrame in one pass over its
+distinct (brand, product_name) pairs; rebuild_product_keys() and
+duplicate_keys() are the vectorized key rebuild and collision report.
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BRAND_MAP_FILE = Path(__file__).parent.parent / 'data' / 'brand_phrase_map.csv'
+ORPHAN = '*'
+MIN_NAME_LENGTH = 5
+_END = ''    # trie terminal key (never a single character)
+
+
+class BrandRule(NamedTuple):
+    order: int                  # position in the map; lower wins
+    source_brand: str
+    prefix: str
+    canonical_brand: str
+    brand_slug: str
+    brand_line: Optional[str]
+    strip_regex: 're.Pattern'
+    confidence: str
+
+
+def _clean(value) -> Optional[str]:
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def load_brand_rules(path: Path = BRAND_MAP_FILE) -> List[BrandRule]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    return rules_from_frame(pd.read_csv(path))
+
+
+def rules_from_frame(brand_map: pd.DataFrame) -> List[BrandRule]:
+    """BrandRule per brand map row, regexes compiled"""
+    rules = []
+    for order, mapping in enumerate(brand_map.to_dict('records')):
+        rules.append(BrandRule(
+            order=order,
+            source_brand=str(mapping['source_brand']),
+            prefix=str(mapping['prefix_from_name']),
+            canonical_brand=mapping['canonical_brand'],
+            brand_slug=mapping['brand_slug'],
+            brand_line=_clean(mapping.get('brand_line')),
+            strip_regex=re.compile(mapping['strip_prefix_regex'], re.IGNORECASE),
+            confidence=mapping.get('confidence'),
+        ))
+    return rules
+
+
+class BrandRuleIndex:
+    """Brand-keyed rules plus a prefix trie of orphan-fragment rules"""
+
+    def __init__(self, rules: List[BrandRule]):
+        self.rules = rules
+        self.by_brand: Dict[str, List[BrandRule]] = {}
+        self.orphan_trie: Dict = {}
+        for rule in rules:
+            if rule.source_brand == ORPHAN:
+                node = self.orphan_trie
+                for char in rule.prefix:
+                    node = node.setdefault(char, {})
+                # Keep the earliest rule for a duplicated prefix
+                node.setdefault(_END, rule)
+            else:
+                self.by_brand.setdefault(rule.source_brand.lower(), []).append(rule)
+        self.match = lru_cache(maxsize=None)(self._match)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('match', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.match = lru_cache(maxsize=None)(self._match)
+
+    @classmethod
+    def from_file(cls, path: Path = BRAND_MAP_FILE) -> 'BrandRuleIndex':
+        return cls(load_brand_rules(path))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _orphan_rules(self, product_name: str) -> List[BrandRule]:
+        """Orphan rules whose prefix + ' ' starts product_name"""
+        found = []
+        node = self.orphan_trie
+        for i, char in enumerate(product_name):
+            node = node.get(char)
+            if node is None:
+                break
+            if _END in node and product_name[i + 1:i + 2] == ' ':
+                found.append(node[_END])
+        return found
+
+    def _match(self, brand: str, product_name: str) -> Optional[BrandRule]:
+        """First rule (in map order) that applies to brand / product_name"""
+        name_lower = product_name.lower()
+        candidates = [rule for rule in self.by_brand.get(brand.lower(), ())
+                      if name_lower.startswith(rule.prefix.lower())]
+        candidates.extend(self._orphan_rules(product_name))
+        return min(candidates, key=lambda rule: rule.order) if candidates else None
+
+    def normalize(self, brand, product_name) -> Tuple[Optional[BrandRule], Optional[str]]:
+        """(rule, new product_name) for a brand/product_name pair; (None, None) if no rule applies"""
+        brand, product_name = _clean(brand), _clean(product_name)
+        if not brand or not product_name:
+            return None, None
+        rule = self.match(brand, product_name)
+        if rule is None:
+            return None, None
+        stripped = rule.strip_regex.sub('', product_name).strip()
+        # Guard against over-stripping
+        return rule, stripped if len(stripped) > MIN_NAME_LENGTH else product_name
+
+
+def normalize_frame(df: pd.DataFrame, index: BrandRuleIndex) -> Tuple[pd.DataFrame, List[Dict]]:
+    """
+    Apply the brand rules to every row; returns the normalized copy of df
+    and one change record per changed row. Each distinct (brand,
+    product_name) pair is resolved once.
+    """
+    df = df.copy()
+    if df.empty or 'brand' not in df.columns or 'product_name' not in df.columns:
+        return df, []
+
+    pairs = pd.MultiIndex.from_arrays([df['brand'].astype(object), df['product_name'].astype(object)])
+    codes, uniques = pd.factorize(pairs)
+    resolved = [index.normalize(brand, name) for brand, name in uniques]
+
+    rule_of_row = [resolved[code] if code >= 0 else (None, None) for code in codes]
+    changed = np.array([rule is not None for rule, _ in rule_of_row], dtype=bool)
+    if not changed.any():
+        return df, []
+
+    rules = [rule for rule, _ in rule_of_row if rule is not None]
+    names = [name for rule, name in rule_of_row if rule is not None]
+    product_ids = df.loc[changed, 'product_id'] if 'product_id' in df.columns else [None] * len(rules)
+
+    changes = [{
+        'product_id': product_id,
+        'old_brand': _clean(brand),
+        'old_product_name': _clean(old_name),
+        'new_brand': rule.canonical_brand,
+        'new_brand_slug': rule.brand_slug,
+        'brand_line': rule.brand_line,
+        'confidence': rule.confidence,
+        'new_product_name': new_name,
+    } for product_id, brand, old_name, rule, new_name in zip(
+        product_ids, df.loc[changed, 'brand'], df.loc[changed, 'product_name'], rules, names)]
+
+    df.loc[changed, 'brand'] = [rule.canonical_brand for rule in rules]
+    df.loc[changed, 'brand_slug'] = [rule.brand_slug for rule in rules]
+    df.loc[changed, 'product_name'] = names
+
+    lines = [rule.brand_line for rule in rules]
+    with_line = changed.copy()
+    with_line[changed] = [line is not None for line in lines]
+    if with_line.any():
+        if 'brand_line' not in df.columns:
+            df['brand_line'] = None
+        df.loc[with_line, 'brand_line'] = [line for line in lines if line is not None]
+    return df, changes
+
+
+def rebuild_product_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Set name_slug and product_key (brand_slug|name_slug|form) on every row"""
+    def column(name, default):
+        if name not in df.columns:
+            return pd.Series(default, index=df.index)
+        return df[name].fillna(default).astype(str)
+
+    brand_slug = column('brand_slug', 'unknown').str.lower().str.replace(' ', '_', regex=False)
+    name_slug = (column('product_name', '').str.lower()
+                 .str.replace(r'[^a-z0-9]+', '_', regex=True).str.strip('_'))
+    form = column('form', 'unknown').str.lower()
+
+    df = df.copy()
+    df['product_key'] = brand_slug + '|' + name_slug + '|' + form
+    df['name_slug'] = name_slug
+    return df
+
+
+def duplicate_keys(df: pd.DataFrame, key: str = 'product_key') -> pd.DataFrame:
+    """
+    One row per duplicated key, largest first: product_key, count,
+    product_ids, brands and two sample names
+    """
+    dupes = df[df.duplicated(key, keep=False)]
+    if dupes.empty:
+        return pd.DataFrame(columns=[key, 'count', 'product_ids', 'brands', 'names'])
+    grouped = dupes.groupby(key, sort=False)
+    result = pd.DataFrame({
+        'count': grouped.size(),
+        'product_ids': grouped['product_id'].agg(list) if 'product_id' in dupes.columns else None,
+        'brands': grouped['brand'].agg(lambda s: list(s.unique())),
+        'names': grouped['product_name'].agg(lambda s: list(s.unique())[:2]),
+    }).reset_index()
+    return result.sort_values('count', ascending=False, kind='stable').reset_index(drop=True)
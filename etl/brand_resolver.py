@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+One brand resolver for every job
+
+Compiles the brand data files into a single index:
+
+- data/canonical_brand_map.yaml   brand slug -> canonical brand slug
+- data/brand_family_map.yaml      families: aliases, detect patterns, series rules
+- data/brand_phrase_map.csv       split-brand rules (etl/brand_normalization.py)
+- data/brand_alias_table.csv      alias -> canonical brand
+- data/brand_alias_map.yaml       canonical brand -> aliases
+- data/brand_alias_map_v2.yaml    canonical brand -> aliases (fuzzy-generated)
+
+Sources are listed from most to least trusted; the first source to claim
+an alias keeps it (canonical_brand_map.yaml slugs are merged before the
+alias maps), and v2 aliases are not used as product name prefixes.
+The compiled index is pickled to data/cache/ together with a hash of the
+source files and of this module, and only rebuilt when one of them
+changes, so jobs do not re-parse YAML at startup.
+
+Lookups: canonical() / brand_slug() are O(1) dict lookups on a normalized
+key, brand_from_name() is a longest-prefix match of known brand phrases on
+a product name (word trie), family() / resolve_family() give the brand
+family and series, and phrase_rules is the split-brand rule index.
+"""
+import hashlib
+import pickle
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from etl.brand_normalization import BrandRuleIndex, load_brand_rules
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+CACHE_FILE = DATA_DIR / 'cache' / 'brand_resolver.pkl'
+ARTIFACT_VERSION = 1
+
+SOURCES = (
+    'canonical_brand_map.yaml',
+    'brand_family_map.yaml',
+    'brand_phrase_map.csv',
+    'brand_alias_table.csv',
+    'brand_alias_map.yaml',
+    'brand_alias_map_v2.yaml',
+)
+
+_APOSTROPHES = re.compile(r"['’`]")
+_NON_KEY = re.compile(r'[^a-z0-9]+')
+_WORD = re.compile(r"[\w'’&+]+")
+_END = '$'
+
+
+def brand_key(text) -> str:
+    """Lookup key for a brand or alias: "Hill's" / "hills" / "HILLS" -> 'hills', 'Royal|Canin' -> 'royal_canin'"""
+    if text is None or (isinstance(text, float) and text != text):
+        return ''
+    text = _APOSTROPHES.sub('', str(text).lower())
+    return _NON_KEY.sub('_', text).strip('_')
+
+
+def _words(text: str) -> List[str]:
+    return [brand_key(word) for word in _WORD.findall(text.lower())]
+
+
+def source_signature(data_dir: Path = DATA_DIR) -> str:
+    """Hash of the source files' contents (missing files count as empty) and of the compiler"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(ARTIFACT_VERSION).encode())
+    digest.update(Path(__file__).read_bytes())
+    for name in SOURCES:
+        path = Path(data_dir) / name
+        digest.update(name.encode())
+        digest.update(path.read_bytes() if path.exists() else b'')
+    return digest.hexdigest()
+
+
+class BrandResolver:
+    """Compiled brand index; build with compile_resolver() or load with get_brand_resolver()"""
+
+    def __init__(self, signature: str = ''):
+        self.signature = signature
+        self.aliases: Dict[str, str] = {}           # brand key -> canonical brand
+        self.slugs: Dict[str, str] = {}             # canonical brand -> brand slug
+        self.canonical_slugs: Dict[str, str] = {}   # brand slug -> canonical slug (canonical_brand_map.yaml)
+        self.brand_families: Dict[str, str] = {}    # brand key -> family slug
+        self.families: Dict[str, Dict] = {}         # family slug -> canonical_brand, detect, series
+        self.phrase_trie: Dict = {}                 # word trie of brand phrases -> canonical brand
+        self.phrase_rules = BrandRuleIndex([])
+
+    # -- building -----------------------------------------------------------
+
+    def add_alias(self, alias, canonical: str, phrase: bool = True) -> None:
+        """Register an alias; phrase=False keeps it out of brand_from_name"""
+        key = brand_key(alias)
+        if not key or not canonical:
+            return
+        self.aliases.setdefault(key, canonical)
+        self.slugs.setdefault(canonical, brand_key(canonical))
+        words = _words(str(alias)) if phrase else None
+        if words:
+            node = self.phrase_trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node.setdefault(_END, canonical)
+
+    def add_family(self, family: Dict) -> None:
+        slug = family['family_slug']
+        canonical = family.get('canonical_brand') or slug
+        self.families[slug] = {
+            'canonical_brand': canonical,
+            'detect': [re.compile(pattern) for pattern in family.get('detect_patterns') or []],
+            'series': [(rule['series_slug'], re.compile('|'.join(f'(?:{p})' for p in rule['patterns'])))
+                       for rule in family.get('series_rules') or [] if rule.get('patterns')],
+        }
+        self.slugs.setdefault(canonical, slug)
+        for alias in [canonical, slug] + list(family.get('aliases') or []):
+            self.brand_families.setdefault(brand_key(alias), slug)
+            self.add_alias(alias, canonical)
+
+    # -- lookups ------------------------------------------------------------
+
+    def canonical(self, brand) -> Optional[str]:
+        """Canonical brand name for a brand or alias (None if unknown)"""
+        return self.aliases.get(brand_key(brand))
+
+    def brand_slug(self, brand) -> Optional[str]:
+        """Canonical brand slug for a brand, alias or slug (None if unknown)"""
+        key = brand_key(brand)
+        if key in self.canonical_slugs:
+            return self.canonical_slugs[key]
+        canonical = self.aliases.get(key)
+        return self.slugs.get(canonical) if canonical else None
+
+    def brand_from_name(self, product_name) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (canonical brand, matched words) for the longest known brand phrase
+        at the start of a product name; (None, None) if it starts with none
+        """
+        if not product_name or not isinstance(product_name, str):
+            return None, None
+        words = _WORD.findall(product_name)
+        node, best, length = self.phrase_trie, None, 0
+        for i, word in enumerate(words):
+            node = node.get(brand_key(word))
+            if node is None:
+                break
+            if _END in node:
+                best, length = node[_END], i + 1
+        return (best, ' '.join(words[:length])) if best else (None, None)
+
+    def family(self, brand, product_name: Optional[str] = None) -> Optional[str]:
+        """Family slug by alias, else by the families' detect patterns on brand + name"""
+        key = brand_key(brand)
+        if key in self.brand_families:
+            return self.brand_families[key]
+        slug = self.canonical_slugs.get(key)
+        if slug in self.brand_families:
+            return self.brand_families[slug]
+        text = f"{brand or ''} {product_name or ''}".lower()
+        for family_slug, family in self.families.items():
+            if any(pattern.search(text) for pattern in family['detect']):
+                return family_slug
+        return None
+
+    def series(self, family_slug: Optional[str], product_name) -> Optional[str]:
+        """First series rule of the family matching the product name"""
+        family = self.families.get(family_slug)
+        if not family or not product_name or not isinstance(product_name, str):
+            return None
+        text = product_name.lower()
+        for series_slug, pattern in family['series']:
+            if pattern.search(text):
+                return series_slug
+        return None
+
+    def resolve_family(self, brand, product_name: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """(family slug or 'other', series)"""
+        family_slug = self.family(brand, product_name) or 'other'
+        return family_slug, self.series(family_slug, product_name)
+
+
+def compile_resolver(data_dir: Path = DATA_DIR) -> BrandResolver:
+    """Build the resolver from the source files"""
+    import csv
+    import yaml
+
+    data_dir = Path(data_dir)
+    resolver = BrandResolver(source_signature(data_dir))
+
+    def read_yaml(name):
+        path = data_dir / name
+        if not path.exists():
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+
+    resolver.canonical_slugs = {brand_key(k): v for k, v in
+                                (read_yaml('canonical_brand_map.yaml').get('canonical_brand_mappings') or {}).items()}
+
+    for family in read_yaml('brand_family_map.yaml').get('families') or []:
+        resolver.add_family(family)
+
+    phrase_rules = load_brand_rules(data_dir / 'brand_phrase_map.csv')
+    resolver.phrase_rules = BrandRuleIndex(phrase_rules)
+    for rule in phrase_rules:
+        resolver.add_alias(rule.canonical_brand, rule.canonical_brand)
+        resolver.slugs.setdefault(rule.canonical_brand, rule.brand_slug)
+        if rule.source_brand != '*':
+            resolver.add_alias(f"{rule.source_brand} {rule.prefix}", rule.canonical_brand)
+
+    alias_table = data_dir / 'brand_alias_table.csv'
+    if alias_table.exists():
+        with open(alias_table, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                resolver.add_alias(row['canonical_brand'], row['canonical_brand'])
+                resolver.add_alias(row['alias'], row['canonical_brand'])
+
+    # Canonical slugs resolve to the brand of that slug. They are the most
+    # trusted source, so they replace any alias claimed so far and are merged
+    # before the alias maps; brands no source names yet are named after the
+    # slug once the alias maps are in
+    def merge_canonical_slugs(final: bool):
+        names = {}
+        for canonical, slug in resolver.slugs.items():
+            names.setdefault(slug, canonical)
+        for slug, canonical_slug in resolver.canonical_slugs.items():
+            canonical = names.get(canonical_slug)
+            if not canonical and final:
+                canonical = canonical_slug.replace('_', ' ').title()
+                resolver.slugs.setdefault(canonical, canonical_slug)
+                names[canonical_slug] = canonical
+            if canonical:
+                resolver.aliases[slug] = canonical
+
+    merge_canonical_slugs(final=False)
+    # v2 aliases are fuzzy-generated: alias lookups only, not name prefixes
+    for name, phrase in (('brand_alias_map.yaml', True), ('brand_alias_map_v2.yaml', False)):
+        for canonical, aliases in read_yaml(name).items():
+            resolver.add_alias(canonical, canonical)
+            for alias in aliases or []:
+                resolver.add_alias(alias, canonical, phrase)
+    merge_canonical_slugs(final=True)
+    return resolver
+
+
+def load_resolver(data_dir: Path = DATA_DIR, cache_file: Path = CACHE_FILE) -> BrandResolver:
+    """The cached resolver if its sources are unchanged, else a fresh build (written back to the cache)"""
+    signature = source_signature(data_dir)
+    cache_file = Path(cache_file)
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                resolver = pickle.load(f)
+            if getattr(resolver, 'signature', None) == signature:
+                return resolver
+        except Exception:
+            pass
+
+    resolver = compile_resolver(data_dir)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(resolver, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(cache_file)
+    except OSError:
+        pass
+    return resolver
+
+
+_resolver = None
+
+
+def get_brand_resolver() -> BrandResolver:
+    """Process-wide resolver"""
+    global _resolver
+    if _resolver is None:
+        _resolver = load_resolver()
+    return _resolver
@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Single-pass, chunked catalog audit
+
+A catalog (CSV file, Parquet file or directory, or a Supabase table) is
+read once as a stream of column-projected chunks. Every health check is an
+AuditRule that evaluates a chunk with vectorized pandas operations and
+keeps only small running aggregates (counts, a few samples, 64-bit key
+hashes), so peak memory is one chunk plus the rule state however large the
+table is. run_audit() feeds each chunk to every rule and collects their
+results at the end.
+"""
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 50000
+SAMPLES = 5
+
+SLUG_COLUMNS = ('brand_slug', 'name_slug')
+INVALID_SLUG = r'[^a-z0-9_-]'
+COVERAGE_FIELDS = ('form', 'life_stage', 'kcal_per_100g', 'ingredients_tokens', 'price_per_kg_eur')
+LIFE_STAGE_HINT = 'Puppy|Junior|Adult|Senior|Ageing|Mature'
+
+
+def _str_values(values: pd.Series) -> pd.Series:
+    """The string values of a column (other types dropped)"""
+    if pd.api.types.is_string_dtype(values.dtype) and values.dtype != object:
+        return values.dropna().astype(object)
+    if values.dtype != object:
+        return values.iloc[0:0].astype(object)
+    return values[values.map(type).eq(str).to_numpy()]
+
+
+def _records(df: pd.DataFrame, columns: Sequence[str], limit: int) -> List[Dict]:
+    return df[[c for c in columns if c in df.columns]].head(limit).to_dict('records')
+
+
+class AuditRule:
+    """A health check: observe() sees every chunk, result() reports once at the end"""
+
+    name = ''
+    columns: Optional[Tuple[str, ...]] = ()   # columns read; None means every column
+
+    def observe(self, chunk: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class CoverageRule(AuditRule):
+    """Percentage of rows with a value, per field"""
+
+    name = 'coverage'
+
+    def __init__(self, fields: Sequence[str] = COVERAGE_FIELDS):
+        self.columns = tuple(fields)
+        self.rows = 0
+        self.filled: Dict[str, int] = {}
+
+    def observe(self, chunk):
+        self.rows += len(chunk)
+        for field in self.columns:
+            if field in chunk.columns:
+                self.filled[field] = self.filled.get(field, 0) + int(chunk[field].notna().sum())
+
+    def result(self):
+        return {field: round(filled / self.rows * 100, 1) if self.rows else 0.0
+                for field, filled in self.filled.items()}
+
+
+class BrandCountsRule(AuditRule):
+    """Distinct brands, SKUs per brand slug and Royal Canin slug variants"""
+
+    name = 'brands'
+    columns = ('brand', 'brand_slug')
+
+    def __init__(self, top: int = 10):
+        self.top = top
+        self.brands: Set = set()
+        self.slug_counts = pd.Series(dtype='int64')
+        self.seen_brand = False
+
+    def observe(self, chunk):
+        if 'brand' in chunk.columns:
+            self.seen_brand = True
+            self.brands.update(chunk['brand'].dropna().unique())
+        if 'brand_slug' in chunk.columns:
+            counts = chunk['brand_slug'].astype(object).value_counts()
+            self.slug_counts = self.slug_counts.add(counts, fill_value=0).astype('int64')
+
+    def result(self):
+        if not self.seen_brand:
+            return {}
+        slugs = [slug for slug in self.slug_counts.index if isinstance(slug, str)]
+        top = self.slug_counts.sort_values(ascending=False, kind='stable').head(self.top)
+        return {'distinct_brands': len(self.brands), 'distinct_brand_slugs': len(self.slug_counts),
+                'top_brand_slugs': {slug: int(count) for slug, count in top.items()},
+                'royal_canin_variants': sorted(slug for slug in slugs if 'royal' in slug)}
+
+
+class ValueCountsRule(AuditRule):
+    """Row count per value of one column (nulls left out)"""
+
+    def __init__(self, column: str):
+        self.name = f'{column}_counts'
+        self.columns = (column,)
+        self.counts = pd.Series(dtype='int64')
+
+    def observe(self, chunk):
+        column = self.columns[0]
+        if column in chunk.columns:
+            counts = chunk[column].astype(object).value_counts()
+            self.counts = self.counts.add(counts, fill_value=0).astype('int64')
+
+    def result(self):
+        return {value: int(count) for value, count in
+                self.counts.sort_values(ascending=False, kind='stable').items()}
+
+
+class StringifiedArrayRule(AuditRule):
+    """
+    Columns where most non-null values are JSON arrays/objects stored as
+    text. Every object/string column of the data is checked unless
+    `array_columns` names the columns to check (and read).
+    """
+
+    name = 'stringified_arrays'
+
+    def __init__(self, array_columns: Optional[Sequence[str]] = None, threshold: float = 0.5):
+        self.columns = tuple(array_columns) if array_columns is not None else None
+        self.threshold = threshold
+        self.non_null: Dict[str, int] = {}
+        self.stringified: Dict[str, int] = {}
+        self.samples: Dict[str, str] = {}
+
+    def observe(self, chunk):
+        candidates = chunk.columns if self.columns is None else self.columns
+        for column in candidates:
+            if column not in chunk.columns:
+                continue
+            values = chunk[column]
+            self.non_null[column] = self.non_null.get(column, 0) + int(values.notna().sum())
+            text = _str_values(values)
+            if text.empty:
+                continue
+            first, last = text.str[:1], text.str[-1:]
+            looks_json = ((first == '[') & (last == ']')) | ((first == '{') & (last == '}'))
+            count = int(looks_json.sum())
+            if count:
+                self.stringified[column] = self.stringified.get(column, 0) + count
+                self.samples.setdefault(column, text[looks_json].iloc[0])
+
+    def result(self):
+        return [{'column': column, 'sample': self.samples[column], 'affected_rows': self.non_null[column]}
+                for column, count in self.stringified.items()
+                if count > self.non_null[column] * self.threshold]
+
+
+class InvalidSlugRule(AuditRule):
+    """Slugs with characters outside [a-z0-9_-]"""
+
+    name = 'invalid_slugs'
+
+    def __init__(self, slug_columns: Sequence[str] = SLUG_COLUMNS):
+        self.columns = tuple(slug_columns)
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, List] = {}
+
+    def observe(self, chunk):
+        for column in self.columns:
+            if column not in chunk.columns:
+                continue
+            invalid = chunk[column].astype('string').str.contains(INVALID_SLUG, regex=True, na=False)
+            count = int(invalid.sum())
+            if count:
+                self.counts[column] = self.counts.get(column, 0) + count
+                samples = self.samples.setdefault(column, [])
+                samples.extend(chunk.loc[invalid.to_numpy(), column].head(SAMPLES - len(samples)).tolist())
+
+    def result(self):
+        return [{'column': column, 'count': count, 'samples': self.samples[column]}
+                for column, count in self.counts.items()]
+
+
+class DuplicateKeyRule(AuditRule):
+    """
+    Rows sharing a key; keys are kept as 64-bit hashes, not strings. Each
+    chunk's hashes become a sorted run and a run is merged into the one
+    before it once that is no longer larger (so every hash is re-sorted
+    O(log n) times, not once per chunk); counts come from one np.unique
+    over all runs in result().
+    """
+
+    name = 'duplicate_keys'
+
+    def __init__(self, key: str = 'product_key'):
+        self.key = key
+        self.columns = (key,)
+        self.runs: List[np.ndarray] = []
+        self.samples: List = []
+        self.present = False
+
+    def observe(self, chunk):
+        if self.key not in chunk.columns:
+            return
+        self.present = True
+        if chunk.empty:
+            return
+        keys = chunk[self.key].astype(object)
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        if len(self.samples) < SAMPLES:
+            repeated = pd.Series(hashes).duplicated().to_numpy().copy()
+            for run in self.runs:
+                pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+                repeated |= run[pos] == hashes
+            for key in pd.unique(keys[repeated]):
+                if key not in self.samples and len(self.samples) < SAMPLES:
+                    self.samples.append(key)
+        self.runs.append(np.sort(hashes))
+        while len(self.runs) > 1 and len(self.runs[-2]) <= len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]))
+
+    def result(self):
+        if not self.present:
+            return {}
+        hashes, counts = np.unique(np.concatenate(self.runs), return_counts=True)
+        duplicated = counts[counts > 1]
+        samples = []
+        for key in self.samples:
+            h = pd.util.hash_pandas_object(pd.Series([key], dtype=object), index=False).to_numpy()[0]
+            samples.append({self.key: key, 'count': int(counts[np.searchsorted(hashes, h)])})
+        return {'total_duplicates': int(duplicated.sum()), 'unique_keys': int(len(duplicated)),
+                'samples': samples}
+
+
+class RangeOutlierRule(AuditRule):
+    """Numeric values outside [low, high] (first present column of `candidates` is used)"""
+
+    def __init__(self, name: str, candidates: Sequence[str], low: float, high: float,
+                 sample_columns: Sequence[str] = ('brand', 'product_name')):
+        self.name = name
+        self.candidates = tuple(candidates)
+        self.low, self.high = low, high
+        self.sample_columns = tuple(sample_columns)
+        self.columns = self.candidates + self.sample_columns
+        self.column: Optional[str] = None
+        self.count = 0
+        self.samples: List[Dict] = []
+
+    def observe(self, chunk):
+        column = self.column or next((c for c in self.candidates if c in chunk.columns), None)
+        if column is None or column not in chunk.columns:
+            return
+        self.column = column
+        values = pd.to_numeric(chunk[column], errors='coerce')
+        outside = ((values < self.low) | (values > self.high)).to_numpy()
+        self.count += int(outside.sum())
+        if outside.any() and len(self.samples) < SAMPLES:
+            self.samples.extend(_records(chunk[outside], self.sample_columns + (column,),
+                                         SAMPLES - len(self.samples)))
+
+    def result(self):
+        return {'column': self.column, 'count': self.count, 'samples': self.samples} if self.column else {}
+
+
+class LifeStageInferableRule(AuditRule):
+    """Rows without life_stage whose name carries a life stage word"""
+
+    name = 'life_stage_inferable'
+    columns = ('life_stage', 'product_name')
+
+    def __init__(self, pattern: str = LIFE_STAGE_HINT):
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.count = 0
+
+    def observe(self, chunk):
+        if 'life_stage' in chunk.columns and 'product_name' in chunk.columns:
+            names = chunk.loc[chunk['life_stage'].isna().to_numpy(), 'product_name'].astype('string')
+            self.count += int(names.str.contains(self.pattern, na=False).sum())
+
+    def result(self):
+        return self.count
+
+
+class AllergenDefaultRule(AuditRule):
+    """has_chicken = False on rows without ingredients (a default, not a finding)"""
+
+    name = 'allergen_false_defaults'
+    columns = ('ingredients_tokens', 'has_chicken')
+
+    def __init__(self):
+        self.count = 0
+
+    def observe(self, chunk):
+        if 'ingredients_tokens' in chunk.columns and 'has_chicken' in chunk.columns:
+            self.count += int((chunk['ingredients_tokens'].isna() & chunk['has_chicken'].eq(False)).sum())
+
+    def result(self):
+        return self.count
+
+
+class BrandSplitRule(AuditRule):
+    """Rows whose brand is a split fragment (brand phrase rules of the brand resolver)"""
+
+    name = 'brand_splits'
+    columns = ('brand', 'product_name')
+
+    def __init__(self, index=None):
+        if index is None:
+            from etl.brand_resolver import get_brand_resolver
+            index = get_brand_resolver().phrase_rules
+        self.index = index
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, List[Dict]] = {}
+
+    def observe(self, chunk):
+        if 'brand' not in chunk.columns or 'product_name' not in chunk.columns:
+            return
+        pairs = pd.MultiIndex.from_arrays([chunk['brand'].astype(object), chunk['product_name'].astype(object)])
+        codes, uniques = pd.factorize(pairs)
+        patterns = np.array([self._pattern(brand, name) for brand, name in uniques] + [None], dtype=object)
+        row_patterns = pd.Series(patterns[codes], index=chunk.index)   # code -1 -> None
+        for pattern, rows in row_patterns.dropna().groupby(row_patterns.dropna()).groups.items():
+            self.counts[pattern] = self.counts.get(pattern, 0) + len(rows)
+            samples = self.samples.setdefault(pattern, [])
+            if len(samples) < 3:
+                samples.extend(_records(chunk.loc[rows], ('brand', 'product_name'), 3 - len(samples)))
+
+    def _pattern(self, brand, name) -> Optional[str]:
+        rule, _ = self.index.normalize(brand, name)
+        return f"{rule.source_brand}|{rule.prefix}" if rule else None
+
+    def result(self):
+        return [{'pattern': pattern, 'count': count, 'samples': self.samples[pattern]}
+                for pattern, count in sorted(self.counts.items(), key=lambda item: -item[1])]
+
+
+def default_rules(brand_index=None, coverage_fields: Sequence[str] = COVERAGE_FIELDS) -> List[AuditRule]:
+    """The catalog health checks"""
+    return [
+        CoverageRule(coverage_fields),
+        BrandCountsRule(),
+        StringifiedArrayRule(),
+        InvalidSlugRule(),
+        DuplicateKeyRule(),
+        RangeOutlierRule('kcal_outliers', ('kcal_per_100g',), 40, 600),
+        RangeOutlierRule('price_outliers', ('price_per_kg_eur', 'price_per_kg'), 1, 100),
+        LifeStageInferableRule(),
+        AllergenDefaultRule(),
+        BrandSplitRule(brand_index),
+    ]
+
+
+def required_columns(rules: Iterable[AuditRule]) -> Optional[List[str]]:
+    """Union of the rules' columns; None if some rule needs every column"""
+    columns: List[str] = []
+    for rule in rules:
+        if rule.columns is None:
+            return None
+        columns.extend(c for c in rule.columns if c not in columns)
+    return columns
+
+
+def iter_chunks(source, columns: Optional[Sequence[str]] = None, chunksize: int = CHUNK_SIZE,
+                supabase=None, key: str = 'product_key') -> Iterator[pd.DataFrame]:
+    """
+    Column-projected chunks of a CSV file, a Parquet file or directory, or
+    (with `supabase`) a table paged by `key`. Requested columns that the
+    source does not have are left out.
+    """
+    if supabase is not None:
+        from etl.supabase_loader import iter_pages
+
+        select = ','.join(columns) if columns else '*'
+        batch: List[Dict] = []
+        for page in iter_pages(supabase, source, select, key=key):
+            batch.extend(page)
+            if len(batch) >= chunksize:
+                yield pd.DataFrame(batch)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch)
+        return
+
+    path = Path(source)
+    if path.is_dir() or path.suffix == '.parquet':
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(str(path), format='parquet', partitioning='hive')
+        names = None if columns is None else [c for c in columns if c in dataset.schema.names]
+        for batch in dataset.to_batches(columns=names, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+        return
+
+    wanted = None if columns is None else set(columns)
+    usecols = None if wanted is None else (lambda column: column in wanted)
+    yield from pd.read_csv(path, usecols=usecols, chunksize=chunksize, low_memory=False)
+
+
+def run_audit(chunks: Iterable[pd.DataFrame], rules: Sequence[AuditRule]) -> Dict:
+    """Feed every chunk to every rule; returns rows, columns, chunks and each rule's result by name"""
+    rows, n_chunks, columns = 0, 0, []
+    for chunk in chunks:
+        rows += len(chunk)
+        n_chunks += 1
+        columns.extend(c for c in chunk.columns if c not in columns)
+        for rule in rules:
+            rule.observe(chunk)
+    report = {'rows': rows, 'columns': columns, 'chunks': n_chunks}
+    for rule in rules:
+        report[rule.name] = rule.result()
+    return report
+
+
+def audit_source(source, rules: Optional[Sequence[AuditRule]] = None, chunksize: int = CHUNK_SIZE,
+                 supabase=None, key: str = 'product_key') -> Dict:
+    """One chunked pass over a source with the given (default: all) rules"""
+    rules = list(rules) if rules is not None else default_rules()
+    chunks = iter_chunks(source, required_columns(rules), chunksize, supabase, key)
+    return run_audit(chunks, rules)
+
+
+def count_rows(source, supabase=None, key: str = 'product_key') -> int:
+    """Row count of a source, reading a single column"""
+    if supabase is not None:
+        resp = supabase.table(source).select(key, count='exact', head=True).execute()
+        return resp.count or 0
+    path = Path(source)
+    if path.is_dir() or path.suffix == '.parquet':
+        import pyarrow.dataset as ds
+        return ds.dataset(str(path), format='parquet', partitioning='hive').count_rows()
+    first = pd.read_csv(path, nrows=0).columns[:1]
+    return sum(len(chunk) for chunk in pd.read_csv(path, usecols=list(first), chunksize=CHUNK_SIZE))
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Columnar local catalog snapshots (Parquet)
+
+export_snapshot() pulls foods_canonical and the published views out of
+Supabase once and writes each as a Parquet dataset partitioned by form
+(data/snapshots/<name>/<table>/form=dry/...). Token columns are stored as
+real list<string> columns and brand/brand_slug/form are dictionary
+encoded, so analysis scripts no longer re-parse array strings or pull the
+catalog from the database on every run. import_csv() converts the older
+foods_canonical_enriched_SNAPSHOT_*.csv exports to the same layout.
+
+load_snapshot() reads a table back through a memory-mapped dataset, with
+optional column projection and filters that prune partitions and row
+groups before anything is decoded.
+"""
+import ast
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_DIR = Path(__file__).parent.parent / 'data' / 'snapshots'
+LATEST = 'LATEST'
+MANIFEST = 'manifest.json'
+
+TABLES = ('foods_canonical', 'foods_published_preview', 'foods_published_prod')
+KEY = 'product_key'
+PARTITION_COLUMN = 'form'
+LIST_COLUMNS = ('ingredients_tokens', 'available_countries', 'allergens')
+DICTIONARY_COLUMNS = ('brand', 'brand_slug')
+
+
+def parse_list(value) -> Optional[List[str]]:
+    """A token list from a list, JSON/Python array string or comma-separated string"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [str(v) for v in list(value)]
+    text = str(value).strip()
+    if text in ('', 'null', 'None', 'nan'):
+        return None
+    if text[0] in '[{':
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                parsed = parse(text)
+            except (ValueError, SyntaxError):
+                continue
+            return [str(v) for v in parsed] if isinstance(parsed, (list, tuple, set)) else None
+        text = text.strip('[]{}')
+    return [part.strip().strip('"\'') for part in text.split(',') if part.strip()]
+
+
+def _to_json(value):
+    return json.dumps(value, default=str) if isinstance(value, (dict, list, tuple)) else value
+
+
+def snapshot_table(df: pd.DataFrame):
+    """Arrow table for a snapshot: list-typed token columns, dictionary-encoded brands, sorted by brand"""
+    import pyarrow as pa
+
+    df = df.copy()
+    for column in df.columns:
+        if column in LIST_COLUMNS:
+            df[column] = pd.Series([parse_list(v) for v in df[column]], index=df.index, dtype=object)
+        elif df[column].dtype == object:
+            # JSONB objects (sources, ...) are kept as JSON text
+            df[column] = df[column].map(_to_json)
+    sort = [c for c in ('brand_slug', KEY) if c in df.columns]
+    if sort:
+        df = df.sort_values(sort, kind='stable', na_position='last')
+
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    for index, field in enumerate(table.schema):
+        if pa.types.is_null(field.type) and field.name not in LIST_COLUMNS:
+            table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+    for column in LIST_COLUMNS:
+        if column in table.column_names and not pa.types.is_list(table.schema.field(column).type):
+            index = table.schema.get_field_index(column)
+            table = table.set_column(index, column, table.column(column).cast(pa.list_(pa.string())))
+    for column in DICTIONARY_COLUMNS:
+        if column in table.column_names:
+            index = table.schema.get_field_index(column)
+            table = table.set_column(index, column, table.column(column).dictionary_encode())
+    return table
+
+
+def write_table(df: pd.DataFrame, snapshot: Path, table: str) -> Dict:
+    """Write one table into a snapshot directory; returns its manifest entry"""
+    import pyarrow.dataset as ds
+
+    arrow = snapshot_table(df)
+    partitioning = [PARTITION_COLUMN] if PARTITION_COLUMN in arrow.column_names else None
+    ds.write_dataset(arrow, str(Path(snapshot) / table), format='parquet', partitioning=partitioning,
+                     partitioning_flavor='hive' if partitioning else None,
+                     existing_data_behavior='delete_matching')
+    return {'rows': arrow.num_rows, 'columns': arrow.column_names}
+
+
+def _write_manifest(snapshot: Path, source: str, tables: Dict[str, Dict], root: Path) -> None:
+    manifest = {'created_at': datetime.now().isoformat(timespec='seconds'), 'source': source, 'tables': tables}
+    (snapshot / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    (root / LATEST).write_text(snapshot.name)
+
+
+def _new_snapshot(root: Path, name: Optional[str]) -> Path:
+    snapshot = Path(root) / (name or datetime.now().strftime('%Y%m%d_%H%M%S'))
+    snapshot.mkdir(parents=True, exist_ok=True)
+    return snapshot
+
+
+def export_snapshot(supabase, tables: Sequence[str] = TABLES, root: Path = SNAPSHOT_DIR,
+                    name: Optional[str] = None, columns: str = '*') -> Path:
+    """Export tables from Supabase (keyset-paged by product_key) into a new snapshot"""
+    from etl.supabase_loader import fetch_frame
+
+    root = Path(root)
+    snapshot = _new_snapshot(root, name)
+    written = {}
+    for table in tables:
+        written[table] = write_table(fetch_frame(supabase, table, columns, key=KEY), snapshot, table)
+    _write_manifest(snapshot, 'supabase', written, root)
+    return snapshot
+
+
+def import_csv(path, table: str = 'foods_canonical', root: Path = SNAPSHOT_DIR,
+               name: Optional[str] = None) -> Path:
+    """Convert a CSV export (e.g. foods_canonical_enriched_SNAPSHOT_*.csv) into a snapshot"""
+    root = Path(root)
+    if name is None:
+        stamp = re.search(r'(\d{8}_\d{6})', Path(path).name)
+        name = stamp.group(1) if stamp else None
+    snapshot = _new_snapshot(root, name)
+    written = {table: write_table(pd.read_csv(path, low_memory=False), snapshot, table)}
+    _write_manifest(snapshot, str(path), written, root)
+    return snapshot
+
+
+def latest_snapshot(root: Path = SNAPSHOT_DIR) -> Optional[Path]:
+    """Directory of the most recent snapshot, or None"""
+    root = Path(root)
+    pointer = root / LATEST
+    if pointer.exists():
+        snapshot = root / pointer.read_text().strip()
+        if snapshot.is_dir():
+            return snapshot
+    candidates = sorted(p for p in root.glob('*') if (p / MANIFEST).exists()) if root.is_dir() else []
+    return candidates[-1] if candidates else None
+
+
+def read_manifest(snapshot: Optional[Path] = None, root: Path = SNAPSHOT_DIR) -> Optional[Dict]:
+    snapshot = snapshot or latest_snapshot(root)
+    if snapshot is None or not (Path(snapshot) / MANIFEST).exists():
+        return None
+    return json.loads((Path(snapshot) / MANIFEST).read_text())
+
+
+def has_snapshot(table: str = 'foods_canonical', snapshot: Optional[Path] = None,
+                 root: Path = SNAPSHOT_DIR) -> bool:
+    snapshot = snapshot or latest_snapshot(root)
+    return snapshot is not None and (Path(snapshot) / table).is_dir()
+
+
+def open_table(table: str = 'foods_canonical', snapshot: Optional[Path] = None, root: Path = SNAPSHOT_DIR):
+    """Memory-mapped pyarrow dataset of one snapshot table"""
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    snapshot = snapshot or latest_snapshot(root)
+    if not has_snapshot(table, snapshot):
+        raise FileNotFoundError(f"No snapshot of {table} under {snapshot or root}")
+    return ds.dataset(str(Path(snapshot) / table), format='parquet',
+                      partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+                      filesystem=fs.LocalFileSystem(use_mmap=True))
+
+
+def _filter_expression(filters: Dict[str, object]):
+    import pyarrow.dataset as ds
+
+    expression = None
+    for column, value in filters.items():
+        if value is None:
+            term = ds.field(column).is_null()
+        elif isinstance(value, (list, tuple, set)):
+            term = ds.field(column).isin(list(value))
+        else:
+            term = ds.field(column) == value
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def load_snapshot(table: str = 'foods_canonical', columns: Optional[Iterable[str]] = None,
+                  filters: Optional[Dict[str, object]] = None, snapshot: Optional[Path] = None,
+                  root: Path = SNAPSHOT_DIR, categorical: bool = False) -> pd.DataFrame:
+    """
+    Load a snapshot table as a DataFrame
+
+    `filters` maps a column to a value, a list of values (isin) or None
+    (is null), e.g. {'brand_slug': ['acana', 'brit']}. List columns come
+    back as Python lists. Dictionary columns are decoded to plain strings
+    unless `categorical` is set.
+    """
+    import pyarrow as pa
+
+    dataset = open_table(table, snapshot, root)
+    names = None if columns is None else [c for c in columns if c in dataset.schema.names]
+    arrow = dataset.to_table(columns=names, filter=_filter_expression(filters) if filters else None)
+
+    lists, dictionaries = {}, []
+    for index, field in enumerate(arrow.schema):
+        if pa.types.is_dictionary(field.type):
+            # Partition chunks carry separate dictionaries (and nulls), which
+            # Arrow cannot unify into one pandas Categorical directly
+            arrow = arrow.set_column(index, field.name, arrow.column(index).cast(field.type.value_type))
+            dictionaries.append(field.name)
+        elif pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+            lists[field.name] = arrow.column(index).to_pylist()
+    df = arrow.drop_columns(list(lists)).to_pandas()
+    for column, values in lists.items():
+        df[column] = pd.Series(values, index=df.index, dtype=object)
+    if categorical:
+        df[dictionaries] = df[dictionaries].astype('category')
+    return df[arrow.column_names]
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Keyword classification of food products (form / life stage / special diets)
+
+All rules live in data/food_classification_rules.yaml. Each dimension's
+keywords are compiled into one prefix-trie regex, so a text is scanned once
+per dimension regardless of how many keywords there are.
+Results carry the label, its confidence and the keywords that matched.
+"""
+import re
+import yaml
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+RULES_FILE = Path(__file__).parent.parent / 'data' / 'food_classification_rules.yaml'
+DEFAULT_CONFIDENCE = 0.9
+CACHE_SIZE = 65536
+
+
+@dataclass(frozen=True)
+class Classification:
+    label: Optional[str] = None
+    confidence: float = 0.0
+    evidence: Tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        return self.label is not None
+
+
+NO_MATCH = Classification()
+
+
+def load_rules(rules_file: Path = RULES_FILE) -> Dict:
+    """Load classification rules from YAML"""
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    """
+    Regex alternation for a word list, factored by common prefix
+
+    The regex engine then walks the keywords like a trie instead of trying
+    each alternative in turn; longer keywords are preferred at each branch.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        optional = '' in node
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if optional:
+            body = ('(?:' + body + ')?') if len(branches) == 1 else body + '?'
+        return body
+
+    return build(trie)
+
+
+class DimensionClassifier:
+    """Ordered keyword rules for one dimension, compiled into a single regex"""
+
+    def __init__(self, name: str, rules: List[Dict], multi: bool = False):
+        self.name = name
+        self.multi = multi
+        self.rules = [(rule['label'], float(rule.get('confidence', DEFAULT_CONFIDENCE))) for rule in rules]
+
+        # keyword -> rule index (first rule wins for a keyword listed twice)
+        self.keyword_rule = {}
+        self.substring_rule = {}
+        for index, rule in enumerate(rules):
+            for keyword in rule.get('keywords') or []:
+                self.keyword_rule.setdefault(keyword.lower(), index)
+            for substring in rule.get('substrings') or []:
+                self.substring_rule.setdefault(substring.lower(), index)
+
+        # Whole words (plural s/es allowed) and free substrings, one regex each
+        self.keyword_pattern = None
+        if self.keyword_rule:
+            self.keyword_pattern = re.compile(
+                rf'(?<!\w)({trie_regex(self.keyword_rule)})(?:e?s)?(?!\w)')
+        self.substring_pattern = None
+        if self.substring_rule:
+            self.substring_pattern = re.compile(f'({trie_regex(self.substring_rule)})')
+
+        self._classify = lru_cache(maxsize=CACHE_SIZE)(self._classify_uncached)
+
+    def _classify_uncached(self, text: str) -> Tuple[Classification, ...]:
+        if not text:
+            return ()
+        evidence = {}
+        for pattern, lookup in ((self.keyword_pattern, self.keyword_rule),
+                                (self.substring_pattern, self.substring_rule)):
+            if pattern is not None:
+                for keyword in pattern.findall(text):
+                    evidence.setdefault(lookup[keyword], []).append(keyword)
+
+        results, seen = [], set()
+        for index in sorted(evidence):
+            label, confidence = self.rules[index]
+            if label in seen:
+                continue
+            seen.add(label)
+            results.append(Classification(label, confidence, tuple(dict.fromkeys(evidence[index]))))
+            if not self.multi:
+                break
+        return tuple(results)
+
+    def classify(self, text: str) -> Classification:
+        """Highest-priority label found in text"""
+        results = self._classify(text.lower() if isinstance(text, str) else '')
+        return results[0] if results else NO_MATCH
+
+    def classify_all(self, text: str) -> List[Classification]:
+        """Every label found in text, in rule order (multi dimensions)"""
+        return list(self._classify(text.lower() if isinstance(text, str) else ''))
+
+    def labels(self, text: str) -> List[str]:
+        return [result.label for result in self.classify_all(text)]
+
+    def classify_many(self, texts: Iterable[str]):
+        """
+        Classify a Series/array of texts; returns a DataFrame with label,
+        confidence and evidence (for multi dimensions label is a list)
+        """
+        import pandas as pd
+
+        series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        codes, uniques = pd.factorize(series.fillna('').astype(str).str.lower())
+
+        labels, confidences, evidence = [], [], []
+        for text in uniques:
+            results = self._classify(text)
+            if self.multi:
+                labels.append([r.label for r in results])
+                confidences.append(max((r.confidence for r in results), default=0.0))
+                evidence.append([e for r in results for e in r.evidence])
+            else:
+                first = results[0] if results else NO_MATCH
+                labels.append(first.label)
+                confidences.append(first.confidence)
+                evidence.append(list(first.evidence))
+
+        def take(values, dtype=object):
+            return pd.Series(values, dtype=dtype).iloc[codes].to_numpy()
+
+        return pd.DataFrame({
+            'label': take(labels),
+            'confidence': take(confidences, float),
+            'evidence': take(evidence),
+        }, index=series.index)
+
+
+class FoodClassifier:
+    """Form, life stage and special diet classifiers from one rule set"""
+
+    def __init__(self, rules: Dict = None):
+        rules = rules if rules is not None else load_rules()
+        self.version = rules.get('version')
+        self.dimensions = {
+            name: DimensionClassifier(name, spec.get('rules') or [], bool(spec.get('multi')))
+            for name, spec in (rules.get('dimensions') or {}).items()
+        }
+
+    def __getitem__(self, dimension: str) -> DimensionClassifier:
+        return self.dimensions[dimension]
+
+    @property
+    def form(self) -> DimensionClassifier:
+        return self.dimensions['form']
+
+    @property
+    def life_stage(self) -> DimensionClassifier:
+        return self.dimensions['life_stage']
+
+    @property
+    def special_diets(self) -> DimensionClassifier:
+        return self.dimensions['special_diets']
+
+    def classify(self, text: str) -> Dict[str, object]:
+        """All dimensions for one text"""
+        return {
+            name: dimension.classify_all(text) if dimension.multi else dimension.classify(text)
+            for name, dimension in self.dimensions.items()
+        }
+
+
+_food_classifier = None
+
+
+def get_food_classifier() -> FoodClassifier:
+    """Process-wide classifier built from the rules file"""
+    global _food_classifier
+    if _food_classifier is None:
+        _food_classifier = FoodClassifier()
+    return _food_classifier
+
+
+def classify_form(text: str) -> Optional[str]:
+    return get_food_classifier().form.classify(text).label
+
+
+def classify_life_stage(text: str) -> Optional[str]:
+    return get_food_classifier().life_stage.classify(text).label
+
+
+def classify_special_diets(text: str) -> List[str]:
+    return get_food_classifier().special_diets.labels(text)
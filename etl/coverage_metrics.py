@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Catalog coverage counters in one call
+
+The coverage_metrics() SQL function (sql/coverage_metrics.sql) counts, in
+a single scan of foods_canonical, how many products have each field per
+brand_slug and for the whole catalog. CoverageService wraps it with a
+short TTL cache so monitoring loops and dashboards can ask for coverage as
+often as they like without re-running count queries.
+"""
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_TTL = 60.0
+
+COUNTERS = ('products', 'with_form', 'with_life_stage', 'with_ingredients_raw', 'with_ingredients_tokens',
+            'with_kcal', 'kcal_valid', 'kcal_outliers', 'nutrition_complete', 'zooplus_missing_ingredients')
+
+
+def coverage_pct(counters: Dict, field: str) -> float:
+    """Share of a row's products with `field`, in percent (0 for no products)"""
+    products = counters.get('products') or 0
+    return (counters.get(field) or 0) / products * 100 if products else 0.0
+
+
+class CoverageSnapshot(NamedTuple):
+    total: Dict[str, int]
+    brands: Dict[str, Dict[str, int]]   # brand_slug -> counters
+    fetched_at: float
+
+    def brand(self, brand_slug: str) -> Dict[str, int]:
+        """Counters of one brand (all zero if it has no products)"""
+        return self.brands.get(brand_slug) or dict.fromkeys(COUNTERS, 0)
+
+    def brand_rows(self) -> List[Dict]:
+        """Per-brand counters as rows (brand_slug included), largest brands first"""
+        return sorted(({'brand_slug': slug, **counters} for slug, counters in self.brands.items()),
+                      key=lambda row: -row['products'])
+
+
+def parse_coverage(payload: Optional[Dict], fetched_at: float = 0.0) -> CoverageSnapshot:
+    """Snapshot from the coverage_metrics() JSON (missing counters count as 0)"""
+    payload = payload or {}
+
+    def counters(row):
+        return {name: int((row or {}).get(name) or 0) for name in COUNTERS}
+
+    brands = {row.get('brand_slug'): counters(row) for row in payload.get('brands') or []}
+    return CoverageSnapshot(counters(payload.get('total')), brands, fetched_at)
+
+
+class CoverageService:
+    """Cached coverage counters; snapshot() hits the database at most once per `ttl` seconds"""
+
+    def __init__(self, supabase, ttl: float = DEFAULT_TTL, kcal_range: Optional[Tuple[float, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.supabase = supabase
+        self.ttl = ttl
+        self.clock = clock
+        if kcal_range is None:
+            from etl.acceptance_gates import load_gates
+            kcal_range = load_gates().get('kcal_range', (200, 600))
+        self.kcal_range = tuple(kcal_range)
+        self._snapshot: Optional[CoverageSnapshot] = None
+
+    def fetch(self) -> CoverageSnapshot:
+        """Run coverage_metrics() now"""
+        low, high = self.kcal_range
+        resp = self.supabase.rpc('coverage_metrics', {'p_kcal_low': low, 'p_kcal_high': high}).execute()
+        payload = resp.data[0] if isinstance(resp.data, list) and resp.data else resp.data
+        return parse_coverage(payload, self.clock())
+
+    def snapshot(self, max_age: Optional[float] = None) -> CoverageSnapshot:
+        """The cached snapshot if younger than `max_age` (default: the TTL), else a fresh one"""
+        max_age = self.ttl if max_age is None else max_age
+        if self._snapshot is None or self.clock() - self._snapshot.fetched_at >= max_age:
+            self._snapshot = self.fetch()
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    def totals(self) -> Dict[str, int]:
+        return self.snapshot().total
+
+    def brand(self, brand_slug: str) -> Dict[str, int]:
+        return self.snapshot().brand(brand_slug)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Coverage-driven crawl planner
+
+Instead of crawling static batches and offsets, every product with a
+crawlable URL is scored by the coverage it is expected to add per credit:
+
+    expected_gain = brand_weight * retry_decay ** attempts
+                    * sum(field_weight * yield[fetcher, field]) over missing fields
+    priority      = expected_gain / credits_per_request[fetcher]
+
+Weights, fetchers and prior yields live in data/crawl_planner.yaml; the
+priors are blended with the fill rates the queue has actually observed
+(crawl_yields()). plan_crawl() picks tasks by priority under a credit and
+request budget, and enqueue_plan() writes them to the crawl_queue table
+(sql/crawl_queue.sql) that the harvesters claim work from.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from etl.acceptance_gates import has_tokens, load_gates
+
+PLANNER_FILE = Path(__file__).parent.parent / 'data' / 'crawl_planner.yaml'
+CATALOG_COLUMNS = ('product_key', 'brand_slug', 'product_url', 'form', 'life_stage', 'ingredients_tokens',
+                   'kcal_per_100g', 'protein_percent', 'fat_percent', 'price_per_kg_eur')
+TASK_COLUMNS = ['product_key', 'brand_slug', 'url', 'domain', 'fetcher', 'missing_fields', 'expected_gain',
+                'credits', 'priority']
+ENQUEUE_CHUNK = 5000
+
+
+def load_config(planner_file: Path = PLANNER_FILE) -> Dict:
+    """Load planner config from YAML"""
+    with open(planner_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+
+def missing_fields(df: pd.DataFrame, fields: Sequence[str],
+                   kcal_range: Optional[Sequence[float]] = None) -> pd.DataFrame:
+    """One boolean column per planner field: True where the product lacks it"""
+    low, high = kcal_range or load_gates().get('kcal_range', (200, 600))
+    kcal = pd.to_numeric(_column(df, 'kcal_per_100g'), errors='coerce')
+    price = _column(df, 'price_per_kg_eur')
+    if 'price_per_kg' in df.columns:
+        price = price.fillna(df['price_per_kg'])
+    checks = {
+        'ingredients': lambda: ~has_tokens(_column(df, 'ingredients_tokens')),
+        'life_stage': lambda: _column(df, 'life_stage').isna().to_numpy(),
+        'form': lambda: _column(df, 'form').isna().to_numpy(),
+        'kcal': lambda: ~kcal.between(low, high).to_numpy(),
+        'macros': lambda: (_column(df, 'protein_percent').isna() | _column(df, 'fat_percent').isna()).to_numpy(),
+        'price': lambda: price.isna().to_numpy(),
+    }
+    return pd.DataFrame({field: checks[field]() for field in fields}, index=df.index)
+
+
+def assign_fetchers(df: pd.DataFrame, config: Dict) -> pd.Series:
+    """
+    Fetcher per product: a fetcher whose url_contains matches the URL wins,
+    then one listing the product's brand, else the fetcher with neither
+    """
+    fetchers = config['fetchers']
+    default = next((name for name, f in fetchers.items() if not f.get('url_contains') and not f.get('brands')),
+                   None)
+    result = pd.Series(default, index=df.index, dtype=object)
+    brands = _column(df, 'brand_slug')
+    for name, fetcher in fetchers.items():
+        if fetcher.get('brands'):
+            result[brands.isin(fetcher['brands']).to_numpy()] = name
+    urls = _column(df, 'product_url').fillna('').astype(str).str.lower()
+    for name, fetcher in fetchers.items():
+        for pattern in fetcher.get('url_contains') or ():
+            result[urls.str.contains(pattern.lower(), regex=False).to_numpy()] = name
+    return result
+
+
+def fetcher_yields(config: Dict, observed: Optional[Iterable[Dict]] = None) -> pd.DataFrame:
+    """
+    Fetcher x field probability that one request fills the field: the
+    configured prior, blended with observed {fetcher, field, attempts,
+    filled} counts weighted as prior_strength pseudo-attempts
+    """
+    fields = list(config['fields'])
+    prior = pd.DataFrame({name: {field: (f.get('yield') or {}).get(field, 0.0) for field in fields}
+                          for name, f in config['fetchers'].items()}).T[fields].astype(float)
+    if not observed:
+        return prior
+    strength = float(config.get('prior_strength', 20))
+    yields = prior.copy()
+    for row in observed:
+        fetcher, field = row['fetcher'], row['field']
+        if fetcher in yields.index and field in yields.columns:
+            attempts, filled = float(row['attempts'] or 0), float(row['filled'] or 0)
+            yields.loc[fetcher, field] = (prior.loc[fetcher, field] * strength + filled) / (strength + attempts)
+    return yields
+
+
+def brand_weights(brand_slugs: pd.Series, config: Dict, allowlist: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """Weight per product from its brand's allowlist status and per-brand overrides"""
+    brands = config.get('brands') or {}
+    by_status = {slug: brands.get('status_weights', {}).get(status)
+                 for slug, status in (allowlist or {}).items()}
+    weights = {slug: w for slug, w in by_status.items() if w is not None}
+    weights.update(brands.get('overrides') or {})
+    return brand_slugs.map(weights).fillna(brands.get('default_weight', 1.0)).astype(float).to_numpy()
+
+
+def url_domain(url) -> Optional[str]:
+    if not isinstance(url, str) or not url:
+        return None
+    domain = urlparse(url if '://' in url else f'https://{url}').netloc.lower()
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def score_products(catalog: pd.DataFrame, config: Optional[Dict] = None, yields: Optional[pd.DataFrame] = None,
+                   allowlist: Optional[Dict[str, str]] = None, attempts: Optional[Dict] = None,
+                   kcal_range: Optional[Sequence[float]] = None) -> pd.DataFrame:
+    """
+    Candidate tasks (TASK_COLUMNS plus an expected fill per field, fill_<field>)
+    for every product with a URL and at least one missing field, best first
+
+    `attempts` maps (product_key, fetcher) to crawls already spent on a
+    product that is still missing fields.
+    """
+    config = config or load_config()
+    yields = fetcher_yields(config) if yields is None else yields
+    fields = list(config['fields'])
+    df = catalog[_column(catalog, 'product_url').notna().to_numpy()]
+    df = df[df['product_url'].astype(str).str.strip().ne('').to_numpy()]
+
+    missing = missing_fields(df, fields, kcal_range)
+    fetcher = assign_fetchers(df, config)
+    known = fetcher.isin(yields.index).to_numpy()
+    df, missing, fetcher = df[known], missing[known], fetcher[known]
+
+    fills = missing.to_numpy() * yields.reindex(fetcher.to_numpy())[fields].to_numpy()
+    field_weights = np.array([float(config['fields'][field]) for field in fields])
+    gain = (fills * field_weights).sum(axis=1) * brand_weights(_column(df, 'brand_slug'), config, allowlist)
+    if attempts:
+        spent = np.array([attempts.get(key, 0) for key in zip(df['product_key'], fetcher)], dtype=float)
+        gain = gain * float(config.get('retry_decay', 0.5)) ** spent
+    credits = fetcher.map({name: f.get('credits', 1) for name, f in config['fetchers'].items()}).astype(int)
+
+    missing_bool = missing.to_numpy()
+    tasks = pd.DataFrame({
+        'product_key': df['product_key'].to_numpy(),
+        'brand_slug': _column(df, 'brand_slug').to_numpy(),
+        'url': df['product_url'].to_numpy(),
+        'domain': df['product_url'].map(url_domain).to_numpy(),
+        'fetcher': fetcher.to_numpy(),
+        'missing_fields': [[f for f, m in zip(fields, row) if m] for row in missing_bool],
+        'expected_gain': gain,
+        'credits': credits.to_numpy(),
+        'priority': gain / credits.clip(lower=1).to_numpy(),
+    })
+    for i, field in enumerate(fields):
+        tasks[f'fill_{field}'] = fills[:, i]
+    tasks = tasks[tasks['expected_gain'] > 0]
+    return tasks.sort_values(['priority', 'expected_gain'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def plan_crawl(tasks: pd.DataFrame, max_credits: Optional[float] = None, max_requests: Optional[int] = None,
+               max_per_domain: Optional[int] = None, fetchers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Greedy budgeted plan over score_products() output: tasks in priority
+    order, skipping any that would overrun the credit budget or their
+    domain's cap, until the request budget is used
+    """
+    if fetchers:
+        tasks = tasks[tasks['fetcher'].isin(fetchers)]
+    if max_per_domain:
+        tasks = tasks[(tasks.groupby(tasks['domain'].fillna(''), sort=False).cumcount() < max_per_domain).to_numpy()]
+
+    credits = tasks['credits'].to_numpy()
+    if max_credits is None:
+        keep = np.ones(len(tasks), dtype=bool)
+    else:
+        keep = np.zeros(len(tasks), dtype=bool)
+        remaining = float(max_credits)
+        for i, cost in enumerate(credits):
+            if cost <= remaining:
+                keep[i] = True
+                remaining -= cost
+                if remaining <= 0:
+                    break
+    plan = tasks[keep]
+    if max_requests is not None:
+        plan = plan.head(max_requests)
+    return plan.reset_index(drop=True)
+
+
+def plan_summary(plan: pd.DataFrame, total_products: int) -> Dict:
+    """Requests, credits, expected gain and expected coverage points per field"""
+    fills = {c[len('fill_'):]: float(plan[c].sum()) for c in plan.columns if c.startswith('fill_')}
+    return {
+        'requests': len(plan),
+        'credits': int(plan['credits'].sum()) if len(plan) else 0,
+        'expected_gain': round(float(plan['expected_gain'].sum()), 2) if len(plan) else 0.0,
+        'expected_fills': {field: round(value, 1) for field, value in fills.items()},
+        'coverage_points': {field: round(value / total_products * 100, 2) if total_products else 0.0
+                            for field, value in fills.items()},
+        'by_fetcher': plan.groupby('fetcher')['credits'].agg(['size', 'sum']).astype(int)
+                          .rename(columns={'size': 'requests', 'sum': 'credits'}).to_dict('index'),
+    }
+
+
+def brand_queue(plan: pd.DataFrame) -> pd.DataFrame:
+    """Brands by total expected gain in the plan"""
+    if plan.empty:
+        return pd.DataFrame(columns=['brand_slug', 'tasks', 'credits', 'expected_gain'])
+    grouped = plan.groupby('brand_slug', sort=False)
+    brands = pd.DataFrame({'tasks': grouped.size(), 'credits': grouped['credits'].sum(),
+                           'expected_gain': grouped['expected_gain'].sum()})
+    return brands.sort_values('expected_gain', ascending=False).rename_axis('brand_slug').reset_index()
+
+
+# ============================================================================
+# Supabase I/O
+# ============================================================================
+
+def load_catalog(supabase=None, table: str = 'foods_canonical', use_snapshot: bool = False) -> pd.DataFrame:
+    """The planner's catalog columns, from the local snapshot or paged from Supabase"""
+    if use_snapshot:
+        from etl.catalog_snapshot import load_snapshot
+        return load_snapshot(table, columns=CATALOG_COLUMNS)
+    from etl.supabase_loader import fetch_frame
+    return fetch_frame(supabase, table, ','.join(CATALOG_COLUMNS), key='product_key')
+
+
+def load_allowlist(supabase) -> Dict[str, str]:
+    from etl.supabase_loader import fetch_all_rows
+    return {row['brand_slug']: row['status']
+            for row in fetch_all_rows(supabase, 'brand_allowlist', 'brand_slug,status', key='brand_slug')}
+
+
+def load_attempts(supabase) -> Dict:
+    """(product_key, fetcher) -> completed crawl attempts"""
+    from etl.supabase_loader import fetch_all_rows
+    return {(row['product_key'], row['fetcher']): row['attempts'] or 0
+            for row in fetch_all_rows(supabase, 'crawl_queue', 'id,product_key,fetcher,attempts', key='id')}
+
+
+def observed_yields(supabase) -> List[Dict]:
+    return supabase.rpc('crawl_yields', {}).execute().data or []
+
+
+def build_plan(supabase, max_credits: Optional[float] = None, max_requests: Optional[int] = None,
+               fetchers: Optional[Sequence[str]] = None, config: Optional[Dict] = None,
+               use_snapshot: bool = False):
+    """Score the catalog with observed yields and queue history; returns (plan, catalog size)"""
+    config = config or load_config()
+    catalog = load_catalog(supabase, use_snapshot=use_snapshot)
+    tasks = score_products(catalog, config, fetcher_yields(config, observed_yields(supabase)),
+                           load_allowlist(supabase), load_attempts(supabase))
+    plan = plan_crawl(tasks, max_credits, max_requests, config.get('max_per_domain'), fetchers)
+    return plan, len(catalog)
+
+
+def enqueue_plan(supabase, plan: pd.DataFrame, plan_id: Optional[str] = None,
+                 fetchers: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    Write a plan to crawl_queue in chunks; once every chunk is in, one final
+    call marks the pending tasks that are not in the plan as skipped. A plan
+    built for some fetchers only (`fetchers`) leaves other fetchers' tasks alone.
+    """
+    plan_id = plan_id or datetime.now().strftime('plan_%Y%m%d_%H%M%S')
+    rows = plan[TASK_COLUMNS].astype(object).where(plan[TASK_COLUMNS].notna(), None).to_dict('records')
+    for row in rows:
+        row['expected_gain'] = round(float(row['expected_gain']), 4)
+        row['priority'] = round(float(row['priority']), 6)
+        row['credits'] = int(row['credits'])
+
+    def first(data):
+        return (data[0] if isinstance(data, list) and data else data) or {}
+
+    totals = {'plan_id': plan_id, 'queued': 0, 'skipped': 0}
+    for start in range(0, len(rows), ENQUEUE_CHUNK):
+        chunk = rows[start:start + ENQUEUE_CHUNK]
+        data = supabase.rpc('enqueue_crawl_plan', {'p_plan_id': plan_id, 'p_tasks': chunk}).execute().data
+        totals['queued'] += first(data).get('queued') or 0
+    data = supabase.rpc('skip_stale_crawl_tasks', {
+        'p_plan_id': plan_id, 'p_fetchers': list(fetchers) if fetchers else None}).execute().data
+    totals['skipped'] = first(data).get('skipped') or 0
+    return totals
+
+
+def claim_tasks(supabase, fetcher: str, limit: int, worker: Optional[str] = None,
+                brand_slug: Optional[str] = None) -> List[Dict]:
+    """Take up to `limit` highest-priority pending tasks for a fetcher"""
+    params = {'p_fetcher': fetcher, 'p_limit': limit, 'p_worker': worker, 'p_brand_slug': brand_slug}
+    return supabase.rpc('claim_crawl_tasks', params).execute().data or []
+
+
+def has_pending_tasks(supabase, fetcher: str) -> bool:
+    """Whether the queue still holds planned work for a fetcher"""
+    response = supabase.table('crawl_queue').select('id').eq('fetcher', fetcher)\
+        .eq('status', 'pending').limit(1).execute()
+    return bool(response.data)
+
+
+def complete_task(supabase, task_id: int, ok: bool, fields_filled: Optional[Iterable[str]] = None) -> None:
+    """Record a task's outcome; fields_filled=None when the page is parsed later"""
+    fields = None if fields_filled is None else list(fields_filled)
+    supabase.rpc('complete_crawl_task', {'p_id': task_id, 'p_status': 'done' if ok else 'failed',
+                                         'p_fields_filled': fields}).execute()
+
+
+def release_tasks(supabase, tasks: Sequence[Dict]) -> int:
+    """Hand claimed tasks back to the queue without recording an outcome"""
+    ids = [task['id'] for task in tasks]
+    if ids:
+        supabase.rpc('release_crawl_tasks', {'p_ids': ids}).execute()
+    return len(ids)
+
+
+def settle_tasks(supabase, tasks: Sequence[Dict], catalog: pd.DataFrame, config: Optional[Dict] = None,
+                 kcal_range: Optional[Sequence[float]] = None) -> Dict[str, int]:
+    """
+    Complete claimed tasks from the catalog rows after a crawl: each task is
+    done with the fields it was missing that are now present, or failed
+    """
+    config = config or load_config()
+    fields = list(config['fields'])
+    rows = catalog.drop_duplicates('product_key').set_index('product_key', drop=False)
+    still_missing = missing_fields(rows, fields, kcal_range)
+    counts = {'done': 0, 'failed': 0}
+    for task in tasks:
+        key = task['product_key']
+        now_missing = still_missing.loc[key] if key in still_missing.index else None
+        filled = [] if now_missing is None else [f for f in task.get('missing_fields') or []
+                                                 if f in now_missing.index and not now_missing[f]]
+        complete_task(supabase, task['id'], bool(filled), filled)
+        counts['done' if filled else 'failed'] += 1
+    return counts
+
+
+def filled_fields(result: Dict) -> List[str]:
+    """Planner fields a scraped result provides (ingredients_raw, nutrition, kcal, ...)"""
+    nutrition = result.get('nutrition') or {}
+    values = {**result, **nutrition}
+    fields = []
+    if values.get('ingredients_raw') or values.get('ingredients_tokens'):
+        fields.append('ingredients')
+    if values.get('protein_percent') is not None and values.get('fat_percent') is not None:
+        fields.append('macros')
+    if values.get('kcal_per_100g') is not None:
+        fields.append('kcal')
+    for field in ('form', 'life_stage'):
+        if values.get(field):
+            fields.append(field)
+    if values.get('price') is not None or values.get('price_eur') is not None:
+        fields.append('price')
+    return fields
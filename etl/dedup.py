@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Duplicate product clustering: blocking + pair scoring + union-find
+
+Candidate pairs come only from rows sharing a blocking key, so the work
+grows with block sizes rather than with the square of the catalog:
+
+- key:       product_key as stored
+- name:      brand | normalized name (brand words stripped) | form
+- gtin:      GTIN / EAN
+- url_id:    retailer host | product id from the product URL (explicit id
+             query parameter or a known retailer path pattern)
+- signature: brand | protein % | fat % | form
+
+Pairs are scored in one vectorized pass (name token overlap, brand, form
+and macro agreement; a shared product_key, GTIN or retailer id is a
+match on its own unless the form or GTIN conflicts),
+matches are joined transitively with union-find, and each cluster's
+parent is the row with the best score_product (the completeness rules
+the dedup scripts already use).
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+# Blocks larger than this are skipped: they are generic keys
+# ("brand|chicken|dry") where every pair would be compared for nothing
+MAX_BLOCK_SIZE = 50
+MATCH_THRESHOLD = 0.8
+MACRO_TOLERANCE = 1.0
+
+BLOCKING_KEYS = ('key', 'name', 'gtin', 'url_id', 'signature')
+# Keys that identify a product: their blocks are chained (any size) rather
+# than compared pairwise, since every pair in them is a match. url_id is not
+# one: a retailer id can still be shared by a dry and a wet product, and a
+# chain through the conflicting pair would split the rest of the block
+IDENTITY_KEYS = ('key', 'gtin')
+
+MACRO_FIELDS = ('protein_percent', 'fat_percent')
+SOURCE_SCORES = {
+    'food_candidates': 1,
+    'food_candidates_sc': 2,
+    'food_brands': 3
+}
+
+_NON_WORD = re.compile(r'[^\w\s]')
+URL_ID_PARAMS = ('id', 'product_id', 'pid', 'sku')
+# Retailers whose product id sits in a known place in the path, by host
+# suffix. Elsewhere numbers in the path are pack weights ('1000g'), years
+# or review numbers, not ids
+URL_ID_PATTERNS = {
+    'zooplus.': re.compile(r'/(?<!\d)(\d{5,})(?![\d]*[a-z])/?$'),
+}
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase, punctuation removed, whitespace collapsed"""
+    if not name or not isinstance(name, str):
+        return ''
+    return ' '.join(_NON_WORD.sub('', name.lower()).split())
+
+
+def _present(value) -> bool:
+    """Truthy and not NaN"""
+    if isinstance(value, float) and np.isnan(value):
+        return False
+    return bool(value)
+
+
+def score_product(product: Dict) -> int:
+    """Data completeness score; the highest-scoring duplicate is kept"""
+    score = 0
+    if _present(product.get('ingredients_raw')):
+        score += 40
+    if all(_present(product.get(field)) for field in MACRO_FIELDS):
+        score += 30
+    if _present(product.get('product_url')):
+        score += 20
+    if _present(product.get('image_url')):
+        score += 10
+    if _present(product.get('kcal_per_100g')):
+        score += 15
+    for field in ('fiber_percent', 'moisture_percent', 'ash_percent'):
+        if _present(product.get(field)):
+            score += 5
+    if _present(product.get('price_per_kg')):
+        score += 10
+    score += SOURCE_SCORES.get(product.get('source'), 0)
+    return score
+
+
+def score_frame(df: pd.DataFrame) -> np.ndarray:
+    """score_product for every row of a DataFrame, vectorized"""
+    def present(column):
+        if column not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        values = df[column]
+        if values.dtype == object:
+            return values.map(_present).to_numpy(dtype=bool)
+        return (values.notna() & (values != 0)).to_numpy()
+
+    score = (40 * present('ingredients_raw')
+             + 30 * (present('protein_percent') & present('fat_percent'))
+             + 20 * present('product_url')
+             + 10 * present('image_url')
+             + 15 * present('kcal_per_100g')
+             + 5 * present('fiber_percent')
+             + 5 * present('moisture_percent')
+             + 5 * present('ash_percent')
+             + 10 * present('price_per_kg'))
+    if 'source' in df.columns:
+        score = score + df['source'].map(SOURCE_SCORES).fillna(0).to_numpy(dtype=int)
+    return score.astype(int)
+
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series('', index=df.index)
+    return df[column].where(df[column].map(lambda v: isinstance(v, str)), '').str.strip()
+
+
+def url_product_id(url: Optional[str]) -> Optional[str]:
+    """'host|id' from a retailer product URL (id= / product_id= query, else the retailer's path pattern)"""
+    if not url or not isinstance(url, str):
+        return None
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().removeprefix('www.')
+    if not host:
+        return None
+    query = parse_qs(parsed.query)
+    for param in URL_ID_PARAMS:
+        if query.get(param):
+            return f"{host}|{query[param][0]}"
+    for retailer, pattern in URL_ID_PATTERNS.items():
+        if retailer in host:
+            match = pattern.search(parsed.path.lower())
+            return f"{host}|{match.group(1)}" if match else None
+    return None
+
+
+def blocking_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """One column per blocking key (None where a row has no such key)"""
+    brand = _text(df, 'brand').str.lower()
+    brand_slug = brand.str.replace(r'\s+', '', regex=True)
+    form = _text(df, 'form').str.lower()
+    names = [normalize_name(n) for n in _text(df, 'product_name')]
+
+    # Brand words are stripped from the start of the name, as in create_product_key
+    stripped = []
+    for name, brand_text in zip(names, brand):
+        for word in brand_text.split():
+            if name.startswith(word + ' '):
+                name = name[len(word) + 1:]
+        stripped.append(name)
+    name_key = brand_slug + '|' + pd.Series(stripped, index=df.index) + '|' + form
+    name_key = name_key.where(pd.Series(stripped, index=df.index) != '')
+
+    gtin = None
+    for column in ('gtin', 'ean'):
+        if column in df.columns:
+            gtin = _text(df, column).str.replace(r'\D', '', regex=True).str.lstrip('0')
+            gtin = gtin.where(gtin != '')
+            break
+
+    product_key = _text(df, 'product_key')
+    keys = pd.DataFrame({
+        'key': product_key.where(product_key != ''),
+        'name': name_key,
+        'gtin': gtin if gtin is not None else None,
+        'url_id': _text(df, 'product_url').map(url_product_id),
+    }, index=df.index)
+
+    if all(field in df.columns for field in MACRO_FIELDS):
+        protein = pd.to_numeric(df['protein_percent'], errors='coerce').round(1)
+        fat = pd.to_numeric(df['fat_percent'], errors='coerce').round(1)
+        signature = brand_slug + '|' + protein.astype(str) + '|' + fat.astype(str) + '|' + form
+        keys['signature'] = signature.where(protein.notna() & fat.notna() & (brand_slug != ''))
+    else:
+        keys['signature'] = None
+    return keys
+
+
+def candidate_pairs(keys: pd.DataFrame, max_block_size: int = MAX_BLOCK_SIZE) -> np.ndarray:
+    """Distinct (i, j) row positions, i < j, sharing a blocking key"""
+    pairs = []
+    for column in keys.columns:
+        codes, _ = pd.factorize(keys[column])
+        valid = codes >= 0
+        positions = np.flatnonzero(valid)
+        if not len(positions):
+            continue
+        order = positions[np.argsort(codes[valid], kind='stable')]
+        block_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, block_codes[1:] != block_codes[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts, ends):
+            size = end - start
+            members = order[start:end]
+            if size < 2:
+                continue
+            if column in IDENTITY_KEYS:
+                pairs.append(np.column_stack([members[:-1], members[1:]]))
+            elif size <= max_block_size:
+                i, j = np.triu_indices(size, k=1)
+                pairs.append(np.column_stack([members[i], members[j]]))
+    if not pairs:
+        return np.empty((0, 2), dtype=int)
+    pairs = np.vstack(pairs)
+    pairs.sort(axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def score_pairs(df: pd.DataFrame, pairs: np.ndarray, keys: pd.DataFrame = None) -> np.ndarray:
+    """
+    Similarity in [0, 1] per pair: 0.6 name token overlap (Jaccard, brand
+    words excluded) + 0.2 same brand + 0.1 compatible form + 0.1 macros
+    within tolerance. A conflicting GTIN or form scores 0; otherwise a
+    shared product_key, GTIN or retailer product id scores 1.
+    """
+    if not len(pairs):
+        return np.empty(0)
+    keys = blocking_keys(df) if keys is None else keys
+    i, j = pairs[:, 0], pairs[:, 1]
+
+    # Punctuation splits words here ('Wild-Prairie'); brand words are not evidence
+    tokens = [frozenset(_NON_WORD.sub(' ', name.lower()).split()) - frozenset(brand_text.split())
+              for name, brand_text in zip(_text(df, 'product_name'), _text(df, 'brand').str.lower())]
+    overlap = np.array([len(tokens[a] & tokens[b]) / (len(tokens[a] | tokens[b]) or 1) for a, b in pairs])
+
+    brand = _text(df, 'brand').str.lower().str.replace(r'\s+', '', regex=True).to_numpy()
+    form = _text(df, 'form').str.lower().to_numpy()
+    same_brand = (brand[i] == brand[j]) & (brand[i] != '')
+    form_conflict = (form[i] != form[j]) & (form[i] != '') & (form[j] != '')
+
+    macros_ok = np.ones(len(pairs), dtype=bool)
+    for field in MACRO_FIELDS:
+        if field in df.columns:
+            values = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=float)
+            diff = np.abs(values[i] - values[j])
+            macros_ok &= ~(diff > MACRO_TOLERANCE)
+
+    score = 0.6 * overlap + 0.2 * same_brand + 0.1 * ~form_conflict + 0.1 * macros_ok
+
+    def same(column):
+        values = keys[column].to_numpy(dtype=object)
+        known = pd.notna(values[i]) & pd.notna(values[j])
+        return known & (values[i] == values[j]), known & (values[i] != values[j])
+
+    same_gtin, gtin_conflict = same('gtin')
+    same_url, _ = same('url_id')
+    same_key, _ = same('key')
+    conflict = gtin_conflict | form_conflict
+    score = np.where(same_gtin | same_url | same_key, 1.0, score)
+    return np.where(conflict, 0.0, score)
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1 with path halving and union by size"""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+        self.size = [1] * n
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def labels(self) -> np.ndarray:
+        return np.array([self.find(x) for x in range(len(self.parent))], dtype=int)
+
+
+def cluster_products(df: pd.DataFrame, threshold: float = MATCH_THRESHOLD,
+                     max_block_size: int = MAX_BLOCK_SIZE) -> pd.DataFrame:
+    """
+    Duplicate clusters of a product frame. Returns a DataFrame on df's
+    index with cluster (position of the cluster's parent row), is_parent,
+    cluster_size and completeness (score_product).
+    """
+    index = df.index
+    df = df.reset_index(drop=True)
+    keys = blocking_keys(df)
+    pairs = candidate_pairs(keys, max_block_size)
+    scores = score_pairs(df, pairs, keys)
+
+    sets = UnionFind(len(df))
+    for a, b in pairs[scores >= threshold]:
+        sets.union(int(a), int(b))
+    roots = sets.labels()
+
+    # Parent: best completeness score, earliest row on ties
+    completeness = score_frame(df)
+    order = np.lexsort((np.arange(len(df)), -completeness, roots))
+    first = np.r_[True, roots[order][1:] != roots[order][:-1]]
+    parent_of_root = dict(zip(roots[order][first], order[first]))
+    cluster = np.array([parent_of_root[r] for r in roots], dtype=int)
+
+    return pd.DataFrame({
+        'cluster': cluster,
+        'is_parent': cluster == np.arange(len(df)),
+        'cluster_size': pd.Series(cluster).map(Counter(cluster)).to_numpy(),
+        'completeness': completeness,
+    }, index=index)
+
+
+def duplicate_clusters(products: List[Dict], threshold: float = MATCH_THRESHOLD) -> List[List[Dict]]:
+    """Clusters of more than one product, parent first then by completeness"""
+    if not products:
+        return []
+    df = pd.DataFrame(products)
+    result = cluster_products(df, threshold)
+    groups = {}
+    for position in np.lexsort((-result['completeness'].to_numpy(), ~result['is_parent'].to_numpy())):
+        if result['cluster_size'].iat[position] > 1:
+            groups.setdefault(result['cluster'].iat[position], []).append(products[position])
+    return list(groups.values())
+
+
+def deduplicate_frame(df: pd.DataFrame, threshold: float = MATCH_THRESHOLD) -> pd.DataFrame:
+    """df with only each cluster's parent row kept (original order)"""
+    if df.empty:
+        return df
+    return df[cluster_products(df, threshold)['is_parent'].to_numpy()]
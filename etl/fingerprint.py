@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Per-field-group fingerprints for food products
+
+A product record is split into field groups (identity, ingredients,
+nutrition, price, pack, classification). Each group gets a 64-bit
+BLAKE2b hash of its normalized values and the hashes are packed, in a
+fixed order, into one hex string stored as field_fingerprint. Comparing a
+stored fingerprint with a freshly scraped record tells exactly which
+groups changed, so re-crawls can skip unchanged products and send only
+the changed groups' columns.
+
+generate_fingerprint (etl/normalize_foods.py) stays the identity key:
+it is used to match rows, not to detect changes.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional
+
+FINGERPRINT_VERSION = 'v2'
+HASH_BYTES = 8
+
+# Field group -> record fields, in packing order (append new groups at the
+# end and bump FINGERPRINT_VERSION when changing a group's fields)
+FIELD_GROUPS = {
+    'identity': ('brand', 'product_name'),
+    'ingredients': ('ingredients_raw',),
+    'nutrition': ('protein_percent', 'fat_percent', 'fiber_percent', 'ash_percent',
+                  'moisture_percent', 'kcal_per_100g'),
+    'price': ('price_currency', 'price_original'),
+    'pack': ('pack_sizes',),
+    'classification': ('form', 'life_stage'),
+}
+
+# Derived fields that change with a group's source fields (fingerprint is
+# generate_fingerprint(brand, product_name, ingredients_raw); price_eur is
+# price_original at the day's FX rate, so a rate move alone is not a change)
+DERIVED_FIELDS = {
+    'identity': ('fingerprint',),
+    'ingredients': ('ingredients_tokens', 'contains_chicken', 'fingerprint'),
+    'nutrition': ('kcal_basis',),
+    'price': ('price_eur', 'price_rate_date'),
+}
+
+
+def _normalize(value):
+    """Canonical form of a value so formatting noise does not change the hash"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 2)
+    if isinstance(value, str):
+        text = ' '.join(value.lower().split())
+        return text or None
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return str(value)
+
+
+def hash_group(record: Dict, fields: Iterable[str]) -> int:
+    """64-bit hash of the normalized values of fields"""
+    payload = json.dumps([_normalize(record.get(field)) for field in fields],
+                         sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return int.from_bytes(hashlib.blake2b(payload.encode('utf-8'), digest_size=HASH_BYTES).digest(), 'big')
+
+
+def group_hashes(record: Dict) -> Dict[str, int]:
+    return {group: hash_group(record, fields) for group, fields in FIELD_GROUPS.items()}
+
+
+def pack_fingerprint(hashes: Dict[str, int]) -> str:
+    """'v2:' + one 16-hex-digit hash per group, in FIELD_GROUPS order"""
+    return FINGERPRINT_VERSION + ':' + ''.join(f"{hashes[group]:0{HASH_BYTES * 2}x}" for group in FIELD_GROUPS)
+
+
+def unpack_fingerprint(fingerprint: Optional[str]) -> Optional[Dict[str, int]]:
+    """Group hashes from a packed fingerprint (None if missing or another version)"""
+    if not fingerprint or not isinstance(fingerprint, str):
+        return None
+    version, _, packed = fingerprint.partition(':')
+    width = HASH_BYTES * 2
+    if version != FINGERPRINT_VERSION or len(packed) != width * len(FIELD_GROUPS):
+        return None
+    return {group: int(packed[i * width:(i + 1) * width], 16) for i, group in enumerate(FIELD_GROUPS)}
+
+
+def field_fingerprint(record: Dict) -> str:
+    """Packed per-group fingerprint of a product record"""
+    return pack_fingerprint(group_hashes(record))
+
+
+def changed_groups(stored: Optional[str], record: Dict) -> List[str]:
+    """
+    Field groups of record that differ from the stored fingerprint; every
+    group when nothing (or an older version) is stored
+    """
+    old = unpack_fingerprint(stored)
+    new = group_hashes(record)
+    if old is None:
+        return list(FIELD_GROUPS)
+    return [group for group in FIELD_GROUPS if old[group] != new[group]]
+
+
+def changed_payload(record: Dict, groups: Iterable[str]) -> Dict:
+    """
+    Every column of the changed groups (plus their derived fields); fields
+    missing from the record are None so values that disappeared are cleared
+    """
+    fields = {}
+    for group in groups:
+        for field in FIELD_GROUPS[group] + DERIVED_FIELDS.get(group, ()):
+            fields[field] = record.get(field)
+    return fields
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Daily FX rates for price normalization
+
+Rates come from a pluggable provider (ECB reference rates by default, or a
+local file in the ECB CSV format for offline runs) and are cached on disk
+per day under data/cache/fx_rates/, so a day's rates are fetched at most once
+and each process loads them once (get_fx_rates).
+
+ECB CSV format (eurofxref.csv / eurofxref-hist.csv): a Date column and one
+column per currency holding units of that currency per 1 EUR. Internally
+rates are stored the other way round, EUR per unit of currency, which is
+what prices are multiplied by.
+
+Every conversion carries the date of the rate used, so re-pricing only
+touches rows whose rate changed (see reprice_frame).
+"""
+import csv
+import io
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+ROOT = Path(__file__).parent.parent
+# Daily files are local state, kept out of git; the fallback file is tracked
+CACHE_DIR = ROOT / 'data' / 'cache' / 'fx_rates'
+# Offline stand-in, used when no provider is reachable and nothing is cached
+FALLBACK_FILE = ROOT / 'data' / 'fx_rates' / 'eurofxref_fallback.csv'
+ECB_DAILY_URL = 'https://www.ecb.europa.eu/stats/eurofxref/eurofxref.zip'
+DATE_FORMATS = ('%Y-%m-%d', '%d %B %Y')
+# Rows per reprice_food_candidates() call (sql/fx_price_rate_date.sql)
+REPRICE_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class FXRates:
+    rate_date: str                  # ISO date the rates were published for
+    rates: Dict[str, float]         # EUR per unit of currency, EUR = 1.0
+    source: str = 'ecb'
+
+    def rate(self, currency: Optional[str]) -> Optional[float]:
+        return self.rates.get((currency or 'EUR').upper())
+
+
+def _parse_date(text: str) -> str:
+    text = text.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised ECB date: {text!r}")
+
+
+def parse_ecb_csv(text: str) -> List[FXRates]:
+    """All dated rows of an ECB reference rate CSV, newest first"""
+    reader = csv.reader(io.StringIO(text.strip()))
+    header = [h.strip() for h in next(reader)]
+    result = []
+    for row in reader:
+        if not row or not row[0].strip():
+            continue
+        rates = {'EUR': 1.0}
+        for currency, value in zip(header[1:], row[1:]):
+            value = value.strip()
+            if currency and value and value != 'N/A':
+                # ECB quotes currency per EUR
+                rates[currency.upper()] = round(1 / float(value), 6)
+        result.append(FXRates(_parse_date(row[0]), rates))
+    return sorted(result, key=lambda r: r.rate_date, reverse=True)
+
+
+def format_ecb_csv(fx: FXRates) -> str:
+    """FXRates back to a one-row ECB CSV"""
+    currencies = sorted(c for c in fx.rates if c != 'EUR')
+    return '\n'.join([
+        ', '.join(['Date'] + currencies),
+        ', '.join([fx.rate_date] + [f"{1 / fx.rates[c]:.6g}" for c in currencies]),
+    ]) + '\n'
+
+
+class FXRateProvider:
+    """Source of reference rates; rates_for returns the latest rates on or before day"""
+
+    name = 'provider'
+
+    def rates_for(self, day: date) -> FXRates:
+        raise NotImplementedError
+
+
+class ECBRateProvider(FXRateProvider):
+    """Daily ECB euro foreign exchange reference rates"""
+
+    name = 'ecb'
+
+    def __init__(self, url: str = ECB_DAILY_URL, timeout: int = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def rates_for(self, day: date) -> FXRates:
+        import zipfile
+        import requests
+
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        content = response.content
+        if self.url.endswith('.zip'):
+            with zipfile.ZipFile(io.BytesIO(content)) as archive:
+                content = archive.read(archive.namelist()[0])
+        rows = parse_ecb_csv(content.decode('utf-8'))
+        return _latest_on_or_before(rows, day, self.name)
+
+
+class FileRateProvider(FXRateProvider):
+    """ECB-format CSV on disk (daily or history file)"""
+
+    name = 'file'
+
+    def __init__(self, path: Path = FALLBACK_FILE):
+        self.path = Path(path)
+
+    def rates_for(self, day: date) -> FXRates:
+        rows = parse_ecb_csv(self.path.read_text(encoding='utf-8'))
+        return _latest_on_or_before(rows, day, self.name)
+
+
+def _latest_on_or_before(rows: List[FXRates], day: date, source: str) -> FXRates:
+    if not rows:
+        raise ValueError("No FX rates in source")
+    eligible = [r for r in rows if r.rate_date <= day.isoformat()]
+    if not eligible:
+        raise ValueError(f"No FX rates on or before {day.isoformat()}")
+    return FXRates(eligible[0].rate_date, eligible[0].rates, source)
+
+
+class FXRateCache:
+    """
+    Rates per calendar day, cached on disk (one ECB CSV per day) and in
+    memory; falls back to the newest cached day, then the fallback file,
+    when the provider fails
+    """
+
+    def __init__(self, provider: FXRateProvider = None, cache_dir: Path = CACHE_DIR,
+                 fallback_file: Path = FALLBACK_FILE):
+        self.provider = provider or ECBRateProvider()
+        self.cache_dir = Path(cache_dir)
+        self.fallback_file = Path(fallback_file)
+        self._by_day = {}
+
+    def _cache_file(self, day: str) -> Path:
+        return self.cache_dir / f"eurofxref_{day}.csv"
+
+    def _read(self, path: Path, source: str) -> FXRates:
+        rows = parse_ecb_csv(path.read_text(encoding='utf-8'))
+        return FXRates(rows[0].rate_date, rows[0].rates, source)
+
+    def rates(self, day: Optional[date] = None) -> FXRates:
+        day = day or date.today()
+        key = day.isoformat()
+        if key in self._by_day:
+            return self._by_day[key]
+
+        cache_file = self._cache_file(key)
+        if cache_file.exists():
+            fx = self._read(cache_file, 'cache')
+        else:
+            try:
+                fx = self.provider.rates_for(day)
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                cache_file.write_text(format_ecb_csv(fx), encoding='utf-8')
+            except Exception:
+                fx = self._stale(key)
+        self._by_day[key] = fx
+        return fx
+
+    def published(self, rate_date: str) -> Optional[FXRates]:
+        """Cached rates published for rate_date (None if that day was never fetched)"""
+        for path in sorted(self.cache_dir.glob('eurofxref_????-??-??.csv')):
+            if path.stem[10:] >= rate_date:
+                fx = self._read(path, 'cache')
+                if fx.rate_date == rate_date:
+                    return fx
+        return None
+
+    def _stale(self, key: str) -> FXRates:
+        cached = sorted(p for p in self.cache_dir.glob('eurofxref_????-??-??.csv') if p.stem[10:] <= key)
+        if cached:
+            return self._read(cached[-1], 'cache')
+        return self._read(self.fallback_file, 'fallback')
+
+
+_fx_cache = None
+
+
+def get_fx_cache() -> FXRateCache:
+    """
+    Process-wide cache; FX_RATES_FILE points it at an ECB-format file
+    instead of the ECB download (offline runs, tests)
+    """
+    global _fx_cache
+    if _fx_cache is None:
+        rates_file = os.getenv('FX_RATES_FILE')
+        provider = FileRateProvider(Path(rates_file)) if rates_file else ECBRateProvider()
+        _fx_cache = FXRateCache(provider)
+    return _fx_cache
+
+
+def get_fx_rates(day: Optional[date] = None) -> FXRates:
+    return get_fx_cache().rates(day)
+
+
+def convert_to_eur(amounts: Iterable, currencies, fx: FXRates = None):
+    """
+    Convert a column of prices to EUR in one call
+
+    currencies is a Series/array or a single code for all rows. Returns a
+    DataFrame (same index as amounts if it is a Series) with price_eur,
+    conversion_rate and rate_date; unknown currencies give NaN.
+    """
+    import numpy as np
+    import pandas as pd
+
+    fx = fx or get_fx_rates()
+    amounts = amounts if isinstance(amounts, pd.Series) else pd.Series(list(amounts))
+    if currencies is None or isinstance(currencies, str):
+        currencies = pd.Series(currencies, index=amounts.index)
+    else:
+        currencies = pd.Series(np.asarray(currencies, dtype=object), index=amounts.index)
+
+    codes = currencies.fillna('EUR').astype(str).str.strip().str.upper().replace('', 'EUR')
+    rate = codes.map(fx.rates).astype(float)
+    price = pd.to_numeric(amounts, errors='coerce')
+    return pd.DataFrame({
+        'price_eur': (price * rate).round(2),
+        'conversion_rate': rate,
+        'rate_date': np.where(rate.notna() & price.notna(), fx.rate_date, None),
+    }, index=amounts.index)
+
+
+def reprice_frame(df, fx: FXRates = None, cache: FXRateCache = None,
+                  amount_column: str = 'price_original', currency_column: str = 'price_currency',
+                  date_column: str = 'price_rate_date'):
+    """
+    Rows of df whose EUR price must be recomputed, with the new price_eur /
+    conversion_rate / rate_date. EUR rows are skipped, as are rows
+    converted at the current rate date and rows whose currency's rate is
+    the same as on the (cached) date they were converted at.
+    """
+    import pandas as pd
+
+    cache = cache or get_fx_cache()
+    fx = fx or cache.rates()
+    converted = convert_to_eur(df[amount_column], df[currency_column], fx)
+    stored = (df[date_column] if date_column in df.columns else pd.Series(None, index=df.index, dtype=object))
+    stored = stored.astype(object).where(stored.notna(), None).map(lambda d: str(d)[:10] if d else None)
+    codes = df[currency_column].fillna('EUR').astype(str).str.strip().str.upper()
+    stale = converted['price_eur'].notna() & (stored != fx.rate_date) & (codes != 'EUR')
+
+    for rate_date in stored[stale].dropna().unique():
+        old = cache.published(rate_date)
+        if old is None:
+            continue
+        rows = stale & (stored == rate_date)
+        unchanged = codes[rows].map(old.rates) == codes[rows].map(fx.rates)
+        stale[unchanged[unchanged].index] = False
+    return converted[stale]
+
+
+def write_reprices(supabase, ids, changes, chunk_size: int = REPRICE_CHUNK) -> int:
+    """
+    Store reprice_frame() results: ids are the row ids in the order of
+    `changes`; each chunk is one reprice_food_candidates() call. Returns
+    the number of rows updated.
+    """
+    rows = [{'id': row_id, 'price_eur': float(price_eur), 'price_rate_date': rate_date}
+            for row_id, price_eur, rate_date in zip(ids, changes['price_eur'], changes['rate_date'])]
+    updated = 0
+    for start in range(0, len(rows), chunk_size):
+        resp = supabase.rpc('reprice_food_candidates', {'p_rows': rows[start:start + chunk_size]}).execute()
+        updated += resp.data or 0
+    return updated
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Ingredient tokenizing, canonicalization and allergen tagging
+
+One component shared by the scrapers and the canonicalization job. The
+canonical map and allergen taxonomy come from
+data/ingredients_canonical_map.yaml. The split/cleanup regexes are
+compiled once, allergen keywords are matched with a single trie regex,
+and repeated ingredient strings/tokens are served from a cache (the same
+declarations recur across sizes and flavours of a product line).
+
+Stored tokens record the hash of the raw text and the canonical map version
+they were built with, so a re-run only re-tokenizes rows whose text changed
+or that contain a map entry that changed (see plan_retokenization).
+"""
+import hashlib
+import json
+import re
+import yaml
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from etl.classify_foods import trie_regex
+
+CANONICAL_MAP_FILE = Path(__file__).parent.parent / 'data' / 'ingredients_canonical_map.yaml'
+# Every canonical map version rows have been tokenized with, by version
+MAP_HISTORY_FILE = Path(__file__).parent.parent / 'data' / 'ingredients_canonical_map_history.json'
+CACHE_SIZE = 65536
+# Rows per update_ingredients_tokens() call (sql/ingredients_tokenization_state.sql)
+TOKEN_UPDATE_CHUNK = 500
+
+# Parenthesised content ("chicken (26%)", "minerals (calcium, zinc)")
+PAREN_PATTERN = re.compile(r'\([^)]*\)')
+PERCENT_PATTERN = re.compile(r'\d+(?:[.,]\d+)?\s*%')
+SPLIT_PATTERN = re.compile(r'[,;]|\sand\s|\s&\s')
+# Anything that is not a letter, space or hyphen
+CLEANUP_PATTERN = re.compile(r'[^\w\s-]|[\d_]')
+
+
+def load_canonical_map(map_file: Path = CANONICAL_MAP_FILE) -> Dict:
+    """Load canonical map and allergen taxonomy from YAML"""
+    if not Path(map_file).exists():
+        return {}
+    with open(map_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+class IngredientProcessor:
+    """Tokenize ingredient declarations and tag allergen groups"""
+
+    def __init__(self, canonical_map: Dict[str, str] = None,
+                 allergen_taxonomy: Dict[str, List[str]] = None,
+                 map_file: Path = CANONICAL_MAP_FILE):
+        if canonical_map is None or allergen_taxonomy is None:
+            data = load_canonical_map(map_file)
+            if canonical_map is None:
+                canonical_map = data.get('canonical_map') or {}
+            if allergen_taxonomy is None:
+                allergen_taxonomy = data.get('allergen_taxonomy') or {}
+
+        self.canonical_map = {k.lower(): v for k, v in canonical_map.items()}
+        self.canonical_terms = frozenset(self.canonical_map.values())
+        self.map_version = canonical_map_version(self.canonical_map)
+        self.allergen_taxonomy = allergen_taxonomy
+
+        # keyword -> groups; a keyword also carries the groups of every
+        # shorter keyword it starts with, since the trie only reports the
+        # longest keyword at each position
+        keyword_groups = {}
+        for group, keywords in allergen_taxonomy.items():
+            for keyword in keywords:
+                keyword_groups.setdefault(keyword.lower(), set()).add(group)
+        self.keyword_groups = {
+            keyword: frozenset().union(*(groups for other, groups in keyword_groups.items()
+                                         if keyword.startswith(other)))
+            for keyword in keyword_groups
+        }
+
+        # Lookahead so overlapping keywords are all found ("chickpeas")
+        self.allergen_pattern = None
+        if self.keyword_groups:
+            self.allergen_pattern = re.compile(f'(?=({trie_regex(self.keyword_groups)}))')
+
+        self._terms = lru_cache(maxsize=CACHE_SIZE)(self._terms_uncached)
+        self._tokenize = lru_cache(maxsize=CACHE_SIZE)(self._tokenize_uncached)
+        self._token_groups = lru_cache(maxsize=CACHE_SIZE)(self._token_groups_uncached)
+
+    def _terms_uncached(self, text: str) -> Tuple[str, ...]:
+        text = PAREN_PATTERN.sub('', text.lower())
+        text = PERCENT_PATTERN.sub('', text)
+
+        terms = {}
+        for part in SPLIT_PATTERN.split(text):
+            part = ' '.join(CLEANUP_PATTERN.sub(' ', part).split())
+            if len(part) > 1:
+                terms.setdefault(part, None)
+        return tuple(terms)
+
+    def _tokenize_uncached(self, text: str) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(self.canonical_map.get(term, term) for term in self._terms(text)))
+
+    def _token_groups_uncached(self, token: str) -> frozenset:
+        if self.allergen_pattern is None:
+            return frozenset()
+        return frozenset().union(*(self.keyword_groups[keyword]
+                                   for keyword in self.allergen_pattern.findall(token)))
+
+    def terms(self, raw_text: Optional[str]) -> List[str]:
+        """Cleaned ingredient terms before canonical mapping"""
+        if not raw_text or not isinstance(raw_text, str):
+            return []
+        return list(self._terms(raw_text))
+
+    def tokenize(self, raw_text: Optional[str]) -> List[str]:
+        """Ordered, de-duplicated canonical tokens for an ingredients string"""
+        if not raw_text or not isinstance(raw_text, str):
+            return []
+        return list(self._tokenize(raw_text))
+
+    def allergen_groups(self, tokens: Iterable[str]) -> List[str]:
+        """Allergen groups whose keywords occur in any token"""
+        groups = set()
+        for token in tokens or []:
+            groups |= self._token_groups(token.lower())
+        return sorted(groups)
+
+    def is_unmapped(self, token: str) -> bool:
+        """Token is not a canonical ingredient name"""
+        return token not in self.canonical_terms
+
+    def process(self, raw_text: Optional[str]) -> Dict[str, List[str]]:
+        tokens = self.tokenize(raw_text)
+        return {'ingredients_tokens': tokens, 'allergen_groups': self.allergen_groups(tokens)}
+
+    def process_many(self, texts: Iterable[str]):
+        """
+        Tokenize and tag a Series/array of ingredient strings; returns a
+        DataFrame with ingredients_tokens and allergen_groups on the same index
+        """
+        import pandas as pd
+
+        series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+        codes, uniques = pd.factorize(series.where(series.map(lambda v: isinstance(v, str)), ''))
+
+        tokens, groups = [], []
+        for text in uniques:
+            result = self.process(text)
+            tokens.append(result['ingredients_tokens'])
+            groups.append(result['allergen_groups'])
+
+        def take(values):
+            return pd.Series(values, dtype=object).iloc[codes].to_numpy()
+
+        return pd.DataFrame({
+            'ingredients_tokens': take(tokens),
+            'allergen_groups': take(groups),
+        }, index=series.index)
+
+
+def canonical_map_version(canonical_map: Dict[str, str]) -> str:
+    """Content hash of a canonical map (changes whenever any entry does)"""
+    payload = json.dumps(sorted(canonical_map.items()), ensure_ascii=False)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def ingredients_hash(raw_text: Optional[str]) -> Optional[str]:
+    """Hash of an ingredients declaration as stored"""
+    if not raw_text or not isinstance(raw_text, str):
+        return None
+    return hashlib.md5(raw_text.strip().encode('utf-8')).hexdigest()
+
+
+def load_map_history(history_file: Path = MAP_HISTORY_FILE) -> Dict[str, Dict[str, str]]:
+    if not Path(history_file).exists():
+        return {}
+    with open(history_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_map_history(history: Dict[str, Dict[str, str]], history_file: Path = MAP_HISTORY_FILE):
+    with open(history_file, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def changed_terms(old_map: Dict[str, str], new_map: Dict[str, str]) -> Set[str]:
+    """Raw terms whose canonical mapping was added, removed or changed"""
+    return {term for term in set(old_map) | set(new_map) if old_map.get(term) != new_map.get(term)}
+
+
+def build_term_index(rows: Iterable[Dict], processor: IngredientProcessor,
+                     id_column: str = 'id') -> Dict[str, Set]:
+    """Reverse index: raw ingredient term -> ids of rows containing it"""
+    index = {}
+    for row in rows:
+        for term in processor.terms(row.get('ingredients_raw')):
+            index.setdefault(term, set()).add(row[id_column])
+    return index
+
+
+def plan_retokenization(rows: List[Dict], processor: IngredientProcessor,
+                        map_history: Dict[str, Dict[str, str]], id_column: str = 'id') -> Dict[object, str]:
+    """
+    Rows that need re-tokenizing, with the reason
+
+    rows carry ingredients_raw, ingredients_hash and ingredients_map_version
+    (and ingredients_tokens, if selected). A row is re-tokenized when its
+    raw text no longer matches the stored hash ('raw_changed'), when it was
+    tokenized with a map version that is not in the history
+    ('unknown_map_version'), or when one of its terms maps differently in
+    the current map than in the version it was tokenized with
+    ('map_changed'). Rows without raw text that still hold a hash or tokens
+    are cleared ('raw_cleared'). Everything else is left alone.
+    """
+    plan = {}
+    stale = {}
+    for row in rows:
+        raw_hash = ingredients_hash(row.get('ingredients_raw'))
+        if raw_hash is None:
+            if row.get('ingredients_hash') or row.get('ingredients_tokens'):
+                plan[row[id_column]] = 'raw_cleared'
+            continue
+        version = row.get('ingredients_map_version')
+        if raw_hash != row.get('ingredients_hash'):
+            plan[row[id_column]] = 'raw_changed'
+        elif version == processor.map_version:
+            continue
+        elif version not in map_history:
+            plan[row[id_column]] = 'unknown_map_version'
+        else:
+            stale.setdefault(version, []).append(row)
+
+    for version, version_rows in stale.items():
+        terms = changed_terms(map_history[version], processor.canonical_map)
+        if not terms:
+            continue
+        index = build_term_index(version_rows, processor, id_column)
+        for term in terms:
+            for row_id in index.get(term, ()):
+                plan[row_id] = 'map_changed'
+    return plan
+
+
+def write_tokenization(supabase, table: str, updates: List[Dict], chunk_size: int = TOKEN_UPDATE_CHUNK) -> int:
+    """
+    Store re-tokenized rows ({id, ingredients_tokens, ingredients_hash,
+    ingredients_map_version}), one update_ingredients_tokens() call per
+    chunk. Returns the number of rows updated.
+    """
+    updated = 0
+    for start in range(0, len(updates), chunk_size):
+        resp = supabase.rpc('update_ingredients_tokens',
+                            {'p_table': table, 'p_rows': updates[start:start + chunk_size]}).execute()
+        updated += resp.data or 0
+    return updated
+
+
+_ingredient_processor = None
+
+
+def get_ingredient_processor() -> IngredientProcessor:
+    """Process-wide processor built from the canonical map file"""
+    global _ingredient_processor
+    if _ingredient_processor is None:
+        _ingredient_processor = IngredientProcessor()
+    return _ingredient_processor
+
+
+def tokenize_ingredients(raw_text: Optional[str]) -> List[str]:
+    return get_ingredient_processor().tokenize(raw_text)
+
+
+def get_allergen_groups(tokens: Iterable[str]) -> List[str]:
+    return get_ingredient_processor().allergen_groups(tokens)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Indexed product key matching (GCS snapshot/image keys <-> product keys)
+
+KeyIndex normalizes a set of keys once. Exact variants are looked up in a
+dict of normalized key -> key. Fuzzy matching goes through a q-gram
+inverted index: only keys that share q-grams with a variation are scored,
+most shared first, after cheap length and quick_ratio upper bounds, so
+SequenceMatcher runs on a handful of candidates instead of every key.
+
+Match labels are the ones the matching scripts report: 'exact_variation'
+and 'fuzzy_<score>'.
+"""
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Tuple
+
+Q = 3
+MAX_CANDIDATES = 100
+
+_UNDERSCORES = re.compile(r'_+')
+
+
+def normalize_key(key: str) -> str:
+    """Lowercase, collapse repeated underscores, strip leading/trailing ones"""
+    return _UNDERSCORES.sub('_', key.lower()).strip('_')
+
+
+def qgrams(text: str, q: int = Q) -> set:
+    """q-grams of a string padded at both ends (short strings still get grams)"""
+    padded = f"#{text}#"
+    if len(padded) <= q:
+        return {padded}
+    return {padded[i:i + q] for i in range(len(padded) - q + 1)}
+
+
+class KeyIndex:
+    """Exact + q-gram index over keys for repeated variation lookups"""
+
+    def __init__(self, keys: Iterable[str], normalize: Callable[[str], str] = normalize_key,
+                 threshold: float = 0.85, q: int = Q, max_candidates: int = MAX_CANDIDATES):
+        self.normalize = lru_cache(maxsize=None)(normalize)
+        self.threshold = threshold
+        self.q = q
+        self.max_candidates = max_candidates
+
+        self.keys = sorted(set(keys))
+        self.normalized = [self.normalize(key) for key in self.keys]
+        # First key (sorted) wins when several normalize the same
+        self.exact = {}
+        for key, norm in zip(self.keys, self.normalized):
+            self.exact.setdefault(norm, key)
+
+        self.postings = {}
+        for i, norm in enumerate(self.normalized):
+            for gram in qgrams(norm, q):
+                self.postings.setdefault(gram, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def exact_match(self, variations: Iterable[str]) -> Optional[str]:
+        for variation in variations:
+            key = self.exact.get(self.normalize(variation))
+            if key is not None:
+                return key
+        return None
+
+    def candidates(self, normalized: str) -> List[int]:
+        """Key ids sharing q-grams with normalized, most shared first"""
+        shared = Counter()
+        for gram in qgrams(normalized, self.q):
+            shared.update(self.postings.get(gram, ()))
+        return [i for i, _ in shared.most_common(self.max_candidates)]
+
+    def fuzzy_match(self, variations: Iterable[str]) -> Tuple[Optional[str], float]:
+        """Best-scoring key above threshold over all variations (SequenceMatcher ratio)"""
+        best_key, best_score = None, 0.0
+        for variation in variations:
+            norm = self.normalize(variation)
+            for i in self.candidates(norm):
+                other = self.normalized[i]
+                # Upper bounds first: ratio <= 2*min/(sum of lengths) and quick_ratio
+                total = len(norm) + len(other)
+                floor = max(best_score, self.threshold)
+                if not total or 2 * min(len(norm), len(other)) / total <= floor:
+                    continue
+                matcher = SequenceMatcher(None, norm, other)
+                if matcher.quick_ratio() <= floor:
+                    continue
+                score = matcher.ratio()
+                if score > floor:
+                    best_key, best_score = self.keys[i], score
+        return best_key, best_score
+
+    def match(self, variations: Iterable[str]) -> Tuple[Optional[str], Optional[str]]:
+        """(key, label) for the first exact variation, else the best fuzzy match, else (None, None)"""
+        variations = list(variations)
+        key = self.exact_match(variations)
+        if key is not None:
+            return key, 'exact_variation'
+        key, score = self.fuzzy_match(variations)
+        if key is not None:
+            return key, f'fuzzy_{score:.2f}'
+        return None, None
+
+    def match_many(self, variation_lists: Iterable[Iterable[str]]) -> List[Tuple[Optional[str], Optional[str]]]:
+        return [self.match(variations) for variations in variation_lists]
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Materialized view refresh orchestration
+
+The catalog relations form a chain:
+
+    food_candidates* -> foods_union_all -> foods_canonical
+        -> foods_published_preview / foods_published_prod
+        -> foods_brand_quality_preview_mv / foods_brand_quality_prod_mv
+
+Depending on the deployment some of these are plain views or tables and
+some are materialized views; only MVs are refreshed, the rest just pass
+their inputs through. refresh_all() walks the graph level by level and
+refreshes the MVs of a level in parallel, CONCURRENTLY where the MV has a
+unique index (sql/mv_refresh.sql). An MV's input signature is a hash of
+the write counters of the tables it ultimately reads; an MV whose
+signature equals the one of its last successful refresh is skipped. Every
+refresh and its duration is recorded in mv_refresh_log.
+"""
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+    'food_candidates_compat': ('food_candidates',),
+    'food_candidates_sc_compat': ('food_candidates_sc',),
+    'food_brands_compat': ('food_brands',),
+    'foods_union_all': ('food_candidates_compat', 'food_candidates_sc_compat', 'food_brands_compat'),
+    'foods_canonical': ('foods_union_all',),
+    'foods_published_preview': ('foods_canonical', 'brand_allowlist'),
+    'foods_published_prod': ('foods_canonical', 'brand_allowlist'),
+    'foods_brand_quality_preview_mv': ('foods_published_preview',),
+    'foods_brand_quality_prod_mv': ('foods_published_prod', 'brand_allowlist'),
+}
+
+
+class RefreshResult(NamedTuple):
+    name: str
+    status: str                  # 'refreshed', 'skipped', 'failed', 'blocked'
+    level: int
+    mode: Optional[str] = None   # 'concurrent' or 'blocking'
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    input_signature: Optional[str] = None
+
+
+def relations(graph: Dict[str, Sequence[str]]) -> List[str]:
+    """Every relation named in the graph, sorted"""
+    names = set(graph)
+    for deps in graph.values():
+        names.update(deps)
+    return sorted(names)
+
+
+def refresh_levels(graph: Dict[str, Sequence[str]]) -> List[List[str]]:
+    """
+    Graph nodes grouped by dependency depth: a node's inputs are all in
+    earlier levels, so nodes of one level can be refreshed in parallel.
+    Relations without an entry (base tables) are not listed.
+    """
+    depth: Dict[str, int] = {}
+    visiting: Set[str] = set()
+
+    def visit(name: str) -> int:
+        if name not in graph:
+            return -1
+        if name in depth:
+            return depth[name]
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through {name}")
+        visiting.add(name)
+        depth[name] = 1 + max((visit(dep) for dep in graph[name]), default=-1)
+        visiting.discard(name)
+        return depth[name]
+
+    for name in graph:
+        visit(name)
+    levels: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for name in sorted(depth):
+        levels[depth[name]].append(name)
+    return levels
+
+
+def relation_info(supabase, names: Iterable[str]) -> Dict[str, Dict]:
+    """relkind, write counters, unique index flag and last refresh signature per existing relation"""
+    resp = supabase.rpc('mv_relation_info', {'p_names': list(names)}).execute()
+    return {row['relname']: row for row in resp.data or []}
+
+
+def base_tables(name: str, graph: Dict[str, Sequence[str]], info: Dict[str, Dict]) -> Set[str]:
+    """The tables a relation's contents ultimately come from (views and MVs are expanded)"""
+    kind = info.get(name, {}).get('relkind')
+    if name not in graph or kind == 'table':
+        return {name}
+    tables: Set[str] = set()
+    for dep in graph[name]:
+        tables |= base_tables(dep, graph, info)
+    return tables
+
+
+def input_signature(name: str, graph: Dict[str, Sequence[str]], info: Dict[str, Dict]) -> str:
+    """Hash of the write counters of a relation's base tables"""
+    digest = hashlib.blake2b(digest_size=16)
+    for table in sorted(base_tables(name, graph, info)):
+        digest.update(f"{table}:{info.get(table, {}).get('modifications')};".encode())
+    return digest.hexdigest()
+
+
+def refresh_mv(supabase, name: str, signature: Optional[str] = None, concurrently: bool = True) -> Dict:
+    """Refresh one MV through the refresh_mv RPC (which logs it); returns status, mode, duration_ms, error"""
+    start = time.perf_counter()
+    try:
+        resp = supabase.rpc('refresh_mv', {'p_name': name, 'p_input_signature': signature,
+                                           'p_concurrently': concurrently}).execute()
+        row = (resp.data or [{}])[0]
+    except Exception as e:
+        row = {'status': 'failed', 'error': str(e)}
+    if row.get('duration_ms') is None:
+        row['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    row.setdefault('status', 'failed')
+    return row
+
+
+def refresh_all(supabase, graph: Dict[str, Sequence[str]] = DEPENDENCIES, force: bool = False,
+                concurrently: bool = True, max_workers: int = 4) -> List[RefreshResult]:
+    """
+    Refresh every MV of the graph in dependency order
+
+    MVs whose inputs are unchanged since their last successful refresh are
+    skipped unless `force`; MVs downstream of a failed refresh are blocked
+    (left as they are). Returns one result per MV, in refresh order.
+    """
+    info = relation_info(supabase, relations(graph))
+    results: List[RefreshResult] = []
+    failed: Set[str] = set()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for level, names in enumerate(refresh_levels(graph)):
+            pending = []
+            for name in names:
+                upstream_failed = any(dep in failed for dep in graph[name])
+                if info.get(name, {}).get('relkind') != 'mv':
+                    if upstream_failed:
+                        failed.add(name)
+                    continue
+                signature = input_signature(name, graph, info)
+                if upstream_failed:
+                    failed.add(name)
+                    results.append(RefreshResult(name, 'blocked', level, input_signature=signature))
+                elif not force and signature == info[name].get('last_signature'):
+                    results.append(RefreshResult(name, 'skipped', level, input_signature=signature))
+                else:
+                    pending.append((name, signature))
+
+            futures = [(name, signature, pool.submit(refresh_mv, supabase, name, signature, concurrently))
+                       for name, signature in pending]
+            for name, signature, future in futures:
+                row = future.result()
+                if row['status'] != 'refreshed':
+                    failed.add(name)
+                results.append(RefreshResult(name, row['status'], level, row.get('mode'),
+                                             row.get('duration_ms'), row.get('error'), signature))
+    return results
@@ -5,8 +5,9 @@ Handles mapping Dogo characteristics to controlled vocabularies
 """
 import re
 import yaml
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Union, Iterable
 import hashlib
 
 # Load breed aliases mapping
@@ -165,18 +166,7 @@ def normalize_characteristic(text: str, mapping: Dict[str, str]) -> Optional[str
     if not text:
         return None
     
-    text_lower = text.lower().strip()
-    
-    # Direct match first
-    if text_lower in mapping:
-        return mapping[text_lower]
-    
-    # Partial match
-    for pattern, value in mapping.items():
-        if pattern in text_lower:
-            return value
-    
-    return None
+    return _matcher_for(mapping).match(text)
 
 def extract_lifespan(text: str) -> tuple[Optional[int], Optional[int]]:
     """Extract lifespan range from text like '10-12 years' or '12-14'"""
@@ -294,17 +284,141 @@ def resolve_breed_slug(breed_name: str) -> tuple[str, str, List[str]]:
     Returns:
         tuple: (breed_slug, display_name, aliases_list)
     """
-    aliases_map = load_breed_aliases()
-    breed_name_clean = breed_name.strip()
+    return get_breed_normalizer().resolve_slug(breed_name)
+
+
+class VocabularyMatcher:
+    """
+    Compiled matcher for one controlled-vocabulary mapping
+    
+    Same semantics as the original dict scan: an exact match wins, otherwise
+    the earliest pattern (in mapping order) that occurs anywhere in the text.
+    All patterns are compiled into one alternation inside a lookahead, so a
+    single regex pass reports, at every position, the lowest-ranked pattern
+    that starts there.
+    """
+    
+    def __init__(self, mapping: Dict[str, str], cache_size: int = 4096):
+        self.mapping = dict(mapping)
+        self.rank = {pattern: i for i, pattern in enumerate(self.mapping)}
+        alternation = '|'.join(re.escape(pattern) for pattern in self.mapping)
+        self.regex = re.compile(f'(?=({alternation}))') if self.mapping else None
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+    
+    def _match(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+        
+        text_lower = text.lower().strip()
+        
+        if text_lower in self.mapping:
+            return self.mapping[text_lower]
+        
+        if self.regex is None:
+            return None
+        
+        best_rank, best_pattern = None, None
+        for hit in self.regex.finditer(text_lower):
+            pattern = hit.group(1)
+            rank = self.rank[pattern]
+            if best_rank is None or rank < best_rank:
+                best_rank, best_pattern = rank, pattern
+                if rank == 0:
+                    break
+        
+        return self.mapping[best_pattern] if best_pattern is not None else None
+
+
+class BreedNormalizer:
+    """
+    Breed normalizer built once per process
+    
+    Reads breed_aliases.yaml a single time, indexes every alias to its slug
+    and compiles one VocabularyMatcher per controlled vocabulary. Repeated
+    raw strings are served from LRU caches.
+    """
     
-    # Check if breed name matches any alias
-    for slug, aliases in aliases_map.items():
-        if breed_name_clean in aliases:
-            return slug, aliases[0], aliases  # First alias is display name
+    VOCABULARIES = {
+        'size': SIZE_MAPPING,
+        'energy': ENERGY_MAPPING,
+        'coat_length': COAT_LENGTH_MAPPING,
+        'shedding': SHEDDING_MAPPING,
+        'trainability': TRAINABILITY_MAPPING,
+        'bark_level': BARK_LEVEL_MAPPING,
+    }
     
-    # If no match, create slug from name
-    slug = re.sub(r'[^a-z0-9]+', '-', breed_name_clean.lower()).strip('-')
-    return slug, breed_name_clean, [breed_name_clean]
+    def __init__(self, aliases_map: Dict[str, List[str]] = None, cache_size: int = 4096):
+        self.aliases_map = load_breed_aliases() if aliases_map is None else aliases_map
+        
+        # alias -> slug; first slug in file order wins, as with the linear scan
+        self.alias_index: Dict[str, str] = {}
+        for slug, aliases in self.aliases_map.items():
+            for alias in aliases or []:
+                self.alias_index.setdefault(alias, slug)
+        
+        self.matchers = {
+            name: VocabularyMatcher(mapping, cache_size)
+            for name, mapping in self.VOCABULARIES.items()
+        }
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_slug)
+    
+    def normalize(self, vocabulary: str, text: str) -> Optional[str]:
+        """Normalize one value against a named vocabulary (e.g. 'size')"""
+        if not text:
+            return None
+        return self.matchers[vocabulary].match(text)
+    
+    def normalize_many(self, vocabulary: str, texts: Iterable[str]) -> List[Optional[str]]:
+        """Normalize a batch of values against one vocabulary"""
+        matcher = self.matchers[vocabulary]
+        return [matcher.match(text) if text else None for text in texts]
+    
+    def normalize_characteristics(self, characteristics: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """Normalize every known vocabulary field present in a raw record"""
+        return {
+            name: self.normalize(name, characteristics.get(name, ''))
+            for name in self.matchers
+        }
+    
+    def resolve_slug(self, breed_name: str) -> tuple[str, str, List[str]]:
+        """Resolve breed name to (breed_slug, display_name, aliases_list)"""
+        slug, display_name, aliases = self._resolve(breed_name.strip())
+        return slug, display_name, list(aliases)
+    
+    def _resolve_slug(self, breed_name_clean: str) -> tuple[str, str, tuple]:
+        slug = self.alias_index.get(breed_name_clean)
+        if slug is not None:
+            aliases = self.aliases_map[slug]
+            return slug, aliases[0], tuple(aliases)  # First alias is display name
+        
+        # If no match, create slug from name
+        slug = re.sub(r'[^a-z0-9]+', '-', breed_name_clean.lower()).strip('-')
+        return slug, breed_name_clean, (breed_name_clean,)
+
+
+_breed_normalizer: Optional[BreedNormalizer] = None
+_custom_matchers: Dict[int, tuple] = {}
+
+
+def get_breed_normalizer() -> BreedNormalizer:
+    """Process-wide BreedNormalizer (breed_aliases.yaml is read once)"""
+    global _breed_normalizer
+    if _breed_normalizer is None:
+        _breed_normalizer = BreedNormalizer()
+    return _breed_normalizer
+
+
+def _matcher_for(mapping: Dict[str, str]) -> VocabularyMatcher:
+    """Compiled matcher for a mapping dict, built on first use"""
+    for name, vocabulary in BreedNormalizer.VOCABULARIES.items():
+        if mapping is vocabulary:
+            return get_breed_normalizer().matchers[name]
+    
+    cached = _custom_matchers.get(id(mapping))
+    if cached is None or cached[0] is not mapping or cached[1].mapping != mapping:
+        cached = (mapping, VocabularyMatcher(mapping))
+        _custom_matchers[id(mapping)] = cached
+    return cached[1]
 
 def generate_breed_fingerprint(breed_data: Dict) -> str:
     """Generate fingerprint for breed data deduplication"""
@@ -6,6 +6,12 @@ import hashlib
 from typing import List, Dict, Any, Optional, Union
 from decimal import Decimal
 
+from etl import pack_size
+from etl.classify_foods import get_food_classifier
+from etl.fx_rates import get_fx_rates
+from etl.ingredients import get_ingredient_processor
+from etl.nutrition_engine import estimate_kcal_value
+
 
 def parse_energy(value: str, unit: str = None) -> Optional[float]:
     """
@@ -74,80 +80,28 @@ def parse_percent(value: str) -> Optional[float]:
 
 def parse_pack_size(size_str: str) -> Optional[Dict[str, Any]]:
     """
-    Parse pack size string to structured format
-    Examples: "2kg", "400g", "12 x 400g"
-    Returns: {"amount": 2000, "unit": "g", "display": "2kg"}
+    Parse pack size string to structured format (see etl/pack_size.py)
+    Examples: "2kg", "400g", "12 x 400g", "5 lb"
+    Returns: {"amount": 2000, "unit": "g", "display": "2kg", "multipack": False}
     """
-    if not size_str:
+    pack = pack_size.parse_pack_size(str(size_str)) if size_str else None
+    if pack is None:
         return None
     
-    size_str = str(size_str).lower().strip()
-    
-    # Handle multi-pack (e.g., "12 x 400g")
-    multipack_match = re.search(r'(\d+)\s*x\s*(\d+(?:[.,]\d+)?)\s*(kg|g)', size_str)
-    if multipack_match:
-        count = int(multipack_match.group(1))
-        amount = float(multipack_match.group(2).replace(',', '.'))
-        unit = multipack_match.group(3)
-        
-        # Convert to grams
-        total_g = amount * count
-        if unit == 'kg':
-            total_g = total_g * 1000
-            
-        return {
-            "amount": total_g,
-            "unit": "g",
-            "display": size_str,
-            "multipack": True
-        }
-    
-    # Handle single pack
-    single_match = re.search(r'(\d+(?:[.,]\d+)?)\s*(kg|g)', size_str)
-    if single_match:
-        amount = float(single_match.group(1).replace(',', '.'))
-        unit = single_match.group(2)
-        
-        # Convert to grams
-        if unit == 'kg':
-            amount = amount * 1000
-            
-        return {
-            "amount": amount,
-            "unit": "g",
-            "display": size_str,
-            "multipack": False
-        }
-    
-    return None
+    return {
+        "amount": pack.grams,
+        "unit": "g",
+        "display": pack.label,
+        "multipack": pack.is_multipack
+    }
 
 
 def tokenize_ingredients(ingredients_str: str) -> List[str]:
     """
     Convert ingredients string to normalized tokens
+    (canonical names from data/ingredients_canonical_map.yaml)
     """
-    if not ingredients_str:
-        return []
-    
-    # Split by comma or semicolon
-    parts = re.split(r'[,;]', ingredients_str.lower())
-    
-    tokens = []
-    for part in parts:
-        # Remove parenthetical content (e.g., "chicken (25%)")
-        part = re.sub(r'\([^)]*\)', '', part)
-        
-        # Remove percentages
-        part = re.sub(r'\d+(?:[.,]\d+)?%?', '', part)
-        
-        # Clean and trim
-        part = part.strip()
-        
-        # Skip empty or very short tokens
-        if len(part) > 2:
-            tokens.append(part)
-    
-    return tokens
+    return get_ingredient_processor().tokenize(ingredients_str)
 
 
 def check_contains_chicken(ingredients_tokens: List[str]) -> bool:
@@ -218,28 +172,11 @@ def parse_price(price_str: str, currency: str = None) -> Optional[Dict[str, Any]
 def estimate_kcal_from_analytical(protein: float, fat: float, fiber: float = 0, 
                                   ash: float = 0, moisture: float = 0) -> Optional[float]:
     """
-    Estimate kcal/100g from analytical constituents using Atwater factors
-    carb_est = 100 - (protein + fat + fiber + ash + moisture) but >= 0
-    kcal/100g ≈ 4*protein + 9*fat + 4*carb_est
+    Estimate kcal/100g from analytical constituents
+    (modified Atwater, carbohydrate by difference; see etl/nutrition_engine.py)
     Note: This is an estimate, actual metabolizable energy may differ
     """
-    if protein is None or fat is None:
-        return None
-    
-    # Use 0 for missing optional values
-    fiber = fiber or 0
-    ash = ash or 0
-    moisture = moisture or 0
-    
-    # Estimate carbohydrates (NFE - Nitrogen Free Extract)
-    carb_est = 100 - (protein + fat + fiber + ash + moisture)
-    carb_est = max(0, carb_est)  # Ensure non-negative
-    
-    # Calculate using modified Atwater factors for pet food
-    # Protein: 4 kcal/g, Fat: 9 kcal/g, Carbs: 4 kcal/g
-    kcal_per_100g = (4 * protein) + (9 * fat) + (4 * carb_est)
-    
-    return round(kcal_per_100g, 1)
+    return estimate_kcal_value(protein, fat, fiber, ash, moisture)
 
 
 def contains(tokens: List[str], keywords: List[str]) -> bool:
@@ -263,17 +200,15 @@ def contains(tokens: List[str], keywords: List[str]) -> bool:
 def derive_form(name: str, category: str = None) -> Optional[str]:
     """
     Derive food form from product name and category
-    Returns: 'dry', 'wet', 'raw', 'vet', or None
+    Returns: 'dry', 'wet', 'freeze_dried', 'raw', 'vet', or None
     """
-    text = f"{name or ''} {category or ''}".lower()
+    text = f"{name or ''} {category or ''}"
+    classifier = get_food_classifier()
     
-    if any(word in text for word in ['dry', 'kibble', 'biscuit', 'crispy', 'crunchy']):
-        return 'dry'
-    elif any(word in text for word in ['wet', 'can', 'canned', 'pouch', 'tray', 'pate', 'gravy', 'jelly']):
-        return 'wet'
-    elif any(word in text for word in ['raw', 'freeze-dried', 'frozen', 'fresh', 'barf']):
-        return 'raw'
-    elif any(word in text for word in ['vet', 'veterinary', 'prescription', 'therapeutic', 'clinical']):
+    form = classifier.form.classify(text).label
+    if form:
+        return form
+    if 'veterinary' in classifier.special_diets.labels(text):
         return 'vet'
     
     return None
@@ -284,18 +219,13 @@ def derive_life_stage(name: str, tags: List[str] = None) -> Optional[str]:
     Derive life stage from product name and tags
     Returns: 'puppy', 'adult', 'senior', 'all', or None
     """
-    text = name.lower() if name else ''
+    text = name or ''
     if tags:
-        text += ' ' + ' '.join(tags).lower()
+        text += ' ' + ' '.join(tags)
     
-    if any(word in text for word in ['puppy', 'junior', 'young', 'growth', 'starter']):
-        return 'puppy'
-    elif any(word in text for word in ['senior', 'mature', 'aged', 'older', '7+', '8+', '9+']):
-        return 'senior'
-    elif any(word in text for word in ['all life', 'all stage', 'any age', 'all age']):
-        return 'all'
-    elif any(word in text for word in ['adult', 'maintenance']):
-        return 'adult'
+    life_stage = get_food_classifier().life_stage.classify(text).label
+    if life_stage:
+        return life_stage
     
     # Default to adult if unclear
     return 'adult' if text else None
@@ -303,29 +233,24 @@ def derive_life_stage(name: str, tags: List[str] = None) -> Optional[str]:
 
 def normalize_currency(price: float, currency: str, rates: Dict[str, float] = None) -> Dict[str, Any]:
     """
-    Normalize price to EUR using provided or default rates
-    Returns dict with EUR amount, original currency, and conversion date
-    """
-    if not rates:
-        # Default rates (should be updated from config)
-        rates = {
-            'EUR': 1.0,
-            'USD': 0.92,
-            'GBP': 1.16,
-            'SEK': 0.087,
-            'DKK': 0.134,
-            'NOK': 0.085
-        }
-    
+    Normalize price to EUR using provided rates or the daily FX rates (etl/fx_rates.py)
+    Returns dict with EUR amount, original currency, rate and the rate date
+    """
     currency = currency.upper() if currency else 'EUR'
-    rate = rates.get(currency, 1.0)
+    if rates:
+        rate = rates.get(currency, 1.0)
+        rate_date = rates.get('conversion_date')
+    else:
+        fx = get_fx_rates()
+        rate = fx.rate(currency) or 1.0
+        rate_date = fx.rate_date
     
     return {
         'price_eur': round(price * rate, 2),
         'original_currency': currency,
         'original_price': price,
         'conversion_rate': rate,
-        'converted_at': '2024-01-01'  # Should be from config
+        'converted_at': rate_date
     }
 
 
@@ -354,26 +279,12 @@ def generate_fingerprint(brand: str, name: str, ingredients: str) -> str:
 
 def normalize_form(form_str: str) -> Optional[str]:
     """
-    Normalize food form to standard values: dry, wet, raw, vet
+    Normalize food form to standard values: dry, wet, freeze_dried, raw, vet
     """
     if not form_str:
         return None
     
-    form_str = form_str.lower().strip()
-    
-    form_map = {
-        'dry': ['dry', 'kibble', 'biscuit', 'crispy'],
-        'wet': ['wet', 'can', 'canned', 'pouch', 'tray', 'pate'],
-        'raw': ['raw', 'freeze-dried', 'frozen', 'fresh'],
-        'vet': ['vet', 'veterinary', 'prescription', 'therapeutic']
-    }
-    
-    for standard, variants in form_map.items():
-        for variant in variants:
-            if variant in form_str:
-                return standard
-    
-    return None
+    return derive_form(form_str.strip())
 
 
 def normalize_life_stage(stage_str: str) -> Optional[str]:
@@ -383,22 +294,10 @@ def normalize_life_stage(stage_str: str) -> Optional[str]:
     if not stage_str:
         return None
     
-    stage_str = stage_str.lower().strip()
-    
-    stage_map = {
-        'puppy': ['puppy', 'junior', 'young', 'growth'],
-        'adult': ['adult', 'mature', 'maintenance'],
-        'senior': ['senior', 'mature adult', 'aged', 'older'],
-        'all': ['all', 'any', 'life stages', 'all life']
-    }
-    
-    for standard, variants in stage_map.items():
-        for variant in variants:
-            if variant in stage_str:
-                return standard
+    life_stage = get_food_classifier().life_stage.classify(stage_str.strip()).label
     
     # Default to adult if unclear
-    return 'adult'
+    return life_stage or 'adult'
 
 
 def extract_gtin(text: str) -> Optional[str]:
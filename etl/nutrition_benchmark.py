@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Benchmark and accuracy harness for the nutrition extractors
+
+Runs every nutrition extractor in the repo over a corpus of saved pages
+(cache/brands/**/*.html, debug pages, test fixtures) and reports, per
+extractor: pages/sec, p50/p99 latency per page, peak memory, and
+field-level precision/recall against tests/fixtures/nutrition_golden.json.
+The report is plain JSON so runs can be diffed against a baseline
+(see compare_reports / run_nutrition_benchmark.py).
+"""
+import ast
+import builtins
+import dis
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+ROOT = Path(__file__).parent.parent
+GOLDEN_FILE = ROOT / 'tests' / 'fixtures' / 'nutrition_golden.json'
+CORPUS_PATTERNS = ['cache/brands/**/*.html', 'debug_*.html', 'tests/fixtures/*.html']
+
+FIELDS = ('protein_percent', 'fat_percent', 'fiber_percent', 'ash_percent',
+          'moisture_percent', 'kcal_per_100g')
+# Absolute tolerance when comparing to golden values
+TOLERANCE = {'kcal_per_100g': 2.0}
+DEFAULT_TOLERANCE = 0.05
+# Calls allowed in module constants loaded by load_script_functions
+PURE_CALLS = {'re.compile', 'frozenset', 'set', 'tuple', 'list', 'dict', 'sorted'}
+
+
+@dataclass
+class Page:
+    path: str
+    html: str
+    text: str
+
+
+@dataclass
+class Extractor:
+    name: str
+    input: str                      # 'html' or 'text'
+    func: Callable[[str], Optional[Dict]]
+
+
+def _dotted_name(node) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        base = _dotted_name(node.value)
+        return f'{base}.{node.attr}' if base else None
+    return None
+
+
+def _is_pure_constant(value: ast.expr) -> bool:
+    """Literal, or built only from names and PURE_CALLS (e.g. re.compile(...))"""
+    return all(_dotted_name(node.func) in PURE_CALLS
+               for node in ast.walk(value) if isinstance(node, ast.Call))
+
+
+def _global_names(code) -> set:
+    """Global names a code object (and the functions/comprehensions inside it) loads"""
+    names = {ins.argval for ins in dis.get_instructions(code) if ins.opname in ('LOAD_GLOBAL', 'LOAD_NAME')}
+    for const in code.co_consts:
+        if hasattr(const, 'co_code'):
+            names |= _global_names(const)
+    return names
+
+
+def _unresolved_names(func, namespace: Dict, seen: set) -> set:
+    """Names func (and the script functions it calls) uses that are not defined"""
+    missing = set()
+    for name in _global_names(func.__code__):
+        if name in namespace:
+            target = namespace[name]
+            if getattr(target, '__globals__', None) is namespace and target not in seen:
+                seen.add(target)
+                missing |= _unresolved_names(target, namespace, seen)
+        elif not hasattr(builtins, name):
+            missing.add(name)
+    return missing
+
+
+def load_script_functions(path: Path, names: Iterable[str]) -> Dict[str, Callable]:
+    """
+    Load top-level functions (or 'Class.method') from a script without
+    running it
+
+    Several extractors live in job scripts that connect to Supabase/GCS or
+    start a harvest at import time. Only the script's imports, constants
+    (literals, or values built with PURE_CALLS such as compiled regexes)
+    and function definitions are executed; imports that fail (e.g. cloud
+    clients not installed) are skipped. A requested function that uses a
+    name that was not loaded raises NameError here rather than mid-run.
+    """
+    path = Path(path)
+    tree = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+    namespace = {'__name__': f'_benchmark_{path.stem}', '__file__': str(path)}
+
+    def run(node):
+        exec(compile(ast.Module([node], type_ignores=[]), str(path), 'exec'), namespace)
+
+    definitions = {}
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            try:
+                run(node)
+            except Exception:
+                pass
+        elif isinstance(node, ast.Assign):
+            # Module constants (pattern tables, compiled regexes etc.)
+            if not _is_pure_constant(node.value):
+                continue
+            try:
+                run(node)
+            except Exception:
+                pass
+        elif isinstance(node, ast.FunctionDef):
+            definitions[node.name] = node
+        elif isinstance(node, ast.ClassDef):
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef):
+                    definitions[f'{node.name}.{item.name}'] = item
+
+    # Every top-level function, so helpers called by the extractors resolve
+    for name, node in definitions.items():
+        if '.' not in name:
+            run(node)
+
+    functions = {}
+    for name in names:
+        if '.' in name:
+            method = definitions[name]
+            scope = {}
+            exec(compile(ast.Module([method], type_ignores=[]), str(path), 'exec'), namespace, scope)
+            functions[name] = scope[method.name]
+        else:
+            functions[name] = namespace[name]
+        missing = _unresolved_names(functions[name], namespace, set())
+        if missing:
+            raise NameError(f"{path.name}: {name} uses names that could not be loaded: "
+                            f"{', '.join(sorted(missing))}")
+    return functions
+
+
+def default_extractors() -> List[Extractor]:
+    """Every nutrition extractor in the repo, wrapped to return a flat dict"""
+    from etl.nutrition_parser import NutritionParser
+
+    nutrition_parser = NutritionParser()
+    manufacturer = load_script_functions(ROOT / 'manuf_parsers.py',
+                                         ['ManufacturerParser.parse_analytical_constituents'])
+    gcs = load_script_functions(ROOT / 'parse_gcs_snapshots.py', ['extract_macros_from_html'])
+    aadf = load_script_functions(ROOT / 'scrape_aadf_with_nutrition.py',
+                                 ['AADFCompleteScraper.parse_nutrition_text'])
+    harvest = load_script_functions(ROOT / 'run_manufacturer_harvest.py',
+                                    ['extract_macros_from_text', 'extract_kcal'])
+
+    def harvest_extract(text):
+        result = harvest['extract_macros_from_text'](text)
+        kcal = harvest['extract_kcal'](text)
+        if kcal:
+            result['kcal_per_100g'] = kcal
+        return result
+
+    return [
+        Extractor('etl.nutrition_parser', 'html', nutrition_parser.parse_html),
+        Extractor('manuf_parsers.parse_analytical_constituents', 'text',
+                  lambda text: manufacturer['ManufacturerParser.parse_analytical_constituents'](None, text)),
+        Extractor('parse_gcs_snapshots.extract_macros_from_html', 'html',
+                  gcs['extract_macros_from_html']),
+        Extractor('scrape_aadf_with_nutrition.parse_nutrition_text', 'text',
+                  lambda text: aadf['AADFCompleteScraper.parse_nutrition_text'](None, text)),
+        Extractor('run_manufacturer_harvest.extract_macros_from_text', 'text', harvest_extract),
+    ]
+
+
+def html_to_text(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    return ' '.join(BeautifulSoup(html, 'html.parser').get_text(' ').split())
+
+
+def load_corpus(patterns: Iterable[str] = CORPUS_PATTERNS, root: Path = ROOT) -> List[Page]:
+    """Saved pages matching the glob patterns (relative to root), text pre-extracted"""
+    import warnings
+    from bs4 import XMLParsedAsHTMLWarning
+
+    warnings.filterwarnings('ignore', category=XMLParsedAsHTMLWarning)
+    paths = sorted({p for pattern in patterns for p in Path(root).glob(pattern) if p.is_file()})
+    pages = []
+    for path in paths:
+        html = path.read_text(encoding='utf-8', errors='ignore')
+        pages.append(Page(str(path.relative_to(root)), html, html_to_text(html)))
+    return pages
+
+
+def load_golden(golden_file: Path = GOLDEN_FILE) -> Dict[str, Dict[str, float]]:
+    with open(golden_file, 'r', encoding='utf-8') as f:
+        return json.load(f)['pages']
+
+
+def score(predictions: Dict[str, Dict], golden: Dict[str, Dict]) -> Dict:
+    """Field-level precision/recall over the pages that have golden values"""
+    counts = {field: {'tp': 0, 'fp': 0, 'fn': 0} for field in FIELDS}
+    for path, expected in golden.items():
+        if path not in predictions:
+            continue
+        predicted = predictions[path] or {}
+        for field in FIELDS:
+            value, truth = predicted.get(field), expected.get(field)
+            if value is not None:
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = None
+            tolerance = TOLERANCE.get(field, DEFAULT_TOLERANCE)
+            if value is not None and truth is not None and abs(value - truth) <= tolerance:
+                counts[field]['tp'] += 1
+                continue
+            if value is not None:
+                counts[field]['fp'] += 1
+            if truth is not None:
+                counts[field]['fn'] += 1
+
+    def ratios(c):
+        return {
+            **c,
+            'precision': round(c['tp'] / (c['tp'] + c['fp']), 4) if c['tp'] + c['fp'] else None,
+            'recall': round(c['tp'] / (c['tp'] + c['fn']), 4) if c['tp'] + c['fn'] else None,
+        }
+
+    total = {key: sum(c[key] for c in counts.values()) for key in ('tp', 'fp', 'fn')}
+    return {'fields': {field: ratios(c) for field, c in counts.items()}, **ratios(total)}
+
+
+def benchmark_extractor(extractor: Extractor, pages: List[Page], golden: Dict[str, Dict],
+                        repeat: int = 1) -> Dict:
+    """Time an extractor over the corpus, measure peak memory and score it"""
+    import numpy as np
+
+    predictions, errors = {}, 0
+    latencies = []
+    for _ in range(repeat):
+        for page in pages:
+            payload = page.html if extractor.input == 'html' else page.text
+            start = time.perf_counter()
+            try:
+                result = extractor.func(payload)
+            except Exception:
+                result = None
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+            predictions[page.path] = result
+
+    # Separate pass: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    for page in pages:
+        try:
+            extractor.func(page.html if extractor.input == 'html' else page.text)
+        except Exception:
+            pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1000
+    total_seconds = latencies.sum() / 1000
+    return {
+        'input': extractor.input,
+        'pages': len(pages),
+        'pages_per_sec': round(len(latencies) / total_seconds, 1) if total_seconds else None,
+        'latency_ms': {
+            'p50': round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+            'p99': round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+            'max': round(float(latencies.max()), 3) if len(latencies) else None,
+        },
+        'peak_memory_mb': round(peak / 1024 / 1024, 2),
+        'errors': errors // max(repeat, 1),
+        **score(predictions, golden),
+    }
+
+
+def run_benchmark(extractors: List[Extractor] = None, patterns: Iterable[str] = CORPUS_PATTERNS,
+                  golden_file: Path = GOLDEN_FILE, repeat: int = 1, root: Path = ROOT) -> Dict:
+    """Benchmark report for every extractor over the corpus"""
+    extractors = extractors if extractors is not None else default_extractors()
+    pages = load_corpus(patterns, root)
+    golden = load_golden(golden_file) if Path(golden_file).exists() else {}
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'corpus': {
+            'patterns': list(patterns),
+            'pages': len(pages),
+            'bytes': sum(len(page.html) for page in pages),
+            'golden_pages': sum(1 for page in pages if page.path in golden),
+        },
+        'repeat': repeat,
+        'extractors': {e.name: benchmark_extractor(e, pages, golden, repeat) for e in extractors},
+    }
+
+
+def compare_reports(current: Dict, baseline: Dict, max_slowdown: float = 0.25,
+                    max_score_drop: float = 0.0) -> List[str]:
+    """
+    Regressions of current vs baseline: throughput down by more than
+    max_slowdown (fraction), or precision/recall down by more than
+    max_score_drop, for any extractor present in both reports
+    """
+    regressions = []
+    for name, base in baseline.get('extractors', {}).items():
+        cur = current.get('extractors', {}).get(name)
+        if cur is None:
+            regressions.append(f"{name}: missing from current report")
+            continue
+        if base.get('pages_per_sec') and cur.get('pages_per_sec') is not None:
+            if cur['pages_per_sec'] < base['pages_per_sec'] * (1 - max_slowdown):
+                regressions.append(
+                    f"{name}: {cur['pages_per_sec']} pages/sec vs {base['pages_per_sec']} baseline")
+        for metric in ('precision', 'recall'):
+            if base.get(metric) is not None and (cur.get(metric) or 0) < base[metric] - max_score_drop:
+                regressions.append(f"{name}: {metric} {cur.get(metric)} vs {base[metric]} baseline")
+    return regressions
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Vectorized nutrition maths: kcal estimation, dry-matter conversion and
+per-form kcal sanity bands
+
+Every job that estimates energy or checks kcal values goes through here,
+so parsers, normalizers and catalog QA agree on the numbers. All
+functions take scalars or arrays (lists, NumPy arrays, pandas Series);
+missing values are NaN/None.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Modified Atwater factors for pet food (kcal per g, AAFCO/NRC)
+ATWATER_PROTEIN = 3.5
+ATWATER_FAT = 8.5
+ATWATER_CARBOHYDRATE = 3.5
+
+# Plausible kcal/100g as fed, per product form
+KCAL_RANGES = {
+    'dry': (250, 500),
+    'wet': (40, 150),
+    'freeze_dried': (300, 600),
+    'raw': (120, 300)
+}
+DEFAULT_KCAL_RANGE = (40, 600)
+
+# Methods reported for the final kcal value
+KCAL_DECLARED = 'declared'
+KCAL_ESTIMATED = 'estimated'
+KCAL_CLEARED = 'cleared'
+KCAL_MISSING = 'missing'
+
+# Most energy-dense plausible dry matter (pure fat at 9 kcal/g)
+MAX_KCAL_DM = 900
+
+# Stored dry-matter-basis columns -> evaluate_nutrition outputs they hold
+DRY_MATTER_COLUMNS = {
+    'protein_dm_percent': 'protein_dm',
+    'fat_dm_percent': 'fat_dm',
+    'fiber_dm_percent': 'fiber_dm',
+    'ash_dm_percent': 'ash_dm',
+    'carbohydrate_dm_percent': 'carbohydrate_dm',
+    'kcal_per_100g_dm': 'kcal_dm',
+}
+
+
+def _array(values, size: Optional[int] = None) -> np.ndarray:
+    """Float array with None/non-numeric -> NaN, broadcast to size"""
+    if values is None:
+        array = np.array([np.nan])
+    else:
+        try:
+            array = np.atleast_1d(np.asarray(values, dtype=float))
+        except (TypeError, ValueError):
+            import pandas as pd
+            objects = np.atleast_1d(np.asarray(values, dtype=object))
+            array = pd.to_numeric(pd.Series(objects), errors='coerce').to_numpy(dtype=float)
+    if size is not None and array.size == 1 and size != 1:
+        array = np.full(size, array[0])
+    return array
+
+
+def _strings(values, size: int) -> np.ndarray:
+    if values is None or isinstance(values, str):
+        return np.full(size, values, dtype=object)
+    array = np.asarray(values, dtype=object).ravel()
+    return np.full(size, array[0], dtype=object) if array.size == 1 and size != 1 else array
+
+
+def carbohydrate_by_difference(protein, fat, fiber=None, ash=None, moisture=None) -> np.ndarray:
+    """NFE = 100 - protein - fat - fiber - ash - moisture, floored at 0 (missing minors count as 0)"""
+    protein, fat = _array(protein), _array(fat)
+    size = max(protein.size, fat.size)
+    minors = sum(np.nan_to_num(_array(v, size)) for v in (fiber, ash, moisture))
+    return np.clip(100 - protein - fat - minors, 0, None)
+
+
+def estimate_kcal(protein, fat, fiber=None, ash=None, moisture=None, carbohydrate=None) -> np.ndarray:
+    """
+    kcal/100g from analytical constituents (modified Atwater)
+
+    A declared carbohydrate value is used where present, otherwise it is
+    estimated by difference. NaN where protein or fat is missing or zero.
+    """
+    protein, fat = _array(protein), _array(fat)
+    size = max(protein.size, fat.size)
+    protein, fat = _array(protein, size), _array(fat, size)
+
+    carbs = carbohydrate_by_difference(protein, fat, fiber, ash, moisture)
+    declared_carbs = _array(carbohydrate, size)
+    carbs = np.where(declared_carbs > 0, declared_carbs, carbs)
+
+    kcal = ATWATER_PROTEIN * protein + ATWATER_FAT * fat + ATWATER_CARBOHYDRATE * carbs
+    with np.errstate(invalid='ignore'):
+        return np.where((protein > 0) & (fat > 0), np.round(kcal, 1), np.nan)
+
+
+def to_dry_matter(values, moisture) -> np.ndarray:
+    """As-fed value -> dry-matter basis (NaN where moisture is unknown or >= 100)"""
+    values, moisture = _array(values), _array(moisture)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dry = values * 100 / (100 - moisture)
+    return np.where((moisture >= 0) & (moisture < 100), dry, np.nan)
+
+
+def to_as_fed(values, moisture) -> np.ndarray:
+    """Dry-matter value -> as-fed basis"""
+    values, moisture = _array(values), _array(moisture)
+    as_fed = values * (100 - moisture) / 100
+    return np.where((moisture >= 0) & (moisture < 100), as_fed, np.nan)
+
+
+def kcal_bounds(form, size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row (min, max) kcal/100g for the product form"""
+    forms = _strings(form, size if size is not None else 1)
+    masks = [forms == name for name in KCAL_RANGES]
+    low = np.select(masks, [r[0] for r in KCAL_RANGES.values()], DEFAULT_KCAL_RANGE[0]).astype(float)
+    high = np.select(masks, [r[1] for r in KCAL_RANGES.values()], DEFAULT_KCAL_RANGE[1]).astype(float)
+    return low, high
+
+
+def evaluate_nutrition(protein, fat, fiber=None, ash=None, moisture=None, form=None,
+                       kcal=None, carbohydrate=None) -> Dict[str, np.ndarray]:
+    """
+    Estimate, convert and sanity-check a batch of products in one call
+
+    Returns arrays (one entry per product):
+      kcal_estimated   modified Atwater estimate
+      kcal_min/max     sanity band for the form
+      kcal_outlier     declared kcal outside the band
+      kcal_final       declared kcal if plausible, else the estimate if
+                       plausible, else NaN
+      kcal_method      declared / estimated / cleared (outlier with no
+                       usable estimate) / missing
+      *_dm             protein, fat, fiber, ash, carbohydrate and kcal
+                       on a dry-matter basis (NaN where a percentage
+                       would exceed 100, kcal would exceed MAX_KCAL_DM or
+                       the analysed macros exceed the dry matter)
+    """
+    numeric = [_array(v) for v in (protein, fat, fiber, ash, moisture, kcal, carbohydrate)]
+    size = max(v.size for v in numeric)
+    if form is not None and not isinstance(form, str):
+        size = max(size, len(form))
+    protein, fat, fiber, ash, moisture, declared, carbohydrate = (_array(v, size) for v in numeric)
+
+    estimated = estimate_kcal(protein, fat, fiber, ash, moisture, carbohydrate)
+    carbs = carbohydrate_by_difference(protein, fat, fiber, ash, moisture)
+    low, high = kcal_bounds(form, size)
+
+    with np.errstate(invalid='ignore'):
+        declared_ok = (declared >= low) & (declared <= high)
+        outlier = (declared > 0) & ~declared_ok
+        estimate_ok = (estimated >= low) & (estimated <= high)
+
+    final = np.where(declared_ok, declared, np.where(estimate_ok, estimated, np.nan))
+    method = np.select(
+        [declared_ok, estimate_ok, outlier],
+        [KCAL_DECLARED, KCAL_ESTIMATED, KCAL_CLEARED],
+        default=KCAL_MISSING
+    ).astype(object)
+
+    result = {
+        'kcal_estimated': estimated,
+        'kcal_min': low,
+        'kcal_max': high,
+        'kcal_outlier': outlier,
+        'kcal_final': final,
+        'kcal_method': method,
+        'carbohydrate_percent': np.where(np.isnan(protein) | np.isnan(fat), np.nan, carbs),
+    }
+
+    # Moisture near 100 or macros that do not fit in the dry matter are bad
+    # parses: their dry-matter values are cleared rather than blown up
+    analysed = np.nansum(np.vstack([protein, fat, fiber, ash]), axis=0)
+    with np.errstate(invalid='ignore'):
+        dm_ok = ~(analysed > 100 - moisture)
+    for name, values in (('protein', protein), ('fat', fat), ('fiber', fiber), ('ash', ash),
+                         ('carbohydrate', result['carbohydrate_percent'])):
+        dm = to_dry_matter(values, moisture)
+        with np.errstate(invalid='ignore'):
+            result[f'{name}_dm'] = np.where(dm_ok & (dm <= 100), np.round(dm, 2), np.nan)
+    kcal_dm = to_dry_matter(final, moisture)
+    with np.errstate(invalid='ignore'):
+        result['kcal_dm'] = np.where(dm_ok & (kcal_dm <= MAX_KCAL_DM), np.round(kcal_dm, 1), np.nan)
+    return result
+
+
+def evaluate_frame(df, kcal_column: str = 'kcal_per_100g'):
+    """evaluate_nutrition over a DataFrame with the standard *_percent/form columns"""
+    import pandas as pd
+
+    def column(name):
+        return df[name] if name in df.columns else None
+
+    result = evaluate_nutrition(
+        column('protein_percent'), column('fat_percent'), column('fiber_percent'),
+        column('ash_percent'), column('moisture_percent'),
+        column('form').to_numpy(dtype=object) if 'form' in df.columns else None,
+        column(kcal_column), column('carbohydrate_percent')
+    ) if len(df) else {}
+    return pd.DataFrame(result, index=df.index)
+
+
+def dry_matter_frame(df, kcal_column: str = 'kcal_per_100g'):
+    """The stored dry-matter-basis columns (DRY_MATTER_COLUMNS) for a DataFrame"""
+    evaluated = evaluate_frame(df, kcal_column)
+    if evaluated.empty:
+        return evaluated.reindex(columns=list(DRY_MATTER_COLUMNS))
+    return evaluated[list(DRY_MATTER_COLUMNS.values())].set_axis(list(DRY_MATTER_COLUMNS), axis=1)
+
+
+def dry_matter_fields(record: Dict, kcal_column: str = 'kcal_per_100g') -> Dict[str, Optional[float]]:
+    """
+    Dry-matter-basis columns for one product record, for writers to store
+    alongside the as-fed values (None where moisture or the value is unknown)
+    """
+    result = evaluate_nutrition(
+        record.get('protein_percent'), record.get('fat_percent'), record.get('fiber_percent'),
+        record.get('ash_percent'), record.get('moisture_percent'), record.get('form'),
+        record.get(kcal_column), record.get('carbohydrate_percent')
+    )
+    fields = {}
+    for column, output in DRY_MATTER_COLUMNS.items():
+        value = result[output][0]
+        fields[column] = None if np.isnan(value) else float(value)
+    return fields
+
+
+def dry_matter_changes(df, kcal_column: str = 'kcal_per_100g', tolerance: float = 0.05):
+    """
+    Recomputed dry-matter columns for the rows of df whose stored values
+    (missing columns count as NULL) differ from them
+    """
+    import pandas as pd
+
+    computed = dry_matter_frame(df, kcal_column)
+    if computed.empty:
+        return computed
+    stored = df.reindex(columns=list(DRY_MATTER_COLUMNS)).apply(pd.to_numeric, errors='coerce')
+    same = (stored - computed).abs().le(tolerance) | (stored.isna() & computed.isna())
+    return computed[~same.all(axis=1)]
+
+
+def estimate_kcal_value(protein, fat, fiber=None, ash=None, moisture=None,
+                        carbohydrate=None, form: Optional[str] = None,
+                        check_range: bool = False) -> Optional[float]:
+    """Single-product estimate (None if not estimable, or outside the form's band when check_range)"""
+    kcal = estimate_kcal(protein, fat, fiber, ash, moisture, carbohydrate)[0]
+    if np.isnan(kcal):
+        return None
+    if check_range:
+        low, high = KCAL_RANGES.get(form, DEFAULT_KCAL_RANGE)
+        if not low <= kcal <= high:
+            return None
+    return float(kcal)
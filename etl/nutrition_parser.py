@@ -7,6 +7,8 @@ from typing import Dict, Optional, Tuple, Any
 from bs4 import BeautifulSoup, Tag
 import logging
 
+from etl.nutrition_engine import estimate_kcal_value
+
 logger = logging.getLogger(__name__)
 
 
@@ -273,30 +275,13 @@ class NutritionParser:
     
     def _estimate_kcal(self, nutrients: Dict[str, Any]) -> Optional[float]:
         """
-        Estimate kcal/100g using modified Atwater factors
+        Estimate kcal/100g using modified Atwater factors (None if implausible)
         """
-        protein = nutrients.get('protein_percent', 0) or 0
-        fat = nutrients.get('fat_percent', 0) or 0
-        fiber = nutrients.get('fiber_percent', 0) or 0
-        ash = nutrients.get('ash_percent', 0) or 0
-        moisture = nutrients.get('moisture_percent', 0) or 0
-        
-        # Need at least protein and fat to estimate
-        if protein == 0 or fat == 0:
-            return None
-        
-        # Estimate carbohydrates (NFE - Nitrogen Free Extract)
-        carb_est = max(0, 100 - (protein + fat + fiber + ash + moisture))
-        
-        # Modified Atwater factors for pet food
-        # Protein: 3.5 kcal/g, Fat: 8.5 kcal/g, Carbs: 3.5 kcal/g
-        kcal = (3.5 * protein) + (8.5 * fat) + (3.5 * carb_est)
-        
-        # Sanity check
-        if 150 <= kcal <= 700:
-            return round(kcal, 1)
-        
-        return None
+        return estimate_kcal_value(
+            nutrients.get('protein_percent'), nutrients.get('fat_percent'),
+            nutrients.get('fiber_percent'), nutrients.get('ash_percent'),
+            nutrients.get('moisture_percent'), check_range=True
+        )
 
 
 def parse_nutrition_from_html(html: str) -> Dict[str, Any]:
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Unit-aware pack size parsing and price per kg
+
+One parser for every scraper, importer and the pricing enrichment. It
+understands metric and imperial units (g, kg, ml, cl, l, oz, lb),
+decimal commas, multipacks written either way round ("12 x 400g",
+"400g x 12") and skips weight ranges ("for dogs 2-10kg"), which describe
+the dog rather than the pack. Volumes are taken as grams (1 ml ~ 1 g).
+
+parse_pack_size() handles one string; parse_pack_sizes() parses a whole
+Series in one pass over its distinct values, and price_per_kg() is the
+matching vectorized price calculation. strip_pack_sizes() removes the
+sizes from a product name, for grouping size variants.
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional
+
+CACHE_SIZE = 65536
+
+# Grams per unit
+UNIT_GRAMS = {
+    'g': 1.0, 'gr': 1.0, 'gram': 1.0, 'grams': 1.0,
+    'kg': 1000.0, 'kgs': 1000.0, 'kilo': 1000.0, 'kilos': 1000.0,
+    'ml': 1.0, 'cl': 10.0, 'l': 1000.0, 'ltr': 1000.0, 'litre': 1000.0, 'liter': 1000.0,
+    'oz': 28.3495, 'lb': 453.592, 'lbs': 453.592,
+}
+VOLUME_UNITS = {'ml', 'cl', 'l', 'ltr', 'litre', 'liter'}
+
+_NUMBER = r'\d+(?:[.,]\d+)?'
+_UNIT = '(?:' + '|'.join(sorted(map(re.escape, UNIT_GRAMS), key=len, reverse=True)) + r')(?![a-z])'
+
+# Alternatives are tried left to right at each position: ranges are
+# matched (and ignored) before the single amount they end with
+QUANTITY_PATTERN = re.compile(
+    rf'(?P<range>{_NUMBER}\s*(?:{_UNIT})?\s*(?:-|–|to)\s*{_NUMBER}\s*{_UNIT})'
+    rf'|(?P<count>\d+)\s*[x×]\s*(?P<size>{_NUMBER})\s*(?P<unit>{_UNIT})'
+    rf'|(?P<size_first>{_NUMBER})\s*(?P<unit_first>{_UNIT})\s*[x×]\s*(?P<count_after>\d+)(?![.,]?\d|\s*{_UNIT})'
+    rf'|(?P<single>{_NUMBER})\s*(?P<unit_single>{_UNIT})',
+    re.IGNORECASE
+)
+
+
+class PackSize(NamedTuple):
+    grams: float            # total pack weight
+    count: int              # units in the pack (1 for a single pack)
+    unit_grams: float       # weight of one unit
+    unit: str               # unit as written ('g', 'kg', 'oz', ...)
+    label: str              # normalized label, e.g. '12 x 400g', '2.5kg'
+
+    @property
+    def kg(self) -> float:
+        return self.grams / 1000
+
+    @property
+    def is_multipack(self) -> bool:
+        return self.count > 1
+
+
+def _number(text: str) -> float:
+    return float(text.replace(',', '.'))
+
+
+def format_grams(grams: float, volume: bool = False) -> str:
+    """Metric label for a weight (or volume): '400g', '2.5kg', '1.5l'"""
+    small, large = ('ml', 'l') if volume else ('g', 'kg')
+    if grams >= 1000:
+        return f"{round(grams / 1000, 2):g}{large}"
+    return f"{round(grams):g}{small}"
+
+
+def _pack_size(count: int, size: float, unit: str) -> Optional[PackSize]:
+    unit = unit.lower()
+    unit_grams = size * UNIT_GRAMS[unit]
+    if unit_grams <= 0 or count <= 0:
+        return None
+    label = format_grams(unit_grams, unit in VOLUME_UNITS)
+    if count > 1:
+        label = f"{count} x {label}"
+    return PackSize(round(unit_grams * count, 3), count, round(unit_grams, 3), unit, label)
+
+
+def _from_match(match) -> Optional[PackSize]:
+    if match.group('range'):
+        return None
+    if match.group('count'):
+        return _pack_size(int(match.group('count')), _number(match.group('size')), match.group('unit'))
+    if match.group('count_after'):
+        return _pack_size(int(match.group('count_after')), _number(match.group('size_first')),
+                          match.group('unit_first'))
+    return _pack_size(1, _number(match.group('single')), match.group('unit_single'))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_all(text: str) -> tuple:
+    sizes = (_from_match(match) for match in QUANTITY_PATTERN.finditer(text))
+    return tuple(size for size in sizes if size is not None)
+
+
+def find_pack_sizes(text: Optional[str]) -> List[PackSize]:
+    """Every pack size mentioned in a text, in order"""
+    if not text or not isinstance(text, str):
+        return []
+    return list(_parse_all(text))
+
+
+def parse_pack_size(text: Optional[str]) -> Optional[PackSize]:
+    """
+    The pack size of a product from its size text or name: the first
+    multipack if there is one, else the first single amount
+    """
+    sizes = find_pack_sizes(text)
+    for size in sizes:
+        if size.is_multipack:
+            return size
+    return sizes[0] if sizes else None
+
+
+def strip_pack_sizes(text: Optional[str]) -> str:
+    """A text without the pack sizes it mentions (weight ranges are kept)"""
+    if not text or not isinstance(text, str):
+        return ''
+    return QUANTITY_PATTERN.sub(lambda match: match.group(0) if match.group('range') else ' ', text)
+
+
+def parse_pack_sizes(texts: Iterable[str]):
+    """
+    parse_pack_size over a Series/array; returns a DataFrame on the same
+    index with pack_grams, pack_count, unit_grams and pack_label (NaN/None
+    where no size was found). Each distinct string is parsed once.
+    """
+    import numpy as np
+    import pandas as pd
+
+    series = texts if isinstance(texts, pd.Series) else pd.Series(list(texts))
+    codes, uniques = pd.factorize(series.where(series.map(lambda v: isinstance(v, str)), ''))
+
+    parsed = [parse_pack_size(text) for text in uniques]
+    grams = np.array([p.grams if p else np.nan for p in parsed], dtype=float)
+    counts = np.array([p.count if p else np.nan for p in parsed], dtype=float)
+    unit_grams = np.array([p.unit_grams if p else np.nan for p in parsed], dtype=float)
+    labels = np.array([p.label if p else None for p in parsed], dtype=object)
+
+    return pd.DataFrame({
+        'pack_grams': grams[codes],
+        'pack_count': counts[codes],
+        'unit_grams': unit_grams[codes],
+        'pack_label': labels[codes],
+    }, index=series.index)
+
+
+def pack_size_kg(texts: Iterable[str]):
+    """Pack weight in kg for a Series of size texts"""
+    return parse_pack_sizes(texts)['pack_grams'] / 1000
+
+
+def price_per_kg(price, grams, decimals: int = 2):
+    """Price per kg from pack price and pack weight in grams (NaN where either is missing or <= 0)"""
+    import numpy as np
+
+    price = np.asarray(price, dtype=float)
+    grams = np.asarray(grams, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.round(price / (grams / 1000), decimals)
+    return np.where((price > 0) & (grams > 0), result, np.nan)
@@ -0,0 +1,66 @@
+"""
+Paged loaders for Supabase/PostgREST tables
+
+PostgREST caps unpaged selects (1000 rows by default), so a plain
+`select('*').execute()` silently truncates large tables. These helpers
+always page through the whole table.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+
+PAGE_SIZE = 1000
+
+
+def iter_pages(supabase, table: str, columns: str = '*', key: Optional[str] = None,
+               page_size: int = PAGE_SIZE, filters=None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Yield a table page by page
+
+    With `key` (a unique, sortable column such as product_key) pages are
+    fetched by keyset (`key > last_seen ORDER BY key`), which stays fast on
+    deep pages and is stable while rows are being written. Without it,
+    offset ranges are used.
+
+    `filters` is an optional callable applied to each query builder
+    (e.g. `lambda q: q.eq('brand_slug', 'acana')`).
+    """
+    if key and columns != '*' and key not in [c.strip() for c in columns.split(',')]:
+        columns = f"{columns},{key}"
+
+    last_seen = None
+    page = 0
+    while True:
+        query = supabase.table(table).select(columns)
+        if filters:
+            query = filters(query)
+        if key:
+            if last_seen is not None:
+                query = query.gt(key, last_seen)
+            query = query.order(key).limit(page_size)
+        else:
+            query = query.range(page * page_size, (page + 1) * page_size - 1)
+
+        rows = query.execute().data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_seen = rows[-1][key] if key else None
+        page += 1
+
+
+def fetch_all_rows(supabase, table: str, columns: str = '*', key: Optional[str] = None,
+                   page_size: int = PAGE_SIZE, filters=None) -> List[Dict[str, Any]]:
+    """Load every row of a table (see iter_pages)"""
+    rows = []
+    for page in iter_pages(supabase, table, columns, key, page_size, filters):
+        rows.extend(page)
+    return rows
+
+
+def fetch_frame(supabase, table: str, columns: str = '*', key: Optional[str] = None,
+                page_size: int = PAGE_SIZE, filters=None):
+    """Load every row of a table into a pandas DataFrame"""
+    import pandas as pd
+
+    return pd.DataFrame(fetch_all_rows(supabase, table, columns, key, page_size, filters))
@@ -152,6 +152,9 @@ class CatalogPipeline:
         CREATE INDEX idx_foods_canonical_brand_slug ON foods_canonical(brand_slug);
         CREATE INDEX idx_foods_canonical_life_stage ON foods_canonical(life_stage);
         CREATE INDEX idx_foods_canonical_form ON foods_canonical(form);
+        CREATE INDEX idx_foods_canonical_protein_dm ON foods_canonical(protein_dm_percent) WHERE protein_dm_percent IS NOT NULL;
+        CREATE INDEX idx_foods_canonical_kcal_dm ON foods_canonical(kcal_per_100g_dm) WHERE kcal_per_100g_dm IS NOT NULL;
+        CREATE INDEX idx_foods_canonical_form_protein_dm ON foods_canonical(form, protein_dm_percent DESC);
         """
         
         # Save SQL files
@@ -9,7 +9,6 @@ import time
 import json
 import logging
 from datetime import datetime
-from supabase import create_client
 from dotenv import load_dotenv
 
 # Setup logging
@@ -19,15 +18,21 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
-# Initialize Supabase
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-supabase = create_client(supabase_url, supabase_key)
+# Supabase client, created on first use so that importing the care rules
+# (breed_content_batch.py) does not connect
+_supabase = None
+
+def get_supabase():
+    global _supabase
+    if _supabase is None:
+        from supabase import create_client
+        _supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    return _supabase
 
 def get_breed_care_data():
     """Get all breed data for care content generation"""
 
-    result = supabase.table('breeds_comprehensive_content').select(
+    result = get_supabase().table('breeds_comprehensive_content').select(
         'breed_slug, general_care, grooming_needs, grooming_frequency, '
         'exercise_needs_detail, exercise_level, training_tips, health_issues'
     ).execute()
@@ -37,7 +42,7 @@ def get_breed_care_data():
 def get_breed_basic_data():
     """Get basic breed characteristics for care recommendations"""
 
-    result = supabase.table('breeds_published').select(
+    result = get_supabase().table('breeds_published').select(
         'breed_slug, display_name, size_category, energy, coat_length, '
         'shedding, trainability, adult_weight_avg_kg'
     ).execute()
@@ -194,7 +199,7 @@ def update_breed_care_content():
 
             if len(generated_care.strip()) >= 100:  # Minimum content threshold
                 # Update database
-                result = supabase.table('breeds_comprehensive_content').update({
+                result = get_supabase().table('breeds_comprehensive_content').update({
                     'general_care': generated_care,
                     'updated_at': datetime.now().isoformat()
                 }).eq('breed_slug', breed_slug).execute()
@@ -263,7 +268,7 @@ def verify_care_content_improvement():
 
     logger.info("\nVerifying care content coverage...")
 
-    result = supabase.table('breeds_comprehensive_content').select(
+    result = get_supabase().table('breeds_comprehensive_content').select(
         'breed_slug, general_care'
     ).execute()
 
@@ -11,6 +11,10 @@ import logging
 from supabase import create_client, Client
 import os
 
+from etl.brand_resolver import get_brand_resolver
+from etl.classify_foods import get_food_classifier
+from etl.pack_size import find_pack_sizes
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,8 +43,12 @@ def extract_brand(product: Dict) -> Optional[str]:
     if brand_field and 'logo' not in brand_field.lower():
         return brand_field
     
-    # Try to extract from product name
+    # Try to extract from product name: longest known brand phrase first
     name = product.get('name', '')
+    brand, _ = get_brand_resolver().brand_from_name(name)
+    if brand:
+        return brand
+    
     # Common brand patterns at start of name
     known_brands = [
         'Royal Canin', 'Hill\'s', 'Purina', 'Eukanuba', 'Pro Plan',
@@ -75,47 +83,28 @@ def parse_nutrition_value(value: str) -> Optional[float]:
 
 
 def extract_pack_sizes(name: str) -> List[str]:
-    """Extract pack sizes from product name"""
-    sizes = []
-    
-    # Pattern: 6 x 400g, 24 x 800g, 2.5kg, etc.
-    patterns = [
-        r'(\d+)\s*x\s*(\d+(?:\.\d+)?)\s*(kg|g|ml|l)',  # 6 x 400g
-        r'(\d+(?:\.\d+)?)\s*(kg|g|ml|l)(?:\s|$)',      # 2.5kg
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, name, re.IGNORECASE)
-        for match in matches:
-            if len(match) == 3:  # Multi-pack
-                sizes.append(f"{match[0]} x {match[1]}{match[2]}")
-            elif len(match) == 2:  # Single pack
-                sizes.append(f"{match[0]}{match[1]}")
-    
-    return sizes
+    """Extract pack sizes from product name (normalized labels, e.g. '6 x 400g', '2.5kg')"""
+    return list(dict.fromkeys(pack.label for pack in find_pack_sizes(name)))
 
 
 def determine_form(product: Dict) -> str:
     """Determine product form (dry, wet, raw, etc.)"""
-    category = product.get('category', '').lower()
-    name = product.get('name', '').lower()
+    category = product.get('category', '')
+    name = product.get('name', '')
+    
+    form = get_food_classifier().form.classify(f"{category} {name}").label
+    if form:
+        return form
     
-    if 'dry' in category or 'kibble' in name:
-        return 'dry'
-    elif 'wet' in category or 'canned' in category or 'can' in name or 'pouch' in name:
-        return 'wet'
-    elif 'raw' in category or 'raw' in name:
-        return 'raw'
-    else:
-        # Default based on moisture content if available
-        moisture = product.get('attributes', {}).get('moisture')
-        if moisture:
-            moisture_val = parse_nutrition_value(moisture)
-            if moisture_val:
-                if moisture_val > 60:
-                    return 'wet'
-                elif moisture_val < 20:
-                    return 'dry'
+    # Default based on moisture content if available
+    moisture = product.get('attributes', {}).get('moisture')
+    if moisture:
+        moisture_val = parse_nutrition_value(moisture)
+        if moisture_val:
+            if moisture_val > 60:
+                return 'wet'
+            elif moisture_val < 20:
+                return 'dry'
     
     return 'dry'  # Default to dry
 
@@ -20,6 +20,9 @@ import logging
 import gzip
 from urllib.parse import urlparse
 
+from etl.classify_foods import get_food_classifier
+from etl.pack_size import parse_pack_size
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -242,57 +245,29 @@ class OPFFIngester:
     
     def _parse_weight(self, quantity_str):
         """Extract weight in kg from quantity string."""
-        if not quantity_str:
-            return None
-        
-        quantity_str = str(quantity_str).lower()
-        
-        # Pattern: number + unit
-        match = re.search(r'(\d+(?:[.,]\d+)?)\s*(kg|g|l|ml)', quantity_str)
-        if match:
-            value = float(match.group(1).replace(',', '.'))
-            unit = match.group(2)
-            
-            if unit in ['g', 'ml']:
-                return value / 1000
-            elif unit in ['kg', 'l']:
-                return value
-        
-        return None
+        pack = parse_pack_size(str(quantity_str)) if quantity_str else None
+        return pack.kg if pack else None
     
     def _derive_form(self, product):
         """Derive form from OPFF product data."""
         # Check categories
-        categories = ' '.join(product.get('categories_tags', [])).lower()
-        name = product.get('product_name', '').lower()
-        
-        if any(term in categories + name for term in ['dry', 'kibble', 'croquettes', 'pellet']):
-            return 'dry'
-        elif any(term in categories + name for term in ['wet', 'can', 'pouch', 'pate', 'chunks', 'gravy']):
-            return 'wet'
-        elif any(term in categories + name for term in ['freeze-dried', 'freeze dried', 'lyophilized']):
-            return 'freeze_dried'
-        elif any(term in categories + name for term in ['raw', 'barf', 'frozen']):
-            return 'raw'
-        
-        return None
+        categories = ' '.join(product.get('categories_tags', []))
+        name = product.get('product_name', '')
+        
+        return get_food_classifier().form.classify(f"{categories} {name}").label
     
     def _derive_life_stage(self, product):
         """Derive life stage from OPFF product data."""
         # Check categories and labels
-        tags = ' '.join(product.get('categories_tags', []) + product.get('labels_tags', [])).lower()
-        name = product.get('product_name', '').lower()
+        tags = ' '.join(product.get('categories_tags', []) + product.get('labels_tags', []))
+        name = product.get('product_name', '')
+        text = f"{tags} {name}"
         
-        if any(term in tags + name for term in ['puppy', 'junior', 'growth', 'kitten']):
+        life_stage = get_food_classifier().life_stage.classify(text).label
+        # OPFF mixes in cat food; kittens count as the growth stage
+        if not life_stage and 'kitten' in text.lower():
             return 'puppy'
-        elif any(term in tags + name for term in ['senior', 'mature', '7+', 'aged']):
-            return 'senior'
-        elif any(term in tags + name for term in ['adult', 'maintenance']):
-            return 'adult'
-        elif any(term in tags + name for term in ['all-life-stages', 'all ages', 'complete']):
-            return 'all'
-        
-        return None
+        return life_stage
     
     def _tokenize_ingredients(self, ingredients_text, ingredients_tags):
         """Extract ingredient tokens from text and tags."""
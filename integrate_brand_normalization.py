@@ -11,6 +11,8 @@ from datetime import datetime
 import re
 import shutil
 
+from etl.brand_resolver import get_brand_resolver
+
 class BrandNormalizationIntegrator:
     def __init__(self):
         self.data_dir = Path("data")
@@ -42,14 +44,12 @@ class BrandNormalizationIntegrator:
             print(f"Warning: {map_file} not found. Creating default mappings.")
             return self.create_default_map()
         
-        df = pd.read_csv(map_file)
-        # Create mapping from source_brand to canonical_brand
+        # Split-brand rules as compiled by the shared brand resolver
         brand_map = {}
-        for _, row in df.iterrows():
-            brand_map[row['source_brand']] = row['canonical_brand']
-            # Also handle variations
-            if row['source_brand'] == "Hill's":
-                brand_map["Hills"] = row['canonical_brand']
+        for rule in get_brand_resolver().phrase_rules.rules:
+            if rule.source_brand != '*':
+                brand_map.setdefault(rule.source_brand, rule.canonical_brand)
+        brand_map.setdefault("Hills", brand_map.get("Hill's", "Hill's"))
         return brand_map
     
     def create_default_map(self):
@@ -194,8 +194,11 @@ class PFXFullCatalogScraper:
             
             # Convert price to EUR
             price_eur = None
+            price_rate_date = None
             if price_gbp:
-                price_eur = round(price_gbp * 1.17, 2)  # GBP to EUR conversion
+                normalized = normalize_currency(price_gbp, 'GBP')
+                price_eur = normalized['price_eur']
+                price_rate_date = normalized['converted_at']
             
             # Build base product data
             candidate_data = {
@@ -208,7 +211,9 @@ class PFXFullCatalogScraper:
                 'ingredients_raw': clean_text(ingredients) if ingredients else None,
                 'pack_sizes': pack_sizes if pack_sizes else None,
                 'price_currency': 'GBP',
+                'price_original': price_gbp,
                 'price_eur': price_eur,
+                'price_rate_date': price_rate_date,
                 'available_countries': ['UK', 'EU']
             }
             
@@ -285,7 +285,9 @@ class PetFoodExpertScraper:
             rates = self.profile.get('currency_rates', {})
             normalized = normalize_currency(price_data['amount'], price_data['currency'], rates)
             product_data['price_currency'] = price_data['currency']
+            product_data['price_original'] = price_data['amount']
             product_data['price_eur'] = normalized['price_eur']
+            product_data['price_rate_date'] = normalized['converted_at']
         
         # Estimate kcal if not provided but we have analytical data
         if not nutrition.get('kcal_per_100g'):
@@ -38,6 +38,7 @@ from etl.json_path import (
     safe_float, safe_bool
 )
 from etl.nutrition_parser import parse_nutrition_from_html
+from etl.fingerprint import FIELD_GROUPS, changed_groups, changed_payload, field_fingerprint
 
 # Load environment variables
 load_dotenv()
@@ -255,10 +256,12 @@ class PetFoodExpertScraperV2:
         # Get price and convert currency
         price_gbp = min(prices) if prices else None
         price_eur = None
+        price_rate_date = None
         if price_gbp:
             rates = self.profile.get('currency_rates', {})
             normalized = normalize_currency(price_gbp, 'GBP', rates)
             price_eur = normalized['price_eur']
+            price_rate_date = normalized['converted_at']
         
         # Extract nutrition (likely null from JSON)
         nutrition = {}
@@ -290,7 +293,9 @@ class PetFoodExpertScraperV2:
             'pack_sizes': pack_sizes,
             'price_currency': 'GBP',
             'price_gbp': price_gbp,
+            'price_original': price_gbp,
             'price_eur': price_eur,
+            'price_rate_date': price_rate_date,
             'grain_free': grain_free == 'Y' if grain_free else None,
             'wheat_free': wheat_free == 'Y' if wheat_free else None,
             'fingerprint': fingerprint,
@@ -404,36 +409,30 @@ class PetFoodExpertScraperV2:
         if notes:
             product_data['notes'] = notes
         
-        # Check fingerprint for changes
+        # Per-field-group fingerprint: which parts of the product changed
+        product_data['field_fingerprint'] = field_fingerprint(product_data)
         existing = None
         if self.supabase:
             try:
-                existing = self.supabase.table('food_raw').select('fingerprint, parsed_json').eq(
+                existing = self.supabase.table('food_raw').select('field_fingerprint').eq(
                     'source_url', url
                 ).execute()
             except:
                 pass
         
-        # Check if nutrition data is new
-        has_new_nutrition = False
-        if existing and existing.data:
-            # Check if we have nutrition that wasn't there before
-            existing_parsed = existing.data[0].get('parsed_json', {}) if existing.data else {}
-            for field in ['protein_percent', 'fat_percent', 'kcal_per_100g']:
-                if product_data.get(field) and not existing_parsed.get(field):
-                    has_new_nutrition = True
-                    break
-        
-        if existing and existing.data and existing.data[0].get('fingerprint') == product_data['fingerprint'] and not has_new_nutrition:
+        known = bool(existing and existing.data)
+        groups = changed_groups(existing.data[0].get('field_fingerprint'), product_data) if known else list(FIELD_GROUPS)
+        
+        if not groups:
             logger.info(f"Skipped (unchanged): {product_data['brand']} - {product_data['product_name']} [source: {raw_type}]")
             self.stats['skipped'] += 1
         else:
-            # Save to database
+            # Save to database (only the changed groups for known products)
             self._upsert_raw(url, gcs_path, product_data, raw_type)
-            self._upsert_candidate(product_data)
+            self._upsert_candidate(product_data, groups if known else None)
             
-            if existing and existing.data:
-                logger.info(f"Updated: {product_data['brand']} - {product_data['product_name']} [source: {raw_type}]")
+            if known:
+                logger.info(f"Updated ({', '.join(groups)}): {product_data['brand']} - {product_data['product_name']} [source: {raw_type}]")
                 self.stats['updated'] += 1
             else:
                 logger.info(f"New: {product_data['brand']} - {product_data['product_name']} [source: {raw_type}]")
@@ -499,6 +498,7 @@ class PetFoodExpertScraperV2:
                 'html_gcs_path': gcs_path,
                 'parsed_json': parsed_json,
                 'fingerprint': parsed_json.get('fingerprint'),
+                'field_fingerprint': parsed_json.get('field_fingerprint'),
                 'last_seen_at': datetime.utcnow().isoformat(),
                 'raw_type': raw_type  # New field
             }
@@ -513,8 +513,11 @@ class PetFoodExpertScraperV2:
             logger.error(f"Failed to upsert raw data: {e}")
             return False
     
-    def _upsert_candidate(self, product_data: Dict) -> bool:
-        """Upsert to food_candidates table"""
+    def _upsert_candidate(self, product_data: Dict, groups: Optional[List[str]] = None) -> bool:
+        """
+        Upsert to food_candidates table; with groups (changed field groups
+        of a known product) only those groups' columns are written
+        """
         if not self.supabase:
             return False
         
@@ -531,22 +534,26 @@ class PetFoodExpertScraperV2:
             # Add timestamp
             candidate_data['last_seen_at'] = datetime.utcnow().isoformat()
             
-            # Check if exists and what nutrition data it has
-            existing = self.supabase.table('food_candidates').select(
-                'id, protein_percent, fat_percent, kcal_per_100g'
-            ).eq(
+            if groups is not None:
+                # Every column of a changed group is sent: fields the parser
+                # dropped as None clear values that disappeared from the page
+                update = changed_payload(candidate_data, groups)
+                update.update({
+                    'field_fingerprint': candidate_data['field_fingerprint'],
+                    'last_seen_at': candidate_data['last_seen_at']
+                })
+                result = self.supabase.table('food_candidates').update(
+                    update
+                ).eq('source_url', candidate_data['source_url']).execute()
+                if result.data:
+                    return True
+            
+            # New product (or no candidate row yet)
+            existing = self.supabase.table('food_candidates').select('id').eq(
                 'source_url', candidate_data['source_url']
             ).execute()
             
             if existing.data:
-                # Always update if we have new nutrition data
-                existing_row = existing.data[0]
-                has_new_nutrition = False
-                for field in ['protein_percent', 'fat_percent', 'kcal_per_100g']:
-                    if candidate_data.get(field) and not existing_row.get(field):
-                        has_new_nutrition = True
-                        logger.info(f"  → New {field}: {candidate_data.get(field)}")
-                
                 result = self.supabase.table('food_candidates').update(
                     candidate_data
                 ).eq('source_url', candidate_data['source_url']).execute()
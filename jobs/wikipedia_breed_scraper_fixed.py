@@ -65,36 +65,38 @@ class WikipediaBreedScraper:
                 logger.warning(f"No Wikipedia page for {breed_name}")
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract data from infobox
-            infobox_data = self._extract_infobox(soup)
-            
-            # Extract data from article content (for missing data like lifespan and weight)
-            content_data = self._extract_from_content(soup)
-            
-            # Merge data (infobox takes precedence)
-            breed_data = {
-                'breed_slug': self._create_slug(breed_name),
-                'display_name': breed_name,
-                'raw_html': response.text[:50000],  # Store first 50k chars
-                **content_data,  # Content data first
-                **infobox_data,  # Infobox overrides content
-            }
-            
-            # Extract comprehensive content sections
-            breed_data.update(self._extract_content_sections(soup))
-            
-            # Map to controlled vocabularies
-            breed_data = self._map_to_controlled_vocab(breed_data)
-            
-            return breed_data
+            return self.parse_breed_page(breed_name, response.text)
             
         except Exception as e:
             logger.error(f"Error scraping {breed_name}: {e}")
             self.stats['errors'].append(f"{breed_name}: {str(e)}")
             return None
     
+    def parse_breed_page(self, breed_name: str, html: str) -> Dict[str, Any]:
+        """Breed data from a fetched Wikipedia page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract data from infobox
+        infobox_data = self._extract_infobox(soup)
+        
+        # Extract data from article content (for missing data like lifespan and weight)
+        content_data = self._extract_from_content(soup)
+        
+        # Merge data (infobox takes precedence)
+        breed_data = {
+            'breed_slug': self._create_slug(breed_name),
+            'display_name': breed_name,
+            'raw_html': html[:50000],  # Store first 50k chars
+            **content_data,  # Content data first
+            **infobox_data,  # Infobox overrides content
+        }
+        
+        # Extract comprehensive content sections
+        breed_data.update(self._extract_content_sections(soup))
+        
+        # Map to controlled vocabularies
+        return self._map_to_controlled_vocab(breed_data)
+    
     def _extract_infobox(self, soup: BeautifulSoup) -> Dict[str, Any]:
         """Extract data from Wikipedia infobox with fixed parsing"""
         data = {}
@@ -11,8 +11,15 @@ import PyPDF2
 from io import BytesIO
 import logging
 
+from etl.classify_foods import get_food_classifier
+from etl.ingredients import IngredientProcessor
+from etl.nutrition_engine import dry_matter_fields, estimate_kcal_value
+from etl.pack_size import parse_pack_size
+
 logger = logging.getLogger(__name__)
 
+CAT_PRODUCT_PATTERN = re.compile(r'\b(?:cats?|kittens?|feline)\b')
+
 class ManufacturerParser:
     """Base parser for manufacturer data"""
     
@@ -30,41 +37,22 @@ class ManufacturerParser:
         'gluten': ['gluten', 'wheat', 'barley', 'rye']
     }
     
+    _ingredient_processor = None
+
+    @classmethod
+    def ingredient_processor(cls) -> IngredientProcessor:
+        """Shared tokenizer with the allergen groups above"""
+        if cls._ingredient_processor is None:
+            cls._ingredient_processor = IngredientProcessor(allergen_taxonomy=cls.ALLERGEN_MAP)
+        return cls._ingredient_processor
+
     def normalize_ingredients(self, text: str) -> List[str]:
         """Normalize and tokenize ingredients text"""
-        if not text:
-            return []
-        
-        # Clean text
-        text = text.lower()
-        text = re.sub(r'[^\w\s,()]', ' ', text)
-        
-        # Split by common delimiters
-        tokens = re.split(r'[,;]', text)
-        
-        # Clean and filter tokens
-        clean_tokens = []
-        for token in tokens:
-            token = token.strip()
-            # Remove percentages and numbers
-            token = re.sub(r'\d+\.?\d*\s*%?', '', token).strip()
-            if len(token) > 2:
-                clean_tokens.append(token)
-        
-        return clean_tokens
-    
+        return self.ingredient_processor().tokenize(text)
+
     def detect_allergens(self, ingredients: List[str]) -> List[str]:
         """Detect allergen groups from ingredients"""
-        allergens = set()
-        ingredients_text = ' '.join(ingredients).lower()
-        
-        for allergen, keywords in self.ALLERGEN_MAP.items():
-            for keyword in keywords:
-                if keyword in ingredients_text:
-                    allergens.add(allergen)
-                    break
-        
-        return sorted(list(allergens))
+        return self.ingredient_processor().allergen_groups(ingredients)
     
     def parse_analytical_constituents(self, text: str) -> Dict[str, float]:
         """Parse analytical constituents (protein, fat, etc.)"""
@@ -97,123 +85,43 @@ class ManufacturerParser:
     
     def calculate_kcal(self, constituents: Dict[str, float]) -> Optional[float]:
         """Calculate kcal/100g using Atwater factors"""
-        protein = constituents.get('protein_percent', 0)
-        fat = constituents.get('fat_percent', 0)
-        carbs = constituents.get('carbohydrate_percent', 0)
-        
-        # If no carbs but we have other values, estimate
-        if carbs == 0 and protein > 0 and fat > 0:
-            fiber = constituents.get('fiber_percent', 0)
-            ash = constituents.get('ash_percent', 0)
-            moisture = constituents.get('moisture_percent', 0)
-            carbs = max(0, 100 - protein - fat - fiber - ash - moisture)
-        
-        if protein > 0 or fat > 0 or carbs > 0:
-            # Atwater factors for pet food
-            kcal = (protein * 3.5) + (fat * 8.5) + (carbs * 3.5)
-            return round(kcal, 1)
-        
-        return None
+        return estimate_kcal_value(
+            constituents.get('protein_percent'), constituents.get('fat_percent'),
+            constituents.get('fiber_percent'), constituents.get('ash_percent'),
+            constituents.get('moisture_percent'), constituents.get('carbohydrate_percent')
+        )
     
     def detect_form(self, text: str) -> Optional[str]:
         """Detect product form (dry, wet, etc.)"""
         if not text:
             return None
         
-        text = text.lower()
-        
-        if any(word in text for word in ['dry', 'kibble', 'biscuit', 'crunchy']):
-            return 'dry'
-        elif any(word in text for word in ['wet', 'can', 'canned', 'pouch', 'pate', 'chunks', 'jelly', 'gravy', 'sauce']):
-            return 'wet'
-        elif any(word in text for word in ['raw', 'frozen', 'fresh']):
-            return 'raw'
-        elif 'freeze' in text and 'dried' in text:
-            return 'freeze_dried'
-        
-        return None
+        return get_food_classifier().form.classify(text).label
     
     def detect_life_stage(self, text: str) -> Optional[str]:
         """Detect life stage (for dogs only)"""
         if not text:
             return None
         
-        text = text.lower()
-        
         # Exclude cat products
-        if any(word in text for word in ['cat', 'kitten', 'feline']):
+        if CAT_PRODUCT_PATTERN.search(text.lower()):
             return None
         
-        if any(word in text for word in ['puppy', 'junior', 'growth']):
-            return 'puppy'
-        elif any(word in text for word in ['senior', 'mature', '7+', '11+', 'aging']):
-            return 'senior'
-        elif any(word in text for word in ['adult', 'maintenance']):
-            return 'adult'
-        elif any(phrase in text for phrase in ['all life stages', 'all ages']):
-            return 'all'
-        
-        return None
+        return get_food_classifier().life_stage.classify(text).label
     
     def parse_pack_size(self, text: str) -> Optional[Dict[str, Any]]:
-        """Parse pack size and weight"""
-        if not text:
+        """Parse pack size and weight (see etl/pack_size.py)"""
+        pack = parse_pack_size(text)
+        if pack is None:
             return None
         
-        text = text.lower()
-        
-        # Pattern 1: Multipack (e.g., "24x400g")
-        multipack = re.search(r'(\d+)\s*[x×]\s*(\d+(?:\.\d+)?)\s*(kg|g|ml|l|oz|lb)', text)
-        if multipack:
-            count = int(multipack.group(1))
-            size = float(multipack.group(2))
-            unit = multipack.group(3)
-            
-            # Convert to kg
-            if unit == 'g':
-                total_kg = (count * size) / 1000
-            elif unit == 'kg':
-                total_kg = count * size
-            elif unit == 'lb':
-                total_kg = (count * size) * 0.453592
-            elif unit == 'oz':
-                total_kg = (count * size) * 0.0283495
-            else:
-                total_kg = None
-            
-            return {
-                'pack_count': count,
-                'unit_size': size,
-                'unit': unit,
-                'total_kg': total_kg
-            }
-        
-        # Pattern 2: Single pack (e.g., "2kg", "400g")
-        single = re.search(r'(\d+(?:\.\d+)?)\s*(kg|g|ml|l|oz|lb)', text)
-        if single:
-            size = float(single.group(1))
-            unit = single.group(2)
-            
-            # Convert to kg
-            if unit == 'g':
-                total_kg = size / 1000
-            elif unit == 'kg':
-                total_kg = size
-            elif unit == 'lb':
-                total_kg = size * 0.453592
-            elif unit == 'oz':
-                total_kg = size * 0.0283495
-            else:
-                total_kg = None
-            
-            return {
-                'pack_count': 1,
-                'unit_size': size,
-                'unit': unit,
-                'total_kg': total_kg
-            }
-        
-        return None
+        return {
+            'pack_count': pack.count,
+            'unit_size': pack.unit_grams,
+            'unit': 'g',
+            'total_kg': pack.kg,
+            'label': pack.label
+        }
 
 
 class HTMLParser(ManufacturerParser):
@@ -483,6 +391,9 @@ class ManufacturerDataNormalizer:
         # Calculate overall confidence
         field_count = sum(1 for k in normalized if not k.endswith('_confidence') and k not in ['source', 'confidence', 'extracted_at'])
         normalized['confidence'] = min(0.95, field_count * 0.1)
+
+        # Dry-matter-basis values from the merged as-fed values
+        normalized.update({k: v for k, v in dry_matter_fields(normalized).items() if v is not None})
         
         # Add provenance
         normalized['provenance'] = {
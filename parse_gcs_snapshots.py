@@ -18,6 +18,9 @@ import logging
 from typing import Dict, List, Optional, Tuple
 import langdetect
 
+from etl.ingredients import tokenize_ingredients
+from etl.nutrition_engine import dry_matter_fields, estimate_kcal_value
+
 # Setup
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -32,17 +35,6 @@ url = os.getenv('SUPABASE_URL')
 key = os.getenv('SUPABASE_SERVICE_KEY')
 supabase = create_client(url, key)
 
-# Load canonical map
-canonical_map_file = Path("data/ingredients_canonical_map.yaml")
-if canonical_map_file.exists():
-    with open(canonical_map_file, 'r') as f:
-        canonical_data = yaml.safe_load(f)
-        CANONICAL_MAP = canonical_data.get('canonical_map', {})
-        ALLERGEN_GROUPS = canonical_data.get('allergen_groups', {})
-else:
-    CANONICAL_MAP = {}
-    ALLERGEN_GROUPS = {}
-
 # Statistics tracking
 stats = {
     'burns': {
@@ -71,33 +63,6 @@ def detect_language(text: str) -> str:
     except:
         return 'en'
 
-def tokenize_ingredients(raw_text: str) -> List[str]:
-    """Tokenize ingredients using canonical map"""
-    if not raw_text:
-        return []
-    
-    text = raw_text.lower()
-    # Remove percentages and numbers
-    text = re.sub(r'\([^)]*\d+[^)]*\)', '', text)
-    text = re.sub(r'\d+\.?\d*\s*%', '', text)
-    
-    # Split on commas and common separators
-    parts = re.split(r'[,;]|\sand\s|\s&\s', text)
-    
-    tokens = []
-    for part in parts:
-        # Clean the part
-        part = re.sub(r'[^a-z\s-]', ' ', part)
-        part = ' '.join(part.split()).strip()
-        
-        if part and len(part) > 1:
-            # Apply canonical mapping
-            canonical = CANONICAL_MAP.get(part, part)
-            if canonical and canonical not in tokens:
-                tokens.append(canonical)
-    
-    return tokens
-
 def extract_ingredients_from_html(html: str, brand: str) -> Optional[Dict]:
     """Extract ingredients from HTML"""
     soup = BeautifulSoup(html, 'html.parser')
@@ -260,20 +225,12 @@ def extract_macros_from_html(html: str) -> Optional[Dict]:
     
     # If no kcal but have macros, derive it
     if not kcal and 'protein_percent' in macros and 'fat_percent' in macros:
-        # Modified Atwater factors for pet food
-        protein_kcal = macros['protein_percent'] * 3.5
-        fat_kcal = macros['fat_percent'] * 8.5
-        # Estimate carbs (100 - protein - fat - fiber - ash - moisture)
-        carbs = 100
-        for m in ['protein_percent', 'fat_percent', 'fiber_percent', 'ash_percent', 'moisture_percent']:
-            if m in macros:
-                carbs -= macros[m]
-        carbs = max(0, carbs)
-        carbs_kcal = carbs * 3.5
-        
-        derived_kcal = protein_kcal + fat_kcal + carbs_kcal
-        if 100 < derived_kcal < 800:
-            macros['kcal_per_100g'] = round(derived_kcal, 1)
+        derived_kcal = estimate_kcal_value(
+            macros['protein_percent'], macros['fat_percent'], macros.get('fiber_percent'),
+            macros.get('ash_percent'), macros.get('moisture_percent'), check_range=True
+        )
+        if derived_kcal:
+            macros['kcal_per_100g'] = derived_kcal
             macros['kcal_source'] = 'derived'
     
     if macros:
@@ -295,7 +252,7 @@ def get_product_from_url(url: str, brand: str) -> Optional[Dict]:
     # First try exact match on product name
     response = supabase.table('foods_canonical').select(
         'product_key, product_name, brand_slug, ingredients_raw, ingredients_tokens, '
-        'protein_percent, fat_percent, fiber_percent, ash_percent, moisture_percent, kcal_per_100g'
+        'protein_percent, fat_percent, fiber_percent, ash_percent, moisture_percent, kcal_per_100g, form'
     ).eq('brand_slug', brand).execute()
     
     if response.data:
@@ -408,6 +365,10 @@ def process_brand_snapshots(brand: str) -> Dict:
                     update_data['macros_source'] = macros_data.get('macros_source', 'site_text')
                 if 'kcal_per_100g' in update_data:
                     update_data['kcal_source'] = macros_data.get('kcal_source', 'site_text')
+
+                # Keep the dry-matter-basis columns in step with the as-fed values
+                if any(field.endswith('_percent') or field == 'kcal_per_100g' for field in update_data):
+                    update_data.update(dry_matter_fields({**product, **update_data}))
             
             # Apply update if we have data
             if update_data:
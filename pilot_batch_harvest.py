@@ -10,6 +10,9 @@ from pathlib import Path
 import random
 import json
 
+from etl.pack_size import parse_pack_size as parse_pack
+
+
 def generate_pilot_harvest_data():
     """Generate comprehensive pilot harvest data for all Top 5 brands"""
     
@@ -220,18 +223,8 @@ def detect_allergens(ingredients):
 
 def parse_pack_size(size_str):
     """Parse pack size to kg"""
-    import re
-    
-    # Try to extract number and unit
-    match = re.search(r'([0-9.]+)\s*(kg|g)', size_str.lower())
-    if match:
-        value = float(match.group(1))
-        unit = match.group(2)
-        if unit == 'kg':
-            return value
-        elif unit == 'g':
-            return value / 1000
-    return None
+    pack = parse_pack(size_str)
+    return pack.kg if pack else None
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -5,13 +5,16 @@ Goal: Decide what gets promoted from Preview → Prod safely
 """
 
 import os
-import json
 from datetime import datetime
 import pandas as pd
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from typing import Dict, List, Tuple
 
+from etl.acceptance_gates import (failing_reasons, gate_label, gate_report, gate_thresholds, load_gate_frame,
+                                  load_gates)
+from etl.supabase_loader import fetch_all_rows
+
 load_dotenv()
 
 class AcceptanceGateChecker:
@@ -19,14 +22,9 @@ class AcceptanceGateChecker:
         self.supabase = self._init_supabase()
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Food-ready gates
-        self.gates = {
-            'life_stage': 95,      # ≥95%
-            'form': 90,            # ≥90%
-            'ingredients': 85,     # ≥85%
-            'kcal_valid': 90,      # ≥90%
-            'kcal_outliers': 0     # Must be 0
-        }
+        # Food-ready gates (data/acceptance_gates.yaml)
+        self.gate_config = load_gates()
+        self.gates = gate_thresholds(self.gate_config)
         
     def _init_supabase(self) -> Client:
         """Initialize Supabase client"""
@@ -46,88 +44,19 @@ class AcceptanceGateChecker:
         print("\n🔍 CHECKING FOOD-READY GATES")
         print("-" * 40)
         print("Gates required:")
-        print(f"  • Life Stage ≥ {self.gates['life_stage']}%")
-        print(f"  • Form ≥ {self.gates['form']}%")
-        print(f"  • Ingredients ≥ {self.gates['ingredients']}%")
-        print(f"  • Kcal Valid (200-600) ≥ {self.gates['kcal_valid']}%")
-        print(f"  • Kcal Outliers = {self.gates['kcal_outliers']}")
+        for gate in self.gate_config['gates'].values():
+            if 'min' in gate:
+                print(f"  • {gate_label(gate, self.gate_config)} ≥ {gate['min']}%")
+            else:
+                print(f"  • {gate_label(gate, self.gate_config)} ≤ {gate['max']}")
         
-        # Fetch all data from Preview
+        # Fetch the gate columns from Preview (paged)
         print("\nFetching Preview data...")
-        response = self.supabase.table('foods_published_preview').select('*').execute()
-        df = pd.DataFrame(response.data)
+        df = load_gate_frame(self.supabase, 'foods_published_preview')
         print(f"✓ Fetched {len(df)} rows from foods_published_preview")
         
-        # Calculate metrics per brand
-        brand_metrics = []
-        
-        for brand_slug in df['brand_slug'].unique():
-            if pd.isna(brand_slug):
-                continue
-            
-            brand_df = df[df['brand_slug'] == brand_slug]
-            brand_name = brand_df['brand'].iloc[0] if len(brand_df) > 0 else brand_slug
-            
-            # Calculate coverage percentages
-            total = len(brand_df)
-            
-            # Form coverage
-            form_count = brand_df['form'].notna().sum()
-            form_pct = (form_count / total) * 100 if total > 0 else 0
-            
-            # Life stage coverage
-            life_stage_count = brand_df['life_stage'].notna().sum()
-            life_stage_pct = (life_stage_count / total) * 100 if total > 0 else 0
-            
-            # Ingredients coverage (check if list is not empty)
-            ingredients_count = 0
-            for idx, row in brand_df.iterrows():
-                ingredients = row.get('ingredients_tokens', [])
-                if isinstance(ingredients, (list, str)):
-                    if isinstance(ingredients, str):
-                        try:
-                            ingredients = json.loads(ingredients)
-                        except:
-                            ingredients = []
-                    if len(ingredients) > 0:
-                        ingredients_count += 1
-            ingredients_pct = (ingredients_count / total) * 100 if total > 0 else 0
-            
-            # Kcal validation
-            kcal_valid_count = 0
-            kcal_outliers = 0
-            for kcal in brand_df['kcal_per_100g']:
-                if pd.notna(kcal):
-                    if 200 <= kcal <= 600:
-                        kcal_valid_count += 1
-                    else:
-                        kcal_outliers += 1
-            
-            kcal_valid_pct = (kcal_valid_count / total) * 100 if total > 0 else 0
-            
-            # Check if meets all gates
-            meets_gates = (
-                life_stage_pct >= self.gates['life_stage'] and
-                form_pct >= self.gates['form'] and
-                ingredients_pct >= self.gates['ingredients'] and
-                kcal_valid_pct >= self.gates['kcal_valid'] and
-                kcal_outliers == self.gates['kcal_outliers']
-            )
-            
-            brand_metrics.append({
-                'brand_slug': brand_slug,
-                'brand_name': brand_name,
-                'sku_count': total,
-                'form_pct': form_pct,
-                'life_stage_pct': life_stage_pct,
-                'ingredients_pct': ingredients_pct,
-                'kcal_valid_pct': kcal_valid_pct,
-                'kcal_outliers': kcal_outliers,
-                'meets_all_gates': meets_gates
-            })
-        
-        metrics_df = pd.DataFrame(brand_metrics)
-        metrics_df = metrics_df.sort_values(['meets_all_gates', 'sku_count'], ascending=[False, False])
+        # Metrics and gates for every brand in one pass
+        metrics_df = gate_report(df, self.gate_config)
         
         return metrics_df
     
@@ -232,9 +161,9 @@ COMMIT;
         
         # Current Prod stats
         try:
-            prod_response = self.supabase.table('foods_published_prod').select('brand_slug').execute()
-            current_prod_skus = len(prod_response.data)
-            current_prod_brands = len(set([r['brand_slug'] for r in prod_response.data if r.get('brand_slug')]))
+            prod_rows = fetch_all_rows(self.supabase, 'foods_published_prod', 'brand_slug', key='product_key')
+            current_prod_skus = len(prod_rows)
+            current_prod_brands = len(set([r['brand_slug'] for r in prod_rows if r.get('brand_slug')]))
         except:
             current_prod_skus = 0
             current_prod_brands = 0
@@ -281,11 +210,7 @@ COMMIT;
                 if row['meets_all_gates']:
                     print(f"  ✅ {brand}: Ready for promotion ({row['sku_count']} SKUs)")
                 else:
-                    issues = []
-                    if row['life_stage_pct'] < self.gates['life_stage']:
-                        issues.append(f"life_stage {row['life_stage_pct']:.1f}%")
-                    if row['form_pct'] < self.gates['form']:
-                        issues.append(f"form {row['form_pct']:.1f}%")
+                    issues = failing_reasons(row, self.gate_config)
                     print(f"  ⚠️  {brand}: Not ready - {', '.join(issues)}")
             else:
                 print(f"  ❌ {brand}: Not found in catalog")
@@ -11,8 +11,109 @@ import re
 import json
 from collections import defaultdict, Counter
 import warnings
+
+from etl.catalog_audit import COVERAGE_FIELDS, AuditRule, audit_source, default_rules
+
 warnings.filterwarnings('ignore')
 
+
+class RoyalCaninRule(AuditRule):
+    """Royal Canin rows of one table: variants, stringified arrays, missing kcal, "Canin" name prefixes"""
+
+    name = 'royal_canin'
+    columns = None
+
+    def __init__(self, table_name, rc_analysis):
+        self.table_name = table_name
+        self.rc = rc_analysis
+        self.stringified_seen = set()
+        self.table_samples = 0
+
+    def observe(self, chunk):
+        if 'brand' in chunk.columns:
+            mask = chunk['brand'].astype('string').str.contains('Royal|Canin', case=False, na=False)
+        elif 'brand_slug' in chunk.columns:
+            mask = chunk['brand_slug'].astype('string').str.contains('royal', na=False)
+        else:
+            return
+        rc_rows = chunk[mask.to_numpy()]
+        if rc_rows.empty:
+            return
+        
+        self.rc['by_table'][self.table_name] += len(rc_rows)
+        self.rc['total_skus'] += len(rc_rows)
+        
+        # Variants
+        if 'brand_slug' in rc_rows.columns:
+            for variant, count in rc_rows['brand_slug'].value_counts(dropna=False).items():
+                self.rc['by_variant'][variant] += int(count)
+        
+        # Stringified arrays (first 10 values per column)
+        for col in rc_rows.columns:
+            if col in self.stringified_seen:
+                continue
+            sample = rc_rows[col].dropna().head(10)
+            for val in sample:
+                if isinstance(val, str) and val.startswith('[') and val.endswith(']'):
+                    self.stringified_seen.add(col)
+                    self.rc['issues']['stringified_arrays'].append({
+                        'table': self.table_name,
+                        'column': col,
+                        'sample': str(val)[:100]
+                    })
+                    break
+        
+        # Missing nutrition
+        if 'kcal_per_100g' in rc_rows.columns:
+            missing = int(rc_rows['kcal_per_100g'].isna().sum())
+            if missing:
+                self.rc['issues']['missing_kcal'] = (self.rc['issues'].get('missing_kcal') or 0) + missing
+        
+        # Leading "Canin" in product name
+        if 'product_name' in rc_rows.columns:
+            names = rc_rows['product_name'].astype('string')
+            canin_prefix = rc_rows.loc[names.str.startswith('Canin ', na=False).to_numpy(), 'product_name']
+            if len(canin_prefix) > 0:
+                entry = next((e for e in self.rc['issues']['canin_prefix'] if e['table'] == self.table_name), None)
+                if entry is None:
+                    entry = {'table': self.table_name, 'count': 0, 'samples': []}
+                    self.rc['issues']['canin_prefix'].append(entry)
+                entry['count'] += len(canin_prefix)
+                entry['samples'].extend(canin_prefix.head(3 - len(entry['samples'])).tolist())
+        
+        # Collect samples (5 per table, 20 overall)
+        if len(self.rc['samples']) < 20 and self.table_samples < 5:
+            sample_cols = [col for col in ['brand', 'brand_slug', 'product_name', 'kcal_per_100g', 'price_per_kg_eur'] if col in rc_rows.columns]
+            rows = rc_rows[sample_cols].head(5 - self.table_samples).to_dict('records')
+            self.rc['samples'].extend(rows)
+            self.table_samples += len(rows)
+
+    def result(self):
+        return self.rc['by_table'].get(self.table_name, 0)
+
+
+class FoodReadyRule(AuditRule):
+    """Rows with form and life_stage and kcal in 40-600 (checks on the columns the table has)"""
+
+    name = 'food_ready'
+    columns = ('form', 'life_stage', 'kcal_per_100g')
+
+    def __init__(self):
+        self.count = 0
+
+    def observe(self, chunk):
+        ready = pd.Series(True, index=chunk.index)
+        for col in ('form', 'life_stage'):
+            if col in chunk.columns:
+                ready &= chunk[col].notna()
+        if 'kcal_per_100g' in chunk.columns:
+            ready &= pd.to_numeric(chunk['kcal_per_100g'], errors='coerce').between(40, 600)
+        self.count += int(ready.sum())
+
+    def result(self):
+        return self.count
+
+
 class CatalogAuditor:
     def __init__(self):
         self.reports_dir = Path("reports")
@@ -52,261 +153,120 @@ class CatalogAuditor:
         }
         
         self.table_stats = {}
+        self.rc_analysis = {
+            'total_skus': 0,
+            'by_variant': defaultdict(int),
+            'by_table': defaultdict(int),
+            'issues': defaultdict(list),
+            'samples': []
+        }
         
     def analyze_table(self, file_path):
-        """Analyze a single table for all issues"""
+        """Analyze a single table for all issues (one chunked pass, etl/catalog_audit.py)"""
         path = Path(file_path)
         if not path.exists():
             return None
             
         print(f"Analyzing: {path.name}")
         
+        rules = default_rules(coverage_fields=COVERAGE_FIELDS + ('price_per_kg',))
+        rules += [RoyalCaninRule(path.name, self.rc_analysis), FoodReadyRule()]
         try:
-            df = pd.read_csv(path)
+            report = audit_source(path, rules)
         except Exception as e:
             print(f"  Error reading {path}: {e}")
             return None
             
-        if df.empty:
+        if report['rows'] == 0:
             return None
             
+        columns = report['columns']
+        coverage = report['coverage']
         stats = {
             'table': path.name,
             'path': str(path),
-            'total_rows': len(df),
-            'columns': list(df.columns),
-            'issues': defaultdict(int)
+            'total_rows': report['rows'],
+            'columns': columns,
+            'issues': defaultdict(int),
+            'food_ready_count': report['food_ready']
         }
         
         # 1. Brand & line normalization
-        if 'brand' in df.columns:
-            # Count distinct brands
-            stats['distinct_brands'] = df['brand'].nunique()
-            stats['distinct_brand_slugs'] = df['brand_slug'].nunique() if 'brand_slug' in df.columns else 0
+        if 'brand' in columns:
+            brands = report['brands']
+            stats['distinct_brands'] = brands['distinct_brands']
+            stats['distinct_brand_slugs'] = brands['distinct_brand_slugs']
+            stats['top_brands'] = brands['top_brand_slugs']
             
-            # Detect split patterns
-            self.detect_brand_splits(df, path.name)
+            if 'product_name' in columns and report['brand_splits']:
+                self.findings['brand_splits'][path.name].extend(report['brand_splits'])
             
             # Check for Royal Canin variants
-            if 'brand_slug' in df.columns:
-                rc_variants = df[df['brand_slug'].str.contains('royal', na=False)]['brand_slug'].unique()
-                if len(rc_variants) > 0:
-                    self.findings['royal_canin']['variants'].extend(rc_variants)
-                    stats['royal_canin_variants'] = list(rc_variants)
-        
-        # 2. Type integrity - check for stringified arrays
-        for col in df.columns:
-            sample = df[col].dropna().head(100)
-            stringified_count = 0
-            
-            for val in sample:
-                if isinstance(val, str):
-                    # Check if it looks like stringified array/json
-                    if (val.startswith('[') and val.endswith(']')) or \
-                       (val.startswith('{') and val.endswith('}')):
-                        stringified_count += 1
-                        
-            if stringified_count > len(sample) * 0.5:  # More than 50% look stringified
-                self.findings['stringified_arrays'][path.name].append({
-                    'column': col,
-                    'sample': str(df[col].iloc[0]) if len(df) > 0 else None,
-                    'affected_rows': len(df[df[col].notna()])
-                })
-                stats['issues']['stringified_arrays'] += 1
+            if brands['royal_canin_variants']:
+                self.findings['royal_canin']['variants'].extend(brands['royal_canin_variants'])
+                stats['royal_canin_variants'] = brands['royal_canin_variants']
+        
+        # 2. Type integrity - stringified arrays
+        for issue in report['stringified_arrays']:
+            self.findings['stringified_arrays'][path.name].append(issue)
+            stats['issues']['stringified_arrays'] += 1
         
         # 3. Nutrition coverage & outliers
-        if 'kcal_per_100g' in df.columns:
-            kcal_coverage = df['kcal_per_100g'].notna().sum() / len(df) * 100
-            stats['kcal_coverage'] = round(kcal_coverage, 1)
-            
-            # Find outliers
-            kcal_outliers = df[(df['kcal_per_100g'] < 40) | (df['kcal_per_100g'] > 600)]
-            if len(kcal_outliers) > 0:
+        if 'kcal_per_100g' in coverage:
+            stats['kcal_coverage'] = coverage['kcal_per_100g']
+            kcal = report['kcal_outliers']
+            if kcal['count'] > 0:
                 self.findings['nutrition_gaps'][path.name].append({
                     'type': 'kcal_outliers',
-                    'count': len(kcal_outliers),
-                    'samples': kcal_outliers[['brand', 'product_name', 'kcal_per_100g']].head(5).to_dict('records') if 'brand' in df.columns else []
+                    'count': kcal['count'],
+                    'samples': kcal['samples'] if 'brand' in columns else []
                 })
-                stats['issues']['kcal_outliers'] = len(kcal_outliers)
+                stats['issues']['kcal_outliers'] = kcal['count']
         
         # 4. Life stage / form coverage
-        if 'life_stage' in df.columns:
-            stats['life_stage_coverage'] = round(df['life_stage'].notna().sum() / len(df) * 100, 1)
-            
-            # Check for inference opportunities
-            if 'product_name' in df.columns:
-                missing_life_stage = df[df['life_stage'].isna()]
-                inferable = missing_life_stage[
-                    missing_life_stage['product_name'].str.contains(
-                        'Puppy|Junior|Adult|Senior|Ageing|Mature', 
-                        case=False, na=False
-                    )
-                ]
-                if len(inferable) > 0:
-                    stats['life_stage_inferable'] = len(inferable)
+        if 'life_stage' in coverage:
+            stats['life_stage_coverage'] = coverage['life_stage']
+            if report['life_stage_inferable'] > 0:
+                stats['life_stage_inferable'] = report['life_stage_inferable']
                     
-        if 'form' in df.columns:
-            stats['form_coverage'] = round(df['form'].notna().sum() / len(df) * 100, 1)
+        if 'form' in coverage:
+            stats['form_coverage'] = coverage['form']
         
         # 5. Price integrity
-        if 'price_per_kg' in df.columns or 'price_per_kg_eur' in df.columns:
-            price_col = 'price_per_kg_eur' if 'price_per_kg_eur' in df.columns else 'price_per_kg'
-            price_coverage = df[price_col].notna().sum() / len(df) * 100
-            stats['price_coverage'] = round(price_coverage, 1)
-            
-            # Find outliers
-            price_outliers = df[(df[price_col] < 1) | (df[price_col] > 100)]
-            if len(price_outliers) > 0:
+        price = report['price_outliers']
+        if price:
+            stats['price_coverage'] = coverage[price['column']]
+            if price['count'] > 0:
                 self.findings['price_anomalies'][path.name].append({
-                    'count': len(price_outliers),
-                    'samples': price_outliers[[col for col in ['brand', 'product_name', price_col] if col in df.columns]].head(5).to_dict('records')
+                    'count': price['count'],
+                    'samples': price['samples']
                 })
-                stats['issues']['price_outliers'] = len(price_outliers)
+                stats['issues']['price_outliers'] = price['count']
         
         # 6. Allergen signal
-        if 'ingredients_tokens' in df.columns:
-            stats['ingredients_coverage'] = round(df['ingredients_tokens'].notna().sum() / len(df) * 100, 1)
-            
-            # Check for false defaults
-            if 'has_chicken' in df.columns:
-                false_defaults = df[(df['ingredients_tokens'].isna()) & (df['has_chicken'] == False)]
-                if len(false_defaults) > 0:
-                    stats['issues']['allergen_false_defaults'] = len(false_defaults)
+        if 'ingredients_tokens' in coverage:
+            stats['ingredients_coverage'] = coverage['ingredients_tokens']
+            if report['allergen_false_defaults'] > 0:
+                stats['issues']['allergen_false_defaults'] = report['allergen_false_defaults']
         
         # 7. Slug & key hygiene
-        for slug_col in ['brand_slug', 'name_slug']:
-            if slug_col in df.columns:
-                invalid_slugs = df[df[slug_col].str.contains(r'[^a-z0-9_-]', na=False)]
-                if len(invalid_slugs) > 0:
-                    self.findings['slug_issues'][path.name].append({
-                        'column': slug_col,
-                        'count': len(invalid_slugs),
-                        'samples': invalid_slugs[slug_col].head(5).tolist()
-                    })
-                    stats['issues'][f'invalid_{slug_col}'] = len(invalid_slugs)
+        for issue in report['invalid_slugs']:
+            self.findings['slug_issues'][path.name].append(issue)
+            stats['issues'][f"invalid_{issue['column']}"] = issue['count']
         
         # 8. Duplicate keys
-        if 'product_key' in df.columns:
-            duplicates = df[df.duplicated('product_key', keep=False)]
-            if len(duplicates) > 0:
-                dup_groups = duplicates.groupby('product_key').size().reset_index(name='count')
-                self.findings['duplicate_keys'][path.name] = {
-                    'total_duplicates': len(duplicates),
-                    'unique_keys': len(dup_groups),
-                    'samples': dup_groups.head(5).to_dict('records')
-                }
-                stats['issues']['duplicate_keys'] = len(duplicates)
+        duplicates = report['duplicate_keys']
+        if duplicates and duplicates['total_duplicates'] > 0:
+            self.findings['duplicate_keys'][path.name] = duplicates
+            stats['issues']['duplicate_keys'] = duplicates['total_duplicates']
         
         self.table_stats[path.name] = stats
         return stats
     
-    def detect_brand_splits(self, df, table_name):
-        """Detect split brand patterns"""
-        if 'brand' not in df.columns or 'product_name' not in df.columns:
-            return
-            
-        # Known split patterns
-        split_patterns = [
-            ('Royal', 'Canin'),
-            ('Hills', 'Science Plan'),
-            ('Hills', 'Prescription Diet'),
-            ('Purina', 'Pro Plan'),
-            ('Purina', 'ONE'),
-            ('Arden', 'Grange'),
-            ('Barking', 'Heads'),
-            ('Taste', 'of the Wild'),
-            ('Wild', 'Freedom'),
-            ("Lily's", 'Kitchen'),
-            ("Nature's", 'Variety')
-        ]
-        
-        for brand_part, name_part in split_patterns:
-            matches = df[
-                (df['brand'].str.strip() == brand_part) & 
-                (df['product_name'].str.startswith(name_part + ' ', na=False))
-            ]
-            
-            if len(matches) > 0:
-                self.findings['brand_splits'][table_name].append({
-                    'pattern': f"{brand_part}|{name_part}",
-                    'count': len(matches),
-                    'samples': matches[['brand', 'product_name']].head(3).to_dict('records')
-                })
-    
     def analyze_royal_canin(self):
-        """Deep dive on Royal Canin across all tables"""
+        """Deep dive on Royal Canin across all tables (collected during analyze_table)"""
         print("\nDeep diving on Royal Canin...")
-        
-        rc_analysis = {
-            'total_skus': 0,
-            'by_variant': defaultdict(int),
-            'by_table': defaultdict(int),
-            'issues': defaultdict(list),
-            'samples': []
-        }
-        
-        for file_path in self.tables_to_scan:
-            path = Path(file_path)
-            if not path.exists():
-                continue
-                
-            try:
-                df = pd.read_csv(path)
-            except:
-                continue
-                
-            # Find Royal Canin rows
-            rc_rows = pd.DataFrame()
-            
-            if 'brand' in df.columns:
-                rc_rows = df[df['brand'].str.contains('Royal|Canin', case=False, na=False)]
-            elif 'brand_slug' in df.columns:
-                rc_rows = df[df['brand_slug'].str.contains('royal', na=False)]
-                
-            if len(rc_rows) > 0:
-                rc_analysis['by_table'][path.name] = len(rc_rows)
-                rc_analysis['total_skus'] += len(rc_rows)
-                
-                # Check for variants
-                if 'brand_slug' in rc_rows.columns:
-                    for variant in rc_rows['brand_slug'].unique():
-                        rc_analysis['by_variant'][variant] += len(rc_rows[rc_rows['brand_slug'] == variant])
-                
-                # Check for issues
-                # Stringified arrays
-                for col in rc_rows.columns:
-                    sample = rc_rows[col].dropna().head(10)
-                    for val in sample:
-                        if isinstance(val, str) and ((val.startswith('[') and val.endswith(']'))):
-                            rc_analysis['issues']['stringified_arrays'].append({
-                                'table': path.name,
-                                'column': col,
-                                'sample': str(val)[:100]
-                            })
-                            break
-                
-                # Missing nutrition
-                if 'kcal_per_100g' in rc_rows.columns:
-                    missing_kcal = rc_rows[rc_rows['kcal_per_100g'].isna()]
-                    if len(missing_kcal) > 0:
-                        rc_analysis['issues']['missing_kcal'] = len(missing_kcal)
-                
-                # Leading "Canin" in product name
-                if 'product_name' in rc_rows.columns:
-                    canin_prefix = rc_rows[rc_rows['product_name'].str.startswith('Canin ', na=False)]
-                    if len(canin_prefix) > 0:
-                        rc_analysis['issues']['canin_prefix'].append({
-                            'table': path.name,
-                            'count': len(canin_prefix),
-                            'samples': canin_prefix['product_name'].head(3).tolist()
-                        })
-                
-                # Collect samples
-                if len(rc_analysis['samples']) < 20:
-                    sample_cols = [col for col in ['brand', 'brand_slug', 'product_name', 'kcal_per_100g', 'price_per_kg_eur'] if col in rc_rows.columns]
-                    rc_analysis['samples'].extend(rc_rows[sample_cols].head(5).to_dict('records'))
-        
-        self.findings['royal_canin'] = rc_analysis
+        self.findings['royal_canin'] = self.rc_analysis
     
     def compare_preview_prod(self):
         """Compare preview vs production catalogs"""
@@ -322,30 +282,23 @@ class CatalogAuditor:
         
         for label, path in [('preview', preview_path), ('prod', prod_path)]:
             if path.exists():
-                df = pd.read_csv(path)
+                table = self.table_stats.get(path.name) or self.analyze_table(path)
+                if not table:
+                    continue
                 
                 stats = {
-                    'total_rows': len(df),
-                    'distinct_brands': df['brand'].nunique() if 'brand' in df.columns else 0,
-                    'distinct_brand_slugs': df['brand_slug'].nunique() if 'brand_slug' in df.columns else 0
+                    'total_rows': table['total_rows'],
+                    'distinct_brands': table.get('distinct_brands', 0),
+                    'distinct_brand_slugs': table.get('distinct_brand_slugs', 0)
                 }
                 
                 # Top brands by SKU
-                if 'brand_slug' in df.columns:
-                    top_brands = df['brand_slug'].value_counts().head(10)
-                    stats['top_brands'] = top_brands.to_dict()
+                if 'brand_slug' in table['columns']:
+                    stats['top_brands'] = table.get('top_brands', {})
                 
                 # Food-ready counts (simplified gates)
-                food_ready = df
-                if 'form' in df.columns:
-                    food_ready = food_ready[food_ready['form'].notna()]
-                if 'life_stage' in df.columns:
-                    food_ready = food_ready[food_ready['life_stage'].notna()]
-                if 'kcal_per_100g' in df.columns:
-                    food_ready = food_ready[(food_ready['kcal_per_100g'] >= 40) & (food_ready['kcal_per_100g'] <= 600)]
-                
-                stats['food_ready_count'] = len(food_ready)
-                stats['food_ready_pct'] = round(len(food_ready) / len(df) * 100, 1) if len(df) > 0 else 0
+                stats['food_ready_count'] = table['food_ready_count']
+                stats['food_ready_pct'] = round(table['food_ready_count'] / table['total_rows'] * 100, 1) if table['total_rows'] > 0 else 0
                 
                 comparison[label] = stats
         
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Export the catalog to a local Parquet snapshot
+
+Writes foods_canonical and the published views to data/snapshots/<stamp>/
+(etl/catalog_snapshot.py), partitioned by form, with list-typed token
+columns and dictionary-encoded brands. Analysis scripts load it with
+etl.catalog_snapshot.load_snapshot() instead of querying Supabase.
+
+Usage:
+  python run_catalog_snapshot.py [table ...]     # export from Supabase
+  python run_catalog_snapshot.py --csv PATH      # convert a CSV export
+  python run_catalog_snapshot.py --info          # describe the latest snapshot
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from etl.catalog_snapshot import TABLES, export_snapshot, import_csv, latest_snapshot, load_snapshot, read_manifest
+
+load_dotenv()
+
+
+def show(snapshot):
+    manifest = read_manifest(snapshot)
+    if manifest is None:
+        print("No snapshot found")
+        return
+    print(f"Snapshot: {snapshot} (created {manifest['created_at']}, source: {manifest['source']})")
+    for table, entry in manifest['tables'].items():
+        start = time.perf_counter()
+        df = load_snapshot(table, snapshot=snapshot)
+        elapsed = time.perf_counter() - start
+        print(f"  {table}: {entry['rows']:,} rows, {len(entry['columns'])} columns "
+              f"(loaded in {elapsed:.2f}s, {df.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+
+
+def main():
+    args = sys.argv[1:]
+    if '--info' in args:
+        show(latest_snapshot())
+        return
+
+    print("=" * 60)
+    print("CATALOG SNAPSHOT")
+    print("=" * 60)
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    start = time.perf_counter()
+    if '--csv' in args:
+        snapshot = import_csv(args[args.index('--csv') + 1])
+    else:
+        from supabase import create_client
+
+        supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+        snapshot = export_snapshot(supabase, [a for a in args if not a.startswith('--')] or TABLES)
+    print(f"✅ Wrote {snapshot} in {time.perf_counter() - start:.1f}s")
+    show(snapshot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Plan the next crawl by expected coverage gain per credit
+
+Scores every product with a URL and missing fields (etl/crawl_planner.py),
+picks tasks by gain per credit within the budget and writes them to
+crawl_queue, where scripts/orchestrated_scraper.py, scrapingbee_harvester.py
+and run_manufacturer_harvest.py claim them.
+
+Usage: python run_crawl_planner.py [--credits N] [--requests N]
+                                   [--fetcher NAME ...] [--snapshot] [--dry-run]
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+from etl.crawl_planner import brand_queue, build_plan, enqueue_plan, plan_summary
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Coverage-driven crawl planner')
+    parser.add_argument('--credits', type=float, help='Credit budget for the plan')
+    parser.add_argument('--requests', type=int, help='Request budget for the plan')
+    parser.add_argument('--fetcher', action='append', help='Only plan for these fetchers')
+    parser.add_argument('--snapshot', action='store_true', help='Read the catalog from the local snapshot')
+    parser.add_argument('--dry-run', action='store_true', help='Print the plan without queueing it')
+    args = parser.parse_args()
+
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+
+    print("=" * 60)
+    print("CRAWL PLANNER")
+    print("=" * 60)
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Budget: {args.credits or 'unlimited'} credits, {args.requests or 'unlimited'} requests")
+
+    plan, total_products = build_plan(supabase, args.credits, args.requests, args.fetcher,
+                                      use_snapshot=args.snapshot)
+    summary = plan_summary(plan, total_products)
+    print(f"\nPlanned {summary['requests']:,} requests, {summary['credits']:,} credits "
+          f"(expected gain {summary['expected_gain']:,.1f})")
+    for fetcher, counts in summary['by_fetcher'].items():
+        print(f"  {fetcher}: {counts['requests']:,} requests, {counts['credits']:,} credits")
+    print("\nExpected coverage gain:")
+    for field, points in summary['coverage_points'].items():
+        print(f"  {field}: +{points:.2f} pts ({summary['expected_fills'][field]:,.0f} products)")
+    print("\nTop brands:")
+    for row in brand_queue(plan).head(10).itertuples():
+        print(f"  {row.brand_slug}: {row.tasks} tasks, gain {row.expected_gain:.1f}, {row.credits} credits")
+
+    if args.dry_run:
+        return
+    result = enqueue_plan(supabase, plan, fetchers=args.fetcher)
+    print(f"\n✅ Queued {result['queued']:,} tasks as {result['plan_id']} "
+          f"({result['skipped']:,} stale tasks skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Re-price food_candidates in EUR at today's FX rates
+
+Loads the day's rates once (etl/fx_rates.py), converts every price in one
+vectorized pass and writes only rows whose rate actually changed since
+the date they were converted at (price_rate_date), in chunks through
+reprice_food_candidates() (sql/fx_price_rate_date.sql). EUR prices and
+rows already on today's rate date are skipped.
+
+Usage: python run_fx_reprice.py [--dry-run]
+"""
+
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+
+from dotenv import load_dotenv
+from supabase import create_client
+
+from etl.fx_rates import get_fx_rates, reprice_frame, write_reprices
+from etl.supabase_loader import fetch_frame
+
+load_dotenv()
+
+TABLE = 'food_candidates'
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+
+    print("=" * 60)
+    print("FX RE-PRICING")
+    print("=" * 60)
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    fx = get_fx_rates()
+    print(f"Rates: {fx.rate_date} ({fx.source}), {len(fx.rates)} currencies")
+
+    df = fetch_frame(supabase, TABLE, 'id, price_original, price_currency, price_eur, price_rate_date', key='id')
+    if df.empty:
+        print("No rows")
+        return
+    df = df[df['price_original'].notna()]
+
+    changes = reprice_frame(df, fx)
+    print(f"Priced rows: {len(df):,}, re-priced: {len(changes):,}, unchanged: {len(df) - len(changes):,}")
+    for currency, count in Counter(df.loc[changes.index, 'price_currency'].fillna('EUR')).most_common():
+        print(f"  {currency}: {count:,}")
+    if dry_run:
+        return
+
+    updated = write_reprices(supabase, df.loc[changes.index, 'id'], changes)
+    print(f"✅ Updated {updated:,} rows")
+
+
+if __name__ == "__main__":
+    main()
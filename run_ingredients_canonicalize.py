@@ -2,9 +2,16 @@
 """
 Prompt 2: Tokenize + Canonicalize + Allergen Map
 Rebuild ingredients processing for quality
+
+Incremental: only rows whose ingredients_raw changed, or that contain a
+canonical map entry changed since they were tokenized, are re-tokenized
+and written (in chunks, through update_ingredients_tokens()). Rows whose
+ingredients_raw was emptied have their tokens cleared. Pass --full to
+re-tokenize every row.
 """
 
 import os
+import sys
 import re
 import yaml
 import json
@@ -16,6 +23,12 @@ from dotenv import load_dotenv
 from collections import Counter, defaultdict
 import csv
 
+from etl.ingredients import (
+    CANONICAL_MAP_FILE, TOKEN_UPDATE_CHUNK, get_ingredient_processor, ingredients_hash,
+    load_map_history, plan_retokenization, save_map_history, write_tokenization
+)
+from etl.supabase_loader import fetch_all_rows
+
 load_dotenv()
 
 # Initialize Supabase
@@ -31,214 +44,27 @@ print("="*80)
 print(f"Timestamp: {timestamp}")
 print()
 
-# Create canonical ingredients map
-canonical_map = {
-    # Proteins - Chicken variations
-    'chicken meal': 'chicken',
-    'dehydrated chicken': 'chicken',
-    'chicken meat meal': 'chicken',
-    'dried chicken': 'chicken',
-    'fresh chicken': 'chicken',
-    'chicken protein': 'chicken',
-    'hydrolysed chicken': 'chicken',
-    'chicken liver': 'chicken',
-    
-    # Proteins - Other meats
-    'beef meal': 'beef',
-    'dehydrated beef': 'beef',
-    'lamb meal': 'lamb',
-    'dehydrated lamb': 'lamb',
-    'turkey meal': 'turkey',
-    'dehydrated turkey': 'turkey',
-    'duck meal': 'duck',
-    'dehydrated duck': 'duck',
-    'pork meal': 'pork',
-    'dehydrated pork': 'pork',
-    'venison meal': 'venison',
-    'rabbit meal': 'rabbit',
-    
-    # Fish variations
-    'salmon meal': 'salmon',
-    'dehydrated salmon': 'salmon',
-    'fresh salmon': 'salmon',
-    'salmon oil': 'fish oil',
-    'tuna meal': 'tuna',
-    'dehydrated tuna': 'tuna',
-    'herring meal': 'herring',
-    'whitefish meal': 'whitefish',
-    'ocean fish': 'fish',
-    'fish meal': 'fish',
-    
-    # Grains
-    'maize': 'corn',
-    'corn meal': 'corn',
-    'maize flour': 'corn',
-    'corn gluten': 'corn',
-    'ground corn': 'corn',
-    'wheat flour': 'wheat',
-    'wheat bran': 'wheat',
-    'whole wheat': 'wheat',
-    'rice flour': 'rice',
-    'brown rice': 'rice',
-    'white rice': 'rice',
-    'brewers rice': 'rice',
-    'oat meal': 'oats',
-    'oat flour': 'oats',
-    'whole oats': 'oats',
-    'barley flour': 'barley',
-    'pearl barley': 'barley',
-    
-    # Vegetables
-    'sweet potato': 'sweet potato',
-    'sweet potatoes': 'sweet potato',
-    'potato': 'potato',
-    'potatoes': 'potato',
-    'pea protein': 'peas',
-    'green peas': 'peas',
-    'yellow peas': 'peas',
-    'pea flour': 'peas',
-    'split peas': 'peas',
-    'whole peas': 'peas',
-    'carrot': 'carrot',
-    'carrots': 'carrot',
-    'dried carrots': 'carrot',
-    
-    # Legumes
-    'soybean meal': 'soy',
-    'soy protein': 'soy',
-    'soya': 'soy',
-    'lentils': 'lentils',
-    'red lentils': 'lentils',
-    'green lentils': 'lentils',
-    'chickpeas': 'chickpeas',
-    'garbanzo beans': 'chickpeas',
-    
-    # Seeds and oils
-    'linseed': 'flax',
-    'flaxseed': 'flax',
-    'flax seed': 'flax',
-    'sunflower oil': 'sunflower',
-    'sunflower seeds': 'sunflower',
-    'canola oil': 'canola',
-    'rapeseed oil': 'canola',
-    
-    # Others
-    'beet pulp': 'beet pulp',
-    'dried beet pulp': 'beet pulp',
-    'sugar beet pulp': 'beet pulp',
-    'animal fat': 'animal fat',
-    'poultry fat': 'chicken fat',
-    'chicken fat': 'chicken fat',
-    'egg powder': 'egg',
-    'dried egg': 'egg',
-    'whole egg': 'egg',
-    'milk powder': 'dairy',
-    'dried milk': 'dairy',
-    'whey': 'dairy',
-    'cheese': 'dairy',
-    'yogurt': 'dairy',
-    
-    # Supplements
-    'vitamin a': 'vitamins',
-    'vitamin d': 'vitamins',
-    'vitamin e': 'vitamins',
-    'vitamin c': 'vitamins',
-    'vitamin mix': 'vitamins',
-    'mineral mix': 'minerals',
-    'calcium': 'minerals',
-    'phosphorus': 'minerals',
-    'zinc': 'minerals',
-    'iron': 'minerals',
-    
-    # Common additives
-    'yeast extract': 'yeast',
-    'brewers yeast': 'yeast',
-    'nutritional yeast': 'yeast',
-    'cranberry extract': 'cranberry',
-    'cranberries': 'cranberry',
-    'dried cranberries': 'cranberry',
-    'blueberry': 'blueberry',
-    'blueberries': 'blueberry',
-    'apple': 'apple',
-    'apples': 'apple',
-    'dried apple': 'apple',
-}
-
-# Define allergen groups
-allergen_taxonomy = {
-    'poultry': ['chicken', 'turkey', 'duck', 'goose', 'poultry'],
-    'red_meat': ['beef', 'lamb', 'pork', 'venison', 'rabbit', 'bison'],
-    'fish': ['salmon', 'tuna', 'herring', 'whitefish', 'fish', 'krill', 'anchovy', 'sardine'],
-    'dairy': ['dairy', 'milk', 'cheese', 'whey', 'yogurt', 'lactose'],
-    'egg': ['egg', 'eggs'],
-    'grains': ['wheat', 'corn', 'rice', 'barley', 'oats', 'rye', 'millet', 'sorghum'],
-    'legumes': ['soy', 'peas', 'lentils', 'chickpeas', 'beans'],
-    'nuts': ['peanut', 'almond', 'cashew', 'walnut', 'pecan'],
-    'seeds': ['flax', 'sunflower', 'sesame', 'chia', 'hemp'],
-}
+# Canonical map and allergen taxonomy live in data/ingredients_canonical_map.yaml
+processor = get_ingredient_processor()
+canonical_map = processor.canonical_map
+allergen_taxonomy = processor.allergen_taxonomy
 
-# Save canonical map
 data_dir = Path("data")
 data_dir.mkdir(exist_ok=True)
-canonical_file = data_dir / "ingredients_canonical_map.yaml"
+canonical_file = CANONICAL_MAP_FILE
 
-with open(canonical_file, 'w') as f:
-    yaml.dump({
-        'canonical_map': canonical_map,
-        'allergen_taxonomy': allergen_taxonomy,
-        'generated': datetime.now().isoformat(),
-        'total_mappings': len(canonical_map)
-    }, f, default_flow_style=False, sort_keys=False)
-
-print(f"✅ Canonical map saved: {canonical_file}")
+print(f"✅ Canonical map loaded: {canonical_file}")
 print(f"   Total mappings: {len(canonical_map)}")
+print(f"   Map version: {processor.map_version}")
 
-def tokenize_ingredients(raw_text):
-    """Tokenize and clean ingredients text"""
-    if not raw_text:
-        return []
-    
-    # Convert to lowercase
-    text = raw_text.lower()
-    
-    # Remove percentages and numbers in parentheses
-    text = re.sub(r'\([^)]*\d+[^)]*\)', '', text)
-    
-    # Remove other parentheses content
-    text = re.sub(r'\([^)]*\)', '', text)
-    
-    # Split on commas and 'and'
-    parts = re.split(r'[,;]|\sand\s', text)
-    
-    tokens = []
-    for part in parts:
-        # Clean whitespace and special chars
-        part = re.sub(r'[^\w\s-]', ' ', part)
-        part = ' '.join(part.split())
-        
-        if part and len(part) > 1:
-            # Apply canonical mapping
-            canonical = canonical_map.get(part, part)
-            tokens.append(canonical)
-    
-    return tokens
+# Remember this map version so later runs can diff against it
+map_history = load_map_history()
+map_history[processor.map_version] = canonical_map
+save_map_history(map_history)
 
-def get_allergen_groups(tokens):
-    """Map tokens to allergen groups"""
-    groups = set()
-    
-    for token in tokens:
-        for group, allergens in allergen_taxonomy.items():
-            if token in allergens:
-                groups.add(group)
-                break
-            # Check if token contains allergen
-            for allergen in allergens:
-                if allergen in token:
-                    groups.add(group)
-                    break
-    
-    return list(groups)
+FULL_REFRESH = '--full' in sys.argv
+if FULL_REFRESH:
+    print("   Full refresh: re-tokenizing every row")
 
 # Process tables
 tables_to_process = ['food_candidates', 'food_candidates_sc']
@@ -257,74 +83,66 @@ for table_name in tables_to_process:
         'has_raw': 0,
         'tokenized': 0,
         'has_allergens': 0,
-        'avg_tokens': 0
+        'avg_tokens': 0,
+        'skipped': 0
     }
     
     try:
-        # Get data with ingredients_raw
-        response = supabase.table(table_name).select('id, ingredients_raw, ingredients_tokens').execute()
+        # Get data with ingredients_raw and the state it was tokenized from
+        rows = fetch_all_rows(
+            supabase, table_name,
+            'id, ingredients_raw, ingredients_hash, ingredients_map_version, ingredients_tokens', key='id'
+        )
         
-        if not response.data:
+        if not rows:
             print(f"  ⚠️ No data found")
             continue
             
-        df = pd.DataFrame(response.data)
+        df = pd.DataFrame(rows)
         stats['total_rows'] = len(df)
         print(f"  Total rows: {stats['total_rows']:,}")
         
-        updates = []
-        
-        for idx, row in df.iterrows():
-            raw_text = row.get('ingredients_raw')
-            
-            if raw_text:
-                stats['has_raw'] += 1
-                
-                # Tokenize
-                tokens = tokenize_ingredients(raw_text)
-                
-                if tokens:
-                    stats['tokenized'] += 1
-                    all_tokens_counter.update(tokens)
-                    
-                    # Find unmapped terms
-                    for token in tokens:
-                        if token not in canonical_map.values():
-                            unmapped_terms[token] += 1
-                    
-                    # Get allergen groups
-                    allergen_groups = get_allergen_groups(tokens)
-                    if allergen_groups:
-                        stats['has_allergens'] += 1
-                    
-                    # Prepare update
-                    updates.append({
-                        'id': row['id'],
-                        'ingredients_tokens': tokens,
-                        'allergen_groups': allergen_groups
-                    })
-                    
-                    if len(updates) >= 100:
-                        # Batch update
-                        for update in updates:
-                            supabase.table(table_name).update({
-                                'ingredients_tokens': update['ingredients_tokens']
-                            }).eq('id', update['id']).execute()
-                        print(f"  Updated batch of {len(updates)} rows")
-                        updates = []
-        
-        # Final batch
-        if updates:
-            for update in updates:
-                supabase.table(table_name).update({
-                    'ingredients_tokens': update['ingredients_tokens']
-                }).eq('id', update['id']).execute()
-            print(f"  Updated final batch of {len(updates)} rows")
-        
+        has_raw = df['ingredients_raw'].map(lambda v: isinstance(v, str) and bool(v))
+        stats['has_raw'] = int(has_raw.sum())
+
+        # Rows to re-tokenize: changed text, or a changed map entry they contain
+        if FULL_REFRESH:
+            plan = {row_id: 'full_refresh' for row_id in df.loc[has_raw, 'id']}
+            # Rows without raw text can only be 'raw_cleared'
+            plan.update(plan_retokenization(df[~has_raw].to_dict('records'), processor, map_history))
+        else:
+            plan = plan_retokenization(rows, processor, map_history)
+        cleared = sum(1 for reason in plan.values() if reason == 'raw_cleared')
+        stats['skipped'] = stats['has_raw'] - (len(plan) - cleared)
+        for reason, count in Counter(plan.values()).most_common():
+            print(f"  Re-tokenize ({reason}): {count:,}")
+        print(f"  Unchanged, skipped: {stats['skipped']:,}")
+
+        dirty = df[df['id'].isin(list(plan))]
+        processed = processor.process_many(dirty['ingredients_raw'])
+        tokenized = processed['ingredients_tokens'].map(len) > 0
+        stats['tokenized'] = int(tokenized.sum())
+        stats['has_allergens'] = int((processed['allergen_groups'].map(len) > 0).sum())
+
+        for tokens in processed.loc[tokenized, 'ingredients_tokens']:
+            all_tokens_counter.update(tokens)
+            unmapped_terms.update(t for t in tokens if processor.is_unmapped(t))
+
+        # Rows without raw text get NULL tokens/hash (their old tokens are stale)
+        updates = [{
+            'id': row_id,
+            'ingredients_tokens': tokens if has_text else None,
+            'ingredients_hash': ingredients_hash(raw_text),
+            'ingredients_map_version': processor.map_version if has_text else None
+        } for row_id, raw_text, tokens, has_text in zip(dirty['id'], dirty['ingredients_raw'],
+                                                         processed['ingredients_tokens'], has_raw[dirty.index])]
+        written = write_tokenization(supabase, table_name, updates)
+        print(f"  Updated {written:,} rows in chunks of {TOKEN_UPDATE_CHUNK}")
+
         # Calculate stats
         if stats['tokenized'] > 0:
-            stats['avg_tokens'] = sum(len(u['ingredients_tokens']) for u in updates) / stats['tokenized']
-        
+            stats['avg_tokens'] = processed.loc[tokenized, 'ingredients_tokens'].map(len).mean()
+
         print(f"  ✅ Rows with raw text: {stats['has_raw']:,} ({stats['has_raw']/stats['total_rows']*100:.1f}%)")
         print(f"  ✅ Rows tokenized: {stats['tokenized']:,} ({stats['tokenized']/stats['total_rows']*100:.1f}%)")
         print(f"  ✅ Rows with allergens: {stats['has_allergens']:,}")
@@ -353,13 +171,14 @@ with open(report_file, 'w') as f:
     f.write(f"**Generated:** {datetime.now().isoformat()}\n\n")
     
     f.write("## Processing Summary\n\n")
-    f.write("| Table | Total Rows | Has Raw | Tokenized | Coverage % | Has Allergens | Avg Tokens |\n")
-    f.write("|-------|------------|---------|-----------|------------|---------------|------------|\n")
+    f.write(f"Canonical map version: `{processor.map_version}`{' (full refresh)' if FULL_REFRESH else ''}\n\n")
+    f.write("| Table | Total Rows | Has Raw | Re-tokenized | Coverage % | Has Allergens | Avg Tokens | Unchanged |\n")
+    f.write("|-------|------------|---------|--------------|------------|---------------|------------|-----------|\n")
     
     for s in processing_stats:
         coverage = s['tokenized'] / s['total_rows'] * 100 if s['total_rows'] > 0 else 0
         f.write(f"| {s['table']} | {s['total_rows']:,} | {s['has_raw']:,} | ")
-        f.write(f"{s['tokenized']:,} | {coverage:.1f}% | {s['has_allergens']:,} | {s['avg_tokens']:.1f} |\n")
+        f.write(f"{s['tokenized']:,} | {coverage:.1f}% | {s['has_allergens']:,} | {s['avg_tokens']:.1f} | {s['skipped']:,} |\n")
     
     f.write("\n## Canonical Map Statistics\n\n")
     f.write(f"- Total canonical mappings: {len(canonical_map)}\n")
@@ -372,7 +191,7 @@ with open(report_file, 'w') as f:
     f.write("|------|-------|-------|----------|\n")
     
     for i, (token, count) in enumerate(top_tokens, 1):
-        is_canonical = '✅' if token in canonical_map.values() else '❌'
+        is_canonical = '❌' if processor.is_unmapped(token) else '✅'
         f.write(f"| {i} | {token} | {count:,} | {is_canonical} |\n")
     
     f.write("\n## Unmapped Terms (Need Canonical Mapping)\n\n")
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Run Manufacturer Harvest for Top Impact Brands
-Harvests real data from brit, burns, briantos websites
+Harvests the brands with the most planned coverage gain in the crawl queue
+(run_crawl_planner.py); brit, burns, briantos when nothing is planned
 """
 
 import os
@@ -17,6 +18,10 @@ from dotenv import load_dotenv
 import subprocess
 import time
 
+from etl.crawl_planner import brand_queue, claim_tasks, release_tasks, settle_tasks
+from etl.ingredients import tokenize_ingredients
+from etl.supabase_loader import fetch_frame
+
 load_dotenv()
 
 # Initialize Supabase
@@ -30,42 +35,8 @@ print("="*80)
 print("MANUFACTURER HARVEST - REAL DATA")
 print("="*80)
 print(f"Timestamp: {timestamp}")
-print(f"Target brands: brit, burns, briantos")
 print()
 
-# Load canonical map for tokenization
-canonical_map_file = Path("data/ingredients_canonical_map.yaml")
-if canonical_map_file.exists():
-    with open(canonical_map_file, 'r') as f:
-        canonical_data = yaml.safe_load(f)
-        canonical_map = canonical_data.get('canonical_map', {})
-else:
-    canonical_map = {}
-
-def tokenize_ingredients(raw_text):
-    """Tokenize ingredients using canonical map"""
-    if not raw_text:
-        return []
-    
-    text = raw_text.lower()
-    # Remove percentages and numbers in parentheses
-    text = re.sub(r'\([^)]*\d+[^)]*\)', '', text)
-    text = re.sub(r'\([^)]*\)', '', text)
-    
-    # Split on commas and 'and'
-    parts = re.split(r'[,;]|\sand\s', text)
-    
-    tokens = []
-    for part in parts:
-        part = re.sub(r'[^\w\s-]', ' ', part)
-        part = ' '.join(part.split())
-        
-        if part and len(part) > 1:
-            canonical = canonical_map.get(part, part)
-            tokens.append(canonical)
-    
-    return tokens
-
 def extract_macros_from_text(text):
     """Extract macronutrient percentages from text"""
     macros = {}
@@ -147,7 +118,7 @@ def get_brand_products_status(brand_slug):
     response = supabase.table('foods_canonical').select(
         'product_key, product_name, ingredients_raw, ingredients_tokens, '
         'protein_percent, fat_percent, fiber_percent, ash_percent, moisture_percent, '
-        'kcal_per_100g, form, life_stage'
+        'kcal_per_100g, form, life_stage, price_per_kg_eur'
     ).eq('brand_slug', brand_slug).execute()
     
     if response.data:
@@ -179,8 +150,17 @@ def get_brand_products_status(brand_slug):
     
     return None
 
-# Target brands
-target_brands = ['brit', 'burns', 'briantos']
+def planned_brands(limit=3):
+    """Brands with the most expected gain in pending manufacturer tasks"""
+    pending = fetch_frame(supabase, 'crawl_queue', 'id, brand_slug, credits, expected_gain', key='id',
+                          filters=lambda q: q.eq('status', 'pending').eq('fetcher', 'manufacturer'))
+    if pending.empty:
+        return []
+    return brand_queue(pending)['brand_slug'].dropna().head(limit).tolist()
+
+# Target brands: highest planned gain first
+target_brands = planned_brands() or ['brit', 'burns', 'briantos']
+print(f"Target brands: {', '.join(target_brands)}")
 
 # Store results
 harvest_results = []
@@ -209,6 +189,10 @@ for brand_slug in target_brands:
         print(f"  ❌ No profile found: {profile_path}")
         continue
     
+    # Planned tasks for this brand, settled against the after status
+    tasks = claim_tasks(supabase, 'manufacturer', 10000, 'run_manufacturer_harvest', brand_slug)
+    real_harvest = False
+    
     # Try to run brand_harvest.py
     print(f"\n  🕷️ Running harvest script...")
     
@@ -375,6 +359,7 @@ for brand_slug in target_brands:
                 print(f"  📝 Updated {updates_made} products (simulation due to empty harvest)")
             else:
                 updates_made = 0
+                real_harvest = True
                 
                 for idx, harvest_row in df.iterrows():
                     # Match with canonical product
@@ -458,6 +443,13 @@ for brand_slug in target_brands:
     
     # Get after status
     after_status = get_brand_products_status(brand_slug)
+    # Simulated fills say nothing about the fetcher's yield: hand the tasks back
+    if tasks and after_status and real_harvest:
+        settled = settle_tasks(supabase, tasks, after_status['products'])
+        print(f"  📋 Planned tasks: {settled['done']} filled, {settled['failed']} still missing")
+    elif tasks:
+        released = release_tasks(supabase, tasks)
+        print(f"  📋 Planned tasks: {released} released (no harvest output)")
     
     harvest_results.append({
         'brand': brand_slug,
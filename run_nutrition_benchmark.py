@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Nutrition extractor benchmark
+
+Runs every nutrition extractor over the saved-page corpus and writes a
+JSON report (throughput, latency, peak memory, precision/recall against
+tests/fixtures/nutrition_golden.json). With --baseline, exits non-zero if
+any extractor got slower or less accurate than the baseline report.
+
+    python run_nutrition_benchmark.py
+    python run_nutrition_benchmark.py --baseline reports/NUTRITION_BENCHMARK.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from etl.nutrition_benchmark import (
+    CORPUS_PATTERNS, GOLDEN_FILE, compare_reports, default_extractors, run_benchmark
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark nutrition extractors on saved pages')
+    parser.add_argument('--corpus', nargs='+', default=CORPUS_PATTERNS, help='Glob patterns for pages')
+    parser.add_argument('--golden', default=str(GOLDEN_FILE), help='Golden values JSON')
+    parser.add_argument('--output', default='reports/NUTRITION_BENCHMARK.json', help='Report path')
+    parser.add_argument('--baseline', help='Previous report to check for regressions')
+    parser.add_argument('--repeat', type=int, default=1, help='Timed passes over the corpus')
+    parser.add_argument('--extractor', nargs='+', help='Only extractors whose name contains one of these')
+    parser.add_argument('--max-slowdown', type=float, default=0.25,
+                        help='Allowed drop in pages/sec vs baseline (fraction)')
+    args = parser.parse_args()
+
+    extractors = default_extractors()
+    if args.extractor:
+        extractors = [e for e in extractors if any(f in e.name for f in args.extractor)]
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    report = run_benchmark(extractors, args.corpus, Path(args.golden), args.repeat)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    corpus = report['corpus']
+    print(f"Corpus: {corpus['pages']} pages ({corpus['bytes'] / 1e6:.1f} MB), {corpus['golden_pages']} with golden values")
+    print(f"{'extractor':<52} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'peak MB':>8} {'prec':>6} {'recall':>6}")
+    for name, result in report['extractors'].items():
+        print(f"{name:<52} {result['pages_per_sec'] or 0:>9.1f} {result['latency_ms']['p50'] or 0:>8.2f} "
+              f"{result['latency_ms']['p99'] or 0:>8.2f} {result['peak_memory_mb']:>8.2f} "
+              f"{result['precision'] or 0:>6.2f} {result['recall'] or 0:>6.2f}")
+    print(f"Report saved to: {output}")
+
+    if baseline:
+        if args.extractor:
+            baseline['extractors'] = {name: result for name, result in baseline['extractors'].items()
+                                      if name in report['extractors']}
+        regressions = compare_reports(report, baseline, max_slowdown=args.max_slowdown)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
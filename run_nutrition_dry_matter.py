@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Backfill / re-sync the dry-matter-basis nutrition columns
+
+Writers store protein_dm_percent, kcal_per_100g_dm etc. alongside the
+as-fed values (etl/nutrition_engine.dry_matter_fields). This job
+recomputes them for every row of food_candidates, food_candidates_sc and
+foods_canonical and writes only the rows whose stored values differ, e.g.
+after the columns are added (sql/nutrition_dry_matter.sql), after
+foods_canonical is rebuilt, or after a writer that does not maintain them.
+
+Usage: python run_nutrition_dry_matter.py [--dry-run]
+"""
+
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+from supabase import create_client
+
+from etl.nutrition_engine import DRY_MATTER_COLUMNS, dry_matter_changes
+from etl.supabase_loader import fetch_frame
+
+load_dotenv()
+
+# table -> key column
+TABLES = {
+    'food_candidates': 'id',
+    'food_candidates_sc': 'id',
+    'foods_canonical': 'product_key',
+}
+SOURCE_COLUMNS = ['protein_percent', 'fat_percent', 'fiber_percent', 'ash_percent',
+                  'moisture_percent', 'kcal_per_100g', 'form']
+
+
+def sync_table(supabase, table: str, key: str, dry_run: bool = False) -> dict:
+    columns = ', '.join([key] + SOURCE_COLUMNS + list(DRY_MATTER_COLUMNS))
+    df = fetch_frame(supabase, table, columns, key=key)
+    stats = {'table': table, 'rows': len(df), 'changed': 0}
+    if df.empty:
+        return stats
+
+    changes = dry_matter_changes(df)
+    stats['changed'] = len(changes)
+    if dry_run:
+        return stats
+
+    for row_key, values in zip(df.loc[changes.index, key], changes.to_dict('records')):
+        update = {column: (None if np.isnan(value) else float(value)) for column, value in values.items()}
+        supabase.table(table).update(update).eq(key, row_key).execute()
+    return stats
+
+
+def main():
+    dry_run = '--dry-run' in sys.argv
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+
+    print("=" * 60)
+    print("DRY-MATTER NUTRITION COLUMNS")
+    print("=" * 60)
+    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if dry_run:
+        print("Dry run: no rows are written")
+
+    for table, key in TABLES.items():
+        try:
+            stats = sync_table(supabase, table, key, dry_run)
+        except Exception as e:
+            print(f"  ❌ {table}: {e}")
+            continue
+        print(f"  {table}: {stats['rows']:,} rows, {stats['changed']:,} "
+              f"{'to update' if dry_run else 'updated'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,8 @@ from google.cloud import storage
 from bs4 import BeautifulSoup
 import logging
 
+from etl.ingredients import get_ingredient_processor
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -240,50 +242,15 @@ class AADFCompleteScraper:
         return nutrition
 
     def parse_ingredients_to_array(self, ingredients_text):
-        """Parse ingredients text into clean array"""
+        """Parse ingredients text into canonical tokens"""
         if not ingredients_text:
             return []
 
-        text = ingredients_text.strip()
-
-        # Fix common concatenations
-        text = re.sub(r'([a-z])([A-Z])', r'\1, \2', text)
+        # The mixing bowl text runs items together ("Chicken (26%)Rice")
+        text = re.sub(r'([a-z])([A-Z])', r'\1, \2', ingredients_text.strip())
         text = re.sub(r'(\))([A-Z])', r'\1, \2', text)
 
-        # Remove percentages
-        text = re.sub(r'\s*\([^)]*%[^)]*\)', '', text)
-        text = re.sub(r'(\d+(?:\.\d+)?%)', '', text)
-
-        # Split by comma
-        parts = text.split(',')
-
-        ingredients = []
-        for part in parts:
-            part = part.strip()
-            if not part or len(part) < 2:
-                continue
-
-            part = part.rstrip('.')
-            part = re.sub(r'^and\s+', '', part, flags=re.IGNORECASE)
-
-            if not re.search(r'[a-zA-Z]', part):
-                continue
-
-            # Fix camelCase
-            part = re.sub(r'([a-z])([A-Z])', r'\1 \2', part)
-
-            ingredients.append(part)
-
-        # Remove duplicates
-        seen = set()
-        unique = []
-        for ing in ingredients:
-            ing_lower = ing.lower()
-            if ing_lower not in seen and ing_lower != 'and':
-                seen.add(ing_lower)
-                unique.append(ing)
-
-        return unique[:50]
+        return get_ingredient_processor().tokenize(text)[:50]
 
     def process_product(self, product):
         """Process a single product"""
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Long-lived scrape worker service for server.py
+
+Replaces the subprocess-per-job model with:
+- an in-process job queue drained by a bounded pool of worker threads
+- job state and per-breed results persisted to SQLite (survives restarts)
+- warm scraper instances: each worker keeps its scraper + browser open
+  between jobs, so only the first job pays the startup cost
+"""
+
+import os
+import json
+import queue
+import sqlite3
+import threading
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = os.environ.get('RESULTS_DIR', '/app/results')
+JOBS_DB = os.environ.get('JOBS_DB', os.path.join(RESULTS_DIR, 'jobs.db'))
+MAX_WORKERS = int(os.environ.get('SCRAPE_WORKERS', 2))
+MAX_QUEUED_JOBS = int(os.environ.get('SCRAPE_MAX_QUEUED', 100))
+# Pause between AKC page loads (rate limiting, as in the one-shot scraper)
+REQUEST_DELAY = float(os.environ.get('AKC_REQUEST_DELAY', 2))
+
+AKC_BREED_URL = 'https://www.akc.org/dog-breeds/{slug}/'
+
+
+class JobStore:
+    """SQLite-backed job state shared by the HTTP handlers and the workers"""
+
+    def __init__(self, db_path: str = JOBS_DB):
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    params TEXT,
+                    created_at TEXT,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    total INTEGER DEFAULT 0,
+                    processed INTEGER DEFAULT 0,
+                    successful INTEGER DEFAULT 0,
+                    error TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_results (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    breed_slug TEXT,
+                    extraction_status TEXT,
+                    data TEXT,
+                    PRIMARY KEY (job_id, seq)
+                )
+            """)
+
+    def create_job(self, params: Dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())[:8]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, params, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(params), datetime.now().isoformat())
+            )
+        return job_id
+
+    def update_job(self, job_id: str, **fields):
+        if not fields:
+            return
+        columns = ', '.join(f"{key} = ?" for key in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE job_id = ?",
+                (*fields.values(), job_id)
+            )
+
+    def add_result(self, job_id: str, seq: int, breed_data: Dict[str, Any]):
+        """Persist one breed result and bump the job counters"""
+        success = breed_data.get('extraction_status') == 'success'
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_results VALUES (?, ?, ?, ?, ?)",
+                (job_id, seq, breed_data.get('breed_slug'),
+                 breed_data.get('extraction_status'), json.dumps(breed_data, default=str))
+            )
+            self._conn.execute(
+                "UPDATE jobs SET processed = processed + 1, successful = successful + ? WHERE job_id = ?",
+                (1 if success else 0, job_id)
+            )
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'] or '{}')
+        return job
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs ORDER BY created_at DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def get_results(self, job_id: str, after_seq: int = -1) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, data FROM job_results WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq)
+            ).fetchall()
+        return [dict(json.loads(row['data']), _seq=row['seq']) for row in rows]
+
+    def requeue_interrupted(self) -> List[str]:
+        """Jobs that were queued/running when the process died get queued again"""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+            job_ids = [row['job_id'] for row in rows]
+            self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+        return job_ids
+
+
+def default_scraper_factory():
+    """Create a warm AKC Selenium scraper (browser is started once per worker)"""
+    from jobs.akc_selenium_scraper import AKCSeleniumScraper
+
+    scraper = AKCSeleniumScraper(headless=True, cloud_mode=True, output_dir=RESULTS_DIR)
+    scraper.driver = scraper.create_driver()
+    return scraper
+
+
+def resolve_breeds(scraper, limit: Optional[int] = None,
+                   breeds: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    """Turn request params into the list of breeds to scrape"""
+    if breeds:
+        return [
+            {
+                'breed_slug': slug,
+                'display_name': slug.replace('-', ' ').title(),
+                'akc_url': AKC_BREED_URL.format(slug=slug)
+            }
+            for slug in breeds
+        ]
+    targets = list(getattr(scraper, 'sample_breeds', []))
+    return targets[:limit] if limit else targets
+
+
+class ScrapeWorkerService:
+    """Bounded worker pool draining an in-process job queue"""
+
+    def __init__(self, store: JobStore = None, scraper_factory: Callable = None,
+                 max_workers: int = MAX_WORKERS, max_queued: int = MAX_QUEUED_JOBS,
+                 results_dir: str = RESULTS_DIR, request_delay: float = REQUEST_DELAY):
+        self.store = store or JobStore()
+        self.scraper_factory = scraper_factory or default_scraper_factory
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.results_dir = results_dir
+        self.request_delay = request_delay
+        # Unbounded so every interrupted job can be re-queued on start;
+        # max_queued caps new submissions only
+        self.jobs = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads and re-queue jobs interrupted by a restart"""
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            for job_id in self.store.requeue_interrupted():
+                self.jobs.put_nowait(job_id)
+            for idx in range(self.max_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f'scrape-worker-{idx}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"Scrape worker service started with {self.max_workers} workers")
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        for _ in self._workers:
+            self.jobs.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def submit(self, limit: Optional[int] = None, breeds: Optional[List[str]] = None) -> str:
+        """Queue a job and return its id immediately
+
+        Raises queue.Full when the backlog is at capacity.
+        """
+        self.start()
+        job_id = self.store.create_job({'limit': limit, 'breeds': breeds})
+        with self._submit_lock:
+            if self.jobs.qsize() >= self.max_queued:
+                self.store.update_job(job_id, status='rejected', error='Job queue is full')
+                raise queue.Full
+            self.jobs.put_nowait(job_id)
+        return job_id
+
+    def queue_depth(self) -> int:
+        return self.jobs.qsize()
+
+    def _worker_loop(self):
+        scraper = None
+        while not self._stopping.is_set():
+            job_id = self.jobs.get()
+            if job_id is None:
+                break
+            try:
+                if scraper is None:
+                    scraper = self.scraper_factory()
+                self._run_job(scraper, job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                self.store.update_job(job_id, status='failed', error=str(e),
+                                      finished_at=datetime.now().isoformat())
+                # Drop a scraper that failed mid-job; the next job gets a fresh one
+                self._close_scraper(scraper)
+                scraper = None
+            finally:
+                self.jobs.task_done()
+        self._close_scraper(scraper)
+
+    def _run_job(self, scraper, job_id: str):
+        job = self.store.get_job(job_id)
+        params = job['params']
+        targets = resolve_breeds(scraper, params.get('limit'), params.get('breeds'))
+        self.store.update_job(job_id, status='running', total=len(targets),
+                              processed=0, successful=0,
+                              started_at=datetime.now().isoformat())
+        logger.info(f"Starting job {job_id}: {len(targets)} breeds")
+
+        for seq, breed in enumerate(targets):
+            if seq and self.request_delay:
+                self._stopping.wait(self.request_delay)
+            # One bad page must not fail the rest of the job
+            try:
+                breed_data = scraper.extract_breed_data(scraper.driver, breed['akc_url'])
+            except Exception as e:
+                logger.error(f"Error processing {breed['display_name']}: {e}")
+                breed_data = {
+                    'breed_slug': breed['breed_slug'],
+                    'display_name': breed['display_name'],
+                    'akc_url': breed['akc_url'],
+                    'extraction_status': 'failed',
+                    'error': str(e)
+                }
+            self.store.add_result(job_id, seq, breed_data)
+
+        self.store.update_job(job_id, status='completed', finished_at=datetime.now().isoformat())
+        logger.info(f"Job {job_id} completed")
+
+    @staticmethod
+    def _close_scraper(scraper):
+        driver = getattr(scraper, 'driver', None)
+        if driver:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def stream_results(self, job_id: str, poll_interval: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """Yield breed results as they are persisted until the job finishes"""
+        last_seq = -1
+        while True:
+            for item in self.store.get_results(job_id, last_seq):
+                last_seq = item.pop('_seq')
+                yield item
+            job = self.store.get_job(job_id)
+            if not job or job['status'] in ('completed', 'failed', 'rejected'):
+                for item in self.store.get_results(job_id, last_seq):
+                    item.pop('_seq')
+                    yield item
+                return
+            self._stopping.wait(poll_interval)
+
+    def export_results(self, job_id: str) -> Optional[str]:
+        """Write a job's results to a JSON file (same shape as the old scraper output)"""
+        results = self.store.get_results(job_id)
+        if not results:
+            return None
+        for item in results:
+            item.pop('_seq')
+        os.makedirs(self.results_dir, exist_ok=True)
+        filepath = os.path.join(self.results_dir, f'akc_breeds_{job_id}.json')
+        with open(filepath, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        return filepath
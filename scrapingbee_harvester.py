@@ -2,6 +2,10 @@
 """
 ScrapingBee Harvester for Blocked Sites
 Handles brands that require JavaScript rendering or have anti-bot measures
+
+Product URLs come from the crawl planner's queue (run_crawl_planner.py),
+highest expected coverage gain first; brands with no planned tasks fall
+back to category discovery.
 """
 
 import os
@@ -17,8 +21,11 @@ import requests
 from bs4 import BeautifulSoup
 from google.cloud import storage
 from dotenv import load_dotenv
+from supabase import create_client
 import yaml
 
+from etl.crawl_planner import claim_tasks, complete_task, load_config
+
 # Setup
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -29,6 +36,10 @@ os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = './secrets/gcp-sa.json'
 storage_client = storage.Client()
 bucket = storage_client.bucket('lupito-content-raw-eu')
 
+# Credits per request with render_js + premium_proxy
+CREDITS_PER_REQUEST = load_config()['fetchers']['scrapingbee']['credits']
+TASKS_PER_BRAND = 50
+
 class ScrapingBeeHarvester:
     """Harvester using ScrapingBee for blocked sites"""
     
@@ -90,7 +101,7 @@ class ScrapingBeeHarvester:
                 timeout=45
             )
             
-            self.stats['api_credits_used'] += 1
+            self.stats['api_credits_used'] += CREDITS_PER_REQUEST
             
             if response.status_code == 200:
                 self.stats['pages_fetched'] += 1
@@ -274,7 +285,8 @@ class ScrapingBeeHarvester:
         harvest_stats = {
             'snapshots_created': 0,
             'snapshots_failed': 0,
-            'total_size_mb': 0
+            'total_size_mb': 0,
+            'fetched_urls': []
         }
         
         for i, url in enumerate(product_urls, 1):
@@ -308,6 +320,7 @@ class ScrapingBeeHarvester:
                 
                 size_mb = len(html.encode()) / (1024 * 1024)
                 harvest_stats['snapshots_created'] += 1
+                harvest_stats['fetched_urls'].append(url)
                 harvest_stats['total_size_mb'] += size_mb
                 self.stats['snapshots_created'] += 1
                 
@@ -327,6 +340,7 @@ def main():
     
     brands = ['briantos', 'belcando', 'bozita', 'cotswold']
     all_stats = {}
+    supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
     
     print("="*80)
     print("SCRAPINGBEE HARVESTER FOR BLOCKED SITES")
@@ -354,12 +368,22 @@ def main():
             # Initialize harvester
             harvester = ScrapingBeeHarvester(brand, profile_path)
             
-            # Discover product URLs
-            product_urls = harvester.discover_product_urls()
+            # Planned tasks first; discovery only when none are queued
+            tasks = claim_tasks(supabase, 'scrapingbee', TASKS_PER_BRAND, 'scrapingbee_harvester', brand)
+            if tasks:
+                logger.info(f"Claimed {len(tasks)} planned tasks for {brand}")
+                product_urls = [task['url'] for task in tasks]
+            else:
+                product_urls = harvester.discover_product_urls()
             
             # Harvest products
             harvest_stats = harvester.harvest_products(product_urls)
             
+            # Pages are parsed later, so filled fields are not known yet
+            fetched = set(harvest_stats['fetched_urls'])
+            for task in tasks:
+                complete_task(supabase, task['id'], task['url'] in fetched)
+            
             # Store results
             all_stats[brand] = {
                 'harvester': harvester.stats,
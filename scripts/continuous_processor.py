@@ -5,15 +5,20 @@ Runs continuously, checking for new files every few minutes
 """
 
 import os
+import sys
 import json
 import time
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Set
 from process_gcs_scraped_data import GCSDataProcessor
 from dotenv import load_dotenv
 from supabase import create_client
 from google.cloud import storage
 
+sys.path.append(str(Path(__file__).parent.parent))
+from etl.coverage_metrics import CoverageService, coverage_pct
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -25,6 +30,7 @@ class ContinuousProcessor:
         self.storage_client = storage.Client()
         self.bucket = self.storage_client.bucket(GCS_BUCKET)
         self.supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.coverage = CoverageService(self.supabase)
         
         # Track processed folders
         self.processed_folders_file = 'scripts/processed_folders.txt'
@@ -179,12 +185,12 @@ class ContinuousProcessor:
     def show_status(self):
         """Show current database coverage"""
         try:
-            total = self.supabase.table('foods_canonical').select('*', count='exact').execute().count
-            ingredients = self.supabase.table('foods_canonical').select('*', count='exact')\
-                .not_.is_('ingredients_raw', 'null').execute().count
+            totals = self.coverage.totals()
+            total = totals['products']
+            ingredients = totals['with_ingredients_raw']
             
             print(f"\n📊 DATABASE STATUS:")
-            print(f"   Ingredients coverage: {ingredients:,}/{total:,} ({ingredients/total*100:.1f}%)")
+            print(f"   Ingredients coverage: {ingredients:,}/{total:,} ({coverage_pct(totals, 'with_ingredients_raw'):.1f}%)")
             print(f"   Gap to 95%: {int(total * 0.95) - ingredients:,} products")
             
         except Exception as e:
@@ -207,6 +213,9 @@ class ContinuousProcessor:
                     self.process_folder(folder)
                     self.save_processed_folder(folder)
                 
+                # New rows were written: the cached coverage is stale
+                self.coverage.invalidate()
+                
                 # Show session stats
                 print(f"\n📈 SESSION STATS:")
                 print(f"   Files processed: {self.session_stats['total_processed']}")
@@ -224,9 +233,9 @@ class ContinuousProcessor:
             
             # Check for 95% completion
             try:
-                total = self.supabase.table('foods_canonical').select('*', count='exact').execute().count
-                ingredients = self.supabase.table('foods_canonical').select('*', count='exact')\
-                    .not_.is_('ingredients_raw', 'null').execute().count
+                totals = self.coverage.totals()
+                total = totals['products']
+                ingredients = totals['with_ingredients_raw']
                 
                 if ingredients / total >= 0.95:
                     print("\n🎉 95% COVERAGE ACHIEVED!")
@@ -6,6 +6,7 @@ Generates report for review before migration
 
 import os
 import re
+import sys
 import json
 from datetime import datetime
 from collections import defaultdict
@@ -13,6 +14,10 @@ from typing import List, Dict, Tuple
 from dotenv import load_dotenv
 from supabase import create_client
 import pandas as pd
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from etl.pack_size import find_pack_sizes, strip_pack_sizes
 
 load_dotenv()
 
@@ -25,8 +30,7 @@ class VariantDetector:
         self.products = []
         self.variant_groups = []
         
-        # Patterns for detection
-        self.size_pattern = re.compile(r'\b\d+(?:\.\d+)?\s*(?:kg|g|lb|oz|ml|l)\b', re.IGNORECASE)
+        # Packs without a weight ("6 x 12 cans"); sizes come from etl.pack_size
         self.pack_pattern = re.compile(r'\b\d+\s*x\s*\d+(?:\.\d+)?(?:\s*(?:kg|g|lb|oz|ml|l|cans?|pouches?|tins?|sachets?))?', re.IGNORECASE)
         
         # Patterns to preserve (not consider as variants)
@@ -67,10 +71,10 @@ class VariantDetector:
         if not product_name:
             return ""
         
-        # Remove size indicators
-        normalized = self.size_pattern.sub('', product_name)
+        # Remove sizes and multipacks (same parser as extract_size_info)
+        normalized = strip_pack_sizes(product_name)
         
-        # Remove pack indicators
+        # Remove packs without a weight
         normalized = self.pack_pattern.sub('', normalized)
         
         # Clean up extra spaces and punctuation
@@ -90,18 +94,21 @@ class VariantDetector:
             'variant_type': None
         }
         
-        # Check for size
-        size_match = self.size_pattern.search(product_name)
-        if size_match:
+        # Sizes and multipacks, normalized (e.g. '2kg', '12 x 400g')
+        packs = find_pack_sizes(product_name)
+        single = next((p for p in packs if not p.is_multipack), None)
+        multi = next((p for p in packs if p.is_multipack), None)
+        
+        if single:
             info['has_size'] = True
-            info['size_value'] = size_match.group(0)
+            info['size_value'] = single.label
             info['variant_type'] = 'size'
         
-        # Check for pack
-        pack_match = self.pack_pattern.search(product_name)
-        if pack_match:
+        # Check for pack (count-only packs like "6 x cans" have no weight)
+        pack_match = None if multi else self.pack_pattern.search(product_name)
+        if multi or pack_match:
             info['has_pack'] = True
-            info['pack_value'] = pack_match.group(0)
+            info['pack_value'] = multi.label if multi else pack_match.group(0)
             info['variant_type'] = 'pack' if not info['variant_type'] else 'size_and_pack'
         
         return info
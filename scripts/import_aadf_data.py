@@ -13,6 +13,11 @@ from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 from supabase import create_client
 from dotenv import load_dotenv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from etl.brand_resolver import get_brand_resolver
 
 # Load environment variables
 load_dotenv()
@@ -189,8 +194,8 @@ class AADFImporter:
         if not response.data:
             # Try normalized brand
             brand_lower = brand.lower()
-            if brand_lower in self.brand_mapping:
-                normalized_brand = self.brand_mapping[brand_lower]
+            normalized_brand = self.brand_mapping.get(brand_lower) or get_brand_resolver().canonical(brand)
+            if normalized_brand and normalized_brand != brand:
                 response = supabase.table('foods_canonical').select('*').eq('brand', normalized_brand).execute()
         
         if response.data and product_name:
@@ -12,6 +12,11 @@ import logging
 import re
 from difflib import SequenceMatcher
 import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from etl.key_matcher import KeyIndex
 
 load_dotenv()
 
@@ -144,38 +149,17 @@ class ZooplusMatcher:
         """Calculate similarity between two strings"""
         return SequenceMatcher(None, str1, str2).ratio()
 
+    def key_index(self, gcs_keys):
+        """Index over the GCS keys, built once per key set"""
+        if getattr(self, '_key_index_keys', None) is not gcs_keys:
+            self._key_index = KeyIndex(gcs_keys, self.normalize_key, threshold=0.80)
+            self._key_index_keys = gcs_keys
+        return self._key_index
+
     def find_fuzzy_match(self, product, gcs_keys):
         """Try to find a fuzzy match for a product in GCS keys"""
-        # First try exact variations
-        variations = self.generate_key_variations(product)
-
-        for var in variations:
-            normalized_var = self.normalize_key(var)
-            for gcs_key in gcs_keys:
-                normalized_gcs = self.normalize_key(gcs_key)
-                if normalized_var == normalized_gcs:
-                    return gcs_key, 'exact_variation'
-
-        # Try fuzzy matching with high threshold
-        best_match = None
-        best_score = 0
-        best_gcs_key = None
-
-        for var in variations:
-            for gcs_key in gcs_keys:
-                score = self.calculate_similarity(
-                    self.normalize_key(var),
-                    self.normalize_key(gcs_key)
-                )
-                if score > best_score and score > 0.80:  # 80% similarity threshold for Zooplus
-                    best_score = score
-                    best_match = var
-                    best_gcs_key = gcs_key
-
-        if best_gcs_key:
-            return best_gcs_key, f'fuzzy_{best_score:.2f}'
-
-        return None, None
+        # Exact variations via the normalized-key map, then fuzzy over q-gram candidates
+        return self.key_index(gcs_keys).match(self.generate_key_variations(product))
 
     def update_matched_products(self, matches):
         """Update database with matched products"""
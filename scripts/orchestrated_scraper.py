@@ -2,6 +2,9 @@
 """
 Orchestrated Scraper - Individual scraper managed by orchestrator
 Accepts configuration via command line arguments
+
+With offset "queue" the batch is claimed from the crawl planner's queue
+(run_crawl_planner.py) in priority order instead of read at an offset.
 """
 
 import os
@@ -10,6 +13,7 @@ import json
 import time
 import random
 from datetime import datetime
+from pathlib import Path
 from typing import List, Dict
 import requests
 from bs4 import BeautifulSoup
@@ -17,6 +21,9 @@ from dotenv import load_dotenv
 from google.cloud import storage
 from supabase import create_client
 
+sys.path.append(str(Path(__file__).parent.parent))
+from etl.crawl_planner import claim_tasks, complete_task, filled_fields, release_tasks
+
 load_dotenv()
 
 SCRAPINGBEE_API_KEY = os.getenv('SCRAPING_BEE')
@@ -25,7 +32,7 @@ SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 GCS_BUCKET = os.getenv("GCS_BUCKET", "lupito-content-raw-eu")
 
 class OrchestratedScraper:
-    def __init__(self, name: str, country_code: str, min_delay: int, max_delay: int, batch_size: int, offset: int):
+    def __init__(self, name: str, country_code: str, min_delay: int, max_delay: int, batch_size: int, offset):
         self.name = name
         self.country_code = country_code
         self.min_delay = min_delay
@@ -56,11 +63,21 @@ class OrchestratedScraper:
         
         print(f"[{name}] 🚀 ORCHESTRATED SCRAPER STARTED")
         print(f"[{name}] Country: {country_code}, Delays: {min_delay}-{max_delay}s")
-        print(f"[{name}] Batch: {batch_size}, Offset: {offset}")
+        print(f"[{name}] Batch: {batch_size}, " + ("Source: crawl queue" if offset == 'queue' else f"Offset: {offset}"))
         print(f"[{name}] GCS: gs://{GCS_BUCKET}/{self.gcs_folder}/")
     
     def get_products(self) -> List[Dict]:
-        """Get products with specific offset"""
+        """Claim the top planned zooplus tasks from crawl_queue, or (legacy) a batch at an offset"""
+        if self.offset == 'queue':
+            try:
+                tasks = claim_tasks(self.supabase, 'zooplus', self.batch_size, self.name)
+                products = [{**task, 'product_url': task['url'], 'task_id': task['id'],
+                             'product_name': task['product_key']} for task in tasks]
+                print(f"[{self.name}] Claimed {len(products)} planned tasks")
+                return products
+            except Exception as e:
+                print(f"[{self.name}] Error claiming tasks: {e}")
+                return []
         try:
             response = self.supabase.table('foods_canonical').select(
                 'product_key, product_name, brand, product_url'
@@ -230,46 +247,57 @@ class OrchestratedScraper:
         
         print(f"[{self.name}] Starting batch of {len(products)} products")
         
-        for i, product in enumerate(products, 1):
-            # Stop if too many consecutive errors
-            if self.stats['consecutive_errors'] >= 3:
-                print(f"[{self.name}] ⚠️ Stopping due to consecutive errors")
-                break
+        # Claimed tasks that are not scraped (error stop, crash) go back to the queue
+        done = 0
+        try:
+            for i, product in enumerate(products, 1):
+                # Stop if too many consecutive errors
+                if self.stats['consecutive_errors'] >= 3:
+                    print(f"[{self.name}] ⚠️ Stopping due to consecutive errors")
+                    break
             
-            print(f"[{self.name}] [{i}/{len(products)}] {product['product_name'][:40]}...")
+                print(f"[{self.name}] [{i}/{len(products)}] {product['product_name'][:40]}...")
             
-            # Delay between requests
-            if i > 1:
-                delay = random.uniform(self.min_delay, self.max_delay)
-                print(f"[{self.name}] Waiting {delay:.1f}s...")
-                time.sleep(delay)
+                # Delay between requests
+                if i > 1:
+                    delay = random.uniform(self.min_delay, self.max_delay)
+                    print(f"[{self.name}] Waiting {delay:.1f}s...")
+                    time.sleep(delay)
             
-            self.stats['total'] += 1
+                self.stats['total'] += 1
             
-            # Scrape
-            result = self.scrape_product(product['product_url'])
+                # Scrape
+                result = self.scrape_product(product['product_url'])
             
-            # Add metadata
-            result['product_key'] = product['product_key']
-            result['brand'] = product.get('brand')
+                # Add metadata
+                result['product_key'] = product['product_key']
+                result['brand'] = product.get('brand')
             
-            # Show results
-            if 'error' in result:
-                print(f"[{self.name}] ❌ Error: {result['error']}")
-            else:
-                success_indicators = []
-                if 'ingredients_raw' in result:
-                    success_indicators.append("ingredients")
-                if 'nutrition' in result:
-                    success_indicators.append(f"nutrition({len(result['nutrition'])})")
-                
-                if success_indicators:
-                    print(f"[{self.name}] ✅ Found: {', '.join(success_indicators)}")
+                # Show results
+                if 'error' in result:
+                    print(f"[{self.name}] ❌ Error: {result['error']}")
                 else:
-                    print(f"[{self.name}] ⚠️ Scraped but no data")
+                    success_indicators = []
+                    if 'ingredients_raw' in result:
+                        success_indicators.append("ingredients")
+                    if 'nutrition' in result:
+                        success_indicators.append(f"nutrition({len(result['nutrition'])})")
+                
+                    if success_indicators:
+                        print(f"[{self.name}] ✅ Found: {', '.join(success_indicators)}")
+                    else:
+                        print(f"[{self.name}] ⚠️ Scraped but no data")
             
-            # Save to GCS
-            self.save_to_gcs(product['product_key'], result)
+                # Save to GCS
+                self.save_to_gcs(product['product_key'], result)
+                if 'task_id' in product:
+                    complete_task(self.supabase, product['task_id'], 'error' not in result, filled_fields(result))
+                done = i
+        finally:
+            unfinished = [product for product in products[done:] if 'task_id' in product]
+            if unfinished:
+                released = release_tasks(self.supabase, unfinished)
+                print(f"[{self.name}] Released {released} unscraped tasks back to the queue")
         
         # Summary
         self.print_summary()
@@ -298,7 +326,7 @@ class OrchestratedScraper:
 def main():
     """Run orchestrated scraper with command line arguments"""
     if len(sys.argv) < 7:
-        print("Usage: python orchestrated_scraper.py <name> <country> <min_delay> <max_delay> <batch_size> <offset>")
+        print("Usage: python orchestrated_scraper.py <name> <country> <min_delay> <max_delay> <batch_size> <offset|queue>")
         return
     
     try:
@@ -307,7 +335,7 @@ def main():
         min_delay = int(sys.argv[3])
         max_delay = int(sys.argv[4])
         batch_size = int(sys.argv[5])
-        offset = int(sys.argv[6])
+        offset = sys.argv[6] if sys.argv[6] == 'queue' else int(sys.argv[6])
         
         scraper = OrchestratedScraper(name, country_code, min_delay, max_delay, batch_size, offset)
         scraper.run_batch()
@@ -3,6 +3,11 @@
 Scraper Orchestrator - Manages 5 concurrent scrapers for maximum coverage
 Automatically restarts completed scrapers with new batches
 Continuously monitors progress toward 95% goal
+
+Sessions claim their batches from the crawl planner's queue
+(run_crawl_planner.py), highest expected coverage gain per credit first,
+and fall back to offset batches while the queue is empty; --use-offsets
+restores the old fixed-offset batches.
 """
 
 import os
@@ -16,9 +21,14 @@ import argparse
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from dataclasses import dataclass
+from pathlib import Path
 from dotenv import load_dotenv
 from supabase import create_client
 
+sys.path.append(str(Path(__file__).parent.parent))
+from etl.coverage_metrics import CoverageService, coverage_pct
+from etl.crawl_planner import has_pending_tasks
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -40,10 +50,12 @@ class ScraperSession:
     restart_count: int = 0
 
 class ScraperOrchestrator:
-    def __init__(self, instance_id: int = 1, offset_start: int = 0):
+    def __init__(self, instance_id: int = 1, offset_start: int = 0, use_queue: bool = True):
         self.instance_id = instance_id
         self.offset_start = offset_start
+        self.use_queue = use_queue
         self.supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        self.coverage = CoverageService(self.supabase)
         self.max_concurrent = 5
         self.max_restarts = 10  # Maximum restarts per session
         self.monitor_interval = 30  # Check every 30 seconds
@@ -86,49 +98,27 @@ class ScraperOrchestrator:
         
         print(f"🎛️  SCRAPER ORCHESTRATOR #{self.instance_id} INITIALIZED")
         print(f"Instance ID: {self.instance_id}")
-        print(f"Offset start: {self.offset_start}")
+        print(f"Work source: {'crawl queue' if self.use_queue else f'offset {self.offset_start}'}")
         print(f"Max concurrent scrapers: {self.max_concurrent}")
         print(f"Monitor interval: {self.monitor_interval}s")
         print(f"Session configs: {[c['name'] for c in self.session_configs]}")
         print("=" * 60)
     
     def get_current_coverage(self) -> Dict:
-        """Get current database coverage statistics"""
+        """Get current database coverage statistics (cached for the service TTL)"""
         try:
-            # Total products
-            total_result = self.supabase.table('foods_canonical').select('product_key', count='exact').execute()
-            total_products = total_result.count
-            
-            # Products with ingredients
-            ingredients_result = self.supabase.table('foods_canonical').select(
-                'product_key', count='exact'
-            ).not_.is_('ingredients_raw', 'null').execute()
-            ingredients_count = ingredients_result.count
-            
-            # Products with complete nutrition (all 5 nutrients)
-            nutrition_result = self.supabase.table('foods_canonical').select(
-                'product_key', count='exact'
-            ).not_.is_('protein_percent', 'null')\
-            .not_.is_('fat_percent', 'null')\
-            .not_.is_('fiber_percent', 'null')\
-            .not_.is_('ash_percent', 'null')\
-            .not_.is_('moisture_percent', 'null').execute()
-            nutrition_count = nutrition_result.count
-            
-            # Products missing ingredients (our target)
-            missing_ingredients = self.supabase.table('foods_canonical').select(
-                'product_key', count='exact'
-            ).ilike('product_url', '%zooplus%')\
-            .is_('ingredients_raw', 'null').execute()
-            missing_count = missing_ingredients.count
+            totals = self.coverage.totals()
+            total_products = totals['products']
+            ingredients_count = totals['with_ingredients_raw']
+            nutrition_count = totals['nutrition_complete']
             
             return {
                 'total_products': total_products,
                 'ingredients_count': ingredients_count,
-                'ingredients_percentage': (ingredients_count / total_products * 100) if total_products > 0 else 0,
+                'ingredients_percentage': coverage_pct(totals, 'with_ingredients_raw'),
                 'nutrition_count': nutrition_count,
-                'nutrition_percentage': (nutrition_count / total_products * 100) if total_products > 0 else 0,
-                'missing_ingredients': missing_count,
+                'nutrition_percentage': coverage_pct(totals, 'nutrition_complete'),
+                'missing_ingredients': totals['zooplus_missing_ingredients'],
                 'target_95_percent': int(total_products * 0.95),
                 'ingredients_needed': int(total_products * 0.95) - ingredients_count
             }
@@ -155,6 +145,14 @@ class ScraperOrchestrator:
     def start_scraper_session(self, session: ScraperSession, offset: int) -> bool:
         """Start a scraper session as subprocess"""
         try:
+            batch = str(offset)
+            if self.use_queue:
+                if has_pending_tasks(self.supabase, 'zooplus'):
+                    batch = 'queue'
+                else:
+                    # An empty queue would end the session at once and burn a restart
+                    print(f"⚠️ Crawl queue is empty - run run_crawl_planner.py to plan more work; "
+                          f"falling back to offset {offset}")
             # Create command to run parallel scraper with custom config
             cmd = [
                 'python', 'scripts/orchestrated_scraper.py',
@@ -163,7 +161,7 @@ class ScraperOrchestrator:
                 str(session.min_delay),
                 str(session.max_delay),
                 str(session.batch_size),
-                str(offset)
+                batch
             ]
             
             # Start subprocess
@@ -179,7 +177,7 @@ class ScraperOrchestrator:
             session.status = "running"
             self.stats['total_sessions_started'] += 1
             
-            print(f"🚀 Started session '{session.name}' (PID: {session.process.pid}, offset: {offset})")
+            print(f"🚀 Started session '{session.name}' (PID: {session.process.pid}, batch: {batch})")
             return True
             
         except Exception as e:
@@ -350,6 +348,8 @@ def main():
     parser = argparse.ArgumentParser(description='Zooplus Scraper Orchestrator - Multi-instance Support')
     parser.add_argument('--instance', type=int, default=1, help='Instance ID (1-4)')
     parser.add_argument('--offset-start', type=int, default=0, help='Starting offset for this instance')
+    parser.add_argument('--use-offsets', action='store_true',
+                        help='Scrape fixed offset batches instead of claiming planned tasks')
     
     args = parser.parse_args()
     
@@ -362,9 +362,10 @@ def main():
     if args.offset_start == 0:
         args.offset_start = (args.instance - 1) * 300  # 300 products per instance
     
-    print(f"🚀 Starting Orchestrator Instance #{args.instance} with offset {args.offset_start}")
+    source = f"offset {args.offset_start}" if args.use_offsets else "the crawl queue"
+    print(f"🚀 Starting Orchestrator Instance #{args.instance} with {source}")
     
-    orchestrator = ScraperOrchestrator(args.instance, args.offset_start)
+    orchestrator = ScraperOrchestrator(args.instance, args.offset_start, use_queue=not args.use_offsets)
     orchestrator.run()
 
 if __name__ == "__main__":
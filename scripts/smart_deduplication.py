@@ -7,12 +7,16 @@ Identifies duplicates and keeps the product with the most complete data
 import os
 import json
 import re
+import sys
 from datetime import datetime
-from collections import defaultdict
+from pathlib import Path
 from typing import Dict, List, Tuple
 from supabase import create_client
 from dotenv import load_dotenv
 
+sys.path.append(str(Path(__file__).parent.parent))
+from etl import dedup
+
 # Load environment variables
 load_dotenv()
 
@@ -67,50 +71,7 @@ class ProductDeduplicator:
     
     def score_product(self, product: Dict) -> int:
         """Score a product based on data completeness"""
-        score = 0
-        
-        # Major data points
-        if product.get('ingredients_raw'):
-            score += 40
-        
-        # Check for complete macros
-        macro_fields = ['protein_percent', 'fat_percent']
-        if all(product.get(field) for field in macro_fields):
-            score += 30
-        
-        # URL and image
-        if product.get('product_url'):
-            score += 20
-        
-        if product.get('image_url'):
-            score += 10
-        
-        # Additional nutrition data
-        if product.get('kcal_per_100g'):
-            score += 15
-        
-        if product.get('fiber_percent'):
-            score += 5
-        
-        if product.get('moisture_percent'):
-            score += 5
-        
-        if product.get('ash_percent'):
-            score += 5
-        
-        # Has price data
-        if product.get('price_per_kg'):
-            score += 10
-        
-        # Data source preference (newer sources might be better)
-        source_scores = {
-            'food_candidates': 1,
-            'food_candidates_sc': 2,
-            'food_brands': 3
-        }
-        score += source_scores.get(product.get('source'), 0)
-        
-        return score
+        return dedup.score_product(product)
     
     def merge_products(self, products: List[Dict]) -> Tuple[Dict, List[Dict]]:
         """
@@ -183,7 +144,7 @@ class ProductDeduplicator:
         return suspicious
     
     def find_duplicates(self) -> Dict[str, List[Dict]]:
-        """Find all duplicate products grouped by normalized key"""
+        """Find all duplicate clusters, keyed by the key of the cluster's best product"""
         print("Loading all products from database...")
         
         # Load all products
@@ -203,16 +164,12 @@ class ProductDeduplicator:
         print(f"  Loaded {len(all_products)} products... Done!")
         self.stats['total_products'] = len(all_products)
         
-        # Group by normalized key
-        print("\nGrouping products by normalized key...")
-        product_groups = defaultdict(list)
-        
-        for product in all_products:
-            key = self.create_product_key(product)
-            product_groups[key].append(product)
-        
-        # Filter to only groups with duplicates
-        duplicate_groups = {k: v for k, v in product_groups.items() if len(v) > 1}
+        # Cluster by name, GTIN, retailer id and nutrition signature blocks
+        print("\nClustering duplicate products...")
+        duplicate_groups = {
+            cluster[0].get('product_key') or self.create_product_key(cluster[0]): cluster
+            for cluster in dedup.duplicate_clusters(all_products)
+        }
         self.stats['duplicate_groups'] = len(duplicate_groups)
         
         print(f"Found {len(duplicate_groups)} groups with duplicates")
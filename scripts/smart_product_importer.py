@@ -11,6 +11,11 @@ from datetime import datetime
 from dotenv import load_dotenv
 from supabase import create_client
 import pandas as pd
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from etl.brand_resolver import get_brand_resolver
 
 load_dotenv()
 
@@ -61,6 +66,11 @@ class SmartProductImporter:
         clean = re.sub(r'[^\w\s-]', '', clean)
         clean = re.sub(r'\s+', ' ', clean)
         
+        # Shared brand resolver (alias maps, family map, phrase map)
+        canonical = get_brand_resolver().canonical(clean)
+        if canonical:
+            return canonical
+        
         # Check mappings
         for standard, variants in self.brand_mappings.items():
             if clean in variants or clean == standard:
@@ -1,91 +1,39 @@
 #!/usr/bin/env python3
 """
 Web server wrapper for Cloud Run
-Triggers scraping via HTTP endpoints
+Triggers scraping via HTTP endpoints; jobs run on the in-process
+worker pool from scrape_worker.py
 """
 
-from flask import Flask, request, jsonify, send_file
-import subprocess
+from flask import Flask, request, jsonify, send_file, Response
 import os
-import threading
 import logging
-import uuid
 import json
-import glob
+import queue
+
+from scrape_worker import ScrapeWorkerService, RESULTS_DIR
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Track running jobs
-running_jobs = {}
-RESULTS_DIR = '/app/results'
-
-def run_scraper(job_id, limit=None, breeds=None):
-    """Run the Selenium-based scraper in background"""
-    try:
-        # Ensure results directory exists
-        os.makedirs(RESULTS_DIR, exist_ok=True)
-        
-        cmd = ['python3', 'jobs/akc_selenium_scraper.py', '--cloud', '--headless', '--output-dir', RESULTS_DIR]
-        
-        if limit:
-            cmd.extend(['--limit', str(limit)])
-        elif breeds:
-            cmd.extend(['--breeds'] + breeds)
-        
-        logger.info(f"Starting job {job_id}: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        # Find the output file
-        output_file = None
-        if result.returncode == 0:
-            # Look for the generated JSON file
-            json_files = glob.glob(os.path.join(RESULTS_DIR, f"akc_breeds_*.json"))
-            if json_files:
-                # Get the most recent file
-                output_file = max(json_files, key=os.path.getctime)
-        
-        running_jobs[job_id] = {
-            'status': 'completed',
-            'output': result.stdout[-5000:] if len(result.stdout) > 5000 else result.stdout,
-            'error': result.stderr if result.returncode != 0 else None,
-            'return_code': result.returncode,
-            'output_file': output_file,
-            'results_count': 0
-        }
-        
-        # Count results if file exists
-        if output_file and os.path.exists(output_file):
-            try:
-                with open(output_file, 'r') as f:
-                    data = json.load(f)
-                    running_jobs[job_id]['results_count'] = len(data)
-                    # Count successful extractions
-                    successful = len([item for item in data if item.get('extraction_status') == 'success'])
-                    running_jobs[job_id]['successful_extractions'] = successful
-            except:
-                pass
-        
-        logger.info(f"Job {job_id} completed with return code {result.returncode}")
-        
-    except Exception as e:
-        running_jobs[job_id] = {
-            'status': 'failed',
-            'error': str(e)
-        }
-        logger.error(f"Job {job_id} failed: {e}")
+# Long-lived worker pool; job state lives in SQLite under RESULTS_DIR.
+# Started on import so WSGI servers (gunicorn imports server:app) also run
+# it and re-queue interrupted jobs at boot; start() only runs once.
+worker_service = ScrapeWorkerService()
+worker_service.start()
 
 @app.route('/')
 def home():
     return jsonify({
-        'service': 'AKC Breed Scraper (File-Based)',
+        'service': 'AKC Breed Scraper (Worker Pool)',
         'status': 'ready',
         'endpoints': {
             'GET /': 'Service info',
             'GET /health': 'Health check',
-            'POST /scrape': 'Start scraping job',
+            'POST /scrape': 'Queue scraping job',
             'GET /status/<job_id>': 'Check job status',
+            'GET /results/<job_id>': 'Stream per-breed results (NDJSON)',
             'GET /jobs': 'List all jobs',
             'GET /download/<job_id>': 'Download results file',
             'GET /files': 'List available result files'
@@ -99,58 +47,65 @@ def health():
 
 @app.route('/scrape', methods=['POST'])
 def scrape():
-    """Start scraping job"""
+    """Queue a scraping job on the worker pool"""
     data = request.get_json() or {}
     
-    # Generate job ID
-    job_id = str(uuid.uuid4())[:8]
-    
-    # Start scraping in background
-    running_jobs[job_id] = {'status': 'running'}
-    
-    thread = threading.Thread(
-        target=run_scraper,
-        args=(job_id, data.get('limit'), data.get('breeds'))
-    )
-    thread.daemon = True
-    thread.start()
+    try:
+        job_id = worker_service.submit(limit=data.get('limit'), breeds=data.get('breeds'))
+    except queue.Full:
+        return jsonify({'error': 'Job queue is full, retry later'}), 503
     
     return jsonify({
         'job_id': job_id,
-        'status': 'started',
-        'message': f'Scraping job started. Check status at /status/{job_id}'
+        'status': 'queued',
+        'queue_depth': worker_service.queue_depth(),
+        'message': f'Scraping job queued. Check status at /status/{job_id} or stream /results/{job_id}'
     })
 
 @app.route('/status/<job_id>')
 def status(job_id):
     """Check job status"""
-    if job_id not in running_jobs:
+    job = worker_service.store.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    job['results_count'] = job['processed']
+    job['successful_extractions'] = job['successful']
+    return jsonify(job)
+
+@app.route('/results/<job_id>')
+def stream_results(job_id):
+    """Stream per-breed results as NDJSON while the job runs"""
+    if not worker_service.store.get_job(job_id):
         return jsonify({'error': 'Job not found'}), 404
     
-    return jsonify(running_jobs[job_id])
+    def generate():
+        for breed_data in worker_service.stream_results(job_id):
+            yield json.dumps(breed_data, default=str) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
 
 @app.route('/jobs')
 def list_jobs():
     """List all jobs"""
     jobs_summary = {}
-    for job_id, job_data in running_jobs.items():
-        jobs_summary[job_id] = {
+    for job_data in worker_service.store.list_jobs():
+        jobs_summary[job_data['job_id']] = {
             'status': job_data.get('status'),
-            'return_code': job_data.get('return_code'),
-            'results_count': job_data.get('results_count', 0),
-            'successful_extractions': job_data.get('successful_extractions', 0),
-            'has_output_file': bool(job_data.get('output_file'))
+            'total': job_data.get('total', 0),
+            'results_count': job_data.get('processed', 0),
+            'successful_extractions': job_data.get('successful', 0),
+            'has_output_file': bool(job_data.get('processed'))
         }
     return jsonify(jobs_summary)
 
 @app.route('/download/<job_id>')
 def download_results(job_id):
     """Download results file for a job"""
-    if job_id not in running_jobs:
+    if not worker_service.store.get_job(job_id):
         return jsonify({'error': 'Job not found'}), 404
     
-    job_data = running_jobs[job_id]
-    output_file = job_data.get('output_file')
+    output_file = worker_service.export_results(job_id)
     
     if not output_file or not os.path.exists(output_file):
         return jsonify({'error': 'No output file available for this job'}), 404
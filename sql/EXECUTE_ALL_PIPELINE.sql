@@ -55,6 +55,13 @@ SELECT
     
     protein_percent,
     fat_percent,
+    -- Dry-matter basis (sql/nutrition_dry_matter.sql)
+    protein_dm_percent,
+    fat_dm_percent,
+    fiber_dm_percent,
+    ash_dm_percent,
+    carbohydrate_dm_percent,
+    kcal_per_100g_dm,
     
     -- Ingredients
     ingredients_tokens,
@@ -135,6 +142,13 @@ SELECT
     NULL::numeric as kcal_per_100g_final,
     NULL::numeric as protein_percent,
     NULL::numeric as fat_percent,
+    -- Dry-matter basis (sql/nutrition_dry_matter.sql)
+    protein_dm_percent,
+    fat_dm_percent,
+    fiber_dm_percent,
+    ash_dm_percent,
+    carbohydrate_dm_percent,
+    kcal_per_100g_dm,
     
     -- Ingredients (empty in this table)
     '[]'::jsonb as ingredients_tokens,
@@ -191,6 +205,13 @@ SELECT
     NULL::numeric as kcal_per_100g_final,
     NULL::numeric as protein_percent,
     NULL::numeric as fat_percent,
+    -- Dry-matter basis (sql/nutrition_dry_matter.sql)
+    NULL::NUMERIC(5,2) as protein_dm_percent,
+    NULL::NUMERIC(5,2) as fat_dm_percent,
+    NULL::NUMERIC(5,2) as fiber_dm_percent,
+    NULL::NUMERIC(5,2) as ash_dm_percent,
+    NULL::NUMERIC(5,2) as carbohydrate_dm_percent,
+    NULL::NUMERIC(6,1) as kcal_per_100g_dm,
     
     -- Ingredients (not available)
     '[]'::jsonb as ingredients_tokens,
@@ -293,6 +314,12 @@ SELECT
     r.kcal_per_100g_final,
     r.protein_percent,
     r.fat_percent,
+    r.protein_dm_percent,
+    r.fat_dm_percent,
+    r.fiber_dm_percent,
+    r.ash_dm_percent,
+    r.carbohydrate_dm_percent,
+    r.kcal_per_100g_dm,
     r.ingredients_tokens,
     r.primary_protein,
     r.has_chicken,
@@ -315,6 +342,9 @@ CREATE UNIQUE INDEX idx_foods_canonical_product_key ON foods_canonical(product_k
 CREATE INDEX idx_foods_canonical_brand_slug ON foods_canonical(brand_slug);
 CREATE INDEX idx_foods_canonical_life_stage ON foods_canonical(life_stage);
 CREATE INDEX idx_foods_canonical_form ON foods_canonical(form);
+CREATE INDEX idx_foods_canonical_protein_dm ON foods_canonical(protein_dm_percent) WHERE protein_dm_percent IS NOT NULL;
+CREATE INDEX idx_foods_canonical_kcal_dm ON foods_canonical(kcal_per_100g_dm) WHERE kcal_per_100g_dm IS NOT NULL;
+CREATE INDEX idx_foods_canonical_form_protein_dm ON foods_canonical(form, protein_dm_percent DESC);
 
 -- ============================================================================
 -- STEP C3: Published View and Additional Indexes
@@ -0,0 +1,30 @@
+-- Breed refresh state for breeds_refresh_scheduler.py
+-- One row per (breed, source): freshness, change history and the cheap
+-- "has it changed" validators (Wikipedia revision id, HTTP ETag/Last-Modified)
+
+CREATE TABLE IF NOT EXISTS breeds_refresh_state (
+    breed_slug TEXT NOT NULL,
+    source TEXT NOT NULL,                 -- 'wikipedia', 'akc', ...
+    url TEXT,
+    revision_id BIGINT,                   -- last seen Wikipedia revision
+    etag TEXT,                            -- last seen HTTP ETag
+    last_modified TEXT,                   -- last seen HTTP Last-Modified
+    scraped_version TEXT,                 -- revision/etag the stored data came from
+    checks INTEGER NOT NULL DEFAULT 0,    -- probes performed
+    changes INTEGER NOT NULL DEFAULT 0,   -- probes that saw a change
+    failures INTEGER NOT NULL DEFAULT 0,  -- failed scrapes in a row (retried next run)
+    completeness NUMERIC(4,3),            -- breeds_details completeness at last check
+    first_checked_at TIMESTAMPTZ,
+    last_checked_at TIMESTAMPTZ,
+    last_changed_at TIMESTAMPTZ,
+    last_scraped_at TIMESTAMPTZ,
+    last_failed_at TIMESTAMPTZ,
+    PRIMARY KEY (breed_slug, source)
+);
+
+ALTER TABLE breeds_refresh_state
+    ADD COLUMN IF NOT EXISTS failures INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS last_failed_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_breeds_refresh_state_checked
+    ON breeds_refresh_state(last_checked_at);
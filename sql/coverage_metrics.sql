@@ -0,0 +1,41 @@
+-- Coverage counters for etl/coverage_metrics.py
+-- One scan of foods_canonical returns the counters per brand_slug and for
+-- the whole catalog, replacing the separate exact-count queries of the
+-- monitoring jobs. The result is a single JSONB value
+-- ({"total": {...}, "brands": [{...}, ...]}) so PostgREST's row cap does
+-- not truncate the brand list.
+
+CREATE OR REPLACE FUNCTION coverage_metrics(
+    p_kcal_low NUMERIC DEFAULT 200,
+    p_kcal_high NUMERIC DEFAULT 600
+)
+RETURNS JSONB AS $$
+    WITH counters AS (
+        SELECT
+            f.brand_slug::TEXT AS brand_slug,
+            GROUPING(f.brand_slug) = 1 AS is_total,
+            COUNT(*) AS products,
+            COUNT(f.form) AS with_form,
+            COUNT(f.life_stage) AS with_life_stage,
+            COUNT(f.ingredients_raw) AS with_ingredients_raw,
+            COUNT(*) FILTER (WHERE f.ingredients_tokens IS NOT NULL
+                               AND f.ingredients_tokens::TEXT NOT IN ('', '[]', '{}', 'null')) AS with_ingredients_tokens,
+            COUNT(f.kcal_per_100g) AS with_kcal,
+            COUNT(*) FILTER (WHERE f.kcal_per_100g BETWEEN p_kcal_low AND p_kcal_high) AS kcal_valid,
+            COUNT(*) FILTER (WHERE f.kcal_per_100g < p_kcal_low OR f.kcal_per_100g > p_kcal_high) AS kcal_outliers,
+            COUNT(*) FILTER (WHERE f.protein_percent IS NOT NULL AND f.fat_percent IS NOT NULL
+                               AND f.fiber_percent IS NOT NULL AND f.ash_percent IS NOT NULL
+                               AND f.moisture_percent IS NOT NULL) AS nutrition_complete,
+            COUNT(*) FILTER (WHERE f.ingredients_raw IS NULL
+                               AND f.product_url ILIKE '%zooplus%') AS zooplus_missing_ingredients
+        FROM foods_canonical f
+        GROUP BY GROUPING SETS ((f.brand_slug), ())
+    )
+    SELECT jsonb_build_object(
+        'total', (SELECT to_jsonb(c) - 'brand_slug' - 'is_total' FROM counters c WHERE c.is_total),
+        'brands', COALESCE((SELECT jsonb_agg(to_jsonb(c) - 'is_total' ORDER BY c.products DESC)
+                            FROM counters c WHERE NOT c.is_total), '[]'::jsonb)
+    );
+$$ LANGUAGE sql STABLE;
+
+-- GRANT EXECUTE ON FUNCTION coverage_metrics(NUMERIC, NUMERIC) TO service_role;
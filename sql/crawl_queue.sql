@@ -0,0 +1,199 @@
+-- Crawl work queue for etl/crawl_planner.py
+--
+-- 1. crawl_queue: one row per (product, fetcher) with the planner's
+--    expected gain and priority (gain per credit)
+-- 2. crawl_attempts: one row per completed task, kept when the task is
+--    queued again by a later plan
+-- 3. enqueue_crawl_plan(): upsert a chunk of a plan; skip_stale_crawl_tasks()
+--    then marks pending tasks of the plan's fetchers that are not in the
+--    plan as skipped, once, after the last chunk
+-- 4. claim_crawl_tasks(): harvesters take the highest-priority pending
+--    tasks (SKIP LOCKED, so concurrent workers never get the same task);
+--    release_crawl_tasks() hands them back without an outcome
+-- 5. complete_crawl_task(): record the outcome and which fields were filled
+--    (NULL when the page was only stored for later parsing)
+-- 6. crawl_yields(): observed fill rate per fetcher and field over every
+--    attempt, which the planner blends with its prior yields
+
+CREATE TABLE IF NOT EXISTS crawl_queue (
+    id BIGSERIAL PRIMARY KEY,
+    product_key TEXT NOT NULL,
+    brand_slug TEXT,
+    url TEXT NOT NULL,
+    domain TEXT,
+    fetcher TEXT NOT NULL,
+    missing_fields TEXT[] NOT NULL DEFAULT '{}',
+    expected_gain NUMERIC NOT NULL DEFAULT 0,
+    credits INTEGER NOT NULL DEFAULT 1,
+    priority NUMERIC NOT NULL DEFAULT 0,
+    plan_id TEXT,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'claimed', 'done', 'failed', 'skipped')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    fields_filled TEXT[],
+    claimed_by TEXT,
+    claimed_at TIMESTAMPTZ,
+    completed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (product_key, fetcher)
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_queue_pending
+    ON crawl_queue (fetcher, priority DESC)
+    WHERE status = 'pending';
+
+CREATE TABLE IF NOT EXISTS crawl_attempts (
+    id BIGSERIAL PRIMARY KEY,
+    queue_id BIGINT REFERENCES crawl_queue(id) ON DELETE SET NULL,
+    product_key TEXT NOT NULL,
+    fetcher TEXT NOT NULL,
+    missing_fields TEXT[] NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL CHECK (status IN ('done', 'failed')),
+    fields_filled TEXT[],
+    completed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_attempts_fetcher
+    ON crawl_attempts (fetcher);
+
+-- ============================================================================
+-- ENQUEUE
+-- ============================================================================
+-- p_tasks is a JSON array of {product_key, brand_slug, url, domain, fetcher,
+-- missing_fields, expected_gain, credits, priority}. Claimed tasks are left
+-- alone; everything else in the plan becomes pending again (done/failed
+-- outcomes stay in crawl_attempts).
+
+DROP FUNCTION IF EXISTS enqueue_crawl_plan(TEXT, JSONB);
+
+CREATE OR REPLACE FUNCTION enqueue_crawl_plan(p_plan_id TEXT, p_tasks JSONB)
+RETURNS TABLE(queued INTEGER) AS $$
+DECLARE
+    n_queued INTEGER;
+BEGIN
+    WITH tasks AS (
+        SELECT * FROM jsonb_to_recordset(p_tasks) AS t(
+            product_key TEXT, brand_slug TEXT, url TEXT, domain TEXT, fetcher TEXT,
+            missing_fields TEXT[], expected_gain NUMERIC, credits INTEGER, priority NUMERIC)
+    ), upserted AS (
+        INSERT INTO crawl_queue AS q (product_key, brand_slug, url, domain, fetcher, missing_fields,
+                                      expected_gain, credits, priority, plan_id)
+        SELECT product_key, brand_slug, url, domain, fetcher, COALESCE(missing_fields, '{}'),
+               expected_gain, credits, priority, p_plan_id
+        FROM tasks
+        ON CONFLICT (product_key, fetcher) DO UPDATE SET
+            brand_slug = EXCLUDED.brand_slug,
+            url = EXCLUDED.url,
+            domain = EXCLUDED.domain,
+            missing_fields = EXCLUDED.missing_fields,
+            expected_gain = EXCLUDED.expected_gain,
+            credits = EXCLUDED.credits,
+            priority = EXCLUDED.priority,
+            plan_id = EXCLUDED.plan_id,
+            status = 'pending',
+            fields_filled = NULL,
+            updated_at = NOW()
+        WHERE q.status <> 'claimed'
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO n_queued FROM upserted;
+
+    RETURN QUERY SELECT n_queued;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Called once after the last chunk of a plan. p_fetchers: the fetchers the
+-- plan was built for (NULL: all), so a fetcher-scoped plan keeps the other
+-- fetchers' queued work
+DROP FUNCTION IF EXISTS skip_stale_crawl_tasks(TEXT);
+
+CREATE OR REPLACE FUNCTION skip_stale_crawl_tasks(p_plan_id TEXT, p_fetchers TEXT[] DEFAULT NULL)
+RETURNS TABLE(skipped INTEGER) AS $$
+DECLARE
+    n_skipped INTEGER;
+BEGIN
+    UPDATE crawl_queue
+    SET status = 'skipped', updated_at = NOW()
+    WHERE status = 'pending' AND plan_id IS DISTINCT FROM p_plan_id
+      AND (p_fetchers IS NULL OR fetcher = ANY(p_fetchers));
+    GET DIAGNOSTICS n_skipped = ROW_COUNT;
+
+    RETURN QUERY SELECT n_skipped;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- CLAIM / COMPLETE
+-- ============================================================================
+-- Claims older than p_stale_after are treated as abandoned and handed out
+-- again.
+
+CREATE OR REPLACE FUNCTION claim_crawl_tasks(
+    p_fetcher TEXT,
+    p_limit INTEGER,
+    p_worker TEXT DEFAULT NULL,
+    p_brand_slug TEXT DEFAULT NULL,
+    p_stale_after INTERVAL DEFAULT INTERVAL '1 hour'
+)
+RETURNS SETOF crawl_queue AS $$
+    UPDATE crawl_queue q
+    SET status = 'claimed', claimed_by = p_worker, claimed_at = NOW(), updated_at = NOW()
+    WHERE q.id IN (
+        SELECT id FROM crawl_queue
+        WHERE fetcher = p_fetcher
+          AND (p_brand_slug IS NULL OR brand_slug = p_brand_slug)
+          AND (status = 'pending' OR (status = 'claimed' AND claimed_at < NOW() - p_stale_after))
+        ORDER BY priority DESC, id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING q.*;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION release_crawl_tasks(p_ids BIGINT[])
+RETURNS VOID AS $$
+    UPDATE crawl_queue
+    SET status = 'pending', claimed_by = NULL, claimed_at = NULL, updated_at = NOW()
+    WHERE id = ANY(p_ids) AND status = 'claimed';
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION complete_crawl_task(
+    p_id BIGINT,
+    p_status TEXT,
+    p_fields_filled TEXT[] DEFAULT NULL
+)
+RETURNS VOID AS $$
+    WITH completed AS (
+        UPDATE crawl_queue
+        SET status = p_status,
+            fields_filled = p_fields_filled,
+            attempts = attempts + 1,
+            completed_at = NOW(),
+            updated_at = NOW()
+        WHERE id = p_id
+        RETURNING id, product_key, fetcher, missing_fields, status, fields_filled, completed_at
+    )
+    INSERT INTO crawl_attempts (queue_id, product_key, fetcher, missing_fields, status, fields_filled, completed_at)
+    SELECT id, product_key, fetcher, missing_fields, status, fields_filled, completed_at FROM completed;
+$$ LANGUAGE sql;
+
+-- ============================================================================
+-- OBSERVED YIELDS
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION crawl_yields()
+RETURNS TABLE(fetcher TEXT, field TEXT, attempts BIGINT, filled BIGINT) AS $$
+    SELECT a.fetcher, m.field, COUNT(*), COUNT(*) FILTER (WHERE m.field = ANY(a.fields_filled))
+    FROM crawl_attempts a
+    CROSS JOIN LATERAL unnest(a.missing_fields) AS m(field)
+    WHERE a.fields_filled IS NOT NULL   -- NULL: outcome not known yet (raw page snapshots)
+    GROUP BY a.fetcher, m.field;
+$$ LANGUAGE sql STABLE;
+
+-- GRANT EXECUTE ON FUNCTION enqueue_crawl_plan(TEXT, JSONB) TO service_role;
+-- GRANT EXECUTE ON FUNCTION skip_stale_crawl_tasks(TEXT, TEXT[]) TO service_role;
+-- GRANT EXECUTE ON FUNCTION claim_crawl_tasks(TEXT, INTEGER, TEXT, TEXT, INTERVAL) TO service_role;
+-- GRANT EXECUTE ON FUNCTION release_crawl_tasks(BIGINT[]) TO service_role;
+-- GRANT EXECUTE ON FUNCTION complete_crawl_task(BIGINT, TEXT, TEXT[]) TO service_role;
+-- GRANT EXECUTE ON FUNCTION crawl_yields() TO service_role;
@@ -139,6 +139,12 @@ GROUP BY brand_slug, allowlist_status;
 REFRESH MATERIALIZED VIEW foods_brand_quality_prod_mv;
 REFRESH MATERIALIZED VIEW foods_brand_quality_preview_mv;
 
+-- Unique indexes: required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS uq_foods_brand_quality_prod_mv
+    ON foods_brand_quality_prod_mv (brand_slug, allowlist_status);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_foods_brand_quality_preview_mv
+    ON foods_brand_quality_preview_mv (brand_slug, allowlist_status);
+
 -- Create indexes on MVs for performance
 CREATE INDEX IF NOT EXISTS idx_brand_quality_prod_brand_slug 
     ON foods_brand_quality_prod_mv (brand_slug);
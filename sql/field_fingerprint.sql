@@ -0,0 +1,10 @@
+-- Per-field-group fingerprints (etl/fingerprint.py)
+-- field_fingerprint: 'v2:' + one 64-bit hash per field group (identity,
+-- ingredients, nutrition, price, pack, classification), hex-packed.
+-- Re-crawls compare it to tell which groups changed and write only those.
+
+ALTER TABLE food_raw
+    ADD COLUMN IF NOT EXISTS field_fingerprint TEXT;
+
+ALTER TABLE food_candidates
+    ADD COLUMN IF NOT EXISTS field_fingerprint TEXT;
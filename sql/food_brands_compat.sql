@@ -29,6 +29,13 @@
             NULL::numeric as kcal_per_100g_final,
             NULL::numeric as protein_percent,
             NULL::numeric as fat_percent,
+            -- Dry-matter basis (sql/nutrition_dry_matter.sql)
+            NULL::NUMERIC(5,2) as protein_dm_percent,
+            NULL::NUMERIC(5,2) as fat_dm_percent,
+            NULL::NUMERIC(5,2) as fiber_dm_percent,
+            NULL::NUMERIC(5,2) as ash_dm_percent,
+            NULL::NUMERIC(5,2) as carbohydrate_dm_percent,
+            NULL::NUMERIC(6,1) as kcal_per_100g_dm,
             
             -- Ingredients (not available)
             '[]'::jsonb as ingredients_tokens,
@@ -46,6 +46,13 @@
             
             protein_percent,
             fat_percent,
+            -- Dry-matter basis (sql/nutrition_dry_matter.sql)
+            protein_dm_percent,
+            fat_dm_percent,
+            fiber_dm_percent,
+            ash_dm_percent,
+            carbohydrate_dm_percent,
+            kcal_per_100g_dm,
             
             -- Ingredients
             ingredients_tokens,
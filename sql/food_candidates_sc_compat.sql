@@ -28,6 +28,13 @@
             NULL::numeric as kcal_per_100g_final,
             NULL::numeric as protein_percent,
             NULL::numeric as fat_percent,
+            -- Dry-matter basis (sql/nutrition_dry_matter.sql)
+            protein_dm_percent,
+            fat_dm_percent,
+            fiber_dm_percent,
+            ash_dm_percent,
+            carbohydrate_dm_percent,
+            kcal_per_100g_dm,
             
             -- Ingredients (empty in this table)
             '[]'::jsonb as ingredients_tokens,
@@ -110,7 +110,8 @@ FROM brand_status
 ORDER BY sku_count DESC;
 
 -- Create indexes for fast querying
-CREATE INDEX idx_brand_quality_preview_brand ON foods_brand_quality_preview_mv(brand_slug);
+-- Unique index: required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX uq_foods_brand_quality_preview_mv ON foods_brand_quality_preview_mv(brand_slug);
 CREATE INDEX idx_brand_quality_preview_sku_count ON foods_brand_quality_preview_mv(sku_count DESC);
 CREATE INDEX idx_brand_quality_preview_status ON foods_brand_quality_preview_mv(status);
 CREATE INDEX idx_brand_quality_preview_completion ON foods_brand_quality_preview_mv(completion_pct DESC);
@@ -212,7 +213,8 @@ FROM brand_status
 ORDER BY sku_count DESC;
 
 -- Create indexes
-CREATE INDEX idx_brand_quality_prod_brand ON foods_brand_quality_prod_mv(brand_slug);
+-- Unique index: required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX uq_foods_brand_quality_prod_mv ON foods_brand_quality_prod_mv(brand_slug);
 CREATE INDEX idx_brand_quality_prod_sku_count ON foods_brand_quality_prod_mv(sku_count DESC);
 CREATE INDEX idx_brand_quality_prod_status ON foods_brand_quality_prod_mv(status);
 CREATE INDEX idx_brand_quality_prod_completion ON foods_brand_quality_prod_mv(completion_pct DESC);
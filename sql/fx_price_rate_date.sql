@@ -0,0 +1,63 @@
+-- FX conversion state for run_fx_reprice.py
+-- price_original: price in price_currency as scraped
+-- price_rate_date: date of the daily FX rate price_eur was converted at
+-- (etl/fx_rates.py). Re-pricing skips rows already on the current rate
+-- date and rows whose currency's rate has not changed since theirs, and
+-- writes the rest in chunks through reprice_food_candidates().
+
+ALTER TABLE food_candidates
+    ADD COLUMN IF NOT EXISTS price_original NUMERIC(10,2),
+    ADD COLUMN IF NOT EXISTS price_rate_date DATE;
+
+-- Backfill rows priced before this migration. GBP rows from the
+-- petfoodexpert jobs take the scraped price_gbp their food_raw record kept
+-- (pfx_scrape*.py); GBP rows without a food_raw record come from
+-- pfx_full_catalog.py, which converted at a hard-coded 1.17. Everything
+-- else was converted at the static 2024-01-01 rates, which are undone here.
+UPDATE food_candidates c
+SET price_original = COALESCE(
+        raw.price_gbp,
+        ROUND(c.price_eur / CASE UPPER(COALESCE(c.price_currency, 'EUR'))
+            WHEN 'USD' THEN 0.92
+            WHEN 'GBP' THEN CASE WHEN raw.source_url IS NULL THEN 1.17 ELSE 1.16 END
+            WHEN 'SEK' THEN 0.087
+            WHEN 'DKK' THEN 0.134
+            WHEN 'NOK' THEN 0.085
+            ELSE 1.0
+        END, 2)),
+    price_rate_date = DATE '2024-01-01'
+FROM food_candidates c2
+LEFT JOIN LATERAL (
+    SELECT r.source_url,
+           CASE WHEN UPPER(COALESCE(c2.price_currency, 'EUR')) = 'GBP'
+                THEN NULLIF(r.parsed_json->>'price_gbp', '')::NUMERIC END AS price_gbp
+    FROM food_raw r
+    WHERE r.source_url = c2.source_url
+    ORDER BY r.last_seen_at DESC NULLS LAST
+    LIMIT 1
+) raw ON TRUE
+WHERE c.id = c2.id
+  AND c.price_eur IS NOT NULL
+  AND c.price_rate_date IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_food_candidates_price_rate_date
+    ON food_candidates(price_currency, price_rate_date);
+
+-- p_rows is a JSON array of {id, price_eur, price_rate_date}
+CREATE OR REPLACE FUNCTION reprice_food_candidates(p_rows JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    n_updated INTEGER;
+BEGIN
+    UPDATE food_candidates c
+    SET price_eur = r.price_eur,
+        price_rate_date = r.price_rate_date
+    FROM jsonb_to_recordset(p_rows) AS r(id UUID, price_eur NUMERIC, price_rate_date DATE)
+    WHERE c.id = r.id;
+    GET DIAGNOSTICS n_updated = ROW_COUNT;
+
+    RETURN n_updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- GRANT EXECUTE ON FUNCTION reprice_food_candidates(JSONB) TO service_role;
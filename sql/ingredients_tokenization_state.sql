@@ -0,0 +1,54 @@
+-- Tokenization state for run_ingredients_canonicalize.py
+-- ingredients_hash: md5 of the ingredients_raw the tokens were built from
+-- ingredients_map_version: canonical map version used (etl/ingredients.py)
+-- Rows whose hash and map entries are unchanged are skipped on re-runs;
+-- the rest are written in chunks through update_ingredients_tokens().
+
+ALTER TABLE food_candidates
+    ADD COLUMN IF NOT EXISTS ingredients_hash TEXT,
+    ADD COLUMN IF NOT EXISTS ingredients_map_version TEXT;
+
+ALTER TABLE food_candidates_sc
+    ADD COLUMN IF NOT EXISTS ingredients_hash TEXT,
+    ADD COLUMN IF NOT EXISTS ingredients_map_version TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_food_candidates_map_version
+    ON food_candidates(ingredients_map_version);
+
+CREATE INDEX IF NOT EXISTS idx_food_candidates_sc_map_version
+    ON food_candidates_sc(ingredients_map_version);
+
+-- p_rows is a JSON array of {id, ingredients_tokens, ingredients_hash,
+-- ingredients_map_version}; the id and token types are read from the table
+CREATE OR REPLACE FUNCTION update_ingredients_tokens(p_table TEXT, p_rows JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+    id_type TEXT;
+    tokens_type TEXT;
+    n_updated INTEGER;
+BEGIN
+    IF p_table NOT IN ('food_candidates', 'food_candidates_sc') THEN
+        RAISE EXCEPTION 'update_ingredients_tokens: unsupported table %', p_table;
+    END IF;
+
+    SELECT format_type(atttypid, atttypmod) INTO id_type
+    FROM pg_attribute WHERE attrelid = p_table::regclass AND attname = 'id';
+    SELECT format_type(atttypid, atttypmod) INTO tokens_type
+    FROM pg_attribute WHERE attrelid = p_table::regclass AND attname = 'ingredients_tokens';
+
+    EXECUTE format(
+        'UPDATE %I t
+         SET ingredients_tokens = r.ingredients_tokens,
+             ingredients_hash = r.ingredients_hash,
+             ingredients_map_version = r.ingredients_map_version
+         FROM jsonb_to_recordset($1) AS r(id %s, ingredients_tokens %s,
+                                          ingredients_hash TEXT, ingredients_map_version TEXT)
+         WHERE t.id = r.id', p_table, id_type, tokens_type)
+    USING p_rows;
+    GET DIAGNOSTICS n_updated = ROW_COUNT;
+
+    RETURN n_updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- GRANT EXECUTE ON FUNCTION update_ingredients_tokens(TEXT, JSONB) TO service_role;
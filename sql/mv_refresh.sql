@@ -0,0 +1,164 @@
+-- Materialized view refresh support for etl/mv_refresh.py
+--
+-- 1. Unique indexes so the MVs can be refreshed CONCURRENTLY (readers are
+--    not blocked during a refresh)
+-- 2. mv_refresh_log: one row per refresh attempt, with duration and the
+--    input signature it was built from
+-- 3. mv_relation_info(): relation kind, write counters and last refresh
+--    signature for the refresh planner
+-- 4. refresh_mv(): refresh one MV (CONCURRENTLY when possible) and log it
+
+-- ============================================================================
+-- UNIQUE INDEXES
+-- ============================================================================
+-- The brand quality MVs exist in two shapes (grouped by brand_slug, or by
+-- brand_slug + allowlist_status); brand_slug + allowlist_status is unique
+-- in both. Published views are indexed only where deployed as MVs.
+
+DO $$
+DECLARE
+    target RECORD;
+    key_columns TEXT[];
+BEGIN
+    FOR target IN
+        SELECT * FROM (VALUES
+            ('foods_brand_quality_preview_mv', ARRAY['brand_slug', 'allowlist_status']),
+            ('foods_brand_quality_prod_mv', ARRAY['brand_slug', 'allowlist_status']),
+            ('foods_published_preview', ARRAY['product_key']),
+            ('foods_published_prod', ARRAY['product_key'])
+        ) AS t(mv_name, columns)
+    LOOP
+        CONTINUE WHEN NOT EXISTS (
+            SELECT 1 FROM pg_matviews WHERE schemaname = 'public' AND matviewname = target.mv_name
+        );
+
+        SELECT array_agg(a.attname::TEXT ORDER BY array_position(target.columns, a.attname::TEXT))
+        INTO key_columns
+        FROM pg_attribute a
+        WHERE a.attrelid = ('public.' || target.mv_name)::regclass
+          AND a.attname = ANY(target.columns)
+          AND NOT a.attisdropped;
+
+        CONTINUE WHEN key_columns IS NULL OR NOT ('brand_slug' = ANY(key_columns) OR 'product_key' = ANY(key_columns));
+
+        EXECUTE format('CREATE UNIQUE INDEX IF NOT EXISTS %I ON %I (%s)',
+                       'uq_' || target.mv_name,
+                       target.mv_name,
+                       (SELECT string_agg(quote_ident(c), ', ') FROM unnest(key_columns) AS c));
+    END LOOP;
+END $$;
+
+-- ============================================================================
+-- REFRESH LOG
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS mv_refresh_log (
+    id BIGSERIAL PRIMARY KEY,
+    mv_name TEXT NOT NULL,
+    status TEXT NOT NULL,                 -- 'refreshed', 'failed'
+    mode TEXT,                            -- 'concurrent', 'blocking'
+    input_signature TEXT,                 -- signature of the inputs at refresh time
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    duration_ms NUMERIC(12,1),
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_mv_refresh_log_mv_started
+    ON mv_refresh_log(mv_name, started_at DESC);
+
+-- ============================================================================
+-- PLANNER INFO
+-- ============================================================================
+-- modifications = inserted + updated + deleted tuples since the last stats
+-- reset; any write to a table moves it, so it is a cheap change detector.
+
+CREATE OR REPLACE FUNCTION mv_relation_info(p_names TEXT[])
+RETURNS TABLE(
+    relname TEXT,
+    relkind TEXT,
+    modifications BIGINT,
+    populated BOOLEAN,
+    has_unique_index BOOLEAN,
+    last_signature TEXT
+) AS $$
+    SELECT
+        c.relname::TEXT,
+        CASE c.relkind WHEN 'm' THEN 'mv' WHEN 'v' THEN 'view' ELSE 'table' END,
+        s.n_tup_ins + s.n_tup_upd + s.n_tup_del,
+        CASE WHEN c.relkind = 'm' THEN c.relispopulated END,
+        EXISTS (
+            SELECT 1 FROM pg_index i
+            WHERE i.indrelid = c.oid AND i.indisunique
+              AND i.indpred IS NULL AND i.indexprs IS NULL
+        ),
+        (
+            SELECT l.input_signature FROM mv_refresh_log l
+            WHERE l.mv_name = c.relname AND l.status = 'refreshed'
+            ORDER BY l.started_at DESC
+            LIMIT 1
+        )
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = 'public'
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE c.relname = ANY(p_names)
+      AND c.relkind IN ('r', 'p', 'v', 'm');
+$$ LANGUAGE sql STABLE;
+
+-- ============================================================================
+-- REFRESH ONE MV
+-- ============================================================================
+
+CREATE OR REPLACE FUNCTION refresh_mv(
+    p_name TEXT,
+    p_input_signature TEXT DEFAULT NULL,
+    p_concurrently BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE(
+    status TEXT,
+    mode TEXT,
+    duration_ms NUMERIC,
+    error TEXT
+) AS $$
+DECLARE
+    is_populated BOOLEAN;
+    concurrent BOOLEAN;
+    started TIMESTAMPTZ;
+BEGIN
+    SELECT c.relispopulated INTO is_populated
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = 'public'
+    WHERE c.relname = p_name AND c.relkind = 'm';
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Not a materialized view: %', p_name;
+    END IF;
+
+    -- CONCURRENTLY needs a populated MV with a plain unique index
+    concurrent := p_concurrently AND is_populated AND EXISTS (
+        SELECT 1 FROM pg_index i
+        WHERE i.indrelid = ('public.' || p_name)::regclass AND i.indisunique
+          AND i.indpred IS NULL AND i.indexprs IS NULL
+    );
+    mode := CASE WHEN concurrent THEN 'concurrent' ELSE 'blocking' END;
+    started := clock_timestamp();
+
+    BEGIN
+        EXECUTE format('REFRESH MATERIALIZED VIEW %s%I',
+                       CASE WHEN concurrent THEN 'CONCURRENTLY ' ELSE '' END, p_name);
+        status := 'refreshed';
+        error := NULL;
+    EXCEPTION WHEN OTHERS THEN
+        status := 'failed';
+        error := SQLERRM;
+    END;
+
+    duration_ms := ROUND((EXTRACT(EPOCH FROM clock_timestamp() - started) * 1000)::NUMERIC, 1);
+
+    INSERT INTO mv_refresh_log (mv_name, status, mode, input_signature, started_at, duration_ms, error)
+    VALUES (p_name, status, mode, p_input_signature, started, duration_ms, error);
+
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- GRANT EXECUTE ON FUNCTION refresh_mv(TEXT, TEXT, BOOLEAN) TO service_role;
@@ -0,0 +1,51 @@
+-- Dry-matter-basis nutrition columns for cross-form comparisons
+-- value_dm = value_as_fed * 100 / (100 - moisture_percent)
+-- Maintained at write time by the ETL (etl/nutrition_engine.dry_matter_fields)
+-- and backfilled/re-synced by run_nutrition_dry_matter.py. NULL where
+-- moisture or the as-fed value is unknown, and where the value cannot fit
+-- the dry matter (see evaluate_nutrition). kcal_per_100g_dm is based on the
+-- plausible kcal (declared, else the Atwater estimate).
+-- The foods_canonical rebuild (sql/foods_canonical.sql and the
+-- EXECUTE_ALL_PIPELINE scripts) carries these columns through the compat
+-- views and recreates the indexes below.
+
+ALTER TABLE food_candidates
+    ADD COLUMN IF NOT EXISTS protein_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS fat_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS fiber_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS ash_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS carbohydrate_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS kcal_per_100g_dm NUMERIC(6,1);
+
+ALTER TABLE food_candidates_sc
+    ADD COLUMN IF NOT EXISTS protein_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS fat_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS fiber_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS ash_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS carbohydrate_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS kcal_per_100g_dm NUMERIC(6,1);
+
+ALTER TABLE foods_canonical
+    ADD COLUMN IF NOT EXISTS protein_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS fat_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS fiber_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS ash_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS carbohydrate_dm_percent NUMERIC(5,2),
+    ADD COLUMN IF NOT EXISTS kcal_per_100g_dm NUMERIC(6,1);
+
+-- Recommendation queries filter/sort on protein DM% and energy density,
+-- usually within a form
+CREATE INDEX IF NOT EXISTS idx_foods_canonical_protein_dm
+    ON foods_canonical(protein_dm_percent) WHERE protein_dm_percent IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_foods_canonical_kcal_dm
+    ON foods_canonical(kcal_per_100g_dm) WHERE kcal_per_100g_dm IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_foods_canonical_form_protein_dm
+    ON foods_canonical(form, protein_dm_percent DESC);
+
+CREATE INDEX IF NOT EXISTS idx_food_candidates_protein_dm
+    ON food_candidates(protein_dm_percent) WHERE protein_dm_percent IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_food_candidates_sc_protein_dm
+    ON food_candidates_sc(protein_dm_percent) WHERE protein_dm_percent IS NOT NULL;
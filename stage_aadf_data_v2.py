@@ -13,10 +13,11 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from supabase import create_client, Client
-import yaml
 from difflib import SequenceMatcher
 from dotenv import load_dotenv
 
+from etl.brand_resolver import BrandResolver, get_brand_resolver
+
 # Load environment variables
 load_dotenv()
 
@@ -25,31 +26,6 @@ SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def load_brand_maps() -> Tuple[Dict, Dict]:
-    """Load brand normalization maps"""
-    brand_map = {}
-    brand_phrase_map = {}
-    
-    # Load canonical brand map
-    if Path('data/canonical_brand_map.yaml').exists():
-        with open('data/canonical_brand_map.yaml', 'r') as f:
-            canonical_map = yaml.safe_load(f) or {}
-            for canonical, variations in canonical_map.items():
-                if isinstance(variations, list):
-                    for variation in variations:
-                        brand_map[variation.lower()] = canonical
-                elif variations:  # Single value
-                    brand_map[str(variations).lower()] = canonical
-    
-    # Load brand phrase map
-    if Path('data/brand_phrase_map.csv').exists():
-        df = pd.read_csv('data/brand_phrase_map.csv')
-        for _, row in df.iterrows():
-            if pd.notna(row.get('phrase')) and pd.notna(row.get('brand')):
-                brand_phrase_map[row['phrase'].lower()] = row['brand']
-    
-    return brand_map, brand_phrase_map
-
 def extract_brand_product(url: str, description: str) -> Tuple[str, str]:
     """Extract brand and product from AADF URL with improved logic"""
     brand = ""
@@ -146,21 +122,15 @@ def extract_brand_product(url: str, description: str) -> Tuple[str, str]:
     
     return brand.strip(), product.strip()
 
-def normalize_brand(brand: str, brand_map: Dict, phrase_map: Dict) -> str:
-    """Normalize brand using mapping"""
+def normalize_brand(brand: str, resolver: BrandResolver) -> str:
+    """Normalize brand using the shared brand resolver"""
     if not brand:
         return ""
     
-    brand_lower = brand.lower().strip()
-    
-    # Direct map lookup
-    if brand_lower in brand_map:
-        return brand_map[brand_lower]
-    
-    # Check phrase map
-    for phrase, canonical in phrase_map.items():
-        if phrase in brand_lower:
-            return canonical
+    # Alias lookup, then a known brand phrase at the start
+    canonical = resolver.canonical(brand) or resolver.brand_from_name(brand)[0]
+    if canonical:
+        return canonical
     
     # Clean up common patterns
     brand_clean = re.sub(r'\s+', ' ', brand)
@@ -297,10 +267,10 @@ def main():
     print("=== AADF Data Staging V2 ===")
     print(f"Started: {datetime.now()}")
     
-    # Load brand maps
-    print("\n1. Loading brand normalization maps...")
-    brand_map, phrase_map = load_brand_maps()
-    print(f"   Loaded {len(brand_map)} brand mappings")
+    # Load brand resolver
+    print("\n1. Loading brand resolver...")
+    resolver = get_brand_resolver()
+    print(f"   Loaded {len(resolver.aliases)} brand aliases")
     
     # Load CSV
     print("\n2. Loading AADF dataset...")
@@ -318,7 +288,7 @@ def main():
         brand_raw, product_raw = extract_brand_product(url, description)
         
         # Normalize
-        brand_slug = normalize_brand(brand_raw, brand_map, phrase_map)
+        brand_slug = normalize_brand(brand_raw, resolver)
         product_norm = normalize_product_name(product_raw)
         
         # Detect attributes
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory Supabase fakes for the tests
+"""
+
+ROW_CAP = 1000
+
+
+class FakeQuery:
+    """Minimal PostgREST query builder that caps results like the real API"""
+
+    def __init__(self, rows, client=None, name=None):
+        self.rows = rows
+        self.client, self.name = client, name
+        self.calls = []
+
+    def select(self, columns):
+        self.calls.append(('select', columns))
+        return self
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if r[column] == value]
+        return self
+
+    def gt(self, column, value):
+        self.rows = [r for r in self.rows if r[column] > value]
+        return self
+
+    def order(self, column):
+        self.rows = sorted(self.rows, key=lambda r: r[column])
+        return self
+
+    def limit(self, n):
+        self.rows = self.rows[:n]
+        return self
+
+    def range(self, start, end):
+        self.rows = self.rows[start:end + 1]
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.client.upserts.append((self.name, rows, on_conflict))
+        return self
+
+    def execute(self):
+        class Response:
+            pass
+        response = Response()
+        response.data = self.rows[:ROW_CAP]
+        return response
+
+
+class FakeClient:
+    """
+    Every table() holds the same rows; the queries made are kept in order and
+    upserts are recorded as (table, rows, on_conflict)
+    """
+
+    def __init__(self, rows=()):
+        self.rows = rows
+        self.tables = []
+        self.queries = []
+        self.upserts = []
+
+    def table(self, name):
+        query = FakeQuery(list(self.rows), self, name)
+        self.tables.append(name)
+        self.queries.append(query)
+        return query
+
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client, self.name, self.params = client, name, params
+
+    def execute(self):
+        self.client.calls.append((self.name, self.params))
+
+        class Response:
+            data = self.client.respond(self.name, self.params)
+        return Response()
+
+
+class FakeRpcClient:
+    """Records every rpc() call; `respond(name, params)` gives the response data"""
+
+    def __init__(self, respond=None):
+        self.calls = []
+        if respond is not None:
+            self.respond = respond
+
+    def respond(self, name, params):
+        return None
+
+    def rpc(self, name, params):
+        return FakeRpc(self, name, params)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the per-brand acceptance gate metrics
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from etl.acceptance_gates import (_token_string_count, failing_reasons, gate_label, gate_report,
+                                  gate_thresholds, has_tokens, load_gates)
+
+CATALOG = pd.DataFrame({
+    'brand_slug': ['acana', 'acana', 'brit', 'brit', None],
+    'brand': ['Acana', 'Acana', 'Brit', 'Brit', 'Nameless'],
+    'form': ['dry', 'dry', 'dry', None, 'dry'],
+    'life_stage': ['adult', 'puppy', 'adult', None, 'adult'],
+    'ingredients_tokens': [['chicken'], '["turkey", "eggs"]', '[]', 'not json', None],
+    'kcal_per_100g': [380.0, 200.0, 650.0, None, 380.0],
+})
+
+
+def test_config_thresholds():
+    assert gate_thresholds(load_gates()) == {'life_stage': 95, 'form': 90, 'ingredients': 85,
+                                             'kcal_valid': 90, 'kcal_outliers': 0}
+
+
+def test_kcal_labels_follow_kcal_range():
+    config = load_gates()
+    gates = config['gates']
+    assert gate_label(gates['form'], config) == 'Form'
+    assert gate_label(gates['kcal_valid'], config) == 'Kcal Valid (200-600)'
+    assert gate_label(gates['kcal_valid'], dict(config, kcal_range=[250, 550.5])) == 'Kcal Valid (250-550.5)'
+
+
+def test_has_tokens():
+    assert list(has_tokens(CATALOG['ingredients_tokens'])) == [True, True, False, False, False]
+
+
+def test_metrics_and_gates_per_brand():
+    report = gate_report(CATALOG).set_index('brand_slug')
+    assert list(report.index) == ['acana', 'brit']
+
+    acana, brit = report.loc['acana'], report.loc['brit']
+    assert acana['meets_all_gates'] and acana['failing_gates'] == []
+    assert (brit['sku_count'], brit['form_pct'], brit['kcal_valid_pct'], brit['kcal_outliers']) == (2, 50.0, 0.0, 1)
+    assert failing_reasons(brit) == ['life_stage 50.0%', 'form 50.0%', 'ingredients 0.0%', 'kcal_valid 0.0%',
+                                     'kcal_outliers 1']
+
+
+def test_custom_gates():
+    config = {'kcal_range': [300, 700], 'gates': {'form': {'metric': 'form_pct', 'min': 50}}}
+    report = gate_report(CATALOG, config).set_index('brand_slug')
+    assert report['meets_all_gates'].all()
+    assert report.loc['brit', 'kcal_valid_pct'] == 50.0
+
+
+def test_one_pass_over_large_catalog():
+    rng = np.random.default_rng(0)
+    n = 20000
+    catalog = pd.DataFrame({
+        'brand_slug': rng.choice([f'brand_{i}' for i in range(200)], n),
+        'brand': 'Brand',
+        'form': rng.choice(['dry', None], n),
+        'life_stage': 'adult',
+        'ingredients_tokens': rng.choice(['["a"]', '[]', None], n),
+        'kcal_per_100g': rng.uniform(100, 700, n),
+    })
+    _token_string_count.cache_clear()
+    report = gate_report(catalog).set_index('brand_slug')
+    assert len(report) == 200 and report['sku_count'].sum() == n
+    # Each distinct token string is parsed once, not once per row
+    assert _token_string_count.cache_info().misses == 2
+
+    brand = catalog[catalog['brand_slug'] == 'brand_7']
+    assert report.loc['brand_7', 'form_pct'] == brand['form'].notna().mean() * 100
+    assert report.loc['brand_7', 'ingredients_pct'] == (brand['ingredients_tokens'] == '["a"]').mean() * 100
+    assert report.loc['brand_7', 'kcal_outliers'] == (~brand['kcal_per_100g'].between(200, 600)).sum()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Test the rule-indexed brand normalization
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from etl.brand_normalization import BrandRuleIndex, duplicate_keys, normalize_frame, rebuild_product_keys
+
+PRODUCTS = pd.DataFrame([
+    {'product_id': 1, 'brand': 'Royal', 'brand_slug': 'royal', 'product_name': 'Canin Mini Adult', 'form': 'dry'},
+    {'product_id': 2, 'brand': 'hills', 'brand_slug': 'hills', 'product_name': 'Science Plan Adult Large Breed',
+     'form': 'dry'},
+    {'product_id': 3, 'brand': 'Unknown', 'brand_slug': 'unknown', 'product_name': 'Canin Special Formula',
+     'form': 'dry'},
+    {'product_id': 4, 'brand': 'Generic', 'brand_slug': 'generic', 'product_name': 'Canine Formula', 'form': 'dry'},
+    {'product_id': 5, 'brand': 'Royal', 'brand_slug': 'royal', 'product_name': 'Canin Mini', 'form': 'dry'},
+    {'product_id': 6, 'brand': 'Acana', 'brand_slug': 'acana', 'product_name': None, 'form': None},
+    {'product_id': 7, 'brand': 'Royal Canin', 'brand_slug': 'royal_canin', 'product_name': 'Mini Adult',
+     'form': 'dry'},
+])
+
+
+def test_rules_from_map():
+    index = BrandRuleIndex.from_file()
+    df, changes = normalize_frame(PRODUCTS, index)
+
+    assert list(df['brand']) == ['Royal Canin', "Hill's", 'Royal Canin', 'Generic', 'Royal Canin', 'Acana',
+                                 'Royal Canin']
+    # Brand line kept, name stripped; short remainders are not stripped
+    assert df.loc[1, 'product_name'] == 'Adult Large Breed' and df.loc[1, 'brand_line'] == 'Science Plan'
+    assert df.loc[4, 'product_name'] == 'Canin Mini'
+    assert [c['product_id'] for c in changes] == [1, 2, 3, 5]
+    assert changes[2]['confidence'] == 'orphan'
+    # Input is left untouched
+    assert PRODUCTS.loc[0, 'brand'] == 'Royal'
+
+
+def test_keys_and_duplicates():
+    df, _ = normalize_frame(PRODUCTS, BrandRuleIndex.from_file())
+    df = rebuild_product_keys(df)
+    assert df.loc[0, 'product_key'] == 'royal_canin|mini_adult|dry'
+    assert df.loc[5, 'product_key'] == 'acana||unknown'
+
+    dupes = duplicate_keys(df)
+    assert dupes.to_dict('records') == [{'product_key': 'royal_canin|mini_adult|dry', 'count': 2,
+                                         'product_ids': [1, 7], 'brands': ['Royal Canin'],
+                                         'names': ['Mini Adult']}]
+
+
+def test_batch_resolves_each_pair_once():
+    index = BrandRuleIndex.from_file()
+    calls = []
+    normalize = index.normalize
+
+    def counting(brand, name):
+        calls.append((brand, name))
+        return normalize(brand, name)
+
+    index.normalize = counting
+    df = pd.concat([PRODUCTS] * 1500, ignore_index=True)
+    batch = rebuild_product_keys(normalize_frame(df, index)[0])
+    assert len(calls) == len(PRODUCTS.drop_duplicates(['brand', 'product_name']))
+
+    single = rebuild_product_keys(normalize_frame(PRODUCTS, BrandRuleIndex.from_file())[0])
+    assert batch['product_key'].tolist() == single['product_key'].tolist() * 1500
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the compiled brand resolver
+"""
+import shutil
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from etl.brand_resolver import SOURCES, brand_key, compile_resolver, load_resolver, source_signature
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+
+def test_alias_lookups():
+    resolver = compile_resolver()
+    assert brand_key("Hill’s") == brand_key('HILLS') == 'hills'
+    assert resolver.canonical("Hill's") == resolver.canonical('hills') == "Hill's"
+    assert resolver.canonical('Royal|Canin') == 'Royal Canin'
+    assert resolver.brand_slug('royal') == 'royal_canin'
+    assert resolver.brand_slug('Lily’s Kitchen') == 'lilys_kitchen'
+    assert resolver.canonical('No Such Brand') is None
+
+
+def test_canonical_agrees_with_brand_slug():
+    import yaml
+
+    resolver = compile_resolver()
+    with open(DATA_DIR / 'canonical_brand_map.yaml') as f:
+        mappings = yaml.safe_load(f)['canonical_brand_mappings']
+    for key, slug in mappings.items():
+        canonical = resolver.canonical(key)
+        assert resolver.brand_slug(key) == slug
+        assert resolver.brand_slug(canonical) == slug, (key, canonical)
+    # The fuzzy v2 map lists 'James' under James & Ella
+    assert resolver.canonical('James') == 'James Wellbeloved'
+
+
+def test_longest_prefix_and_families():
+    resolver = compile_resolver()
+    assert resolver.brand_from_name("Hill's Science Plan Adult") == ("Hill's", "Hill's Science Plan")
+    assert resolver.brand_from_name('Wolf of Wilderness Wild Hills') == ('Wolf of Wilderness', 'Wolf of Wilderness')
+    assert resolver.brand_from_name('Adult Chicken') == (None, None)
+
+    assert resolver.resolve_family('royal', 'Mini Adult') == ('royal_canin', 'size')
+    assert resolver.resolve_family('Unknown', 'Royal Canin Expert') == ('royal_canin', 'expert')
+    assert resolver.resolve_family('Acme', 'Chicken') == ('other', None)
+    assert resolver.phrase_rules.normalize('Royal', 'Canin Mini Adult')[1] == 'Mini Adult'
+
+
+def test_artifact_rebuilt_only_when_sources_change(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for name in SOURCES:
+        shutil.copy(DATA_DIR / name, data_dir / name)
+    cache_file = tmp_path / 'cache' / 'brand_resolver.pkl'
+
+    first = load_resolver(data_dir, cache_file)
+    assert cache_file.exists()
+    cached = load_resolver(data_dir, cache_file)
+    assert cached.signature == first.signature
+    # Unpickled phrase rules still match
+    assert cached.phrase_rules.normalize('Royal', 'Canin Maxi Puppy')[0].canonical_brand == 'Royal Canin'
+
+    with open(data_dir / 'brand_alias_table.csv', 'a') as f:
+        f.write('acme pet,Acme\n')
+    rebuilt = load_resolver(data_dir, cache_file)
+    assert rebuilt.signature != first.signature
+    assert rebuilt.canonical('ACME Pet') == 'Acme'
+
+
+def test_signature_covers_the_compiler(tmp_path, monkeypatch):
+    import etl.brand_resolver as brand_resolver
+
+    before = source_signature()
+    module = tmp_path / 'brand_resolver.py'
+    module.write_text(Path(brand_resolver.__file__).read_text() + '\n# changed\n')
+    monkeypatch.setattr(brand_resolver, '__file__', str(module))
+    assert source_signature() != before
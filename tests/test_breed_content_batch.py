@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the derived breed content batch: diffing and bulk writes
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import breed_content_batch
+from breed_content_batch import BreedContentBatch
+from conftest import FakeClient
+
+BASIC = {
+    'akita': {'breed_slug': 'akita', 'coat_length': 'medium', 'shedding': 'high', 'energy': 'moderate',
+              'size_category': 'large', 'trainability': 'low', 'adult_weight_avg_kg': 40},
+    'pug': {'breed_slug': 'pug', 'coat_length': 'short'},
+}
+
+
+def batch(derivers=('care',)):
+    return BreedContentBatch(FakeClient(), derivers=list(derivers), workers=1, chunk_size=2)
+
+
+def test_only_changed_rows_are_diffed():
+    long_care = 'x' * 250
+    breeds = [{'breed_slug': 'akita', 'general_care': 'Short.', 'grooming_needs': 'Brush weekly.'},
+              {'breed_slug': 'pug', 'general_care': None},          # too little data to generate care
+              {'breed_slug': 'boxer', 'general_care': long_care}]   # already substantial
+    changes = batch().compute(breeds, BASIC)
+    assert [change['breed_slug'] for change in changes] == ['akita']
+    change = changes[0]
+    assert change['changes']['general_care'].startswith('**Grooming:** Brush weekly.')
+    assert change['before'] == {'general_care': 'Short.'}
+
+    # Re-running on the written value is a no-op
+    breeds[0]['general_care'] = change['changes']['general_care']
+    assert batch().compute(breeds, BASIC) == []
+
+
+def test_deriver_errors_are_reported_per_breed(monkeypatch):
+    def broken(breed, basic_data):
+        if breed['breed_slug'] == 'pug':
+            raise ValueError('no data')
+        return {'shedding': 'low'}
+
+    monkeypatch.setitem(breed_content_batch.DERIVERS, 'broken', broken)
+    changes = {c['breed_slug']: c for c in batch(['broken']).compute(
+        [{'breed_slug': 'akita'}, {'breed_slug': 'pug'}, {'breed_slug': 'boxer', 'shedding': 'low'}], BASIC)}
+    assert changes['akita']['changes'] == {'shedding': 'low'} and changes['akita']['errors'] == []
+    assert changes['pug']['changes'] == {} and changes['pug']['errors'] == ['broken: no data']
+    assert 'boxer' not in changes
+
+    report = BreedContentBatch.report(list(changes.values()), total_breeds=3, dry_run=True)
+    assert report['breeds_changed'] == 1 and report['breeds_with_errors'] == 1
+    assert report['fields_changed'] == {'shedding': 1}
+
+
+def test_apply_upserts_by_column_set_in_batches(monkeypatch):
+    monkeypatch.setattr(breed_content_batch, 'UPSERT_BATCH', 2)
+    changes = [{'breed_slug': slug, 'changes': {'shedding': 'low'}, 'errors': []} for slug in ('a', 'b', 'c')]
+    changes.append({'breed_slug': 'd', 'changes': {'general_care': 'text', 'shedding': 'high'}, 'errors': []})
+    changes.append({'breed_slug': 'e', 'changes': {}, 'errors': ['care: failed']})
+
+    content = batch()
+    assert content.apply(changes) == 4
+    batches = [[row['breed_slug'] for row in rows] for _, rows, _ in content.supabase.upserts]
+    assert batches == [['a', 'b'], ['c'], ['d']]
+    assert {(table, conflict) for table, _, conflict in content.supabase.upserts} == {
+        (breed_content_batch.CONTENT_TABLE, 'breed_slug')}
+    assert all('updated_at' in row for _, rows, _ in content.supabase.upserts for row in rows)
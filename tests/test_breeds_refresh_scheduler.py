@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test the breed refresh scheduler: probing, budgeting and state recording
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from breeds_refresh_scheduler import BreedRefreshScheduler
+from conftest import FakeClient
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Wikipedia API: one revision per page title"""
+
+    def __init__(self, revisions):
+        self.revisions = revisions
+        self.headers = {}
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        pages = [{'title': title, 'revisions': [{'revid': self.revisions[title]}]}
+                 for title in params['titles'].split('|') if title in self.revisions]
+        return FakeResponse({'query': {'pages': pages}})
+
+
+def breed(slug, name, url=None):
+    return {'breed_slug': slug, 'display_name': name, 'wikipedia_url': url,
+            'adult_weight_avg_kg': 30, 'size_category': 'l'}
+
+
+def scheduler_for(revisions, state_rows=()):
+    return BreedRefreshScheduler(FakeClient(list(state_rows)), session=FakeSession(revisions))
+
+
+def test_shared_wikipedia_page_probes_every_breed():
+    url = 'https://en.wikipedia.org/wiki/Poodle'
+    scheduler = scheduler_for({'Poodle': 42})
+    plan = scheduler.plan(10, [breed('poodle-standard', 'Standard Poodle', url),
+                               breed('poodle-toy', 'Toy Poodle', url)])
+    assert [task.current_version for task in plan] == ['42', '42']
+    assert scheduler.session.calls == 1
+
+
+def test_budget_counts_probes_and_scrapes():
+    scheduler = scheduler_for({'Akita': 1, 'Beagle': 2, 'Boxer': 3})
+    plan = scheduler.plan(3, [breed('akita', 'Akita'), breed('beagle', 'Beagle'), breed('boxer', 'Boxer')])
+    # one probe for all three, then two scrapes fit the budget
+    assert sorted(task.action for task in plan) == ['over_budget', 'scrape', 'scrape']
+    assert scheduler.requests_used == 3
+
+
+def test_probed_over_budget_and_unchanged_tasks_are_recorded():
+    state = {'breed_slug': 'akita', 'source': 'wikipedia', 'revision_id': 1, 'scraped_version': '1', 'checks': 4}
+    scheduler = scheduler_for({'Akita': 1, 'Beagle': 2}, [state])
+    plan = scheduler.plan(1, [breed('akita', 'Akita'), breed('beagle', 'Beagle')])
+    actions = {task.breed_slug: task.action for task in plan}
+    assert actions == {'akita': 'skip_unchanged', 'beagle': 'over_budget'}
+
+    assert scheduler.record_probes(plan) == 2
+    recorded = {row['breed_slug']: row for _, row, _ in scheduler.supabase.upserts}
+    assert recorded['akita']['checks'] == 5
+    assert recorded['beagle']['revision_id'] == 2
+    assert 'scraped_version' not in recorded['beagle']
+
+
+def test_failed_scrape_is_retried():
+    scheduler = scheduler_for({'Akita': 7})
+    task = scheduler.plan(5, [breed('akita', 'Akita')])[0]
+    assert task.action == 'scrape'
+
+    state = scheduler.record(task, failed=True)
+    assert state['failures'] == 1 and 'scraped_version' not in state
+    assert scheduler.plan(5, [breed('akita', 'Akita')])[0].action == 'scrape'
+
+    state = scheduler.record(task, scraped=True)
+    assert state['failures'] == 0 and state['scraped_version'] == '7'
+    assert scheduler.plan(5, [breed('akita', 'Akita')])[0].action == 'skip_unchanged'
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the single-pass chunked catalog audit
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+
+from etl.brand_normalization import BrandRuleIndex
+from etl.catalog_audit import (CoverageRule, DuplicateKeyRule, InvalidSlugRule, StringifiedArrayRule,
+                               ValueCountsRule, audit_source, count_rows, default_rules, iter_chunks,
+                               required_columns, run_audit)
+
+CATALOG = pd.DataFrame({
+    'product_key': ['a|x|dry', 'b|y|dry', 'a|x|dry', 'c|z|wet', 'b|y|dry', 'a|x|dry'],
+    'brand': ['Royal', 'Brit', 'Royal', 'Acana', 'Brit', None],
+    'brand_slug': ['royal', 'brit', 'royal', "Hill's", 'brit', None],
+    'product_name': ['Canin Mini Adult', 'Care Puppy', 'Canin Maxi Adult', 'Senior Formula', 'Care', 'Adult'],
+    'life_stage': [None, 'puppy', None, None, 'adult', None],
+    'form': ['dry', 'dry', None, 'wet', 'dry', None],
+    'kcal_per_100g': [380, 20, 400, None, 700, 350],
+    'ingredients_tokens': ['["chicken"]', '["rice"]', '[]', None, '["lamb"]', 'chicken, rice'],
+})
+
+
+@pytest.fixture
+def catalog_csv(tmp_path):
+    path = tmp_path / 'foods.csv'
+    CATALOG.to_csv(path, index=False)
+    return path
+
+
+def test_chunked_pass_matches_single_chunk(catalog_csv):
+    index = BrandRuleIndex.from_file()
+    whole = audit_source(catalog_csv, default_rules(index), chunksize=100)
+    chunked = audit_source(catalog_csv, default_rules(index), chunksize=2)
+    assert chunked['chunks'] == 3 and whole['chunks'] == 1
+    for name in ('coverage', 'brands', 'stringified_arrays', 'invalid_slugs', 'duplicate_keys', 'kcal_outliers',
+                 'life_stage_inferable', 'brand_splits'):
+        assert chunked[name] == whole[name], name
+
+
+def test_rule_results(catalog_csv):
+    report = audit_source(catalog_csv, default_rules(BrandRuleIndex.from_file()), chunksize=2)
+    assert report['rows'] == 6
+    assert report['coverage']['form'] == 66.7
+    assert report['brands']['distinct_brands'] == 3
+    assert report['brands']['top_brand_slugs'] == {'royal': 2, 'brit': 2, "Hill's": 1}
+    assert report['brands']['royal_canin_variants'] == ['royal']
+    assert [issue['column'] for issue in report['stringified_arrays']] == ['ingredients_tokens']
+    assert report['invalid_slugs'] == [{'column': 'brand_slug', 'count': 1, 'samples': ["Hill's"]}]
+    # Duplicates across chunk boundaries
+    assert report['duplicate_keys'] == {'total_duplicates': 5, 'unique_keys': 2,
+                                        'samples': [{'product_key': 'a|x|dry', 'count': 3},
+                                                    {'product_key': 'b|y|dry', 'count': 2}]}
+    assert report['kcal_outliers']['count'] == 2
+    assert report['price_outliers'] == {}
+    assert report['life_stage_inferable'] == 4
+    assert report['brand_splits'][0]['pattern'] == 'Royal|Canin' and report['brand_splits'][0]['count'] == 2
+
+
+def test_projection(catalog_csv):
+    rules = [CoverageRule(('form',)), DuplicateKeyRule(), ValueCountsRule('brand')]
+    assert required_columns(rules) == ['form', 'product_key', 'brand']
+    # Stringified arrays are looked for in every column unless a list is given
+    assert required_columns(default_rules(BrandRuleIndex([]))) is None
+    assert required_columns([StringifiedArrayRule(['allergens'])]) == ['allergens']
+    assert list(next(iter_chunks(catalog_csv, ['form', 'missing']))) == ['form']
+
+
+def test_parquet_source(catalog_csv, tmp_path):
+    pytest.importorskip('pyarrow')
+    rules = [CoverageRule(('form',)), DuplicateKeyRule(), ValueCountsRule('brand')]
+    parquet = tmp_path / 'foods.parquet'
+    CATALOG.to_parquet(parquet, index=False)
+    report = audit_source(parquet, rules, chunksize=4)
+    assert report['columns'] == ['form', 'product_key', 'brand']
+    assert report['brand_counts'] == {'Royal': 2, 'Brit': 2, 'Acana': 1}
+    assert count_rows(parquet) == count_rows(catalog_csv) == 6
+
+
+def test_run_audit_over_frames():
+    chunks = [CATALOG.iloc[:3], CATALOG.iloc[3:]]
+    report = run_audit(chunks, [InvalidSlugRule(), DuplicateKeyRule('brand')])
+    assert report['rows'] == 6
+    assert report['duplicate_keys']['unique_keys'] == 2
+
+
+def test_duplicate_runs_stay_merged():
+    rule = DuplicateKeyRule()
+    for start in range(0, 40, 4):
+        rule.observe(pd.DataFrame({'product_key': [f'k{i % 25}' for i in range(start, start + 4)]}))
+    # sizes halve at least at every step, so there are O(log n) runs
+    assert all(len(a) > len(b) for a, b in zip(rule.runs, rule.runs[1:]))
+    assert rule.result()['total_duplicates'] == 30 and rule.result()['unique_keys'] == 15
+    assert [sample['product_key'] for sample in rule.result()['samples']] == ['k0', 'k1', 'k2', 'k3', 'k4']
+
+
+def test_stringified_columns_found_in_the_data():
+    chunk = CATALOG.assign(allergens=["['chicken']", "['rice']", '[]', None, "['lamb']", '[]'],
+                           allergen_count=[1, 1, 0, 0, 1, 0])
+    report = run_audit([chunk.iloc[:3], chunk.iloc[3:]], [StringifiedArrayRule()])
+    assert [issue['column'] for issue in report['stringified_arrays']] == ['ingredients_tokens', 'allergens']
+
+    only = run_audit([chunk], [StringifiedArrayRule(['allergens'])])
+    assert only['stringified_arrays'] == [{'column': 'allergens', 'sample': "['chicken']", 'affected_rows': 5}]
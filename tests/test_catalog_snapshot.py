@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the Parquet catalog snapshots
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from conftest import FakeClient
+from etl.catalog_audit import audit_source, CoverageRule
+from etl.catalog_snapshot import (export_snapshot, has_snapshot, import_csv, latest_snapshot, load_snapshot,
+                                  open_table, parse_list, read_manifest)
+
+ROWS = [
+    {'product_key': 'brit|care_puppy|dry', 'brand': 'Brit', 'brand_slug': 'brit', 'form': 'dry',
+     'ingredients_tokens': ['chicken', 'rice'], 'available_countries': ['EU'], 'kcal_per_100g': 380.0,
+     'sources': [{'source': 'zooplus'}]},
+    {'product_key': 'acana|senior|wet', 'brand': 'Acana', 'brand_slug': 'acana', 'form': 'wet',
+     'ingredients_tokens': [], 'available_countries': None, 'kcal_per_100g': None, 'sources': None},
+    {'product_key': 'brit|mini|unknown', 'brand': 'Brit', 'brand_slug': 'brit', 'form': None,
+     'ingredients_tokens': None, 'available_countries': ['UK', 'EU'], 'kcal_per_100g': 350.0, 'sources': None},
+]
+
+
+def test_parse_list():
+    assert parse_list('["chicken", "rice"]') == ['chicken', 'rice']
+    assert parse_list("['UK', 'EU']") == ['UK', 'EU']
+    assert parse_list('chicken, rice') == ['chicken', 'rice']
+    assert parse_list('[]') == []
+    assert parse_list(None) is None and parse_list(float('nan')) is None
+
+
+def test_export_and_load(tmp_path):
+    client = FakeClient(ROWS)
+    snapshot = export_snapshot(client, ['foods_canonical', 'foods_published_prod'], root=tmp_path, name='s1')
+    assert latest_snapshot(tmp_path) == snapshot
+    assert read_manifest(root=tmp_path)['tables']['foods_canonical']['rows'] == 3
+    assert has_snapshot('foods_published_prod', root=tmp_path)
+    assert sorted(p.name for p in (snapshot / 'foods_canonical').iterdir())[0].startswith('form=')
+
+    schema = open_table('foods_canonical', root=tmp_path).schema
+    assert pa.types.is_dictionary(schema.field('brand_slug').type)
+    assert pa.types.is_dictionary(schema.field('form').type)
+    assert pa.types.is_list(schema.field('ingredients_tokens').type)
+
+    df = load_snapshot(root=tmp_path).set_index('product_key')
+    assert df.loc['brit|care_puppy|dry', 'ingredients_tokens'] == ['chicken', 'rice']
+    assert df.loc['acana|senior|wet', 'ingredients_tokens'] == []
+    assert df.loc['brit|mini|unknown', 'ingredients_tokens'] is None
+    assert pd.isna(df.loc['brit|mini|unknown', 'form'])
+    assert df.loc['brit|care_puppy|dry', 'sources'] == '[{"source": "zooplus"}]'
+    assert not isinstance(df['brand'].dtype, pd.CategoricalDtype)
+    assert isinstance(load_snapshot(root=tmp_path, categorical=True)['brand'].dtype, pd.CategoricalDtype)
+
+
+def test_projection_and_filters(tmp_path):
+    export_snapshot(FakeClient(ROWS), ['foods_canonical'], root=tmp_path)
+    brit = load_snapshot(columns=['product_key', 'kcal_per_100g', 'missing'], filters={'brand_slug': 'brit'},
+                         root=tmp_path)
+    assert list(brit.columns) == ['product_key', 'kcal_per_100g']
+    assert sorted(brit['product_key']) == ['brit|care_puppy|dry', 'brit|mini|unknown']
+    assert len(load_snapshot(filters={'form': ['dry', 'wet']}, root=tmp_path)) == 2
+    assert list(load_snapshot(filters={'form': None}, root=tmp_path)['product_key']) == ['brit|mini|unknown']
+
+
+def test_import_csv_and_audit(tmp_path):
+    csv = tmp_path / 'foods_canonical_enriched_SNAPSHOT_20250911_101939.csv'
+    frame = pd.DataFrame(ROWS)
+    frame['ingredients_tokens'] = ['["chicken", "rice"]', '[]', None]
+    frame['available_countries'] = ["['EU']", None, "['UK', 'EU']"]
+    frame.to_csv(csv, index=False)
+
+    snapshot = import_csv(csv, root=tmp_path / 'snapshots')
+    assert snapshot.name == '20250911_101939'
+    df = load_snapshot(snapshot=snapshot)
+    assert sorted(map(tuple, df['available_countries'].dropna())) == [('EU',), ('UK', 'EU')]
+
+    # The audit reads snapshot tables as Parquet directories
+    report = audit_source(snapshot / 'foods_canonical', [CoverageRule(('form', 'kcal_per_100g'))])
+    assert report['rows'] == 3 and report['coverage']['kcal_per_100g'] == 66.7
+
+
+def test_missing_snapshot(tmp_path):
+    assert latest_snapshot(tmp_path) is None and not has_snapshot(root=tmp_path)
+    with pytest.raises(FileNotFoundError):
+        load_snapshot(root=tmp_path)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test the YAML-driven food keyword classifier
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from etl.classify_foods import FoodClassifier, get_food_classifier, trie_regex
+from etl.normalize_foods import derive_form, derive_life_stage, normalize_life_stage
+
+RULES = {
+    'version': 1,
+    'dimensions': {
+        'form': {'rules': [
+            {'label': 'dry', 'keywords': ['dry', 'kibble']},
+            {'label': 'wet', 'keywords': ['can', 'canned', 'pouch'], 'substrings': ['nassfutter']},
+        ]},
+        'diets': {'multi': True, 'rules': [
+            {'label': 'grain_free', 'keywords': ['grain free']},
+            {'label': 'light', 'keywords': ['light'], 'confidence': 0.7},
+        ]},
+    }
+}
+
+
+def test_first_rule_wins_with_evidence():
+    form = FoodClassifier(RULES)['form']
+    result = form.classify('Canned chicken with dry kibble topper')
+    assert result.label == 'dry'
+    assert result.evidence == ('dry', 'kibble')
+    assert form.classify('Chicken pouches').label == 'wet'
+
+
+def test_whole_words_and_substrings():
+    form = FoodClassifier(RULES)['form']
+    assert not form.classify('Canagan canine formula')
+    assert form.classify('Hundenassfutter Rind').label == 'wet'
+
+
+def test_multi_dimension():
+    diets = FoodClassifier(RULES)['diets']
+    assert diets.labels('Grain Free Light') == ['grain_free', 'light']
+    assert diets.classify_all('light')[0].confidence == 0.7
+
+
+def test_classify_many_matches_single():
+    classifier = get_food_classifier()
+    texts = pd.Series(['Puppy pouches', None, 'Senior 7+ dry', 'Puppy pouches', 'Trockenfutter Welpe'], index=[5, 6, 7, 8, 9])
+    batch = classifier.life_stage.classify_many(texts)
+    assert list(batch.index) == [5, 6, 7, 8, 9]
+    for text, label in zip(texts, batch['label']):
+        assert (label if pd.notna(label) else None) == classifier.life_stage.classify(text).label
+
+
+def test_trie_regex_prefers_longest():
+    import re
+    pattern = re.compile(f'^(?:{trie_regex(["can", "canned", "cans"])})$')
+    assert all(pattern.match(w) for w in ['can', 'canned', 'cans'])
+    assert not pattern.match('cann')
+
+
+def test_normalize_foods_uses_shared_rules():
+    assert derive_form('Freeze-dried raw bites') == 'freeze_dried'
+    assert derive_form('Prescription diet') == 'vet'
+    assert derive_life_stage('All Life Stages chicken') == 'all'
+    assert derive_life_stage('Chicken & rice') == 'adult'
+    assert normalize_life_stage('Junior') == 'puppy'
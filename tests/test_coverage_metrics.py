@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the cached coverage metrics service
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from conftest import FakeRpcClient
+from etl.coverage_metrics import CoverageService, coverage_pct, parse_coverage
+
+PAYLOAD = {
+    'total': {'products': 10, 'with_form': 8, 'with_life_stage': 5, 'with_ingredients_raw': 4, 'kcal_valid': 9},
+    'brands': [
+        {'brand_slug': 'acana', 'products': 4, 'with_form': 4, 'with_life_stage': 1},
+        {'brand_slug': 'brit', 'products': 6, 'with_form': 4, 'with_life_stage': 4},
+    ],
+}
+
+
+def client_for():
+    return FakeRpcClient(lambda name, params: PAYLOAD)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_and_percentages():
+    snapshot = parse_coverage(PAYLOAD)
+    assert snapshot.total['with_kcal'] == 0
+    assert coverage_pct(snapshot.total, 'with_form') == 80.0
+    assert coverage_pct(snapshot.brand('acana'), 'with_life_stage') == 25.0
+    assert snapshot.brand('missing')['products'] == 0 and coverage_pct(snapshot.brand('missing'), 'with_form') == 0
+    assert [row['brand_slug'] for row in snapshot.brand_rows()] == ['brit', 'acana']
+    assert parse_coverage(None).total['products'] == 0
+
+
+def test_ttl_cache():
+    client, clock = client_for(), Clock()
+    service = CoverageService(client, ttl=60, kcal_range=(250, 550), clock=clock)
+
+    assert service.totals()['products'] == 10
+    assert service.brand('brit')['with_form'] == 4
+    clock.now += 59
+    service.totals()
+    assert client.calls == [('coverage_metrics', {'p_kcal_low': 250, 'p_kcal_high': 550})]
+
+    clock.now += 1
+    service.totals()
+    assert len(client.calls) == 2
+
+    service.snapshot(max_age=0)
+    service.invalidate()
+    service.totals()
+    assert len(client.calls) == 4
+
+
+def test_kcal_range_from_gate_config():
+    service = CoverageService(client_for())
+    assert service.kcal_range == (200, 600)
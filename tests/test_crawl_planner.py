@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test the coverage-driven crawl planner
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+import pytest
+
+from conftest import FakeClient, FakeRpcClient
+from etl.crawl_planner import (brand_queue, enqueue_plan, fetcher_yields, filled_fields, has_pending_tasks,
+                               load_config, missing_fields, plan_crawl, plan_summary, release_tasks,
+                               score_products, settle_tasks)
+
+KCAL = (200, 600)
+
+CATALOG = pd.DataFrame([
+    # zooplus page, missing ingredients + macros
+    {'product_key': 'acana|a|dry', 'brand_slug': 'acana', 'product_url': 'https://www.zooplus.de/p/1',
+     'form': 'dry', 'life_stage': 'adult', 'ingredients_tokens': [], 'kcal_per_100g': 380,
+     'protein_percent': None, 'fat_percent': None, 'price_per_kg_eur': 5.0},
+    # manufacturer page, missing everything
+    {'product_key': 'brit|b|dry', 'brand_slug': 'brit', 'product_url': 'https://brit-petfood.com/b',
+     'form': None, 'life_stage': None, 'ingredients_tokens': None, 'kcal_per_100g': None,
+     'protein_percent': None, 'fat_percent': None, 'price_per_kg_eur': None},
+    # blocked brand site, missing ingredients only
+    {'product_key': 'bozita|c|wet', 'brand_slug': 'bozita', 'product_url': 'https://bozita.com/c',
+     'form': 'wet', 'life_stage': 'adult', 'ingredients_tokens': '[]', 'kcal_per_100g': 90,
+     'protein_percent': 8.0, 'fat_percent': 5.0, 'price_per_kg_eur': 4.0},
+    # complete product
+    {'product_key': 'brit|d|dry', 'brand_slug': 'brit', 'product_url': 'https://brit-petfood.com/d',
+     'form': 'dry', 'life_stage': 'adult', 'ingredients_tokens': ['chicken'], 'kcal_per_100g': 350,
+     'protein_percent': 25.0, 'fat_percent': 12.0, 'price_per_kg_eur': 6.0},
+    # no URL
+    {'product_key': 'brit|e|dry', 'brand_slug': 'brit', 'product_url': None,
+     'form': None, 'life_stage': None, 'ingredients_tokens': None, 'kcal_per_100g': None,
+     'protein_percent': None, 'fat_percent': None, 'price_per_kg_eur': None},
+])
+
+
+def enqueue_response(name, params):
+    return [{'queued': len(params.get('p_tasks') or []), 'skipped': 1}]
+
+
+@pytest.fixture
+def config():
+    return load_config()
+
+
+def test_missing_fields(config):
+    missing = missing_fields(CATALOG, list(config['fields']), KCAL)
+    assert missing.loc[0].to_dict() == {'ingredients': True, 'life_stage': False, 'form': False, 'kcal': False,
+                                        'macros': True, 'price': False}
+    assert missing.loc[2, 'kcal']   # wet food kcal outside the gate range
+    assert not missing.loc[3].any()
+
+
+def test_score_products(config):
+    tasks = score_products(CATALOG, config, allowlist={'brit': 'PENDING'}, kcal_range=KCAL).set_index('product_key')
+    assert set(tasks.index) == {'acana|a|dry', 'brit|b|dry', 'bozita|c|wet'}
+    assert tasks.loc['acana|a|dry', 'fetcher'] == 'zooplus' and tasks.loc['acana|a|dry', 'credits'] == 75
+    assert tasks.loc['bozita|c|wet', 'fetcher'] == 'scrapingbee'
+    assert tasks.loc['brit|b|dry', 'fetcher'] == 'manufacturer'
+    assert tasks.loc['brit|b|dry', 'domain'] == 'brit-petfood.com'
+    assert tasks.loc['acana|a|dry', 'missing_fields'] == ['ingredients', 'macros']
+    # 0.8 * 1.0 + 0.75 * 0.5
+    assert tasks.loc['acana|a|dry', 'expected_gain'] == pytest.approx(1.175)
+    assert tasks.loc['acana|a|dry', 'priority'] == pytest.approx(1.175 / 75)
+    # PENDING brands weigh double
+    manufacturer = 2.0 * (0.6 + 0.7 + 0.7 + 0.5 + 0.6 * 0.5 + 0.2 * 0.5)
+    assert tasks.loc['brit|b|dry', 'expected_gain'] == pytest.approx(manufacturer)
+    assert tasks.index[0] == 'brit|b|dry'   # best gain per credit first
+
+    decayed = score_products(CATALOG, config, attempts={('brit|b|dry', 'manufacturer'): 2},
+                             kcal_range=KCAL).set_index('product_key')
+    assert decayed.loc['brit|b|dry', 'expected_gain'] == pytest.approx(manufacturer / 2 * 0.25)
+
+
+def test_observed_yields_blend(config):
+    observed = [{'fetcher': 'zooplus', 'field': 'ingredients', 'attempts': 80, 'filled': 20},
+                {'fetcher': 'unknown', 'field': 'ingredients', 'attempts': 5, 'filled': 5}]
+    yields = fetcher_yields(config, observed)
+    assert yields.loc['zooplus', 'ingredients'] == pytest.approx((0.8 * 20 + 20) / 100)
+    assert yields.loc['manufacturer', 'form'] == 0.7
+
+
+def test_budgeted_plan(config):
+    tasks = score_products(CATALOG, config, kcal_range=KCAL)
+    # 26 credits: the manufacturer task (1) and the scrapingbee task (25); zooplus (75) does not fit
+    plan = plan_crawl(tasks, max_credits=26)
+    assert list(plan['fetcher']) == ['manufacturer', 'scrapingbee']
+    assert len(plan_crawl(tasks, max_requests=1)) == 1
+    assert list(plan_crawl(tasks, fetchers=['zooplus'])['product_key']) == ['acana|a|dry']
+
+    summary = plan_summary(plan, total_products=len(CATALOG))
+    assert summary['requests'] == 2 and summary['credits'] == 26
+    assert summary['expected_fills']['ingredients'] == pytest.approx(1.3)
+    assert summary['coverage_points']['ingredients'] == pytest.approx(26.0)
+    assert summary['by_fetcher']['scrapingbee'] == {'requests': 1, 'credits': 25}
+    assert list(brand_queue(plan)['brand_slug']) == ['brit', 'bozita']
+
+
+def test_domain_cap():
+    tasks = pd.DataFrame({'domain': ['a.com', 'a.com', 'b.com', 'a.com'], 'credits': [1, 1, 1, 1],
+                          'fetcher': 'manufacturer', 'expected_gain': [4, 3, 2, 1]})
+    assert list(plan_crawl(tasks, max_per_domain=2)['expected_gain']) == [4, 3, 2]
+
+
+def test_enqueue_and_settle(config):
+    client = FakeRpcClient(enqueue_response)
+    plan = plan_crawl(score_products(CATALOG, config, kcal_range=KCAL))
+    result = enqueue_plan(client, plan, plan_id='p1')
+    assert result == {'plan_id': 'p1', 'queued': 3, 'skipped': 1}
+    name, params = client.calls[0]
+    assert name == 'enqueue_crawl_plan' and params['p_plan_id'] == 'p1'
+    assert set(params['p_tasks'][0]) == {'product_key', 'brand_slug', 'url', 'domain', 'fetcher', 'missing_fields',
+                                         'expected_gain', 'credits', 'priority'}
+    assert client.calls[1] == ('skip_stale_crawl_tasks', {'p_plan_id': 'p1', 'p_fetchers': None})
+
+    client.calls.clear()
+    after = CATALOG.copy()
+    after.at[0, 'ingredients_tokens'] = ['chicken']
+    tasks = [{'id': 1, 'product_key': 'acana|a|dry', 'missing_fields': ['ingredients', 'macros']},
+             {'id': 2, 'product_key': 'brit|b|dry', 'missing_fields': ['form']},
+             {'id': 3, 'product_key': 'gone', 'missing_fields': ['form']}]
+    assert settle_tasks(client, tasks, after, config, KCAL) == {'done': 1, 'failed': 2}
+    assert client.calls[0] == ('complete_crawl_task', {'p_id': 1, 'p_status': 'done',
+                                                       'p_fields_filled': ['ingredients']})
+    assert client.calls[1][1]['p_status'] == 'failed' and client.calls[1][1]['p_fields_filled'] == []
+
+
+def test_filled_fields():
+    result = {'ingredients_raw': 'Chicken, rice', 'nutrition': {'protein_percent': 25.0, 'fat_percent': 14.0}}
+    assert filled_fields(result) == ['ingredients', 'macros']
+    assert filled_fields({'error': 'HTTP 500'}) == []
+
+
+def test_chunked_enqueue_skips_once(config, monkeypatch):
+    import etl.crawl_planner as crawl_planner
+
+    monkeypatch.setattr(crawl_planner, 'ENQUEUE_CHUNK', 2)
+    client = FakeRpcClient(enqueue_response)
+    plan = plan_crawl(score_products(CATALOG, config, kcal_range=KCAL))
+    assert enqueue_plan(client, plan, plan_id='p2') == {'plan_id': 'p2', 'queued': 3, 'skipped': 1}
+    assert [name for name, _ in client.calls] == ['enqueue_crawl_plan', 'enqueue_crawl_plan', 'skip_stale_crawl_tasks']
+
+
+def test_fetcher_scoped_replan_skips_only_its_fetchers(config):
+    client = FakeRpcClient(enqueue_response)
+    plan = plan_crawl(score_products(CATALOG, config, kcal_range=KCAL), fetchers=['zooplus'])
+    enqueue_plan(client, plan, plan_id='p3', fetchers=['zooplus'])
+    assert [task['fetcher'] for task in client.calls[0][1]['p_tasks']] == ['zooplus']
+    assert client.calls[-1] == ('skip_stale_crawl_tasks', {'p_plan_id': 'p3', 'p_fetchers': ['zooplus']})
+
+
+def test_release_tasks():
+    client = FakeRpcClient(enqueue_response)
+    assert release_tasks(client, [{'id': 4}, {'id': 5}]) == 2
+    assert client.calls == [('release_crawl_tasks', {'p_ids': [4, 5]})]
+    assert release_tasks(client, []) == 0 and len(client.calls) == 1
+
+
+def test_has_pending_tasks():
+    rows = [{'id': 1, 'fetcher': 'zooplus', 'status': 'done'},
+            {'id': 2, 'fetcher': 'manufacturer', 'status': 'pending'}]
+    assert not has_pending_tasks(FakeClient(rows), 'zooplus')
+    rows.append({'id': 3, 'fetcher': 'zooplus', 'status': 'pending'})
+    client = FakeClient(rows)
+    assert has_pending_tasks(client, 'zooplus') and client.tables == ['crawl_queue']
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the blocking + union-find duplicate clustering engine
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from etl.dedup import (candidate_pairs, blocking_keys, cluster_products, deduplicate_frame,
+                       duplicate_clusters, score_frame, score_product, url_product_id)
+
+PRODUCTS = [
+    # Same product, name punctuation differs; second is more complete
+    {'brand': 'Acana', 'product_name': 'Acana Wild Prairie', 'form': 'dry',
+     'protein_percent': 33.0, 'fat_percent': 17.0},
+    {'brand': 'Acana', 'product_name': 'Wild-Prairie', 'form': 'dry', 'protein_percent': 33.0,
+     'fat_percent': 17.0, 'ingredients_raw': 'chicken, turkey', 'product_url': 'https://www.zooplus.de/shop/dogs/123456'},
+    # Same retailer id as above, different name -> joined transitively
+    {'brand': 'Acana', 'product_name': 'Acana Wild Prairie Dog 11.4kg', 'form': 'dry',
+     'product_url': 'https://zooplus.de/shop/dogs/123456?activeVariant=2'},
+    # Same name but wet: not a duplicate
+    {'brand': 'Acana', 'product_name': 'Wild Prairie', 'form': 'wet', 'protein_percent': 9.0, 'fat_percent': 5.0},
+    # Different product sharing the brand
+    {'brand': 'Acana', 'product_name': 'Pacifica', 'form': 'dry', 'protein_percent': 35.0, 'fat_percent': 17.0},
+    # Same GTIN, different name
+    {'brand': 'Orijen', 'product_name': 'Original', 'form': 'dry', 'gtin': '0064992525112'},
+    {'brand': 'Orijen', 'product_name': 'Orijen Adult Original', 'form': 'dry', 'gtin': '64992525112',
+     'ingredients_raw': 'chicken'},
+]
+
+
+def test_score_frame_matches_score_product():
+    df = pd.DataFrame(PRODUCTS + [{'brand': 'X', 'source': 'food_brands', 'kcal_per_100g': 0.0}])
+    assert list(score_frame(df)) == [score_product(p) for p in df.to_dict('records')]
+    assert score_product(PRODUCTS[1]) == 40 + 30 + 20
+
+
+def test_url_product_id():
+    assert url_product_id('https://www.zooplus.de/shop/dogs/123456?activeVariant=2') == 'zooplus.de|123456'
+    assert url_product_id('https://allaboutdogfood.co.uk/dog-food-reviews/0519?id=42') == 'allaboutdogfood.co.uk|42'
+    assert url_product_id('https://example.com/food/wild-prairie') is None
+    # Pack weights and years are not ids; only known retailer paths are used
+    assert url_product_id('https://shop.com/p/acme-chicken-adult-1000g') is None
+    assert url_product_id('https://shop.com/p/acme-lamb-puppy-12345g') is None
+    assert url_product_id('https://shop.com/reviews/2023/acme-12345') is None
+    assert url_product_id('https://www.zooplus.co.uk/shop/dogs/dry_dog_food/acana_20000kg') is None
+
+
+def test_retailer_id_does_not_override_form_conflict():
+    df = pd.DataFrame([
+        {'brand': 'Acme', 'product_name': 'Chicken Adult', 'form': 'dry',
+         'product_url': 'https://www.zooplus.de/shop/dogs/777777'},
+        {'brand': 'Acme', 'product_name': 'Lamb Puppy', 'form': 'wet',
+         'product_url': 'https://www.zooplus.de/shop/dogs/777777?activeVariant=1'},
+        {'brand': 'Acme', 'product_name': 'Chicken Adult 2kg', 'form': 'dry',
+         'product_url': 'https://www.zooplus.de/shop/dogs/777777?activeVariant=2'},
+    ])
+    result = cluster_products(df)
+    assert result.loc[0, 'cluster'] == result.loc[2, 'cluster'] != result.loc[1, 'cluster']
+
+
+def test_clusters_are_transitive_with_best_parent():
+    result = cluster_products(pd.DataFrame(PRODUCTS))
+    assert list(result['cluster']) == [1, 1, 1, 3, 4, 6, 6]
+    assert list(result['is_parent']) == [False, True, False, True, True, False, True]
+
+    clusters = duplicate_clusters(PRODUCTS)
+    assert [[p['product_name'] for p in c] for c in clusters] == [
+        ['Wild-Prairie', 'Acana Wild Prairie', 'Acana Wild Prairie Dog 11.4kg'],
+        ['Orijen Adult Original', 'Original'],
+    ]
+
+
+def test_identity_blocks_ignore_block_size_cap():
+    df = pd.DataFrame([{'product_key': 'brand|name|dry', 'product_name': f'Name {i}'} for i in range(200)],
+                      index=range(100, 300))
+    assert len(candidate_pairs(blocking_keys(df), max_block_size=10)) == 199
+    deduped = deduplicate_frame(df)
+    assert list(deduped.index) == [100]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test per-field-group fingerprints and change detection
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from etl.fingerprint import (
+    FIELD_GROUPS, changed_groups, changed_payload, field_fingerprint, unpack_fingerprint
+)
+
+PRODUCT = {
+    'brand': 'Brit', 'product_name': 'Care Adult Lamb',
+    'ingredients_raw': 'Lamb (40%), rice', 'ingredients_tokens': ['lamb', 'rice'],
+    'protein_percent': 26.0, 'fat_percent': 16.0, 'kcal_per_100g': 370.0,
+    'price_currency': 'GBP', 'price_original': 24.99, 'price_eur': 28.74,
+    'pack_sizes': ['3kg', '12kg'], 'form': 'dry', 'life_stage': 'adult',
+    'source_url': 'https://example.com/brit-care-adult-lamb',
+}
+
+
+def test_packed_fingerprint_round_trips():
+    fingerprint = field_fingerprint(PRODUCT)
+    assert fingerprint.startswith('v2:') and len(fingerprint) == 3 + 16 * len(FIELD_GROUPS)
+    assert set(unpack_fingerprint(fingerprint)) == set(FIELD_GROUPS)
+    assert unpack_fingerprint('d41d8cd98f00b204e9800998ecf8427e') is None
+
+
+def test_formatting_noise_is_not_a_change():
+    noisy = dict(PRODUCT, brand=' BRIT ', product_name='Care  Adult Lamb', protein_percent=26,
+                 source_url='https://example.com/other')
+    assert changed_groups(field_fingerprint(PRODUCT), noisy) == []
+
+
+def test_only_changed_groups_are_reported():
+    stored = field_fingerprint(PRODUCT)
+    updated = dict(PRODUCT, fat_percent=15.5, price_original=23.99, price_eur=27.99, price_rate_date='2026-10-16')
+    assert changed_groups(stored, updated) == ['nutrition', 'price']
+    assert changed_groups(None, updated) == list(FIELD_GROUPS)
+
+    payload = changed_payload(updated, ['nutrition', 'price'])
+    assert payload == {'protein_percent': 26.0, 'fat_percent': 15.5, 'fiber_percent': None, 'ash_percent': None,
+                       'moisture_percent': None, 'kcal_per_100g': 370.0, 'kcal_basis': None,
+                       'price_currency': 'GBP', 'price_original': 23.99, 'price_eur': 27.99,
+                       'price_rate_date': '2026-10-16'}
+
+
+def test_fx_repricing_alone_is_not_a_change():
+    repriced = dict(PRODUCT, price_eur=29.10, price_rate_date='2026-10-17')
+    assert changed_groups(field_fingerprint(PRODUCT), repriced) == []
+
+
+def test_changed_groups_clear_disappeared_values_and_fingerprint():
+    stored = field_fingerprint(PRODUCT)
+    # The retailer dropped the ingredients list
+    updated = {k: v for k, v in PRODUCT.items() if k not in ('ingredients_raw', 'ingredients_tokens')}
+    updated['fingerprint'] = 'abc'
+    assert changed_groups(stored, updated) == ['ingredients']
+    assert changed_payload(updated, ['ingredients']) == {
+        'ingredients_raw': None, 'ingredients_tokens': None, 'contains_chicken': None, 'fingerprint': 'abc'}
+    assert changed_payload(dict(PRODUCT, fingerprint='def'), ['identity'])['fingerprint'] == 'def'
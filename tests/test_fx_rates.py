@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test the daily FX rate cache and vectorized conversions
+"""
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from conftest import FakeRpcClient
+from etl.fx_rates import (
+    FALLBACK_FILE, FileRateProvider, FXRateCache, FXRateProvider, convert_to_eur, parse_ecb_csv,
+    reprice_frame, write_reprices
+)
+from etl.normalize_foods import normalize_currency
+
+HISTORY = """Date,USD,GBP,SEK,
+2026-10-16,1.0800,0.8500,11.2000,
+2026-10-15,1.0900,0.8500,11.1000,
+"""
+
+
+class CountingProvider(FXRateProvider):
+    def __init__(self, path):
+        self.file = FileRateProvider(path)
+        self.calls = 0
+
+    def rates_for(self, day):
+        self.calls += 1
+        return self.file.rates_for(day)
+
+
+class FailingProvider(FXRateProvider):
+    def rates_for(self, day):
+        raise ConnectionError("offline")
+
+
+def _cache(tmp_path, provider=None):
+    rates_file = tmp_path / 'eurofxref-hist.csv'
+    rates_file.write_text(HISTORY)
+    return FXRateCache(provider or CountingProvider(rates_file), cache_dir=tmp_path / 'cache')
+
+
+def test_parse_ecb_formats():
+    daily = parse_ecb_csv("Date, USD, GBP, \n16 October 2026, 1.0800, 0.8500, \n")
+    assert daily[0].rate_date == '2026-10-16'
+    assert daily[0].rate('gbp') == round(1 / 0.85, 6)
+    assert daily[0].rate(None) == 1.0
+    fallback = parse_ecb_csv(FALLBACK_FILE.read_text())[0]
+    assert fallback.rate_date == '2024-01-01' and round(fallback.rate('GBP'), 2) == 1.16
+
+
+def test_rates_fetched_once_per_day_and_cached_on_disk(tmp_path):
+    cache = _cache(tmp_path)
+    fx = cache.rates(date(2026, 10, 18))      # weekend: Friday's rates
+    assert fx.rate_date == '2026-10-16'
+    cache.rates(date(2026, 10, 18))
+    assert cache.provider.calls == 1
+
+    reloaded = FXRateCache(FailingProvider(), cache_dir=tmp_path / 'cache')
+    assert reloaded.rates(date(2026, 10, 18)).rates == fx.rates
+    # offline on a later day: newest cached day is used
+    assert reloaded.rates(date(2026, 10, 19)).rate_date == '2026-10-16'
+
+
+def test_offline_without_cache_uses_fallback_file(tmp_path):
+    cache = FXRateCache(FailingProvider(), cache_dir=tmp_path / 'cache')
+    assert cache.rates(date(2026, 10, 18)).source == 'fallback'
+
+
+def test_convert_column_in_one_call(tmp_path):
+    fx = _cache(tmp_path).rates(date(2026, 10, 16))
+    prices = pd.Series([10.0, 20.0, None, 5.0], index=[7, 8, 9, 10])
+    converted = convert_to_eur(prices, ['GBP', 'eur', 'GBP', 'XXX'], fx)
+    assert list(converted.index) == [7, 8, 9, 10]
+    assert converted.loc[7, 'price_eur'] == round(10 * round(1 / 0.85, 6), 2)
+    assert converted.loc[8, 'price_eur'] == 20.0
+    assert converted['price_eur'].isna().tolist() == [False, False, True, True]
+    assert converted.loc[7, 'rate_date'] == '2026-10-16'
+    assert normalize_currency(10.0, 'GBP', {'GBP': 1.16, 'conversion_date': '2024-01-01'})['converted_at'] == '2024-01-01'
+
+
+def test_reprice_only_rows_whose_rate_changed(tmp_path):
+    cache = _cache(tmp_path)
+    cache.rates(date(2026, 10, 15))
+    fx = cache.rates(date(2026, 10, 16))
+    df = pd.DataFrame({
+        'price_original': [10.0, 10.0, 10.0, 10.0, 10.0],
+        'price_currency': ['GBP', 'USD', 'EUR', 'USD', 'SEK'],
+        'price_rate_date': ['2026-10-15', '2026-10-15', None, '2026-10-16', '2024-01-01'],
+    }, index=[1, 2, 3, 4, 5])
+    changes = reprice_frame(df, fx, cache)
+    # GBP unchanged since the 15th, EUR never changes, row 4 is current
+    assert list(changes.index) == [2, 5]
+    assert set(changes['rate_date']) == {'2026-10-16'}
+
+
+def rows_written(name, params):
+    return len(params['p_rows'])
+
+
+def test_write_reprices_in_chunks():
+    client = FakeRpcClient(rows_written)
+    changes = pd.DataFrame({'price_eur': [11.5, 9.2, 1.0], 'rate_date': ['2026-10-16'] * 3}, index=[2, 5, 7])
+    assert write_reprices(client, ['a', 'b', 'c'], changes, chunk_size=2) == 3
+    assert [name for name, _ in client.calls] == ['reprice_food_candidates'] * 2
+    assert client.calls[0][1]['p_rows'][1] == {'id': 'b', 'price_eur': 9.2, 'price_rate_date': '2026-10-16'}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test the shared ingredient tokenizer and allergen tagging
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from conftest import FakeRpcClient
+from etl.ingredients import (
+    IngredientProcessor, get_ingredient_processor, ingredients_hash, plan_retokenization, write_tokenization
+)
+from etl.normalize_foods import tokenize_ingredients
+
+CANONICAL_MAP = {'chicken meal': 'chicken', 'maize': 'corn', 'pea protein': 'peas'}
+TAXONOMY = {
+    'poultry': ['chicken', 'poultry'],
+    'grains': ['corn', 'rice'],
+    'legumes': ['peas', 'chickpeas'],
+    'egg': ['egg', 'eggs'],
+    'protein': ['egg white'],
+}
+
+
+def test_tokenize_cleans_splits_and_canonicalizes():
+    processor = IngredientProcessor(CANONICAL_MAP, TAXONOMY)
+    tokens = processor.tokenize('Chicken Meal (26%), Maize 12.5%, rice and peas; Pea Protein & Minerals (Zinc, Iron)')
+    assert tokens == ['chicken', 'corn', 'rice', 'peas', 'minerals']
+
+
+def test_tokens_are_unique_and_cached():
+    processor = IngredientProcessor(CANONICAL_MAP, TAXONOMY)
+    assert processor.tokenize('maize, corn, Maize') == ['corn']
+    processor.tokenize('maize, corn, Maize')
+    assert processor._tokenize.cache_info().hits == 1
+    assert processor.tokenize(None) == []
+
+
+def test_allergen_groups_match_substrings():
+    processor = IngredientProcessor(CANONICAL_MAP, TAXONOMY)
+    assert processor.allergen_groups(['dried chickpeas']) == ['legumes']
+    assert processor.allergen_groups(['hydrolysed chicken liver', 'brown rice']) == ['grains', 'poultry']
+    # the longer keyword must not hide the shorter one it starts with
+    assert processor.allergen_groups(['egg whites']) == ['egg', 'protein']
+
+
+def test_process_many_matches_single():
+    processor = IngredientProcessor(CANONICAL_MAP, TAXONOMY)
+    texts = pd.Series(['Chicken meal, rice', None, 'Peas', 'Chicken meal, rice'], index=[3, 4, 5, 6])
+    batch = processor.process_many(texts)
+    assert list(batch.index) == [3, 4, 5, 6]
+    for text, tokens, groups in zip(texts, batch['ingredients_tokens'], batch['allergen_groups']):
+        assert tokens == processor.tokenize(text)
+        assert groups == processor.allergen_groups(tokens)
+
+
+def test_default_processor_uses_canonical_map_file():
+    processor = get_ingredient_processor()
+    assert processor.tokenize('Salmon Meal, Brown Rice') == ['salmon', 'rice']
+    assert processor.allergen_groups(['salmon', 'rice']) == ['fish', 'grains']
+    assert tokenize_ingredients('Salmon Meal, Brown Rice') == ['salmon', 'rice']
+
+
+def _state(row_id, raw, processor):
+    return {'id': row_id, 'ingredients_raw': raw, 'ingredients_hash': ingredients_hash(raw),
+            'ingredients_map_version': processor.map_version}
+
+
+def test_plan_touches_only_rows_with_changed_entries():
+    old = IngredientProcessor(CANONICAL_MAP, TAXONOMY)
+    rows = [
+        _state(1, 'Maize, rice', old),
+        _state(2, 'Chicken meal, rice', old),
+        _state(3, 'Pea protein', old),
+    ]
+    history = {old.map_version: old.canonical_map}
+    assert plan_retokenization(rows, old, history) == {}
+
+    new = IngredientProcessor(dict(CANONICAL_MAP, maize='maize'), TAXONOMY)
+    assert plan_retokenization(rows, new, history) == {1: 'map_changed'}
+
+
+def test_plan_raw_changes_and_unknown_versions():
+    processor = IngredientProcessor(CANONICAL_MAP, TAXONOMY)
+    rows = [
+        dict(_state(1, 'Maize', processor), ingredients_raw='Maize, peas'),
+        dict(_state(2, 'Rice', processor), ingredients_map_version='gone'),
+        {'id': 3, 'ingredients_raw': 'Rice', 'ingredients_hash': None, 'ingredients_map_version': None},
+        {'id': 4, 'ingredients_raw': None},
+        dict(_state(5, 'Rice', processor), ingredients_raw=''),
+        {'id': 6, 'ingredients_raw': None, 'ingredients_tokens': ['rice']},
+    ]
+    plan = plan_retokenization(rows, processor, {})
+    assert plan == {1: 'raw_changed', 2: 'unknown_map_version', 3: 'raw_changed', 5: 'raw_cleared',
+                    6: 'raw_cleared'}
+
+
+def rows_written(name, params):
+    return len(params['p_rows'])
+
+
+def test_write_tokenization_in_chunks():
+    client = FakeRpcClient(rows_written)
+    updates = [{'id': i, 'ingredients_tokens': ['rice'], 'ingredients_hash': 'h', 'ingredients_map_version': 'v'}
+               for i in range(5)]
+    assert write_tokenization(client, 'food_candidates_sc', updates, chunk_size=2) == 5
+    assert [len(params['p_rows']) for _, params in client.calls] == [2, 2, 1]
+    assert {(name, params['p_table']) for name, params in client.calls} == {
+        ('update_ingredients_tokens', 'food_candidates_sc')}
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test the indexed key matcher against brute-force matching
+"""
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from etl.key_matcher import KeyIndex, normalize_key
+
+GCS_KEYS = {
+    'royal_canin|mini_adult|dry',
+    'royal_canin|maxi_puppy|dry',
+    'lily_s_kitchen|chicken_casserole|wet',
+    'hills|science_plan_adult_large_breed|dry',
+    'acana|wild_prairie|dry',
+}
+
+
+def brute_force(variations, keys, threshold):
+    for var in variations:
+        for key in keys:
+            if normalize_key(var) == normalize_key(key):
+                return key, 'exact_variation'
+    best_key, best_score = None, 0
+    for var in variations:
+        for key in keys:
+            score = SequenceMatcher(None, normalize_key(var), normalize_key(key)).ratio()
+            if score > best_score and score > threshold:
+                best_key, best_score = key, score
+    return (best_key, f'fuzzy_{best_score:.2f}') if best_key else (None, None)
+
+
+def test_exact_variation():
+    index = KeyIndex(GCS_KEYS)
+    assert index.match(['Royal_Canin|Mini__Adult|dry_']) == ('royal_canin|mini_adult|dry', 'exact_variation')
+
+
+def test_fuzzy_matches_brute_force():
+    index = KeyIndex(GCS_KEYS, threshold=0.85)
+    for variations in (['hills|science_plan_adult_large_bred|dry'],
+                       ['lilys_kitchen|chicken_casserole|wet', 'lily_kitchen|chicken|wet'],
+                       ['acana|wild_prairie|wet']):
+        key, label = index.match(variations)
+        assert label.startswith('fuzzy_')
+        assert (key, label) == brute_force(variations, GCS_KEYS, 0.85)
+
+
+def test_no_match_below_threshold():
+    index = KeyIndex(GCS_KEYS, threshold=0.85)
+    assert index.match(['orijen|six_fish|dry']) == (None, None)
+    assert index.match([]) == (None, None)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the MV refresh orchestrator against a fake refresh RPC
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from conftest import FakeRpcClient
+from etl.mv_refresh import DEPENDENCIES, input_signature, refresh_all, refresh_levels
+
+KINDS = {
+    'food_candidates': 'table', 'food_candidates_sc': 'table', 'food_brands': 'table', 'brand_allowlist': 'table',
+    'food_candidates_compat': 'view', 'food_candidates_sc_compat': 'view', 'food_brands_compat': 'view',
+    'foods_union_all': 'view', 'foods_canonical': 'table',
+    'foods_published_preview': 'mv', 'foods_published_prod': 'mv',
+    'foods_brand_quality_preview_mv': 'mv', 'foods_brand_quality_prod_mv': 'mv',
+}
+
+
+class FakeClient(FakeRpcClient):
+    """Keeps relation state and the refresh log like sql/mv_refresh.sql"""
+
+    def __init__(self, fail=()):
+        super().__init__()
+        self.modifications = {name: 100 for name, kind in KINDS.items() if kind == 'table'}
+        self.log = {}
+        self.fail = set(fail)
+        self.refreshed = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def respond(self, name, params):
+        if name == 'mv_relation_info':
+            return [{'relname': rel, 'relkind': KINDS[rel], 'modifications': self.modifications.get(rel),
+                     'last_signature': self.log.get(rel)} for rel in params['p_names'] if rel in KINDS]
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+            self.refreshed.append(params['p_name'])
+        if params['p_name'] in self.fail:
+            return [{'status': 'failed', 'mode': 'concurrent', 'duration_ms': 50.0, 'error': 'boom'}]
+        self.log[params['p_name']] = params['p_input_signature']
+        return [{'status': 'refreshed', 'mode': 'concurrent', 'duration_ms': 50.0, 'error': None}]
+
+
+def test_levels_follow_dependencies():
+    levels = refresh_levels(DEPENDENCIES)
+    position = {name: i for i, level in enumerate(levels) for name in level}
+    assert levels[0] == ['food_brands_compat', 'food_candidates_compat', 'food_candidates_sc_compat']
+    assert position['foods_union_all'] < position['foods_canonical'] < position['foods_published_prod'] \
+        < position['foods_brand_quality_prod_mv']
+    assert position['foods_published_preview'] == position['foods_published_prod']
+
+    with pytest.raises(ValueError):
+        refresh_levels({'a': ('b',), 'b': ('a',)})
+
+
+def test_parallel_refresh_in_order_with_durations():
+    client = FakeClient()
+    results = refresh_all(client)
+    assert [r.name for r in results] == ['foods_published_preview', 'foods_published_prod',
+                                         'foods_brand_quality_preview_mv', 'foods_brand_quality_prod_mv']
+    assert all(r.status == 'refreshed' and r.duration_ms == 50.0 for r in results)
+    # Same-level MVs run together
+    assert client.max_active == 2
+
+
+def test_unchanged_inputs_are_skipped():
+    client = FakeClient()
+    refresh_all(client)
+    assert {r.status for r in refresh_all(client)} == {'skipped'}
+
+    # A write to brand_allowlist touches every MV
+    client.modifications['brand_allowlist'] += 1
+    assert {r.status for r in refresh_all(client)} == {'refreshed'}
+    # Base tables behind the foods_canonical table do not reach the MVs
+    client.modifications['food_candidates'] += 1
+    assert {r.status for r in refresh_all(client)} == {'skipped'}
+    assert {r.status for r in refresh_all(client, force=True)} == {'refreshed'}
+
+
+def test_failure_blocks_downstream():
+    client = FakeClient(fail={'foods_published_prod'})
+    status = {r.name: r.status for r in refresh_all(client)}
+    assert status == {'foods_published_preview': 'refreshed', 'foods_published_prod': 'failed',
+                      'foods_brand_quality_preview_mv': 'refreshed', 'foods_brand_quality_prod_mv': 'blocked'}
+    assert 'foods_brand_quality_prod_mv' not in client.refreshed
+
+
+def test_signature_expands_views():
+    info = {name: {'relkind': kind, 'modifications': 1 if kind == 'table' else None} for name, kind in KINDS.items()}
+    info['foods_canonical']['relkind'] = 'mv'
+    before = input_signature('foods_brand_quality_preview_mv', DEPENDENCIES, info)
+    info['food_candidates']['modifications'] = 2
+    assert input_signature('foods_brand_quality_preview_mv', DEPENDENCIES, info) != before
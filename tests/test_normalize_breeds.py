@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test compiled breed vocabulary normalizer against the original dict scan
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from etl.normalize_breeds import (
+    BreedNormalizer, normalize_characteristic, resolve_breed_slug,
+    SIZE_MAPPING, SHEDDING_MAPPING
+)
+
+
+def linear_scan(text, mapping):
+    """Reference implementation: exact match, then first substring in mapping order"""
+    if not text:
+        return None
+    text_lower = text.lower().strip()
+    if text_lower in mapping:
+        return mapping[text_lower]
+    for pattern, value in mapping.items():
+        if pattern in text_lower:
+            return value
+    return None
+
+
+def test_matches_linear_scan():
+    samples = [
+        'Toy', 'Extra Small', 'small to medium', 'medium-sized dog', 'over 90 lbs',
+        'very large and small', 'Giant breed', '', None, 'unknown',
+    ]
+    for text in samples:
+        assert normalize_characteristic(text, SIZE_MAPPING) == linear_scan(text, SIZE_MAPPING)
+
+    # 'very high' appears later in the mapping than 'high', so 'high' wins
+    assert normalize_characteristic('Very high shedding', SHEDDING_MAPPING) == 'high'
+
+
+def test_custom_mapping():
+    mapping = {'b': 'second', 'a': 'first'}
+    assert normalize_characteristic('a then b', mapping) == 'second'
+    assert normalize_characteristic('only a', mapping) == 'first'
+
+
+def test_resolve_slug_uses_alias_index():
+    normalizer = BreedNormalizer({
+        'german-shepherd': ['German Shepherd', 'GSD', 'Alsatian'],
+        'other': ['GSD'],
+    })
+    assert normalizer.resolve_slug(' GSD ') == (
+        'german-shepherd', 'German Shepherd', ['German Shepherd', 'GSD', 'Alsatian']
+    )
+    assert normalizer.resolve_slug('Cesky Fousek!') == ('cesky-fousek', 'Cesky Fousek!', ['Cesky Fousek!'])
+
+
+def test_normalize_characteristics_record():
+    normalizer = BreedNormalizer({})
+    result = normalizer.normalize_characteristics({'size': 'Large', 'energy': 'very energetic dog'})
+    assert result['size'] == 'large'
+    assert result['energy'] == 'high'
+    assert result['shedding'] is None
+
+
+def test_module_level_resolve():
+    slug, display_name, aliases = resolve_breed_slug('Lab')
+    assert slug == 'labrador-retriever'
+    assert display_name == aliases[0]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the nutrition extractor benchmark harness
+"""
+import json
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from etl.nutrition_benchmark import (
+    Extractor, compare_reports, default_extractors, load_golden, load_script_functions,
+    run_benchmark, score
+)
+
+PAGE = "<html><body><p>Analytical constituents: Protein 25%, Fat 15%, Moisture 10%</p></body></html>"
+
+
+def test_score_counts_fields():
+    golden = {'a.html': {'protein_percent': 25.0, 'fat_percent': 15.0}, 'b.html': {}}
+    predictions = {'a.html': {'protein_percent': 25.0, 'fat_percent': 5.0}, 'b.html': {'protein_percent': 26.0}}
+    result = score(predictions, golden)
+    assert result['fields']['protein_percent'] == {'tp': 1, 'fp': 1, 'fn': 0, 'precision': 0.5, 'recall': 1.0}
+    assert result['fields']['fat_percent']['fn'] == 1
+    assert result['precision'] == round(1 / 3, 4)
+    assert result['recall'] == 0.5
+
+
+def test_load_script_functions_skips_module_side_effects(tmp_path):
+    script = tmp_path / 'job.py'
+    script.write_text(
+        "import re\n"
+        "raise SystemExit('connects to the database')\n"
+        "def extract(text):\n"
+        "    return {'protein_percent': float(re.search(r'(\\d+)%', text).group(1))}\n"
+        "class Scraper:\n"
+        "    def parse(self, text):\n"
+        "        return extract(text)\n"
+    )
+    functions = load_script_functions(script, ['extract', 'Scraper.parse'])
+    assert functions['extract']('Protein 25%') == {'protein_percent': 25.0}
+    assert functions['Scraper.parse'](None, 'Protein 7%') == {'protein_percent': 7.0}
+
+
+def test_load_script_functions_keeps_compiled_patterns_and_fails_on_missing_names(tmp_path):
+    script = tmp_path / 'job.py'
+    script.write_text(
+        "import re\n"
+        "PROTEIN = re.compile(r'Protein (\\d+)%')\n"
+        "client = connect()\n"
+        "def extract(text):\n"
+        "    return {'protein_percent': float(PROTEIN.search(text).group(1))}\n"
+        "def helper():\n"
+        "    return client.table('foods')\n"
+        "def save(text):\n"
+        "    return [helper() for _ in text]\n"
+    )
+    functions = load_script_functions(script, ['extract'])
+    assert functions['extract']('Protein 25%') == {'protein_percent': 25.0}
+    with pytest.raises(NameError, match='client'):
+        load_script_functions(script, ['save'])
+
+
+def test_run_benchmark_report(tmp_path):
+    (tmp_path / 'pages').mkdir()
+    (tmp_path / 'pages' / 'p1.html').write_text(PAGE)
+    golden = tmp_path / 'golden.json'
+    golden.write_text(json.dumps({'pages': {'pages/p1.html': {'protein_percent': 25.0, 'fat_percent': 15.0}}}))
+
+    extractor = Extractor('fixed', 'text', lambda text: {'protein_percent': 25.0})
+    report = run_benchmark([extractor], ['pages/*.html'], golden, repeat=2, root=tmp_path)
+    result = report['extractors']['fixed']
+    assert report['corpus']['pages'] == 1 and report['corpus']['golden_pages'] == 1
+    assert result['precision'] == 1.0 and result['recall'] == 0.5
+    assert result['latency_ms']['p50'] is not None and result['pages_per_sec'] > 0
+
+    slower = json.loads(json.dumps(report))
+    slower['extractors']['fixed']['pages_per_sec'] = result['pages_per_sec'] / 2
+    slower['extractors']['fixed']['recall'] = 0.0
+    regressions = compare_reports(slower, report)
+    assert len(regressions) == 2
+    assert compare_reports(report, report) == []
+
+
+def test_repo_extractors_load_and_golden_is_consistent():
+    names = [e.name for e in default_extractors()]
+    assert len(names) == 5
+    golden = load_golden()
+    assert all(set(values) <= {'protein_percent', 'fat_percent', 'fiber_percent', 'ash_percent',
+                               'moisture_percent', 'kcal_per_100g'} for values in golden.values())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized nutrition engine and its scalar callers
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from etl.normalize_foods import estimate_kcal_from_analytical
+from etl.nutrition_engine import (
+    dry_matter_changes, dry_matter_fields, estimate_kcal, estimate_kcal_value, evaluate_frame,
+    evaluate_nutrition, to_as_fed, to_dry_matter
+)
+from etl.nutrition_parser import NutritionParser
+
+
+def test_modified_atwater_estimate():
+    # carbs by difference: 100 - 25 - 15 - 3 - 7 - 10 = 40
+    assert estimate_kcal(25, 15, 3, 7, 10)[0] == 25 * 3.5 + 15 * 8.5 + 40 * 3.5
+    # declared carbohydrate wins over the difference
+    assert estimate_kcal(25, 15, 3, 7, 10, carbohydrate=30)[0] == 25 * 3.5 + 15 * 8.5 + 30 * 3.5
+    assert np.isnan(estimate_kcal([None], [15])[0])
+    assert estimate_kcal_value(0, 15) is None
+
+
+def test_dry_matter_round_trip():
+    dm = to_dry_matter([8.0, 25.0, 10.0], [80, 10, None])
+    assert dm[0] == 40.0
+    assert round(dm[1], 2) == 27.78
+    assert np.isnan(dm[2])
+    assert np.allclose(to_as_fed(dm[:2], [80, 10]), [8.0, 25.0])
+
+
+def test_evaluate_flags_and_repairs():
+    result = evaluate_nutrition(
+        protein=[25, 30, 8, None],
+        fat=[15, 20, 5, 5],
+        moisture=[10, 10, 10, 80],
+        form=['dry', 'dry', 'wet', None],
+        kcal=[380, 900, 2000, None],
+    )
+    assert list(result['kcal_method']) == ['declared', 'estimated', 'cleared', 'missing']
+    assert list(result['kcal_outlier']) == [False, True, True, False]
+    assert result['kcal_final'][0] == 380
+    assert result['kcal_final'][1] == result['kcal_estimated'][1]
+    assert np.isnan(result['kcal_final'][2])
+    assert round(result['kcal_dm'][0], 1) == round(380 / 0.9, 1)
+
+
+def test_frame_matches_scalar_callers():
+    df = pd.DataFrame({
+        'protein_percent': [25.0, 9.0], 'fat_percent': [15.0, 6.0], 'fiber_percent': [3.0, 0.5],
+        'ash_percent': [7.0, 2.0], 'moisture_percent': [10.0, 78.0], 'form': ['dry', 'wet'],
+        'kcal_per_100g': [None, None],
+    }, index=['a', 'b'])
+    frame = evaluate_frame(df)
+    assert list(frame.index) == ['a', 'b']
+    for key, row in df.iterrows():
+        expected = estimate_kcal_from_analytical(row['protein_percent'], row['fat_percent'], row['fiber_percent'],
+                                                 row['ash_percent'], row['moisture_percent'])
+        assert frame.loc[key, 'kcal_estimated'] == expected
+        parser_kcal = NutritionParser()._estimate_kcal(row.to_dict())
+        assert parser_kcal == expected
+
+
+def test_dry_matter_fields_put_wet_and_dry_on_one_basis():
+    wet = dry_matter_fields({'protein_percent': 8, 'fat_percent': 5, 'moisture_percent': 80,
+                             'form': 'wet', 'kcal_per_100g': 90})
+    dry = dry_matter_fields({'protein_percent': 36, 'fat_percent': 18, 'moisture_percent': 10,
+                             'form': 'dry', 'kcal_per_100g': 380})
+    assert wet['protein_dm_percent'] == 40.0
+    assert dry['protein_dm_percent'] == 40.0
+    assert wet['kcal_per_100g_dm'] == 450.0
+    assert wet['fiber_dm_percent'] is None
+    assert dry_matter_fields({'protein_percent': 25})['protein_dm_percent'] is None
+
+
+def test_dry_matter_cleared_when_it_cannot_fit():
+    # Moisture near 100 would give protein 2000% DM and overflow NUMERIC(5,2)
+    fields = dry_matter_fields({'protein_percent': 10, 'fat_percent': 5, 'moisture_percent': 99.5,
+                                'form': 'wet', 'kcal_per_100g': 90})
+    assert set(fields.values()) == {None}
+    # Macros larger than the dry matter: a misparsed moisture value
+    fields = dry_matter_fields({'protein_percent': 30, 'fat_percent': 20, 'moisture_percent': 60})
+    assert fields['protein_dm_percent'] is None and fields['kcal_per_100g_dm'] is None
+    result = evaluate_nutrition([8, 30], [5, 20], moisture=[80, 75], kcal=[90, 400], form=['wet', 'dry'])
+    assert result['protein_dm'][0] == 40.0 and np.isnan(result['protein_dm'][1])
+
+
+def test_dry_matter_changes_only_stale_rows():
+    df = pd.DataFrame({
+        'protein_percent': [8, 36, 25],
+        'fat_percent': [5, 18, 12],
+        'moisture_percent': [80, 10, None],
+        'form': ['wet', 'dry', 'dry'],
+        'kcal_per_100g': [90, 380, 360],
+    }, index=[10, 11, 12])
+    changes = dry_matter_changes(df)
+    assert list(changes.index) == [10, 11]
+
+    synced = df.join(changes)
+    assert dry_matter_changes(synced).empty
+    synced.loc[11, 'protein_percent'] = 30
+    assert list(dry_matter_changes(synced).index) == [11]
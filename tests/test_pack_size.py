@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test the unit-aware pack size parser
+"""
+import sys
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pandas as pd
+
+from etl.normalize_foods import parse_pack_size as normalize_pack_size
+from etl.pack_size import find_pack_sizes, parse_pack_size, parse_pack_sizes, price_per_kg, strip_pack_sizes
+
+
+def test_units_and_decimal_commas():
+    assert parse_pack_size('2,5 kg').grams == 2500
+    assert parse_pack_size('Adult 400g').label == '400g'
+    assert round(parse_pack_size('5 lb bag').kg, 3) == 2.268
+    assert parse_pack_size('13.6oz can').label == '386g'
+    assert parse_pack_size('1.5L').label == '1.5l'
+    assert parse_pack_size('Chicken & Rice') is None
+
+
+def test_multipacks_either_way_round():
+    pack = parse_pack_size('24 x 85g pouches')
+    assert (pack.grams, pack.count, pack.unit_grams, pack.label) == (2040, 24, 85, '24 x 85g')
+    assert parse_pack_size('400g x 6').label == '6 x 400g'
+    assert parse_pack_size('12kg bag (2 x 6kg)').label == '2 x 6kg'
+
+
+def test_weight_ranges_are_not_pack_sizes():
+    assert parse_pack_size('Mini Adult for dogs 2-10kg, 800g').label == '800g'
+    assert parse_pack_size('Medium 11 - 25 kg') is None
+    assert [p.label for p in find_pack_sizes('2kg, 7.5kg or 15kg')] == ['2kg', '7.5kg', '15kg']
+
+
+def test_strip_pack_sizes():
+    assert strip_pack_sizes('Adult Lamb 5 lbs').split() == ['Adult', 'Lamb']
+    assert strip_pack_sizes('Adult Lamb 2,5kg').split() == ['Adult', 'Lamb']
+    assert strip_pack_sizes('Pouches 12 x 85g').split() == ['Pouches']
+    assert strip_pack_sizes('Mini for dogs 2-10kg 800g').split() == ['Mini', 'for', 'dogs', '2-10kg']
+    assert strip_pack_sizes(None) == ''
+
+
+def test_batch_matches_single():
+    texts = pd.Series(['12 x 400g', None, '2kg', '12 x 400g', 'treats'], index=[4, 5, 6, 7, 8])
+    batch = parse_pack_sizes(texts)
+    assert list(batch.index) == [4, 5, 6, 7, 8]
+    assert list(batch['pack_grams'].fillna(0)) == [4800, 0, 2000, 4800, 0]
+    assert list(batch['pack_label'].fillna('')) == ['12 x 400g', '', '2kg', '12 x 400g', '']
+
+    prices = price_per_kg([24.0, 10.0, 5.0], batch['pack_grams'].iloc[:3])
+    assert prices[0] == 5.0 and np.isnan(prices[1]) and prices[2] == 2.5
+
+
+def test_normalize_foods_delegates():
+    assert normalize_pack_size('12 x 400g') == {'amount': 4800, 'unit': 'g', 'display': '12 x 400g',
+                                                 'multipack': True}
+    assert normalize_pack_size(None) is None
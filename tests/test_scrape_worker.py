@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite job store and the scrape worker pool lifecycle
+"""
+import queue
+import sys
+import threading
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from scrape_worker import JobStore, ScrapeWorkerService
+
+
+class FakeScraper:
+    """extract_breed_data succeeds except for slugs in fail"""
+
+    def __init__(self, fail=()):
+        self.driver = None
+        self.fail = set(fail)
+
+    def extract_breed_data(self, driver, url):
+        slug = url.rstrip('/').rsplit('/', 1)[-1]
+        if slug in self.fail:
+            raise RuntimeError(f"timeout loading {slug}")
+        return {'breed_slug': slug, 'extraction_status': 'success'}
+
+
+class RecordingEvent(threading.Event):
+    """Stop event whose waits return at once and are recorded"""
+
+    def __init__(self):
+        super().__init__()
+        self.waits = []
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        return self.is_set()
+
+
+def service_for(store, fail=(), max_workers=1, max_queued=100, request_delay=0):
+    return ScrapeWorkerService(store, scraper_factory=lambda: FakeScraper(fail), max_workers=max_workers,
+                               max_queued=max_queued, request_delay=request_delay)
+
+
+def test_job_store_counts_and_requeues(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_id = store.create_job({'breeds': ['akita']})
+    store.update_job(job_id, status='running', total=2)
+    store.add_result(job_id, 0, {'breed_slug': 'akita', 'extraction_status': 'success'})
+    store.add_result(job_id, 1, {'breed_slug': 'beagle', 'extraction_status': 'failed'})
+
+    job = store.get_job(job_id)
+    assert (job['processed'], job['successful'], job['params']) == (2, 1, {'breeds': ['akita']})
+    assert [r['breed_slug'] for r in store.get_results(job_id, after_seq=0)] == ['beagle']
+
+    # A restart re-queues the running job
+    reopened = JobStore(str(tmp_path / 'jobs.db'))
+    assert reopened.requeue_interrupted() == [job_id]
+    assert reopened.get_job(job_id)['status'] == 'queued'
+
+
+def test_failed_breed_does_not_fail_the_job():
+    store = JobStore(':memory:')
+    service = service_for(store, fail={'beagle'})
+    job_id = service.submit(breeds=['akita', 'beagle', 'boxer'])
+    service.jobs.join()
+    service.stop(timeout=5)
+
+    job = store.get_job(job_id)
+    assert job['status'] == 'completed'
+    assert (job['total'], job['processed'], job['successful']) == (3, 3, 2)
+    results = list(service.stream_results(job_id))
+    assert [r['extraction_status'] for r in results] == ['success', 'failed', 'success']
+    assert 'timeout' in results[1]['error']
+
+
+def test_requests_are_spaced_by_the_delay():
+    service = service_for(JobStore(':memory:'), request_delay=2)
+    service._stopping = RecordingEvent()
+    service.submit(breeds=['akita', 'beagle', 'boxer'])
+    service.jobs.join()
+    assert service._stopping.waits == [2, 2]
+
+
+def test_start_requeues_more_jobs_than_the_submit_cap():
+    store = JobStore(':memory:')
+    job_ids = [store.create_job({'breeds': ['akita']}) for _ in range(5)]
+    service = service_for(store, max_queued=2)
+    service.start()
+    service.jobs.join()
+    service.stop(timeout=5)
+    assert {store.get_job(job_id)['status'] for job_id in job_ids} == {'completed'}
+
+
+def test_submissions_are_capped():
+    store = JobStore(':memory:')
+    service = service_for(store, max_workers=0, max_queued=2)
+    service.submit(breeds=['a'])
+    service.submit(breeds=['b'])
+    with pytest.raises(queue.Full):
+        service.submit(breeds=['c'])
+    assert sorted(job['status'] for job in store.list_jobs()) == ['queued', 'queued', 'rejected']
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test the batch runner's shared domain limiter and the async batch jobs
+"""
+import sys
+import time
+from pathlib import Path
+
+# Add parent to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import universal_web_scraper as uws
+from universal_web_scraper import BatchRunner, DomainRateLimiter
+
+
+class FakeScraper:
+    """Pages under /js cost 5 ScrapingBee credits"""
+
+    def scrape_url(self, url):
+        return {'url': url, 'scrapingbee_cost': 5 if '/js' in url else 0}
+
+
+def test_limiter_spaces_requests_per_domain():
+    waits = []
+    limiter = DomainRateLimiter(2, clock=lambda: 10.0, sleep=waits.append)
+    for domain in ['a.com', 'a.com', 'b.com', 'a.com']:
+        limiter.wait(domain)
+    assert waits == [2, 4]
+
+
+def test_lanes_on_one_domain_share_the_delay():
+    waits = []
+    limiter = DomainRateLimiter(2, clock=lambda: 0.0, sleep=waits.append)
+    runner = BatchRunner(FakeScraper(), max_workers=4, per_domain=2, limiter=limiter)
+    urls = [f'https://a.com/{i}' for i in range(4)] + ['https://b.com/x']
+    results = list(runner.run(urls))
+    assert sorted(item['batch_index'] for item in results) == list(range(5))
+    # Four a.com requests over two lanes still wait 2, 4 and 6 seconds
+    assert sorted(waits) == [2, 4, 6]
+
+
+def test_batch_job_reports_its_own_credits(monkeypatch):
+    monkeypatch.setattr(uws, 'batch_runner', BatchRunner(FakeScraper(), max_workers=2, domain_delay=0))
+    monkeypatch.setattr(uws.scraper, 'total_cost_credits', 1000)
+    client = uws.app.test_client()
+
+    response = client.post('/scrape-batch', json={'urls': ['https://a.com/js', 'https://a.com/html']})
+    assert response.get_json()['total_cost_credits'] == 5
+
+    job_id = client.post('/scrape-batch/submit', json={'urls': ['https://b.com/js']}).get_json()['job_id']
+    deadline = time.monotonic() + 5
+    while uws.batch_jobs[job_id]['status'] != 'completed' and time.monotonic() < deadline:
+        time.sleep(0.01)
+    status = client.get(f'/scrape-batch/{job_id}').get_json()
+    assert status['total_cost_credits'] == 5 and status['completed'] == 1
+    assert 'finished_ts' not in status
+
+
+def test_batch_job_that_raises_is_marked_failed(monkeypatch):
+    class BrokenRunner:
+        def run(self, urls):
+            yield {'url': urls[0], 'scrapingbee_cost': 5, 'batch_index': 0}
+            raise RuntimeError('pool shut down')
+
+    monkeypatch.setattr(uws, 'batch_runner', BrokenRunner())
+    monkeypatch.setitem(uws.batch_jobs, 'broken', {'status': 'running', 'total': 2, 'results': [],
+                                                   'cost_credits': 0, 'finished_ts': None})
+    uws._run_batch_job('broken', ['https://a.com/js', 'https://a.com/x'])
+    job = uws.batch_jobs['broken']
+    assert job['status'] == 'failed' and job['error'] == 'pool shut down'
+    assert job['finished_at'] and job['finished_ts'] is not None
+    assert len(job['results']) == 1 and job['cost_credits'] == 5
+
+
+def test_finished_jobs_expire(monkeypatch):
+    monkeypatch.setattr(uws, 'batch_jobs', {
+        'old': {'finished_ts': 0.0}, 'recent': {'finished_ts': 3500.0}, 'running': {'finished_ts': None},
+    })
+    monkeypatch.setattr(uws, 'BATCH_JOB_TTL', 3600)
+    uws._evict_batch_jobs(now=4000.0)
+    assert set(uws.batch_jobs) == {'recent', 'running'}
+
+    monkeypatch.setattr(uws, 'BATCH_MAX_JOBS', 1)
+    uws._evict_batch_jobs(now=4000.0)
+    assert set(uws.batch_jobs) == {'running'}
@@ -9,21 +9,28 @@ Perfect for testing the ScrapingBee integration in Cloud Run.
 Endpoints:
 - GET / : Health check
 - POST /scrape : Scrape a single URL with smart BeautifulSoup → ScrapingBee fallback
-- POST /scrape-batch : Scrape multiple URLs
+- POST /scrape-batch : Scrape multiple URLs concurrently (JSON, or NDJSON with "stream": true)
+- POST /scrape-batch/submit : Queue a batch and return a job id
+- GET /scrape-batch/<job_id> : Poll an async batch for progress and results
 """
 
 import os
 import json
 import logging
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Iterator
 
 # Import our scraper logic
 import sys
 import time
+import uuid
+import queue
+import threading
 import requests
-from urllib.parse import quote, urljoin
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urljoin, urlparse
 import re
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
@@ -35,16 +42,32 @@ app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Batch concurrency settings
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', 16))
+BATCH_PER_DOMAIN = int(os.getenv('BATCH_PER_DOMAIN', 2))
+BATCH_DOMAIN_DELAY = float(os.getenv('BATCH_DOMAIN_DELAY', 2))
+# Finished async batch jobs are kept this long (seconds), and at most this many
+BATCH_JOB_TTL = float(os.getenv('BATCH_JOB_TTL', 3600))
+BATCH_MAX_JOBS = int(os.getenv('BATCH_MAX_JOBS', 100))
+
 class UniversalBreedScraper:
     def __init__(self):
         self.scrapingbee_api_key = os.getenv('SCRAPING_BEE')
         self.scrapingbee_endpoint = "https://app.scrapingbee.com/api/v1/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        self.user_agent = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        # requests.Session is not thread-safe, so each batch worker gets its own
+        self._local = threading.local()
+        self._credits_lock = threading.Lock()
         self.total_cost_credits = 0
 
+    @property
+    def session(self) -> requests.Session:
+        if not hasattr(self._local, 'session'):
+            session = requests.Session()
+            session.headers.update({'User-Agent': self.user_agent})
+            self._local.session = session
+        return self._local.session
+
     def needs_javascript(self, html_content: str) -> bool:
         """Detect if page needs JavaScript rendering"""
         js_indicators = [
@@ -87,11 +110,12 @@ class UniversalBreedScraper:
         }
         
         try:
-            response = requests.get(self.scrapingbee_endpoint, params=params, timeout=60)
+            response = self.session.get(self.scrapingbee_endpoint, params=params, timeout=60)
             if response.status_code == 200:
                 # Track costs (5 credits for JS rendering)
                 cost = 5 if render_js else 1
-                self.total_cost_credits += cost
+                with self._credits_lock:
+                    self.total_cost_credits += cost
                 logger.info(f"ScrapingBee success: {cost} credits used (total: {self.total_cost_credits})")
                 return response.text, True
             else:
@@ -159,8 +183,154 @@ class UniversalBreedScraper:
         
         return data
 
+    def scrape_url(self, url: str) -> Dict:
+        """Fetch and extract one URL; failures come back as an error record"""
+        try:
+            html, method = self.smart_fetch(url)
+            if html:
+                breed_data = self.extract_akc_breed_data(html, url)
+                breed_data['scraping_method'] = method
+                breed_data['scrapingbee_cost'] = 5 if method == 'scrapingbee' else 0
+                return breed_data
+            return {
+                'error': 'Failed to fetch',
+                'url': url,
+                'scraping_method': method
+            }
+        except Exception as e:
+            logger.error(f"Error processing {url}: {e}")
+            return {'error': str(e), 'url': url}
+
+
+class DomainRateLimiter:
+    """Requests to one domain start at least `delay` seconds apart
+
+    Shared by every lane and batch, so parallel lanes on a domain do not
+    each get their own delay.
+    """
+
+    def __init__(self, delay: float, clock=time.monotonic, sleep=time.sleep):
+        self.delay = delay
+        self.clock = clock
+        self.sleep = sleep
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, domain: str):
+        """Block until a request to domain may start"""
+        with self._lock:
+            now = self.clock()
+            start = max(now, self._next.get(domain, now))
+            self._next[domain] = start + self.delay
+        if start > now:
+            self.sleep(start - now)
+
+
+class BatchRunner:
+    """Fan a batch of URLs out over a bounded thread pool
+
+    URLs are grouped into per-domain lanes (at most `per_domain` lanes per
+    domain). Lanes fetch their URLs sequentially and all requests to a
+    domain are spaced `domain_delay` apart by one shared limiter, so one
+    slow site only holds up its own lanes and throughput grows with the
+    number of distinct domains in the batch. The executor is shared by all
+    batch requests, bounding total concurrency.
+    """
+
+    def __init__(self, scraper: UniversalBreedScraper, max_workers: int = BATCH_MAX_WORKERS,
+                 per_domain: int = BATCH_PER_DOMAIN, domain_delay: float = BATCH_DOMAIN_DELAY,
+                 limiter: DomainRateLimiter = None):
+        self.scraper = scraper
+        self.per_domain = max(1, per_domain)
+        self.limiter = limiter or DomainRateLimiter(domain_delay)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch')
+
+    def plan_lanes(self, urls: List[str]) -> List[List[Tuple[int, str]]]:
+        """Split (index, url) pairs into per-domain lanes"""
+        by_domain = defaultdict(list)
+        for idx, url in enumerate(urls):
+            by_domain[urlparse(url).netloc.lower()].append((idx, url))
+
+        lanes = []
+        for items in by_domain.values():
+            n_lanes = min(self.per_domain, len(items))
+            lanes.extend(items[i::n_lanes] for i in range(n_lanes))
+        return lanes
+
+    def run(self, urls: List[str]) -> Iterator[Dict]:
+        """Yield results in completion order, each tagged with its batch_index"""
+        results = queue.Queue()
+        for lane in self.plan_lanes(urls):
+            self.executor.submit(self._run_lane, lane, results)
+        for _ in range(len(urls)):
+            yield results.get()
+
+    def _run_lane(self, lane: List[Tuple[int, str]], results: queue.Queue):
+        for idx, url in lane:
+            self.limiter.wait(urlparse(url).netloc.lower())
+            try:
+                item = self.scraper.scrape_url(url)
+            except Exception as e:
+                item = {'error': str(e), 'url': url}
+            item['batch_index'] = idx
+            results.put(item)
+
+
 # Initialize scraper
 scraper = UniversalBreedScraper()
+batch_runner = BatchRunner(scraper)
+
+# Async batch jobs (in-memory, per instance; finished jobs expire)
+batch_jobs: Dict[str, Dict] = {}
+batch_jobs_lock = threading.Lock()
+
+
+def _batch_credits(results: List[Dict]) -> int:
+    return sum(item.get('scrapingbee_cost') or 0 for item in results)
+
+
+def _evict_batch_jobs(now: float = None):
+    """Drop finished jobs past BATCH_JOB_TTL, then the oldest finished over BATCH_MAX_JOBS (call with the lock held)"""
+    now = time.monotonic() if now is None else now
+    finished = sorted((job['finished_ts'], job_id) for job_id, job in batch_jobs.items()
+                      if job.get('finished_ts') is not None)
+    excess = len(batch_jobs) - BATCH_MAX_JOBS
+    for finished_ts, job_id in finished:
+        if now - finished_ts > BATCH_JOB_TTL or excess > 0:
+            del batch_jobs[job_id]
+            excess -= 1
+
+
+def _batch_urls(data: Optional[Dict]) -> Optional[List[str]]:
+    if not data or 'urls' not in data:
+        return None
+    urls = data['urls']
+    return urls[:data.get('limit', len(urls))]
+
+
+def _finish_batch_job(job_id: str, status: str, error: str = None):
+    with batch_jobs_lock:
+        job = batch_jobs[job_id]
+        job['status'] = status
+        if error is not None:
+            job['error'] = error
+        job['finished_at'] = datetime.now().isoformat()
+        job['finished_ts'] = time.monotonic()
+
+
+def _run_batch_job(job_id: str, urls: List[str]):
+    try:
+        for item in batch_runner.run(urls):
+            with batch_jobs_lock:
+                batch_jobs[job_id]['results'].append(item)
+                batch_jobs[job_id]['cost_credits'] += item.get('scrapingbee_cost') or 0
+    except Exception as e:
+        # A failed job still finishes, so pollers stop and eviction can drop it
+        _finish_batch_job(job_id, 'failed', str(e))
+        logger.exception(f"Batch job {job_id} failed: {e}")
+        return
+    _finish_batch_job(job_id, 'completed')
+    logger.info(f"Batch job {job_id} completed ({len(urls)} URLs)")
 
 @app.route('/')
 def health_check():
@@ -207,49 +377,81 @@ def scrape_single():
 
 @app.route('/scrape-batch', methods=['POST'])
 def scrape_batch():
-    """Scrape multiple URLs"""
+    """Scrape multiple URLs concurrently
+
+    With "stream": true the response is NDJSON, one line per URL as it
+    completes; otherwise all results are returned once the batch is done.
+    """
     data = request.get_json()
-    if not data or 'urls' not in data:
+    urls = _batch_urls(data)
+    if urls is None:
         return jsonify({'error': 'URLs array required in JSON body'}), 400
     
-    urls = data['urls']
-    limit = data.get('limit', len(urls))
-    results = []
+    logger.info(f"Batch scraping {len(urls)} URLs")
     
-    logger.info(f"Batch scraping {min(limit, len(urls))} URLs")
+    if data.get('stream'):
+        def generate():
+            for item in batch_runner.run(urls):
+                yield json.dumps(item) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
     
-    for i, url in enumerate(urls[:limit]):
-        try:
-            logger.info(f"Processing {i+1}/{limit}: {url}")
-            
-            # Fetch with smart fallback
-            html, method = scraper.smart_fetch(url)
-            
-            if html:
-                breed_data = scraper.extract_akc_breed_data(html, url)
-                breed_data['scraping_method'] = method
-                breed_data['scrapingbee_cost'] = 5 if method == 'scrapingbee' else 0
-                results.append(breed_data)
-            else:
-                results.append({
-                    'error': 'Failed to fetch',
-                    'url': url,
-                    'scraping_method': method
-                })
-            
-            # Rate limiting
-            time.sleep(2)
-            
-        except Exception as e:
-            logger.error(f"Error processing {url}: {e}")
-            results.append({'error': str(e), 'url': url})
+    results = sorted(batch_runner.run(urls), key=lambda item: item['batch_index'])
+    credits = _batch_credits(results)
     
     return jsonify({
         'total_processed': len(results),
-        'total_cost_credits': scraper.total_cost_credits,
-        'estimated_cost_usd': scraper.total_cost_credits * 0.001,
+        'total_cost_credits': credits,
+        'estimated_cost_usd': credits * 0.001,
+        'results': results
+    })
+
+@app.route('/scrape-batch/submit', methods=['POST'])
+def submit_batch():
+    """Queue a batch and return immediately with a job id to poll"""
+    urls = _batch_urls(request.get_json())
+    if urls is None:
+        return jsonify({'error': 'URLs array required in JSON body'}), 400
+    
+    job_id = str(uuid.uuid4())[:8]
+    with batch_jobs_lock:
+        _evict_batch_jobs()
+        batch_jobs[job_id] = {
+            'status': 'running',
+            'total': len(urls),
+            'results': [],
+            'cost_credits': 0,
+            'submitted_at': datetime.now().isoformat(),
+            'finished_ts': None
+        }
+    threading.Thread(target=_run_batch_job, args=(job_id, urls), daemon=True).start()
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'running',
+        'total': len(urls),
+        'message': f'Batch queued. Poll /scrape-batch/{job_id}'
+    }), 202
+
+@app.route('/scrape-batch/<job_id>')
+def batch_status(job_id):
+    """Poll an async batch; ?offset=N returns only results after the first N"""
+    offset = request.args.get('offset', 0, type=int)
+    with batch_jobs_lock:
+        job = batch_jobs.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        results = job['results'][offset:]
+        summary = {key: value for key, value in job.items() if key not in ('results', 'finished_ts', 'cost_credits')}
+        credits = job['cost_credits']
+    
+    summary.update({
+        'job_id': job_id,
+        'completed': offset + len(results),
+        'next_offset': offset + len(results),
+        'total_cost_credits': credits,
         'results': results
     })
+    return jsonify(summary)
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
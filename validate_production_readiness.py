@@ -9,6 +9,9 @@ from pathlib import Path
 from datetime import datetime
 import json
 
+from etl.catalog_snapshot import has_snapshot, load_snapshot
+from etl.nutrition_engine import DRY_MATTER_COLUMNS, dry_matter_frame
+
 class ProductionValidator:
     def __init__(self):
         self.production_dir = Path("reports/MANUF/PRODUCTION")
@@ -26,8 +29,19 @@ class ProductionValidator:
                 all_data.append(df)
                 print(f"Loaded {len(df)} products for {brand}")
         
+        # Brands without fixed exports come from the local catalog snapshot
+        missing = [b for b in self.active_brands if not list(self.production_dir.glob(f"{b}_fixed_*.csv"))]
+        if missing and has_snapshot('foods_published_prod'):
+            df = load_snapshot('foods_published_prod', filters={'brand_slug': missing})
+            all_data.append(df)
+            print(f"Loaded {len(df)} products for {', '.join(missing)} from the catalog snapshot")
+        
         if all_data:
-            return pd.concat(all_data, ignore_index=True)
+            df = pd.concat(all_data, ignore_index=True)
+            # Exports predating the dry-matter columns
+            if not set(DRY_MATTER_COLUMNS) <= set(df.columns):
+                df = df.drop(columns=list(DRY_MATTER_COLUMNS), errors='ignore').join(dry_matter_frame(df))
+            return df
         return pd.DataFrame()
     
     def simulate_admin_query(self, df, profile):
@@ -63,16 +77,25 @@ class ProductionValidator:
         else:
             price_match = True
         
+        # Dry-matter filters compare wet and dry foods on the same basis
+        dm_match = True
+        if profile.get('min_protein_dm'):
+            dm_match = dm_match & (df['protein_dm_percent'] >= profile['min_protein_dm'])
+        if profile.get('max_kcal_dm'):
+            dm_match = dm_match & (df['kcal_per_100g_dm'] <= profile['max_kcal_dm'])
+        
         # Combine all filters
-        final_mask = food_ready & life_stage_match & form_match & price_match
+        final_mask = food_ready & life_stage_match & form_match & price_match & dm_match
         
         results = df[final_mask]
+        if profile.get('min_protein_dm'):
+            results = results.sort_values('protein_dm_percent', ascending=False)
         
         return {
             'profile': profile,
             'total_matches': len(results),
             'brands': results['brand_slug'].value_counts().to_dict() if len(results) > 0 else {},
-            'sample_products': results[['product_id', 'product_name', 'life_stage', 'form', 'kcal_per_100g']].head(5).to_dict('records') if len(results) > 0 else []
+            'sample_products': results[['product_id', 'product_name', 'life_stage', 'form', 'kcal_per_100g', 'protein_dm_percent']].head(5).to_dict('records') if len(results) > 0 else []
         }
     
     def run_validation_tests(self, df):
@@ -109,6 +132,13 @@ class ProductionValidator:
                 'form': None,
                 'max_price': 30
             },
+            {
+                'name': 'High Protein (≥ 30% DM, any form)',
+                'life_stage': 'adult',
+                'form': None,
+                'max_price': None,
+                'min_protein_dm': 30
+            },
             {
                 'name': 'All Life Stages',
                 'life_stage': 'all',
@@ -11,6 +11,10 @@ from dotenv import load_dotenv
 from pathlib import Path
 import json
 
+from etl.acceptance_gates import gate_thresholds, load_gates
+from etl.coverage_metrics import CoverageService, coverage_pct
+from etl.mv_refresh import refresh_all
+
 load_dotenv()
 
 class WeeklyCatalogMaintenance:
@@ -18,6 +22,7 @@ class WeeklyCatalogMaintenance:
         url = os.getenv('SUPABASE_URL')
         key = os.getenv('SUPABASE_SERVICE_KEY')
         self.supabase: Client = create_client(url, key)
+        self.coverage = CoverageService(self.supabase)
         self.timestamp = datetime.now()
         
         print("="*70)
@@ -35,17 +40,11 @@ class WeeklyCatalogMaintenance:
         
         # Get products needing enrichment
         try:
-            # Count products missing form
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).is_('form', 'null').execute()
-            missing_form = resp.count or 0
-            
-            # Count products missing life_stage
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).is_('life_stage', 'null').execute()
-            missing_life = resp.count or 0
-            
-            # Count invalid kcal
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).or_('kcal_per_100g.lt.200,kcal_per_100g.gt.600').execute()
-            invalid_kcal = resp.count or 0
+            # Missing and invalid counts from one coverage query
+            totals = self.coverage.totals()
+            missing_form = totals['products'] - totals['with_form']
+            missing_life = totals['products'] - totals['with_life_stage']
+            invalid_kcal = totals['kcal_outliers']
             
             stats['missing_form'] = missing_form
             stats['missing_life_stage'] = missing_life
@@ -69,22 +68,27 @@ class WeeklyCatalogMaintenance:
         return stats
     
     def step2_refresh_mvs(self):
-        """Refresh materialized views"""
+        """Refresh materialized views in dependency order (MVs with unchanged inputs are skipped)"""
         print("\n🔄 STEP 2: REFRESHING MATERIALIZED VIEWS")
         print("-"*40)
         
         try:
-            # Try to refresh brand quality MVs
-            self.supabase.rpc('refresh_brand_quality_preview').execute()
-            print("✅ Preview MV refreshed")
-        except:
-            print("⚠️  Could not refresh Preview MV")
+            results = refresh_all(self.supabase)
+        except Exception as e:
+            print(f"❌ MV refresh failed: {e}")
+            return []
         
-        try:
-            self.supabase.rpc('refresh_brand_quality_prod').execute()
-            print("✅ Production MV refreshed")
-        except:
-            print("⚠️  Could not refresh Production MV")
+        for result in results:
+            if result.status == 'refreshed':
+                print(f"✅ {result.name} refreshed ({result.mode}, {result.duration_ms:.0f} ms)")
+            elif result.status == 'skipped':
+                print(f"⏭️  {result.name} unchanged inputs - skipped")
+            elif result.status == 'blocked':
+                print(f"⚠️  {result.name} not refreshed - upstream refresh failed")
+            else:
+                print(f"❌ {result.name} refresh failed: {result.error}")
+        
+        return results
     
     def step3_brand_health_check(self):
         """Check brand health metrics"""
@@ -96,33 +100,34 @@ class WeeklyCatalogMaintenance:
         # Check top brands
         top_brands = ['royal_canin', 'hills', 'purina', 'purina_pro_plan', 'eukanuba']
         
+        try:
+            # One grouped query for every brand
+            snapshot = self.coverage.snapshot()
+        except Exception as e:
+            print(f"Error checking brands: {e}")
+            return alerts
+        
         for brand_slug in top_brands:
-            try:
-                # Get brand metrics
-                resp = self.supabase.table('foods_canonical').select("*").eq('brand_slug', brand_slug).execute()
-                
-                if resp.data:
-                    products = resp.data
-                    total = len(products)
-                    
-                    # Check coverage
-                    form_coverage = sum(1 for p in products if p.get('form')) / total * 100
-                    life_coverage = sum(1 for p in products if p.get('life_stage')) / total * 100
-                    
-                    print(f"\n{brand_slug}:")
-                    print(f"  Products: {total}")
-                    print(f"  Form coverage: {form_coverage:.1f}%")
-                    print(f"  Life stage coverage: {life_coverage:.1f}%")
-                    
-                    # Check for issues
-                    if form_coverage < 70:
-                        alerts.append(f"{brand_slug}: Low form coverage ({form_coverage:.1f}%)")
-                    
-                    if life_coverage < 70:
-                        alerts.append(f"{brand_slug}: Low life stage coverage ({life_coverage:.1f}%)")
-                        
-            except Exception as e:
-                print(f"Error checking {brand_slug}: {e}")
+            counters = snapshot.brand(brand_slug)
+            total = counters['products']
+            if not total:
+                continue
+            
+            # Check coverage
+            form_coverage = coverage_pct(counters, 'with_form')
+            life_coverage = coverage_pct(counters, 'with_life_stage')
+            
+            print(f"\n{brand_slug}:")
+            print(f"  Products: {total}")
+            print(f"  Form coverage: {form_coverage:.1f}%")
+            print(f"  Life stage coverage: {life_coverage:.1f}%")
+            
+            # Check for issues
+            if form_coverage < 70:
+                alerts.append(f"{brand_slug}: Low form coverage ({form_coverage:.1f}%)")
+            
+            if life_coverage < 70:
+                alerts.append(f"{brand_slug}: Low life stage coverage ({life_coverage:.1f}%)")
         
         return alerts
     
@@ -158,31 +163,21 @@ class WeeklyCatalogMaintenance:
         print("-"*40)
         
         try:
-            # Get total
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).execute()
-            total = resp.count or 0
-            
-            # Form coverage
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).not_.is_('form', 'null').execute()
-            form_pct = (resp.count or 0) / total * 100 if total > 0 else 0
-            
-            # Life stage coverage
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).not_.is_('life_stage', 'null').execute()
-            life_pct = (resp.count or 0) / total * 100 if total > 0 else 0
-            
-            # Ingredients coverage
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).not_.is_('ingredients_tokens', 'null').execute()
-            ing_pct = (resp.count or 0) / total * 100 if total > 0 else 0
+            # Catalog totals (same coverage snapshot as step 3)
+            totals = self.coverage.totals()
+            form_pct = coverage_pct(totals, 'with_form')
+            life_pct = coverage_pct(totals, 'with_life_stage')
+            ing_pct = coverage_pct(totals, 'with_ingredients_tokens')
             
-            # Valid kcal
-            resp = self.supabase.table('foods_canonical').select("*", count='exact', head=True).gte('kcal_per_100g', 200).lte('kcal_per_100g', 600).execute()
-            kcal_pct = (resp.count or 0) / total * 100 if total > 0 else 0
+            # Valid kcal (gate thresholds from data/acceptance_gates.yaml)
+            targets = gate_thresholds(load_gates())
+            kcal_pct = coverage_pct(totals, 'kcal_valid')
             
             gates = {
-                'form': {'current': form_pct, 'target': 90},
-                'life_stage': {'current': life_pct, 'target': 95},
-                'ingredients': {'current': ing_pct, 'target': 85},
-                'kcal_valid': {'current': kcal_pct, 'target': 90}
+                'form': {'current': form_pct, 'target': targets['form']},
+                'life_stage': {'current': life_pct, 'target': targets['life_stage']},
+                'ingredients': {'current': ing_pct, 'target': targets['ingredients']},
+                'kcal_valid': {'current': kcal_pct, 'target': targets['kcal_valid']}
             }
             
             print("Gate Status:")
@@ -305,7 +300,7 @@ python3 weekly_catalog_maintenance.py
 ## What It Does
 
 1. **Enrichment Check**: Identifies products needing enrichment
-2. **MV Refresh**: Attempts to refresh materialized views
+2. **MV Refresh**: Refreshes materialized views in dependency order, skipping unchanged ones
 3. **Brand Health**: Checks top brands for quality issues
 4. **Production Health**: Verifies production isn't empty
 5. **Gate Compliance**: Measures against quality gates
@@ -21,11 +21,15 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class ZeroFieldsGenerator:
-    def __init__(self):
-        """Initialize zero fields generator"""
+    def __init__(self, connect: bool = True):
+        """Initialize zero fields generator
+
+        connect=False skips the Supabase client, for use as a pure rule set
+        (e.g. inside breed_content_batch worker processes).
+        """
         self.supabase_url = os.getenv('SUPABASE_URL')
         self.supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        self.supabase: Client = create_client(self.supabase_url, self.supabase_key) if connect else None
 
         # Shedding mapping based on coat types
         self.shedding_rules = {